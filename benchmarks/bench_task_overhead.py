@@ -0,0 +1,107 @@
+"""
+Benchmark: custo por arquivo da representação de tarefas no motor paralelo.
+
+Compara o despacho antigo (tupla na fila + FileCopier novo + closures por arquivo)
+com o atual (CopyTask com __slots__ + copiador reutilizado por worker), contando
+blocos de memória alocados pelo Python e bytes rastreados (tracemalloc) por arquivo.
+Também mede o pico de memória de um copy_all completo com CounterSink.
+
+Uso:
+    python benchmarks/bench_task_overhead.py [--files N] [--copy-files N]
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core.copier import FileCopier
+from core.parallel_copier import CopyTask, ParallelFileCopier
+from core.result_sink import CounterSink
+
+
+def legacy_dispatch(paths, dest_root: Path):
+    """Reproduz o despacho antigo: tupla + FileCopier + closures para cada arquivo."""
+    retained = []
+    for idx, source_file in enumerate(paths, 1):
+        item = (idx, source_file, dest_root / source_file.name, ())
+        copier = FileCopier(source_file, item[2], 3)
+
+        def make_callback(i, total, sf):
+            def callback(curr, tot, fname, fsize, bcopy):
+                return i, total, sf, fsize, bcopy
+            return callback
+
+        copier.set_progress_callback(make_callback(idx, len(paths), source_file))
+        retained.append((item, copier))
+    return retained
+
+
+def slotted_dispatch(paths, dest_root: Path):
+    """Despacho atual: um CopyTask por arquivo e um único copiador reutilizado."""
+    copier = FileCopier(dest_root, dest_root, 3)
+    retained = [copier]
+    for idx, source_file in enumerate(paths, 1):
+        retained.append(CopyTask(idx, source_file, dest_root / source_file.name, (), 0))
+    return retained
+
+
+def measure(dispatch, paths, dest_root: Path):
+    """Retorna (blocos/arquivo, bytes/arquivo, µs/arquivo) mantendo os registros vivos."""
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    retained = dispatch(paths, dest_root)
+    elapsed = time.perf_counter() - start
+    blocks = sys.getallocatedblocks() - blocks_before
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retained
+    count = len(paths)
+    return blocks / count, traced / count, elapsed / count * 1e6
+
+
+def copy_peak(file_count: int) -> tuple:
+    """Copia `file_count` arquivos pequenos e retorna (pico de bytes, bytes/arquivo)."""
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_tasks_"))
+    try:
+        source = work_dir / "src"
+        source.mkdir()
+        for i in range(file_count):
+            (source / f"f{i:07d}.txt").write_bytes(b"x" * 64)
+        copier = ParallelFileCopier(source, work_dir / "dest", num_threads=4, result_sink=CounterSink())
+        tracemalloc.start()
+        copier.copy_all()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, peak / file_count
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do custo por arquivo do despacho de tarefas")
+    parser.add_argument("--files", type=int, default=100000, help="Registros no microbenchmark de despacho")
+    parser.add_argument("--copy-files", type=int, default=5000, help="Arquivos na cópia completa")
+    args = parser.parse_args()
+
+    paths = [Path(f"/origem/d{i // 1000}/arquivo{i:07d}.bin") for i in range(args.files)]
+    dest_root = Path("/destino")
+
+    print(f"{'despacho':<22} {'blocos/arquivo':>15} {'bytes/arquivo':>14} {'µs/arquivo':>11}")
+    for name, dispatch in (("antigo (FileCopier)", legacy_dispatch), ("CopyTask + reuso", slotted_dispatch)):
+        blocks, traced, micros = measure(dispatch, paths, dest_root)
+        print(f"{name:<22} {blocks:>15.1f} {traced:>14.0f} {micros:>11.2f}")
+
+    peak, per_file = copy_peak(args.copy_files)
+    print(f"\ncopy_all com CounterSink, {args.copy_files} arquivos: pico {peak / 1024:.0f} KB "
+          f"({per_file:.0f} bytes/arquivo)")
+
+
+if __name__ == "__main__":
+    main()
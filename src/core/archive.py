@@ -0,0 +1,496 @@
+"""
+Módulo: archive.py
+Responsável pelo destino em arquivo compactado (tar/zip) com hash por membro
+e índice de offsets para verificação e extração com acesso aleatório.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import json
+import os
+from collections import deque
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .durability import TEMP_SUFFIX
+from .scanner import COMPRESSED_EXTENSIONS
+from .verifier import create_hasher
+
+try:
+    import zstandard
+except ImportError:  # Dependência opcional (apenas para tar.zst)
+    zstandard = None
+
+
+# Formatos de arquivo suportados
+ARCHIVE_FORMATS = ("tar", "tar.gz", "tar.zst", "zip")
+
+# Sufixo do índice gravado ao lado do arquivo
+INDEX_SUFFIX = ".index.jsonl"
+
+# Fração dos bytes já comprimidos acima da qual o tar comprimido usa o nível mais leve
+COMPRESSED_FRACTION_THRESHOLD = 0.8
+
+# Arquivos de origem examinados para estimar a fração já comprimida
+FRACTION_SAMPLE_FILES = 1000
+
+# Tamanho do bloco de leitura ao gravar/verificar membros
+READ_SIZE = 1024 * 1024  # 1MB
+
+# Entradas do índice lidas à frente ao casar o índice com um tar comprimido
+# (membros fora de ordem além disso são dados como não encontrados)
+INDEX_LOOKAHEAD = 1024
+
+
+def index_path_for(archive_path: Path) -> Path:
+    """Retorna o caminho do índice de um arquivo."""
+    archive_path = Path(archive_path)
+    return archive_path.with_name(archive_path.name + INDEX_SUFFIX)
+
+
+def estimate_compressed_fraction(files: Iterable[Path], limit: int = FRACTION_SAMPLE_FILES) -> float:
+    """
+    Estima a fração dos bytes em formatos já comprimidos pelos primeiros arquivos.
+
+    Evita uma segunda varredura da origem só para escolher o nível de compressão.
+
+    Args:
+        files: Arquivos de origem, na ordem em que serão gravados
+        limit: Máximo de arquivos examinados
+
+    Returns:
+        Valor entre 0.0 e 1.0 (0.0 se nenhum byte foi examinado)
+    """
+    total = 0
+    compressed = 0
+    for count, file_path in enumerate(files):
+        if count >= limit:
+            break
+        try:
+            size = Path(file_path).stat().st_size
+        except OSError:
+            continue
+        total += size
+        if Path(file_path).suffix.lower() in COMPRESSED_EXTENSIONS:
+            compressed += size
+    return compressed / total if total > 0 else 0.0
+
+
+class ArchiveCancelled(Exception):
+    """Gravação de um membro interrompida por cancelamento (o membro não entra no índice)."""
+
+
+class _HashingReader:
+    """Envolve um arquivo de origem, alimentando o hash e o progresso a cada leitura."""
+
+    def __init__(self, fileobj, hasher, progress: Optional[Callable[[int], None]] = None,
+                 checkpoint: Optional[Callable[[], bool]] = None):
+        self.fileobj = fileobj
+        self.hasher = hasher
+        self.progress = progress
+        self.checkpoint = checkpoint
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if self.checkpoint and not self.checkpoint():
+            raise ArchiveCancelled()
+        data = self.fileobj.read(size)
+        if data:
+            self.hasher.update(data)
+            self.bytes_read += len(data)
+            if self.progress:
+                self.progress(self.bytes_read)
+        return data
+
+
+class ArchiveWriter:
+    """
+    Grava uma árvore de arquivos como um único tar (opcionalmente gzip/zstd) ou zip.
+
+    Cada membro é lido uma vez: os bytes passam pelo hash enquanto são gravados.
+    Um índice JSONL (uma linha por membro, escrito em streaming) registra tamanho,
+    offsets e hash, permitindo verificar ou extrair membros sem percorrer o arquivo.
+
+    Pacote e índice são gravados em temporários e só aparecem nos caminhos finais
+    em close(); abort() (ou uma exceção dentro do `with`) os descarta, para que um
+    membro interrompido nunca fique em um pacote com aparência de completo.
+    """
+
+    def __init__(self, archive_path: Path, archive_format: str = "tar", hash_algorithm: str = "sha256",
+                 compressed_fraction: float = 0.0):
+        """
+        Inicializa o gravador.
+
+        Args:
+            archive_path: Caminho do arquivo a ser criado
+            archive_format: 'tar', 'tar.gz', 'tar.zst' ou 'zip'
+            hash_algorithm: Algoritmo do hash por membro
+            compressed_fraction: Fração dos bytes em formatos já comprimidos
+                                 (ver estimate_compressed_fraction)
+        """
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Formato de arquivo não suportado: {archive_format}")
+        if archive_format == "tar.zst" and zstandard is None:
+            raise ValueError("Formato tar.zst requer o pacote opcional 'zstandard'")
+
+        self.archive_path = Path(archive_path)
+        self.index_path = index_path_for(self.archive_path)
+        self._partial_path = self.archive_path.with_name(f".{self.archive_path.name}{TEMP_SUFFIX}")
+        self._partial_index = self.index_path.with_name(f".{self.index_path.name}{TEMP_SUFFIX}")
+        self._active = False
+        # Indica se o pacote chegou ao caminho final (close() concluído)
+        self.published = False
+        self.archive_format = archive_format
+        self.hash_algorithm = hash_algorithm
+        # Dados majoritariamente já comprimidos: usa o nível mais leve no tar comprimido
+        self.light_compression = compressed_fraction >= COMPRESSED_FRACTION_THRESHOLD
+        self._raw = None
+        self._zstd_writer = None
+        self._tar = None
+        self._zip = None
+        self._index = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def open(self):
+        """Cria o arquivo e o índice (nos temporários)."""
+        self.archive_path.parent.mkdir(parents=True, exist_ok=True)
+        self._active = True
+        if self.archive_format == "zip":
+            self._zip = zipfile.ZipFile(self._partial_path, 'w', allowZip64=True)
+        elif self.archive_format == "tar":
+            self._tar = tarfile.open(self._partial_path, 'w', format=tarfile.PAX_FORMAT)
+        elif self.archive_format == "tar.gz":
+            level = 1 if self.light_compression else 6
+            self._tar = tarfile.open(self._partial_path, 'w:gz', compresslevel=level, format=tarfile.PAX_FORMAT)
+        else:
+            level = 1 if self.light_compression else 3
+            self._raw = open(self._partial_path, 'wb')
+            self._zstd_writer = zstandard.ZstdCompressor(level=level).stream_writer(self._raw)
+            self._tar = tarfile.open(fileobj=self._zstd_writer, mode='w|', format=tarfile.PAX_FORMAT)
+
+        self._index = open(self._partial_index, 'w', encoding='utf-8')
+        header = {
+            'format': self.archive_format,
+            'algorithm': self.hash_algorithm,
+            # Offsets só apontam para bytes no disco em tar sem compressão e zip
+            'random_access': self.archive_format in ("tar", "zip"),
+        }
+        self._index.write(json.dumps(header) + "\n")
+
+    def add_file(self, source_file: Path, arcname: str,
+                 progress: Optional[Callable[[int], None]] = None,
+                 checkpoint: Optional[Callable[[], bool]] = None) -> Dict:
+        """
+        Adiciona um arquivo ao pacote.
+
+        Args:
+            source_file: Arquivo de origem
+            arcname: Nome do membro dentro do pacote (separador '/')
+            progress: Chamado com os bytes já lidos do membro
+            checkpoint: Chamado antes de cada leitura; retorna False para cancelar
+                        (levanta ArchiveCancelled; o pacote deve ser descartado com abort())
+
+        Returns:
+            Entrada do índice do membro
+        """
+        hasher = create_hasher(self.hash_algorithm)
+        stat = source_file.stat()
+        compressed = source_file.suffix.lower() not in COMPRESSED_EXTENSIONS
+
+        with open(source_file, 'rb') as f:
+            reader = _HashingReader(f, hasher, progress, checkpoint)
+            if self._zip is not None:
+                zinfo = zipfile.ZipInfo.from_file(source_file, arcname)
+                zinfo.compress_type = zipfile.ZIP_DEFLATED if compressed else zipfile.ZIP_STORED
+                with self._zip.open(zinfo, 'w', force_zip64=stat.st_size > 0x7FFFFFFF) as dst:
+                    while chunk := reader.read(READ_SIZE):
+                        dst.write(chunk)
+                header_offset = zinfo.header_offset
+                data_offset = None
+            else:
+                tarinfo = self._tar.gettarinfo(str(source_file), arcname)
+                header_offset = self._tar.offset
+                self._tar.addfile(tarinfo, reader)
+                data_offset = self._tar.offset - ((stat.st_size + tarfile.BLOCKSIZE - 1)
+                                                  // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+                # Evita acumular TarInfo de milhões de membros em memória
+                self._tar.members = []
+                compressed = self.archive_format != "tar"
+
+        entry = {
+            'name': arcname,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'header_offset': header_offset,
+            'data_offset': data_offset,
+            'compressed': compressed,
+            'hash': hasher.hexdigest(),
+        }
+        self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def close(self):
+        """Finaliza o pacote e o índice e os move para os caminhos finais."""
+        if not self._active:
+            return
+        self._close_files()
+        self._active = False
+        os.replace(self._partial_path, self.archive_path)
+        os.replace(self._partial_index, self.index_path)
+        self.published = True
+
+    def abort(self):
+        """Descarta o pacote e o índice incompletos (cancelamento ou erro no meio de um membro)."""
+        if not self._active:
+            return
+        self._active = False
+        try:
+            self._close_files()
+        except (OSError, tarfile.TarError, zipfile.BadZipFile):
+            pass
+        for path in (self._partial_path, self._partial_index):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _close_files(self):
+        """Fecha os arquivos abertos do pacote e do índice."""
+        if self._tar is not None:
+            self._tar.close()
+            self._tar = None
+        if self._zstd_writer is not None:
+            self._zstd_writer.close()
+            self._zstd_writer = None
+        if self._raw is not None and not self._raw.closed:
+            self._raw.close()
+        self._raw = None
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+
+def read_index(archive_path: Path) -> Tuple[Dict, Iterator[Dict]]:
+    """
+    Lê o índice de um pacote em streaming.
+
+    Args:
+        archive_path: Caminho do pacote
+
+    Returns:
+        Tupla (cabeçalho, iterador de entradas)
+    """
+    f = open(index_path_for(archive_path), 'r', encoding='utf-8')
+    header = json.loads(f.readline())
+
+    def entries():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, entries()
+
+
+def _open_member(header: Dict, entry: Dict, archive_file=None, zip_file=None):
+    """Abre um membro para leitura usando os offsets do índice."""
+    if header['format'] == "zip":
+        return zip_file.open(entry['name'])
+    archive_file.seek(entry['data_offset'])
+    return _BoundedReader(archive_file, entry['size'])
+
+
+class _BoundedReader:
+    """Leitura limitada a `size` bytes a partir da posição atual."""
+
+    def __init__(self, fileobj, size: int):
+        self.fileobj = fileobj
+        self.remaining = size
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fileobj.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        pass
+
+
+def _hash_stream(stream, algorithm: str) -> str:
+    """Calcula o hash de um stream."""
+    hasher = create_hasher(algorithm)
+    while chunk := stream.read(READ_SIZE):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def verify_archive(archive_path: Path, names: Optional[set] = None,
+                   progress_callback: Optional[Callable] = None) -> Dict:
+    """
+    Verifica membros de um pacote contra os hashes do índice.
+
+    Em tar sem compressão e zip, cada membro é lido diretamente pelo offset
+    (acesso aleatório); em tar comprimido, o pacote e o índice (gravados na
+    mesma ordem) são percorridos juntos, sem carregar o índice em memória.
+
+    Args:
+        archive_path: Caminho do pacote
+        names: Nomes dos membros a verificar (None = todos)
+        progress_callback: Assinatura: callback(checked, member_name, ok)
+
+    Returns:
+        Dicionário com 'verified', 'corrupted' e 'corrupted_list'
+    """
+    archive_path = Path(archive_path)
+    header, entries = read_index(archive_path)
+    algorithm = header['algorithm']
+    verified = 0
+    corrupted = []
+
+    def record(name, ok, error=None):
+        nonlocal verified
+        if ok:
+            verified += 1
+        else:
+            corrupted.append((name, error))
+        if progress_callback:
+            progress_callback(verified + len(corrupted), name, ok)
+
+    if header['random_access']:
+        zip_file = zipfile.ZipFile(archive_path) if header['format'] == "zip" else None
+        archive_file = None if zip_file else open(archive_path, 'rb')
+        try:
+            for entry in entries:
+                if names is not None and entry['name'] not in names:
+                    continue
+                try:
+                    stream = _open_member(header, entry, archive_file, zip_file)
+                    actual = _hash_stream(stream, algorithm)
+                    stream.close()
+                    if actual == entry['hash']:
+                        record(entry['name'], True)
+                    else:
+                        record(entry['name'], False, "Hash diferente")
+                except Exception as e:
+                    record(entry['name'], False, str(e))
+        finally:
+            if zip_file:
+                zip_file.close()
+            if archive_file:
+                archive_file.close()
+    else:
+        wanted = (entry for entry in entries if names is None or entry['name'] in names)
+        pending = deque()
+        for name, stream in _iter_compressed_tar(archive_path, header['format']):
+            while len(pending) < INDEX_LOOKAHEAD:
+                entry = next(wanted, None)
+                if entry is None:
+                    break
+                pending.append(entry)
+            position = next((i for i, entry in enumerate(pending) if entry['name'] == name), None)
+            if position is None:
+                continue  # Membro fora do índice (ou não pedido)
+            # Entradas anteriores do índice que o pacote pulou
+            for _ in range(position):
+                record(pending.popleft()['name'], False, "Membro não encontrado no pacote")
+            entry = pending.popleft()
+            actual = _hash_stream(stream, algorithm)
+            record(name, actual == entry['hash'], "Hash diferente")
+        for entry in pending:
+            record(entry['name'], False, "Membro não encontrado no pacote")
+        for entry in wanted:
+            record(entry['name'], False, "Membro não encontrado no pacote")
+
+    return {'verified': verified, 'corrupted': len(corrupted), 'corrupted_list': corrupted}
+
+
+def _iter_compressed_tar(archive_path: Path, archive_format: str) -> Iterator[Tuple[str, object]]:
+    """Percorre um tar comprimido em sequência, produzindo (nome, stream) por membro."""
+    raw = open(archive_path, 'rb')
+    try:
+        if archive_format == "tar.zst":
+            if zstandard is None:
+                raise ValueError("Formato tar.zst requer o pacote opcional 'zstandard'")
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+            tar = tarfile.open(fileobj=stream, mode='r|')
+        else:
+            tar = tarfile.open(fileobj=raw, mode='r|gz')
+        with tar:
+            for member in tar:
+                if member.isfile():
+                    yield member.name, tar.extractfile(member)
+    finally:
+        raw.close()
+
+
+def extract_member(archive_path: Path, name: str, dest_file: Path) -> bool:
+    """
+    Extrai um único membro usando o índice (acesso aleatório em tar e zip).
+
+    Args:
+        archive_path: Caminho do pacote
+        name: Nome do membro
+        dest_file: Arquivo de destino
+
+    Returns:
+        True se o membro foi extraído e o hash confere; False se o hash diverge ou
+        se o membro do índice não está no pacote (tar comprimido)
+    """
+    archive_path = Path(archive_path)
+    header, entries = read_index(archive_path)
+    entry = next((e for e in entries if e['name'] == name), None)
+    if entry is None:
+        raise FileNotFoundError(f"Membro não encontrado no índice: {name}")
+
+    dest_file = Path(dest_file)
+    dest_file.parent.mkdir(parents=True, exist_ok=True)
+    hasher = create_hasher(header['algorithm'])
+
+    if header['random_access']:
+        zip_file = zipfile.ZipFile(archive_path) if header['format'] == "zip" else None
+        archive_file = None if zip_file else open(archive_path, 'rb')
+        try:
+            stream = _open_member(header, entry, archive_file, zip_file)
+            with open(dest_file, 'wb') as dst:
+                while chunk := stream.read(READ_SIZE):
+                    hasher.update(chunk)
+                    dst.write(chunk)
+            stream.close()
+        finally:
+            if zip_file:
+                zip_file.close()
+            if archive_file:
+                archive_file.close()
+    else:
+        found = False
+        for member_name, stream in _iter_compressed_tar(archive_path, header['format']):
+            if member_name == name:
+                with open(dest_file, 'wb') as dst:
+                    while chunk := stream.read(READ_SIZE):
+                        hasher.update(chunk)
+                        dst.write(chunk)
+                found = True
+                break
+        if not found:
+            return False
+
+    os.utime(dest_file, ns=(entry['mtime_ns'], entry['mtime_ns']))
+    return hasher.hexdigest() == entry['hash']
@@ -0,0 +1,456 @@
+"""
+Módulo: chunk_tree.py
+Responsável pelas árvores de hash (Merkle) por blocos de cada arquivo, usadas
+para localizar trechos corrompidos e reparar só esses trechos.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .digests import DEFAULT_CHUNK_SIZE, create_hasher, update_from_file, update_uncached
+
+
+# Tamanho padrão de cada bloco (folha) da árvore
+DEFAULT_TREE_CHUNK_SIZE = 4 * 1024 * 1024  # 4MB
+
+# Prefixos que separam hashes de folhas e de nós internos
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+# Arquivo de árvores gravado ao lado do manifesto: cabeçalho = magia, versão,
+# algoritmo, tamanho do digest e tamanho do bloco; registro = caminho (u16 +
+# UTF-8), tamanho do arquivo (u64) e os digests das folhas
+CHUNKS_MAGIC = b"FCVC"
+CHUNKS_VERSION = 1
+CHUNKS_SUFFIX = ".chunks"
+_CHUNK_SIZE_FIELD = struct.Struct(">Q")
+_RECORD = struct.Struct(">HQ")
+
+
+def chunks_path_for(manifest_path: Path) -> Path:
+    """Arquivo de árvores de um manifesto (ex.: fotos.sha256.chunks)."""
+    manifest_path = Path(manifest_path)
+    return manifest_path.with_name(manifest_path.name + CHUNKS_SUFFIX)
+
+
+class ChunkTree:
+    """
+    Árvore de hash de um arquivo dividido em blocos de tamanho fixo.
+
+    As folhas são H(0x00 || bloco); cada nó é H(0x01 || esquerda || direita) e
+    um nó sem par sobe inalterado. Comparar duas árvores desce só pelos ramos
+    diferentes até as folhas corrompidas.
+    """
+
+    __slots__ = ("algorithm", "chunk_size", "size", "leaves", "_levels")
+
+    def __init__(self, algorithm: str, chunk_size: int, size: int, leaves: List[bytes]):
+        self.algorithm = algorithm
+        self.chunk_size = chunk_size
+        self.size = size
+        self.leaves = leaves
+        self._levels: Optional[List[List[bytes]]] = None
+
+    def levels(self) -> List[List[bytes]]:
+        """Níveis da árvore, das folhas até a raiz."""
+        if self._levels is None:
+            levels = [self.leaves]
+            while len(levels[-1]) > 1:
+                below = levels[-1]
+                above = []
+                for i in range(0, len(below) - 1, 2):
+                    hasher = create_hasher(self.algorithm)
+                    hasher.update(_NODE_PREFIX + below[i] + below[i + 1])
+                    above.append(hasher.digest())
+                if len(below) % 2:
+                    above.append(below[-1])
+                levels.append(above)
+            self._levels = levels
+        return self._levels
+
+    def root(self) -> str:
+        """Hash da raiz (hexadecimal; vazio para arquivo vazio)."""
+        top = self.levels()[-1]
+        return top[0].hex() if top else ""
+
+    def diff(self, other: "ChunkTree") -> List[int]:
+        """
+        Índices dos blocos que diferem entre duas árvores do mesmo arquivo.
+
+        Args:
+            other: Árvore do outro lado (mesmo algoritmo e tamanho de bloco)
+
+        Returns:
+            Índices (em ordem) dos blocos desta árvore que precisam ser reescritos
+            no outro lado
+        """
+        if other.chunk_size != self.chunk_size or other.algorithm != self.algorithm:
+            raise ValueError("Árvores com tamanho de bloco ou algoritmo diferentes")
+        if len(other.leaves) != len(self.leaves):
+            # Tamanhos diferentes: compara folha a folha
+            return [i for i, leaf in enumerate(self.leaves)
+                    if i >= len(other.leaves) or other.leaves[i] != leaf]
+
+        mine, theirs = self.levels(), other.levels()
+        if not mine[0]:
+            return []
+        pending = [(len(mine) - 1, 0)]
+        bad = []
+        while pending:
+            level, index = pending.pop()
+            if mine[level][index] == theirs[level][index]:
+                continue
+            if level == 0:
+                bad.append(index)
+                continue
+            below = len(mine[level - 1])
+            for child in (2 * index + 1, 2 * index):
+                if child < below:
+                    pending.append((level - 1, child))
+        return sorted(bad)
+
+    def ranges(self, indices: List[int]) -> List[Tuple[int, int]]:
+        """
+        Converte índices de blocos em trechos (offset, tamanho), unindo vizinhos.
+
+        Args:
+            indices: Índices ordenados de blocos
+
+        Returns:
+            Lista de (offset, tamanho) em bytes
+        """
+        ranges: List[Tuple[int, int]] = []
+        for index in indices:
+            start = index * self.chunk_size
+            length = min(self.chunk_size, self.size - start)
+            if ranges and ranges[-1][0] + ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], ranges[-1][1] + length)
+            else:
+                ranges.append((start, length))
+        return ranges
+
+
+class ChunkTreeHasher:
+    """
+    Objeto de hash (update/hexdigest) que também monta a árvore de blocos.
+
+    hexdigest() é o hash do arquivo inteiro, igual ao do algoritmo puro; tree()
+    devolve a árvore. Uma única leitura produz os dois.
+    """
+
+    def __init__(self, algorithm: str, chunk_size: int = DEFAULT_TREE_CHUNK_SIZE):
+        self.algorithm = algorithm
+        self.chunk_size = max(1, chunk_size)
+        self._full = create_hasher(algorithm)
+        self._leaf = None
+        self._leaf_filled = 0
+        self._leaves: List[bytes] = []
+        self._size = 0
+
+    def update(self, data):
+        self._full.update(data)
+        view = memoryview(data)
+        self._size += len(view)
+        while view:
+            if self._leaf is None:
+                self._leaf = create_hasher(self.algorithm)
+                self._leaf.update(_LEAF_PREFIX)
+                self._leaf_filled = 0
+            take = min(len(view), self.chunk_size - self._leaf_filled)
+            self._leaf.update(view[:take])
+            self._leaf_filled += take
+            view = view[take:]
+            if self._leaf_filled == self.chunk_size:
+                self._leaves.append(self._leaf.digest())
+                self._leaf = None
+
+    def hexdigest(self) -> str:
+        return self._full.hexdigest()
+
+    def tree(self) -> ChunkTree:
+        """Árvore dos blocos lidos até aqui."""
+        leaves = list(self._leaves)
+        if self._leaf is not None:
+            leaves.append(self._leaf.copy().digest())
+        return ChunkTree(self.algorithm, self.chunk_size, self._size, leaves)
+
+
+def hash_file_with_tree(file_path: Path, algorithm: str = "sha256",
+                        chunk_size: int = DEFAULT_TREE_CHUNK_SIZE,
+                        cache_mode: str = "normal") -> Tuple[str, ChunkTree]:
+    """
+    Calcula, na mesma leitura, o hash completo e a árvore de blocos de um arquivo.
+
+    Args:
+        file_path: Caminho do arquivo
+        algorithm: Algoritmo de hash
+        chunk_size: Tamanho de cada bloco da árvore
+        cache_mode: 'normal' ou, para ler sem usar o page cache, 'drop'/'direct'
+                    (ambos lidos como 'drop'; ver digests.CACHE_MODES)
+
+    Returns:
+        Tupla (hash hexadecimal, árvore)
+    """
+    hasher = ChunkTreeHasher(algorithm, chunk_size)
+    read = update_from_file if cache_mode == "normal" else update_uncached
+    with open(file_path, 'rb', buffering=0) as f:
+        read(hasher, f, max(DEFAULT_CHUNK_SIZE, chunk_size))
+    return hasher.hexdigest(), hasher.tree()
+
+
+def find_bad_ranges(dest_file: Path, reference: ChunkTree, cache_mode: str = "normal") -> List[Tuple[int, int]]:
+    """
+    Lê o destino e aponta os trechos que diferem da árvore de referência.
+
+    Args:
+        dest_file: Arquivo a conferir
+        reference: Árvore do conteúdo correto (da origem ou do manifesto)
+        cache_mode: Uso do page cache na leitura (ver hash_file_with_tree)
+
+    Returns:
+        Lista de (offset, tamanho) a reescrever
+    """
+    _, dest_tree = hash_file_with_tree(dest_file, reference.algorithm, reference.chunk_size, cache_mode)
+    return reference.ranges(reference.diff(dest_tree))
+
+
+def repair_ranges(source_file: Path, dest_file: Path, reference: ChunkTree,
+                  ranges: List[Tuple[int, int]], fsync: bool = True) -> int:
+    """
+    Reescreve no destino só os trechos informados, lidos da origem.
+
+    Os trechos são percorridos bloco a bloco, com um único buffer do tamanho do
+    bloco: cada bloco lido da origem é conferido com a árvore antes de ser
+    gravado. O destino é truncado ao tamanho de referência se estiver maior.
+
+    Args:
+        source_file: Arquivo com o conteúdo correto (origem ou outra réplica)
+        dest_file: Arquivo a reparar
+        reference: Árvore do conteúdo correto
+        ranges: Trechos (offset, tamanho) a reescrever (ver find_bad_ranges)
+        fsync: Força a gravação em disco ao final
+
+    Returns:
+        Bytes reescritos
+    """
+    written = 0
+    chunk_size = reference.chunk_size
+    buffer = memoryview(bytearray(chunk_size))
+    with open(source_file, 'rb') as src, open(dest_file, 'r+b') as dst:
+        for offset, length in ranges:
+            for block_start in range(offset, offset + length, chunk_size):
+                block = buffer[:min(chunk_size, offset + length - block_start)]
+                src.seek(block_start)
+                if src.readinto(block) != len(block):
+                    raise IOError(f"Origem menor que o esperado: {source_file}")
+                hasher = create_hasher(reference.algorithm)
+                hasher.update(_LEAF_PREFIX)
+                hasher.update(block)
+                if hasher.digest() != reference.leaves[block_start // chunk_size]:
+                    raise IOError(f"Origem difere da árvore de referência no offset {block_start}: {source_file}")
+                dst.seek(block_start)
+                dst.write(block)
+                written += len(block)
+        if os.fstat(dst.fileno()).st_size > reference.size:
+            dst.truncate(reference.size)
+        if fsync:
+            dst.flush()
+            os.fsync(dst.fileno())
+    return written
+
+
+def repair_and_recheck(source_file: Path, dest_file: Path, reference: ChunkTree,
+                       ranges: List[Tuple[int, int]], cache_mode: str = "normal") -> List[Tuple[int, int]]:
+    """
+    Repara os trechos (repair_ranges) e relê o destino para confirmar o reparo.
+
+    Args:
+        source_file: Arquivo com o conteúdo correto
+        dest_file: Arquivo a reparar
+        reference: Árvore do conteúdo correto
+        ranges: Trechos a reescrever
+        cache_mode: Uso do page cache na releitura (fora do 'normal', lê o disco)
+
+    Returns:
+        Trechos que ainda diferem da referência (vazio se o reparo conferiu)
+    """
+    repair_ranges(source_file, dest_file, reference, ranges)
+    remaining = find_bad_ranges(dest_file, reference, cache_mode)
+    size = os.stat(dest_file).st_size
+    if not remaining and size != reference.size:
+        raise IOError(f"Tamanho diferente após o reparo: referência={reference.size}, destino={size}")
+    return remaining
+
+
+class ChunkTreeWriter:
+    """Grava as árvores de vários arquivos em streaming (arquivo .chunks do manifesto)."""
+
+    def __init__(self, path: Path, algorithm: str, chunk_size: int = DEFAULT_TREE_CHUNK_SIZE):
+        """
+        Inicializa o gravador.
+
+        Args:
+            path: Arquivo de árvores (sobrescrito)
+            algorithm: Algoritmo de hash
+            chunk_size: Tamanho dos blocos
+        """
+        self.path = Path(path)
+        self.algorithm = algorithm.lower()
+        self.chunk_size = chunk_size
+        self.digest_size = create_hasher(algorithm).digest_size
+        self.count = 0
+        self._file = None
+
+    def open(self):
+        """Cria o arquivo e grava o cabeçalho."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'wb')
+        name = self.algorithm.encode('ascii')
+        self._file.write(CHUNKS_MAGIC + bytes([CHUNKS_VERSION, len(name)]) + name
+                         + bytes([self.digest_size]) + _CHUNK_SIZE_FIELD.pack(self.chunk_size))
+
+    def add(self, relative_path: str, tree: ChunkTree):
+        """
+        Grava a árvore de um arquivo.
+
+        Args:
+            relative_path: Caminho relativo (como no manifesto)
+            tree: Árvore com o mesmo algoritmo e tamanho de bloco do gravador
+        """
+        if tree.chunk_size != self.chunk_size or tree.algorithm.lower() != self.algorithm:
+            raise ValueError("Árvore com tamanho de bloco ou algoritmo diferente do arquivo de árvores")
+        if self._file is None:
+            self.open()
+        path = relative_path.encode('utf-8', 'surrogateescape')
+        self._file.write(_RECORD.pack(len(path), tree.size) + path + b"".join(tree.leaves))
+        self.count += 1
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ChunkTreeReader:
+    """
+    Lê árvores de um arquivo .chunks.
+
+    next_tree() percorre os registros em sequência, acompanhando o manifesto
+    (gravado na mesma ordem): memória constante, sem índice. get() faz acesso
+    aleatório; o índice caminho -> posição só é montado na primeira consulta
+    (percorrendo os registros sem ler as folhas).
+    """
+
+    def __init__(self, path: Path):
+        """
+        Abre o arquivo de árvores e lê o cabeçalho.
+
+        Args:
+            path: Arquivo de árvores
+        """
+        self.path = Path(path)
+        self._index: Optional[Dict[str, Tuple[int, int]]] = None
+        self._lock = threading.Lock()
+        # Leitura sequencial (next_tree): arquivo aberto e próximo registro ainda não consumido
+        self._stream = None
+        self._peeked: Optional[Tuple[str, int]] = None
+        self._stream_done = False
+        with open(self.path, 'rb') as f:
+            head = f.read(len(CHUNKS_MAGIC) + 2)
+            if not head.startswith(CHUNKS_MAGIC) or head[len(CHUNKS_MAGIC)] != CHUNKS_VERSION:
+                raise ValueError(f"Arquivo de árvores inválido: {self.path}")
+            self.algorithm = f.read(head[-1]).decode('ascii')
+            self.digest_size = f.read(1)[0]
+            self.chunk_size = _CHUNK_SIZE_FIELD.unpack(f.read(_CHUNK_SIZE_FIELD.size))[0]
+            self._data_offset = f.tell()
+
+    def _leaf_count(self, size: int) -> int:
+        return -(-size // self.chunk_size)
+
+    def _leaves_from(self, data: bytes, size: int) -> ChunkTree:
+        leaves = [data[i:i + self.digest_size] for i in range(0, len(data), self.digest_size)]
+        return ChunkTree(self.algorithm, self.chunk_size, size, leaves)
+
+    def _build_index(self) -> Dict[str, Tuple[int, int]]:
+        index = {}
+        with open(self.path, 'rb') as f:
+            f.seek(self._data_offset)
+            while header := f.read(_RECORD.size):
+                path_length, size = _RECORD.unpack(header)
+                path = f.read(path_length).decode('utf-8', 'surrogateescape')
+                index[path] = (f.tell(), size)
+                f.seek(self._leaf_count(size) * self.digest_size, os.SEEK_CUR)
+        return index
+
+    def get(self, relative_path: str) -> Optional[ChunkTree]:
+        """
+        Busca a árvore de um arquivo.
+
+        Args:
+            relative_path: Caminho relativo (como no manifesto)
+
+        Returns:
+            Árvore ou None se o arquivo não tem árvore gravada
+        """
+        with self._lock:
+            if self._index is None:
+                self._index = self._build_index()
+        location = self._index.get(relative_path)
+        if location is None:
+            return None
+        offset, size = location
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(self._leaf_count(size) * self.digest_size)
+        return self._leaves_from(data, size)
+
+    def next_tree(self, relative_path: str) -> Optional[ChunkTree]:
+        """
+        Árvore do próximo arquivo do manifesto, lendo os registros em sequência.
+
+        Deve ser chamado com os caminhos na ordem do manifesto (incluindo os que
+        não têm árvore): o registro seguinte só é consumido quando o caminho bate.
+
+        Args:
+            relative_path: Caminho relativo da próxima entrada do manifesto
+
+        Returns:
+            Árvore ou None se o arquivo não tem árvore gravada
+        """
+        with self._lock:
+            if self._peeked is None and not self._stream_done:
+                if self._stream is None:
+                    self._stream = open(self.path, 'rb')
+                    self._stream.seek(self._data_offset)
+                header = self._stream.read(_RECORD.size)
+                if len(header) < _RECORD.size:
+                    self._stream_done = True
+                    self._stream.close()
+                    self._stream = None
+                else:
+                    path_length, size = _RECORD.unpack(header)
+                    self._peeked = (self._stream.read(path_length).decode('utf-8', 'surrogateescape'), size)
+            if self._peeked is None or self._peeked[0] != relative_path:
+                return None
+            size = self._peeked[1]
+            self._peeked = None
+            data = self._stream.read(self._leaf_count(size) * self.digest_size)
+        return self._leaves_from(data, size)
+
+    def close(self):
+        """Fecha a leitura sequencial (a próxima chamada de next_tree recomeça do início)."""
+        with self._lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+            self._peeked = None
+            self._stream_done = False
@@ -8,7 +8,55 @@ Data: 2024
 import shutil
 import time
 from pathlib import Path
-from typing import List, Tuple, Optional, Callable
+from typing import Dict, List, Tuple, Optional, Callable, Union
+from .sync import SyncChecker
+from .delta import DELTA_MODES, DeltaTransfer, resolve_delta
+from .durability import DurabilityManager
+from .verifier import IntegrityVerifier, create_hasher
+from .archive import ARCHIVE_FORMATS, ArchiveCancelled, ArchiveWriter, estimate_compressed_fraction
+from .dedup import ContentStore
+from .locality import LOCALITY_MODES, resolve_locality, sort_by_locality
+
+
+# Granularidade da retomada: o último bloco incompleto do destino é sempre reescrito
+RESUME_BLOCK_SIZE = 1024 * 1024  # 1MB
+
+# Modos de validação do prefixo já copiado antes de retomar
+RESUME_VERIFY_MODES = ("size", "tail", "sample")
+
+# Marcador de cópia parcial ao lado do arquivo gravado: só um destino com marcador
+# (gravado por uma cópia interrompida da mesma origem) é retomado
+RESUME_MARKER_SUFFIX = ".resume"
+
+# Bytes copiados entre atualizações do marcador; arquivos menores não são retomados
+RESUME_MARKER_INTERVAL = 64 * 1024 * 1024  # 64MB
+
+# Destinos menores que isso são simplesmente reescritos no modo delta
+DELTA_MIN_SIZE = 1024 * 1024  # 1MB
+
+
+def dest_path_for(source: Path, source_is_file: bool, source_file: Path, destination: Path) -> Path:
+    """
+    Determina o arquivo de destino de uma origem para uma raiz de destino.
+    
+    Args:
+        source: Origem do job (arquivo ou diretório)
+        source_is_file: Se a origem do job é um arquivo único
+        source_file: Arquivo de origem
+        destination: Raiz de destino
+        
+    Returns:
+        Caminho do arquivo de destino
+    """
+    if source_is_file:
+        # Se origem é arquivo único, destino pode ser arquivo ou diretório
+        if destination.is_dir() or not destination.exists():
+            # Se destino é diretório ou não existe, copia mantendo nome
+            return destination / source_file.name if destination.is_dir() else destination
+        # Destino é arquivo específico
+        return destination
+    # Origem é diretório, mantém estrutura relativa
+    return destination / source_file.relative_to(source)
 
 
 class FileCopier:
@@ -16,7 +64,17 @@ class FileCopier:
     Classe responsável por copiar arquivos preservando metadados.
     """
     
-    def __init__(self, source: Path, destination: Path, max_retries: int = 3):
+    def __init__(self, source: Path, destination: Path, max_retries: int = 3,
+                 resume_partial: bool = False, resume_verify: str = "tail", resume_samples: int = 4,
+                 sync_mode: Optional[str] = None, delta_mode: Union[bool, str] = False,
+                 delta_min_size: int = DELTA_MIN_SIZE, delta_in_place: bool = False,
+                 durability: Union[str, DurabilityManager] = "none",
+                 hash_algorithm: Optional[str] = None,
+                 extra_destinations: Optional[List[Path]] = None, verify_destinations: bool = False,
+                 archive_format: Optional[str] = None,
+                 dedup_store: Union[None, str, Path, ContentStore] = None, dedup_link: str = "auto",
+                 dedup_preserve_metadata: bool = False,
+                 locality: str = "off"):
         """
         Inicializa o copiador de arquivos.
         
@@ -24,18 +82,108 @@ class FileCopier:
             source: Caminho de origem (arquivo ou diretório)
             destination: Caminho de destino (arquivo ou diretório)
             max_retries: Número máximo de tentativas para cada arquivo
+            resume_partial: Retoma cópias parciais a partir do último offset válido
+            resume_verify: Validação do prefixo já escrito ('size', 'tail' ou 'sample')
+            resume_samples: Número de blocos amostrados no modo 'sample'
+            sync_mode: Cópia incremental ('quick' ou 'hash'); None copia tudo
+            delta_mode: Transferência delta para destinos existentes ('off', 'auto' ou
+                        'always'; True equivale a 'always'; 'auto' só a usa com origem lenta)
+            delta_min_size: Tamanho mínimo do destino existente para usar o modo delta
+            delta_in_place: Grava só os blocos alterados direto no destino (sem arquivo
+                            temporário; ignorado quando a durabilidade exige rename)
+            durability: Modo de durabilidade ('none', 'file', 'group', 'syncfs') ou
+                        um DurabilityManager compartilhado entre copiadores
+            hash_algorithm: Calcula o hash da origem durante a cópia (ex.: 'sha256'),
+                            dispensando a releitura da origem na verificação
+            extra_destinations: Destinos adicionais (fan-out): cada chunk é lido uma vez
+                                e gravado em todos os destinos
+            verify_destinations: No fan-out, confere cada destino contra o hash da origem
+            archive_format: Grava a origem em um único pacote ('tar', 'tar.gz', 'tar.zst'
+                            ou 'zip') com índice de offsets e hashes por membro
+            dedup_store: Repositório de conteúdo (diretório ou ContentStore compartilhado):
+                         cada conteúdo é gravado uma vez e os destinos viram links para ele
+            dedup_link: Tipo de link no modo deduplicado ('auto', 'reflink', 'hardlink' ou 'copy')
+            dedup_preserve_metadata: Copia timestamps e permissões da origem para os destinos
+                                     deduplicados ('hardlink' exige False)
+            locality: Ordena os arquivos de um diretório pela posição física ('off', 'auto',
+                      'inode' ou 'extent'; ver locality.LOCALITY_MODES); 'auto' só ordena em
+                      discos rotacionais
         """
+        if locality not in LOCALITY_MODES:
+            raise ValueError(f"Ordenação não suportada: {locality}")
+        self.locality = locality
+        self.locality_applied = "off"
         self.source = Path(source)
         self.destination = Path(destination)
         self.copied_files: List[Path] = []
         self.failed_files: List[Tuple[Path, str]] = []
         self.progress_callback: Optional[Callable] = None
-        self.is_file = self.source.is_file()
-        self.is_dir = self.source.is_dir()
+        # Tipo da origem consultado sob demanda (copiadores reutilizados não precisam dele)
+        self._is_file: Optional[bool] = None
+        self._is_dir: Optional[bool] = None
         self.max_retries = max_retries
         self.paused = False
         self.cancelled = False
+        if resume_verify not in RESUME_VERIFY_MODES:
+            raise ValueError(f"Modo de validação de retomada não suportado: {resume_verify}")
+        self.resume_partial = resume_partial
+        self.resume_verify = resume_verify
+        self.resume_samples = max(0, resume_samples)
+        self.resume_block_size = RESUME_BLOCK_SIZE
+        self.resume_marker_interval = RESUME_MARKER_INTERVAL
+        self.sync_mode = sync_mode
+        self.sync_checker = SyncChecker(sync_mode) if sync_mode else None
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        if delta_mode not in (True, False, None) + DELTA_MODES:
+            raise ValueError(f"Modo delta não suportado: {delta_mode}")
+        self.delta_mode = delta_mode
+        self.delta_min_size = delta_min_size
+        self.delta_in_place = delta_in_place
+        # Modo delta resolvido sob demanda (o 'auto' consulta o disco da origem)
+        self._delta_active: Optional[bool] = None
+        self.delta_bytes_reused = 0
+        self.delta_bytes_written = 0
+        if isinstance(durability, DurabilityManager):
+            self.durability = durability
+        else:
+            self.durability = DurabilityManager(durability)
+        self.hash_algorithm = hash_algorithm
+        self.file_hashes: Dict[Path, str] = {}
+        self.extra_destinations = [Path(d) for d in (extra_destinations or [])]
+        self.verify_destinations = verify_destinations
+        self.destination_callback: Optional[Callable] = None
+        self.destination_stats: Dict[str, dict] = {}
+        if archive_format is not None and archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Formato de arquivo não suportado: {archive_format}")
+        self.archive_format = archive_format
+        if isinstance(dedup_store, ContentStore) or dedup_store is None:
+            self.content_store = dedup_store
+        else:
+            self.content_store = ContentStore(dedup_store, hash_algorithm or "sha256", dedup_link,
+                                              fsync=self.durability.atomic,
+                                              preserve_metadata=dedup_preserve_metadata)
+        if self.content_store is not None and (self.extra_destinations or archive_format):
+            raise ValueError("Modo deduplicado não combina com fan-out nem com modo arquivo")
+        self.logical_bytes = 0
+        self.physical_bytes = 0
+        # Falhas de durabilidade que não são de um arquivo (ex.: sync do destino)
+        self.durability_errors: List[Tuple[Path, str]] = []
         
+    @property
+    def is_file(self) -> bool:
+        """Indica se a origem é um arquivo (consultado uma vez, na primeira leitura)."""
+        if self._is_file is None:
+            self._is_file = self.source.is_file()
+        return self._is_file
+    
+    @property
+    def is_dir(self) -> bool:
+        """Indica se a origem é um diretório (consultado uma vez, na primeira leitura)."""
+        if self._is_dir is None:
+            self._is_dir = self.source.is_dir()
+        return self._is_dir
+    
     def set_progress_callback(self, callback: Callable):
         """
         Define callback para atualização de progresso.
@@ -46,6 +194,16 @@ class FileCopier:
         """
         self.progress_callback = callback
     
+    def set_destination_callback(self, callback: Callable):
+        """
+        Define callback de progresso por destino (fan-out).
+        
+        Args:
+            callback: Chamada ao concluir cada arquivo em cada destino
+                      Assinatura: callback(destination_root, file_index, total_files, filename, success)
+        """
+        self.destination_callback = callback
+    
     def pause(self):
         """Pausa a cópia."""
         self.paused = True
@@ -59,10 +217,277 @@ class FileCopier:
         self.cancelled = True
         self.paused = False
     
+    def _chunk_params(self, file_size: int) -> Tuple[int, int]:
+        """
+        Calcula buffer e intervalo de atualização adaptativos ao tamanho do arquivo.
+        
+        Args:
+            file_size: Tamanho do arquivo em bytes
+            
+        Returns:
+            Tupla (chunk_size, update_interval)
+        """
+        if file_size < 10 * 1024 * 1024:  # < 10MB
+            chunk_size = 512 * 1024  # 512KB
+            update_interval = max(1, file_size // 20)  # Atualiza a cada ~5% do arquivo
+        elif file_size < 100 * 1024 * 1024:  # < 100MB
+            chunk_size = 2 * 1024 * 1024  # 2MB
+            update_interval = max(1, file_size // 10)  # Atualiza a cada ~10% do arquivo
+        else:  # >= 100MB
+            chunk_size = 4 * 1024 * 1024  # 4MB
+            update_interval = max(1, file_size // 100)  # Atualiza a cada ~1% do arquivo
+        return chunk_size, update_interval
+    
+    def _blocks_match(self, source_file: Path, dest_file: Path, offset: int, length: int) -> bool:
+        """
+        Compara um bloco da origem com o mesmo intervalo do destino.
+        
+        Args:
+            source_file: Arquivo de origem
+            dest_file: Arquivo de destino (parcial)
+            offset: Posição inicial do bloco
+            length: Tamanho do bloco
+            
+        Returns:
+            True se os bytes forem idênticos
+        """
+        with open(source_file, 'rb') as src, open(dest_file, 'rb') as dst:
+            src.seek(offset)
+            dst.seek(offset)
+            return src.read(length) == dst.read(length)
+    
+    @staticmethod
+    def _marker_path(write_path: Path) -> Path:
+        """Caminho do marcador de cópia parcial de um arquivo gravado."""
+        return write_path.with_name(f".{write_path.name}{RESUME_MARKER_SUFFIX}")
+    
+    def _write_resume_marker(self, write_path: Path, source_stat, offset: int):
+        """
+        Registra tamanho e mtime da origem e os bytes já gravados de uma cópia parcial.
+        
+        Args:
+            write_path: Arquivo sendo gravado
+            source_stat: Stat da origem
+            offset: Bytes já gravados (e entregues ao sistema operacional)
+        """
+        self._marker_path(write_path).write_text(
+            f"{source_stat.st_size} {source_stat.st_mtime_ns} {offset}\n")
+    
+    def _clear_resume_marker(self, write_path: Path):
+        """Remove o marcador de cópia parcial (cópia concluída ou descartada)."""
+        try:
+            self._marker_path(write_path).unlink(missing_ok=True)
+        except OSError:
+            pass
+    
+    def _discard_partial(self, write_path: Path):
+        """
+        Remove o arquivo parcial de uma cópia interrompida (falha ou cancelamento).
+        
+        Mantido quando há marcador de retomada: a próxima cópia continua dele.
+        
+        Args:
+            write_path: Arquivo em gravação (temporário ou o próprio destino)
+        """
+        if self._marker_path(write_path).exists():
+            return
+        try:
+            write_path.unlink()
+        except OSError:
+            pass
+    
+    def _marked_offset(self, source_file: Path, write_path: Path) -> int:
+        """
+        Bytes registrados no marcador, se ele corresponder à origem atual.
+        
+        Returns:
+            Offset registrado, ou 0 sem marcador, com marcador ilegível ou de outra
+            versão da origem (tamanho ou mtime diferente)
+        """
+        try:
+            size, mtime_ns, offset = (int(v) for v in self._marker_path(write_path).read_text().split())
+            source_stat = source_file.stat()
+        except (OSError, ValueError):
+            return 0
+        if size != source_stat.st_size or mtime_ns != source_stat.st_mtime_ns:
+            return 0
+        return max(0, offset)
+    
+    def _find_resume_offset(self, source_file: Path, dest_file: Path, file_size: int) -> int:
+        """
+        Determina a partir de qual byte uma cópia parcial pode ser retomada.
+        
+        Só é retomado um destino com marcador de cópia parcial da mesma origem
+        (tamanho e mtime); um destino qualquer, mesmo do tamanho da origem, é
+        recopiado do início. O prefixo vai até os bytes registrados no marcador
+        (sem o último bloco incompleto) e é validado pelo tamanho e, conforme
+        `resume_verify`, pela comparação do último bloco ('tail') ou de blocos
+        amostrados ao longo do prefixo mais o último bloco ('sample'); se algum
+        bloco divergir, a cópia recomeça do início. Um destino já completo é
+        comparado inteiro antes de ser aceito.
+        
+        Args:
+            source_file: Arquivo de origem
+            dest_file: Arquivo de destino (possivelmente parcial)
+            file_size: Tamanho do arquivo de origem
+            
+        Returns:
+            Offset a partir do qual a cópia deve continuar (0 = do início)
+        """
+        marked = self._marked_offset(source_file, dest_file)
+        try:
+            dest_size = dest_file.stat().st_size
+        except OSError:
+            return 0
+        
+        dest_size = min(dest_size, marked)
+        if dest_size == 0 or dest_size > file_size:
+            return 0
+        
+        block = self.resume_block_size
+        if dest_size == file_size:
+            # Destino completo: só é aceito comparado inteiro; a retomada volta ao
+            # primeiro bloco divergente (o prefixo anterior a ele foi todo conferido)
+            for block_start in range(0, file_size, block):
+                if not self._blocks_match(source_file, dest_file, block_start, min(block, file_size - block_start)):
+                    return block_start
+            return file_size
+        
+        # Descarta o último bloco incompleto (pode conter escrita interrompida)
+        offset = (dest_size // block) * block
+        
+        if offset == 0 or self.resume_verify == "size":
+            return offset
+        
+        tail_start = max(0, offset - block)
+        check_points = []
+        if self.resume_verify == "sample" and self.resume_samples and tail_start > 0:
+            total_blocks = tail_start // block
+            step = max(1, total_blocks // self.resume_samples)
+            check_points = [i * block for i in range(0, total_blocks, step)][:self.resume_samples]
+        check_points.append(tail_start)
+        
+        for block_start in check_points:
+            length = min(block, offset - block_start)
+            if not self._blocks_match(source_file, dest_file, block_start, length):
+                # Prefixo não conferido por inteiro: não há offset confiável
+                return 0
+        
+        return offset
+    
+    def _wait_if_paused(self) -> bool:
+        """
+        Aguarda enquanto pausado.
+        
+        Returns:
+            False se a cópia foi cancelada
+        """
+        while self.paused and not self.cancelled:
+            time.sleep(0.1)
+        return not self.cancelled
+    
+    def _use_delta(self, dest_file: Path) -> bool:
+        """Verifica se o destino existente justifica uma transferência delta."""
+        if self._delta_active is None:
+            self._delta_active = resolve_delta(self.delta_mode, self.source)
+        if not self._delta_active:
+            return False
+        try:
+            return dest_file.is_file() and dest_file.stat().st_size >= self.delta_min_size
+        except OSError:
+            return False
+    
+    def _hash_prefix(self, hasher, source_file: Path, length: int):
+        """Alimenta o hash com o prefixo da origem já copiado (retomada)."""
+        chunk_size, _ = self._chunk_params(length)
+        with open(source_file, 'rb') as src:
+            remaining = length
+            while remaining > 0:
+                chunk = src.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+    
+    def _copy_delta(self, source_file: Path, dest_file: Path, file_size: int,
+                    file_index: int, total_files: int) -> bool:
+        """
+        Atualiza um destino existente reescrevendo apenas os blocos que diferem.
+        
+        Args:
+            source_file: Arquivo de origem
+            dest_file: Arquivo de destino existente
+            file_size: Tamanho da origem
+            file_index: Índice do arquivo atual (para callback)
+            total_files: Total de arquivos (para callback)
+            
+        Returns:
+            True se concluído, False se cancelado
+        """
+        def on_progress(bytes_done, total):
+            if self.progress_callback:
+                self.progress_callback(file_index, total_files, source_file, file_size, bytes_done)
+        
+        hasher = create_hasher(self.hash_algorithm) if self.hash_algorithm else None
+        delta = DeltaTransfer(in_place=self.delta_in_place)
+        if not delta.transfer(source_file, dest_file, on_progress, self._wait_if_paused,
+                              self.durability, hasher, commit_item=source_file):
+            return False
+        self.delta_bytes_reused += delta.bytes_reused
+        self.delta_bytes_written += delta.bytes_written
+        if hasher is not None:
+            self.file_hashes[source_file] = hasher.hexdigest()
+        return True
+    
+    def _copy_dedup(self, source_file: Path, dest_file: Path, file_size: int,
+                    file_index: int, total_files: int):
+        """
+        Grava um arquivo no repositório de conteúdo e liga o destino ao objeto.
+        
+        O link é criado no caminho de gravação e efetivado pelo modo de durabilidade,
+        como uma cópia comum.
+        
+        Args:
+            source_file: Arquivo de origem
+            dest_file: Arquivo de destino
+            file_size: Tamanho da origem
+            file_index: Índice do arquivo atual (para callback)
+            total_files: Total de arquivos (para callback)
+        """
+        _, update_interval = self._chunk_params(file_size)
+        last_reported = 0
+        
+        def on_progress(bytes_read):
+            nonlocal last_reported
+            self._wait_if_paused()
+            if self.progress_callback and (bytes_read - last_reported >= update_interval
+                                           or bytes_read == file_size):
+                self.progress_callback(file_index, total_files, source_file, file_size, bytes_read)
+                last_reported = bytes_read
+        
+        write_path = self.durability.write_path(dest_file)
+        file_hash, physical = self.content_store.store_file(source_file, write_path, on_progress)
+        self.durability.commit(write_path, dest_file, physical, source_file)
+        
+        self.logical_bytes += file_size
+        self.physical_bytes += physical
+        if self.hash_algorithm == self.content_store.algorithm:
+            self.file_hashes[source_file] = file_hash
+    
     def copy_file(self, source_file: Path, dest_file: Path, file_index: int = 0, total_files: int = 0) -> bool:
         """
         Copia um único arquivo preservando metadados com retry automático.
         
+        Com `resume_partial` ativo, um destino parcial de uma tentativa (ou execução)
+        anterior é mantido e a cópia continua do último offset válido; arquivos a
+        partir de `resume_marker_interval` bytes registram o progresso em um marcador
+        ao lado do arquivo gravado, e só destinos com marcador são retomados. Nos modos de
+        durabilidade diferentes de 'none', os dados são gravados em um arquivo
+        temporário que só é renomeado para o destino após a gravação completa.
+        Com `hash_algorithm`, o hash da origem é calculado sobre os mesmos bytes
+        copiados e guardado em `file_hashes`. Com `dedup_store`, o conteúdo vai para
+        o repositório e o destino vira um link para o objeto.
+        
         Args:
             source_file: Arquivo de origem
             dest_file: Arquivo de destino
@@ -90,57 +515,104 @@ class FileCopier:
                 dest_file.parent.mkdir(parents=True, exist_ok=True)
                 
                 file_size = source_file.stat().st_size
+                write_path = self.durability.write_path(dest_file)
+                
+                # Modo deduplicado: grava só conteúdo novo e liga o destino ao objeto
+                if self.content_store is not None:
+                    self._copy_dedup(source_file, dest_file, file_size, file_index, total_files)
+                    return True
+                
+                # Destino existente grande: reescreve só as regiões alteradas
+                if self._use_delta(dest_file):
+                    return self._copy_delta(source_file, dest_file, file_size, file_index, total_files)
                 
-                # Se tem callback, copia em chunks para rastrear progresso
-                if self.progress_callback and file_size > 0:
-                    # Buffer adaptativo baseado no tamanho do arquivo
-                    if file_size < 10 * 1024 * 1024:  # < 10MB
-                        chunk_size = 512 * 1024  # 512KB
-                        update_interval = max(1, file_size // 20)  # Atualiza a cada ~5% do arquivo
-                    elif file_size < 100 * 1024 * 1024:  # < 100MB
-                        chunk_size = 2 * 1024 * 1024  # 2MB
-                        update_interval = max(1, file_size // 10)  # Atualiza a cada ~10% do arquivo
-                    else:  # >= 100MB
-                        chunk_size = 4 * 1024 * 1024  # 4MB
-                        update_interval = max(1, file_size // 100)  # Atualiza a cada ~1% do arquivo
+                resume_offset = 0
+                if self.resume_partial and file_size > 0:
+                    resume_offset = self._find_resume_offset(source_file, write_path, file_size)
+                
+                hasher = create_hasher(self.hash_algorithm) if self.hash_algorithm else None
+                
+                # Marcador de cópia parcial: só arquivos grandes o bastante para valer a retomada
+                source_stat = None
+                if self.resume_partial and file_size >= self.resume_marker_interval:
+                    source_stat = source_file.stat()
+                    self._write_resume_marker(write_path, source_stat, resume_offset)
+                else:
+                    self._clear_resume_marker(write_path)
+                
+                # Se tem callback, cópia parcial a retomar, marcador ou hash em linha, copia em chunks
+                if ((self.progress_callback and file_size > 0) or resume_offset > 0 or hasher is not None
+                        or source_stat is not None):
+                    chunk_size, update_interval = self._chunk_params(file_size)
+                    
+                    if hasher is not None and resume_offset > 0:
+                        self._hash_prefix(hasher, source_file, resume_offset)
                     
-                    bytes_copied = 0
+                    bytes_copied = resume_offset
                     bytes_since_update = 0
+                    bytes_since_marker = 0
                     
-                    with open(source_file, 'rb') as src, open(dest_file, 'wb') as dst:
+                    interrupted = False
+                    dest_mode = 'r+b' if resume_offset > 0 else 'wb'
+                    with open(source_file, 'rb') as src, open(write_path, dest_mode) as dst:
+                        if resume_offset > 0:
+                            dst.truncate(resume_offset)
+                            dst.seek(resume_offset)
+                            src.seek(resume_offset)
+                            # Informa o ponto de retomada para a barra de progresso
+                            if self.progress_callback:
+                                self.progress_callback(file_index, total_files, source_file, file_size,
+                                                       bytes_copied)
                         while True:
                             # Verifica pausa/cancelamento durante cópia
-                            if self.cancelled:
-                                return False
-                            
-                            while self.paused and not self.cancelled:
-                                time.sleep(0.1)
-                            
-                            if self.cancelled:
-                                return False
+                            if not self._wait_if_paused():
+                                interrupted = True
+                                break
                             
                             chunk = src.read(chunk_size)
                             if not chunk:
                                 break
                             dst.write(chunk)
+                            if hasher is not None:
+                                hasher.update(chunk)
                             bytes_copied += len(chunk)
                             bytes_since_update += len(chunk)
                             
+                            # Registra o progresso para uma retomada futura
+                            if source_stat is not None:
+                                bytes_since_marker += len(chunk)
+                                if bytes_since_marker >= self.resume_marker_interval:
+                                    dst.flush()
+                                    self._write_resume_marker(write_path, source_stat, bytes_copied)
+                                    bytes_since_marker = 0
+                            
                             # Atualiza progresso via callback apenas no intervalo definido
                             if bytes_since_update >= update_interval:
                                 if self.progress_callback:
                                     self.progress_callback(file_index, total_files, source_file, file_size, bytes_copied)
                                 bytes_since_update = 0
                     
+                    if interrupted:
+                        self._discard_partial(write_path)
+                        return False
+                    
                     # Garante que o último progresso seja atualizado
                     if bytes_since_update > 0 and self.progress_callback:
                         self.progress_callback(file_index, total_files, source_file, file_size, bytes_copied)
                     
                     # Preserva metadados
-                    shutil.copystat(source_file, dest_file)
+                    shutil.copystat(source_file, write_path)
                 else:
                     # Copia arquivo preservando metadados (timestamps, permissões)
-                    shutil.copy2(source_file, dest_file)
+                    shutil.copy2(source_file, write_path)
+                
+                # Torna o arquivo visível/durável conforme o modo de durabilidade
+                self.durability.commit(write_path, dest_file, file_size, source_file)
+                if source_stat is not None:
+                    self._clear_resume_marker(write_path)
+                
+                if hasher is not None:
+                    self.file_hashes[source_file] = hasher.hexdigest()
                 
                 # Sucesso
                 return True
@@ -150,21 +622,275 @@ class FileCopier:
                 if attempt == self.max_retries:
                     error_msg = f"Erro ao copiar {source_file} após {self.max_retries} tentativas: {str(e)}"
                     self.failed_files.append((source_file, error_msg))
+                    self._discard_partial(self.durability.write_path(dest_file))
                     return False
                 else:
                     # Backoff exponencial: espera 2^attempt segundos
                     wait_time = 2 ** attempt
                     time.sleep(wait_time)
-                    # Remove arquivo parcial se existir
-                    if dest_file.exists():
-                        try:
-                            dest_file.unlink()
-                        except:
-                            pass
+                    self._discard_partial(self.durability.write_path(dest_file))
                     continue
         
         return False
     
+    def copy_file_fanout(self, source_file: Path, dest_files: List[Path],
+                         file_index: int = 0, total_files: int = 0) -> Dict[Path, Optional[str]]:
+        """
+        Copia um arquivo para vários destinos lendo a origem uma única vez.
+        
+        Cada chunk lido é gravado em todos os destinos ativos. Uma falha de escrita
+        em um destino o retira da passada (sem afetar os demais); depois ele é
+        refeito isoladamente por copy_file, com retry. Com `verify_destinations`,
+        cada destino é conferido contra o hash da origem calculado na leitura.
+        
+        Args:
+            source_file: Arquivo de origem
+            dest_files: Arquivos de destino (um por raiz de destino)
+            file_index: Índice do arquivo atual (para callback)
+            total_files: Total de arquivos (para callback)
+            
+        Returns:
+            Dicionário destino -> mensagem de erro (None se copiado com sucesso)
+        """
+        if not self._wait_if_paused():
+            return {dest_file: "Cancelado" for dest_file in dest_files}
+        
+        results: Dict[Path, Optional[str]] = {}
+        algorithm = self.hash_algorithm or ("sha256" if self.verify_destinations else None)
+        hasher = create_hasher(algorithm) if algorithm else None
+        file_size = source_file.stat().st_size
+        chunk_size, update_interval = self._chunk_params(file_size)
+        
+        # Abre todos os destinos; falha ao abrir isola apenas aquele destino
+        targets = {}
+        for dest_file in dest_files:
+            try:
+                dest_file.parent.mkdir(parents=True, exist_ok=True)
+                write_path = self.durability.write_path(dest_file)
+                targets[dest_file] = (write_path, open(write_path, 'wb'))
+            except OSError as e:
+                results[dest_file] = str(e)
+        
+        bytes_copied = 0
+        bytes_since_update = 0
+        interrupted = False
+        try:
+            with open(source_file, 'rb') as src:
+                while targets:
+                    if not self._wait_if_paused():
+                        interrupted = True
+                        break
+                    
+                    chunk = src.read(chunk_size)
+                    if not chunk:
+                        break
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    for dest_file, (write_path, dst) in list(targets.items()):
+                        try:
+                            dst.write(chunk)
+                        except OSError as e:
+                            # Destino com falha sai da passada sem deixar o parcial no disco
+                            results[dest_file] = str(e)
+                            del targets[dest_file]
+                            try:
+                                dst.close()
+                            except OSError:
+                                pass
+                            self._discard_partial(write_path)
+                    bytes_copied += len(chunk)
+                    bytes_since_update += len(chunk)
+                    
+                    if bytes_since_update >= update_interval and self.progress_callback:
+                        self.progress_callback(file_index, total_files, source_file, file_size, bytes_copied)
+                        bytes_since_update = 0
+        finally:
+            for dest_file, (write_path, dst) in targets.items():
+                try:
+                    dst.close()
+                except OSError as e:
+                    results[dest_file] = str(e)
+                    self._discard_partial(write_path)
+        
+        if interrupted:
+            for dest_file, (write_path, _) in targets.items():
+                results[dest_file] = "Cancelado"
+                self._discard_partial(write_path)
+            return results
+        
+        if bytes_since_update > 0 and self.progress_callback:
+            self.progress_callback(file_index, total_files, source_file, file_size, bytes_copied)
+        
+        source_hash = hasher.hexdigest() if hasher is not None else None
+        if source_hash is not None and self.hash_algorithm:
+            self.file_hashes[source_file] = source_hash
+        
+        verifier = IntegrityVerifier(algorithm) if self.verify_destinations else None
+        for dest_file, (write_path, _) in targets.items():
+            if dest_file in results:
+                continue
+            try:
+                shutil.copystat(source_file, write_path)
+                # Confere o conteúdo gravado antes de torná-lo visível
+                if verifier is not None:
+                    ok, error = verifier.verify_file(source_file, write_path, source_hash)
+                    if not ok:
+                        results[dest_file] = error
+                        self._discard_partial(write_path)
+                        continue
+                self.durability.commit(write_path, dest_file, file_size, source_file)
+                results[dest_file] = None
+            except OSError as e:
+                results[dest_file] = str(e)
+                self._discard_partial(write_path)
+        
+        # Destinos que falharam na passada compartilhada são refeitos isoladamente
+        for dest_file, error in list(results.items()):
+            if error is not None and not self.cancelled:
+                failures_before = len(self.failed_files)
+                if self.copy_file(source_file, dest_file, file_index, total_files):
+                    results[dest_file] = None
+                else:
+                    del self.failed_files[failures_before:]
+        
+        return results
+    
+    def _record_destination(self, destination: Path, file_index: int, total_files: int,
+                            source_file: Path, error: Optional[str]):
+        """Atualiza estatísticas e callback de um destino do fan-out."""
+        entry = self.destination_stats.setdefault(
+            str(destination), {'copied_files': 0, 'failed_files': 0, 'failed_list': []})
+        if error is None:
+            entry['copied_files'] += 1
+        else:
+            entry['failed_files'] += 1
+            entry['failed_list'].append((source_file, error))
+        if self.destination_callback:
+            self.destination_callback(destination, file_index, total_files, source_file, error is None)
+    
+    def _apply_commit_failures(self, destinations: List[Path]):
+        """
+        Move para as falhas os arquivos cujo lote de gravação não foi efetivado.
+        
+        No modo 'group', copy_file retorna antes do rename; as falhas dos lotes são
+        recolhidas do DurabilityManager no fim do job.
+        
+        Args:
+            destinations: Raízes de destino do job
+        """
+        errors_by_source: Dict[Path, List[str]] = {}
+        for dest_file, source_file, error in self.durability.take_failures():
+            if source_file is None:
+                self.durability_errors.append((dest_file, error))
+                continue
+            errors_by_source.setdefault(source_file, []).append(error)
+            root = next((r for r in destinations if dest_file.is_relative_to(r)), None)
+            entry = self.destination_stats.get(str(root)) if root is not None else None
+            if entry is not None:
+                entry['copied_files'] -= 1
+                entry['failed_files'] += 1
+                entry['failed_list'].append((source_file, error))
+        if not errors_by_source:
+            return
+        copied = set(self.copied_files)
+        self.copied_files = [f for f in self.copied_files if f not in errors_by_source]
+        for source_file, errors in errors_by_source.items():
+            if source_file in copied:
+                self.failed_files.append((source_file, "; ".join(dict.fromkeys(errors))))
+                self.file_hashes.pop(source_file, None)
+    
+    def archive_path(self) -> Path:
+        """
+        Determina o caminho do pacote no modo arquivo.
+        
+        Returns:
+            `destination` se for um caminho de arquivo, ou `<destination>/<origem>.<formato>`
+            se `destination` for um diretório existente
+        """
+        if self.destination.is_dir():
+            return self.destination / f"{self.source.name}.{self.archive_format}"
+        return self.destination
+    
+    def _copy_to_archive(self, source_files: List[Path]) -> dict:
+        """
+        Grava os arquivos de origem em um único pacote (modo arquivo).
+        
+        O pacote só é publicado se o job chegar ao fim: um cancelamento, ou um erro
+        no meio de um membro, descarta o pacote e o índice, e nenhum arquivo conta
+        como copiado.
+        
+        Args:
+            source_files: Arquivos de origem
+            
+        Returns:
+            Dicionário com estatísticas da cópia
+        """
+        total_files = len(source_files)
+        archive_path = self.archive_path()
+        
+        # Tar comprimido: a proporção de dados já comprimidos define o nível de compressão
+        compressed_fraction = 0.0
+        if self.archive_format in ("tar.gz", "tar.zst"):
+            compressed_fraction = estimate_compressed_fraction(source_files)
+        
+        writer = ArchiveWriter(archive_path, self.archive_format, self.hash_algorithm or "sha256",
+                               compressed_fraction)
+        with writer:
+            for idx, source_file in enumerate(source_files, 1):
+                if not self._wait_if_paused():
+                    writer.abort()
+                    break
+                
+                arcname = (source_file.name if self.is_file
+                           else source_file.relative_to(self.source).as_posix())
+                file_size = source_file.stat().st_size
+                _, update_interval = self._chunk_params(file_size)
+                last_reported = 0
+                
+                def on_progress(bytes_read):
+                    nonlocal last_reported
+                    if self.progress_callback and (bytes_read - last_reported >= update_interval
+                                                   or bytes_read == file_size):
+                        self.progress_callback(idx, total_files, source_file, file_size, bytes_read)
+                        last_reported = bytes_read
+                
+                try:
+                    entry = writer.add_file(source_file, arcname, on_progress, self._wait_if_paused)
+                    self.copied_files.append(source_file)
+                    if self.hash_algorithm:
+                        self.file_hashes[source_file] = entry['hash']
+                except ArchiveCancelled:
+                    # Cancelado no meio de um membro: o pacote teria um membro truncado
+                    writer.abort()
+                    break
+                except Exception as e:
+                    # Erro no meio de um membro deixa o pacote inconsistente: descarta
+                    self.failed_files.append((source_file, f"Erro ao arquivar {source_file}: {str(e)}"))
+                    writer.abort()
+                    break
+        
+        if not writer.published:
+            # Pacote descartado: nada foi copiado
+            self.copied_files = []
+            self.file_hashes = {}
+        
+        self.durability.sync_written([archive_path, writer.index_path])
+        self.durability.finish([archive_path])
+        self._apply_commit_failures([archive_path])
+        
+        return {
+            'total_files': total_files,
+            'copied_files': len(self.copied_files),
+            'failed_files': len(self.failed_files),
+            'hash_algorithm': self.hash_algorithm,
+            'hashes': self.file_hashes,
+            'archive_path': archive_path,
+            'index_path': writer.index_path,
+            'copied_list': self.copied_files,
+            'failed_list': self.failed_files,
+            'durability_errors': self.durability_errors
+        }
+    
     def copy_all(self) -> dict:
         """
         Copia arquivo(s) ou diretório(s) de origem para destino.
@@ -173,11 +899,31 @@ class FileCopier:
         - Múltiplos arquivos
         - Diretório com subpastas
         
+        Com `archive_format`, a origem é gravada em um único pacote (ver
+        _copy_to_archive). Com `sync_mode` ativo, arquivos cujo destino já é idêntico são pulados
+        e contabilizados em 'skipped_files'/'skipped_bytes'. Com destinos
+        adicionais (fan-out), um arquivo só conta como copiado quando chega a
+        todos os destinos; o resultado por destino fica em 'destinations'. No modo
+        deduplicado, 'logical_bytes' e 'physical_bytes' comparam o volume copiado
+        com o volume efetivamente gravado.
+        
         Returns:
             Dicionário com estatísticas da cópia
         """
         self.copied_files = []
         self.failed_files = []
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.delta_bytes_reused = 0
+        self.delta_bytes_written = 0
+        self.file_hashes = {}
+        self.logical_bytes = 0
+        self.physical_bytes = 0
+        self.durability_errors = []
+        destinations = [self.destination] + self.extra_destinations
+        self.destination_stats = {}
+        if self.sync_checker:
+            self.sync_checker.clear()
         
         # Determina lista de arquivos a copiar
         source_files = []
@@ -188,10 +934,16 @@ class FileCopier:
         elif self.is_dir:
             # Se origem é um diretório, lista todos os arquivos recursivamente
             source_files = [f for f in self.source.rglob('*') if f.is_file()]
+            # Em disco rotacional, segue a posição física em vez da ordem da varredura
+            self.locality_applied = resolve_locality(self.locality, self.source)
+            source_files = sort_by_locality(source_files, self.locality_applied)
         else:
             # Origem não existe
             raise FileNotFoundError(f"Origem não encontrada: {self.source}")
         
+        if self.archive_format:
+            return self._copy_to_archive(source_files)
+        
         total_files = len(source_files)
         copied_count = 0
         
@@ -209,22 +961,41 @@ class FileCopier:
                 break
             
             try:
-                # Determina destino
-                if self.is_file:
-                    # Se origem é arquivo único, destino pode ser arquivo ou diretório
-                    if self.destination.is_dir() or not self.destination.exists():
-                        # Se destino é diretório ou não existe, copia mantendo nome
-                        dest_file = self.destination / source_file.name if self.destination.is_dir() else self.destination
-                    else:
-                        # Destino é arquivo específico
-                        dest_file = self.destination
-                else:
-                    # Origem é diretório, mantém estrutura relativa
-                    relative_path = source_file.relative_to(self.source)
-                    dest_file = self.destination / relative_path
+                # Determina destino(s)
+                targets = {root: dest_path_for(self.source, self.is_file, source_file, root)
+                           for root in destinations}
                 
-                # Copia arquivo (com rastreamento de progresso e retry)
-                if self.copy_file(source_file, dest_file, idx, total_files):
+                # Modo incremental: pula arquivos inalterados no(s) destino(s)
+                if self.sync_checker:
+                    source_stat = source_file.stat()
+                    targets = {root: dest_file for root, dest_file in targets.items()
+                               if not self.sync_checker.is_unchanged(source_file, source_stat, dest_file)}
+                    if not targets:
+                        self.skipped_files += 1
+                        self.skipped_bytes += source_stat.st_size
+                        if self.progress_callback:
+                            self.progress_callback(idx, total_files, source_file,
+                                                   source_stat.st_size, source_stat.st_size)
+                        continue
+                
+                if not self.extra_destinations:
+                    # Copia arquivo (com rastreamento de progresso e retry)
+                    if self.copy_file(source_file, targets[self.destination], idx, total_files):
+                        self.copied_files.append(source_file)
+                        copied_count += 1
+                    continue
+                
+                # Fan-out: lê uma vez e grava em todos os destinos
+                results = self.copy_file_fanout(source_file, list(targets.values()), idx, total_files)
+                errors = []
+                for root, dest_file in targets.items():
+                    error = results.get(dest_file)
+                    self._record_destination(root, idx, total_files, source_file, error)
+                    if error is not None:
+                        errors.append(f"{root}: {error}")
+                if errors:
+                    self.failed_files.append((source_file, "; ".join(errors)))
+                else:
                     self.copied_files.append(source_file)
                     copied_count += 1
                     
@@ -232,12 +1003,32 @@ class FileCopier:
                 error_msg = f"Erro ao processar {source_file}: {str(e)}"
                 self.failed_files.append((source_file, error_msg))
         
+        # Descarrega lotes pendentes / sincroniza o sistema de arquivos de destino
+        self.durability.finish(destinations)
+        self._apply_commit_failures(destinations)
+        if self.content_store is not None:
+            self.content_store.flush()
+        
         # Retorna estatísticas
-        return {
+        stats = {
             'total_files': total_files,
             'copied_files': len(self.copied_files),
             'failed_files': len(self.failed_files),
+            'skipped_files': self.skipped_files,
+            'skipped_bytes': self.skipped_bytes,
+            'delta_bytes_reused': self.delta_bytes_reused,
+            'delta_bytes_written': self.delta_bytes_written,
+            'hash_algorithm': self.hash_algorithm,
+            'hashes': self.file_hashes,
             'copied_list': self.copied_files,
-            'failed_list': self.failed_files
+            'failed_list': self.failed_files,
+            'durability_errors': self.durability_errors,
+            'locality': self.locality_applied
         }
+        if self.extra_destinations:
+            stats['destinations'] = self.destination_stats
+        if self.content_store is not None:
+            stats['logical_bytes'] = self.logical_bytes
+            stats['physical_bytes'] = self.physical_bytes
+        return stats
 
@@ -0,0 +1,318 @@
+"""
+Módulo: dedup.py
+Responsável pelo destino com deduplicação: um repositório de objetos endereçado
+por conteúdo (hash), com os arquivos de destino ligados aos objetos.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from .durability import DurabilityManager
+from .verifier import create_hasher
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# Modos de ligação entre o arquivo de destino e o objeto
+LINK_MODES = ("auto", "reflink", "hardlink", "copy")
+
+# ioctl FICLONE do Linux (reflink em btrfs/XFS)
+FICLONE = 0x40049409
+
+# Inserções no índice agrupadas por transação
+INDEX_BATCH_SIZE = 500
+
+# Tamanho do bloco de leitura
+READ_SIZE = 1024 * 1024  # 1MB
+
+
+def _reflink(source: Path, dest: Path) -> bool:
+    """Tenta clonar `source` em `dest` (cópia sob demanda do sistema de arquivos)."""
+    if fcntl is None:
+        return False
+    try:
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        try:
+            dest.unlink()
+        except OSError:
+            pass
+        return False
+
+
+class ContentStore:
+    """
+    Repositório de objetos endereçado por conteúdo.
+
+    Cada conteúdo distinto é gravado uma única vez em `<root>/objects/ab/cdef...`.
+    Um índice SQLite persistente (`<root>/index.db`) registra hash e tamanho dos
+    objetos, para que jobs futuros pulem conteúdo já armazenado. Quando nenhum
+    objeto tem o mesmo tamanho do arquivo, o conteúdo é novo com certeza: ele é
+    gravado e hasheado em uma única leitura. Caso contrário, o hash é calculado
+    primeiro e o conteúdo só é gravado se ainda não existir. Uma entrada do
+    índice só é aproveitada se o objeto existir com o tamanho registrado; caso
+    contrário ela é descartada e o conteúdo, gravado de novo.
+
+    Um hardlink compartilha o inode (e portanto os metadados) com o objeto: ele só
+    é usado com `preserve_metadata` desligado (o padrão, para que o modo 'auto'
+    economize espaço também sem reflink); com metadados preservados, o modo 'auto'
+    usa reflink ou cópia.
+    """
+
+    def __init__(self, root: Path, algorithm: str = "sha256", link_mode: str = "auto",
+                 fsync: bool = False, preserve_metadata: bool = False):
+        """
+        Inicializa o repositório.
+
+        Args:
+            root: Diretório do repositório
+            algorithm: Algoritmo de hash que identifica os objetos
+            link_mode: 'auto' (reflink > hardlink > cópia), 'reflink', 'hardlink' ou 'copy'
+            fsync: Força cada objeto novo para o disco antes de publicá-lo
+            preserve_metadata: Copia timestamps e permissões da origem para cada destino
+                               (incompatível com 'hardlink'; no 'auto', troca hardlink por cópia)
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Modo de ligação não suportado: {link_mode}")
+        if link_mode == "hardlink" and preserve_metadata:
+            raise ValueError("Hardlink compartilha os metadados do objeto: use preserve_metadata=False")
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.algorithm = algorithm
+        self.link_mode = link_mode
+        self.preserve_metadata = preserve_metadata
+        # Objetos são publicados de imediato (os links dependem deles), nunca em lote
+        self.durability = DurabilityManager("file") if fsync else None
+        self.lock = threading.Lock()
+        self._pending_inserts = 0
+
+        self.connection = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            "hash TEXT PRIMARY KEY, size INTEGER NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS objects_size ON objects(size)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'algorithm'").fetchone()
+        if row is None:
+            self.connection.execute("INSERT INTO meta VALUES ('algorithm', ?)", (algorithm,))
+        elif row[0] != algorithm:
+            raise ValueError(f"Repositório usa o algoritmo {row[0]}, não {algorithm}")
+        self.connection.commit()
+
+    def object_path(self, file_hash: str) -> Path:
+        """Caminho do objeto de um hash."""
+        return self.objects_dir / file_hash[:2] / file_hash[2:]
+
+    def has_size(self, size: int) -> bool:
+        """Indica se algum objeto tem exatamente esse tamanho."""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT 1 FROM objects WHERE size = ? LIMIT 1", (size,)).fetchone() is not None
+
+    def has_object(self, file_hash: str) -> bool:
+        """Indica se o conteúdo já está no repositório."""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT 1 FROM objects WHERE hash = ?", (file_hash,)).fetchone() is not None
+
+    def _object_intact(self, file_hash: str, size: int) -> bool:
+        """
+        Confere se o objeto de uma entrada do índice existe com o tamanho registrado.
+
+        Um objeto ausente ou com outro tamanho tem a entrada descartada (e o arquivo
+        removido), para que o conteúdo seja gravado de novo.
+        """
+        object_path = self.object_path(file_hash)
+        try:
+            if object_path.stat().st_size == size:
+                return True
+        except OSError:
+            pass
+        with self.lock:
+            self.connection.execute("DELETE FROM objects WHERE hash = ?", (file_hash,))
+            self.connection.commit()
+        try:
+            object_path.unlink()
+        except OSError:
+            pass
+        return False
+
+    def _register(self, file_hash: str, size: int):
+        """Registra um objeto no índice (commit em lotes)."""
+        with self.lock:
+            self.connection.execute("INSERT OR IGNORE INTO objects VALUES (?, ?)", (file_hash, size))
+            self._pending_inserts += 1
+            if self._pending_inserts >= INDEX_BATCH_SIZE:
+                self.connection.commit()
+                self._pending_inserts = 0
+
+    def _hash_file(self, source_file: Path, progress: Optional[Callable[[int], None]]) -> str:
+        """Calcula o hash de um arquivo."""
+        hasher = create_hasher(self.algorithm)
+        buffer = bytearray(READ_SIZE)
+        view = memoryview(buffer)
+        done = 0
+        with open(source_file, 'rb', buffering=0) as f:
+            while read := f.readinto(buffer):
+                hasher.update(view[:read])
+                done += read
+                if progress:
+                    progress(done)
+        return hasher.hexdigest()
+
+    def _write_object(self, source_file: Path, progress: Optional[Callable[[int], None]]) -> Tuple[str, bool]:
+        """
+        Grava o conteúdo em um temporário do repositório, calculando o hash na mesma leitura.
+
+        Returns:
+            Tupla (hash, gravado) — gravado=False se o objeto já existia
+        """
+        hasher = create_hasher(self.algorithm)
+        tmp_file = self.tmp_dir / uuid.uuid4().hex
+        done = 0
+        try:
+            with open(source_file, 'rb') as src, open(tmp_file, 'wb') as dst:
+                while chunk := src.read(READ_SIZE):
+                    hasher.update(chunk)
+                    dst.write(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress(done)
+            file_hash = hasher.hexdigest()
+            return file_hash, self._publish(tmp_file, file_hash, done)
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+
+    def _copy_object(self, source_file: Path, file_hash: str) -> bool:
+        """
+        Grava um conteúdo de hash já conhecido, conferindo o hash na mesma leitura.
+
+        Raises:
+            OSError: Se o conteúdo lido não tiver mais o hash esperado (origem
+                     alterada desde o cálculo do hash); nada é publicado
+        """
+        hasher = create_hasher(self.algorithm)
+        tmp_file = self.tmp_dir / uuid.uuid4().hex
+        done = 0
+        try:
+            with open(source_file, 'rb') as src, open(tmp_file, 'wb') as dst:
+                while chunk := src.read(READ_SIZE):
+                    hasher.update(chunk)
+                    dst.write(chunk)
+                    done += len(chunk)
+            if hasher.hexdigest() != file_hash:
+                raise OSError(f"Origem alterada durante a cópia para o repositório: {source_file}")
+            return self._publish(tmp_file, file_hash, done)
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+
+    def _publish(self, tmp_file: Path, file_hash: str, size: int) -> bool:
+        """Move um temporário para o caminho do objeto (se ainda não existir íntegro)."""
+        object_path = self.object_path(file_hash)
+        try:
+            if object_path.stat().st_size == size:
+                self._register(file_hash, size)
+                return False
+        except OSError:
+            pass
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        # Objetos são compartilhados por hardlinks: somente leitura
+        os.chmod(tmp_file, 0o444)
+        if self.durability is not None:
+            self.durability.commit(tmp_file, object_path, size)
+        else:
+            os.replace(tmp_file, object_path)
+        self._register(file_hash, size)
+        return True
+
+    def _link(self, object_path: Path, source_file: Path, dest_file: Path) -> int:
+        """
+        Cria o arquivo de destino apontando para o objeto.
+
+        Returns:
+            Bytes físicos gravados no destino (0 para reflink/hardlink)
+        """
+        dest_file.parent.mkdir(parents=True, exist_ok=True)
+        if dest_file.exists() or dest_file.is_symlink():
+            dest_file.unlink()
+
+        if self.link_mode in ("auto", "reflink") and _reflink(object_path, dest_file):
+            os.chmod(dest_file, 0o644)
+            shutil.copystat(source_file, dest_file)
+            return 0
+        if self.link_mode == "reflink":
+            raise OSError(f"Reflink não suportado em {dest_file.parent}")
+
+        if self.link_mode == "hardlink" or (self.link_mode == "auto" and not self.preserve_metadata):
+            try:
+                # Hardlink compartilha metadados com o objeto: timestamps não são copiados
+                os.link(object_path, dest_file)
+                return 0
+            except OSError:
+                if self.link_mode == "hardlink":
+                    raise
+
+        shutil.copyfile(object_path, dest_file)
+        if self.preserve_metadata:
+            shutil.copystat(source_file, dest_file)
+        return dest_file.stat().st_size
+
+    def store_file(self, source_file: Path, dest_file: Path,
+                   progress: Optional[Callable[[int], None]] = None) -> Tuple[str, int]:
+        """
+        Armazena um arquivo no repositório e liga o destino ao objeto.
+
+        Args:
+            source_file: Arquivo de origem
+            dest_file: Caminho lógico do arquivo no destino
+            progress: Chamado com os bytes já lidos da origem
+
+        Returns:
+            Tupla (hash, bytes_físicos_gravados)
+        """
+        size = source_file.stat().st_size
+        physical = 0
+
+        if not self.has_size(size):
+            # Nenhum objeto com esse tamanho: conteúdo novo, grava e hasheia de uma vez
+            file_hash, written = self._write_object(source_file, progress)
+        else:
+            file_hash = self._hash_file(source_file, progress)
+            written = False
+            if not self.has_object(file_hash) or not self._object_intact(file_hash, size):
+                written = self._copy_object(source_file, file_hash)
+        if written:
+            physical += size
+
+        physical += self._link(self.object_path(file_hash), source_file, dest_file)
+        return file_hash, physical
+
+    def flush(self):
+        """Efetiva inserções pendentes no índice."""
+        with self.lock:
+            self.connection.commit()
+            self._pending_inserts = 0
+
+    def close(self):
+        """Fecha o índice."""
+        self.flush()
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,366 @@
+"""
+Módulo: delta.py
+Responsável pela transferência delta (estilo rsync) de arquivos grandes modificados.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+from .locality import is_rotational
+
+
+# Quando usar a transferência delta em destinos existentes:
+# - off:    nunca (o destino é reescrito por inteiro)
+# - auto:   só quando a origem é lenta (sistema de arquivos de rede ou disco rotacional)
+# - always: sempre que o destino existente atingir o tamanho mínimo
+DELTA_MODES = ("off", "auto", "always")
+
+# Tipos de sistema de arquivos tratados como remotos pelo modo 'auto'
+# (FUSE aparece como 'fuse.<nome>'; conta o nome após o ponto)
+REMOTE_FS_TYPES = frozenset({
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "afs", "ceph", "glusterfs",
+    "lustre", "davfs", "sshfs", "rclone", "s3fs", "gcsfuse",
+})
+
+# Tabela de montagens do processo (ver filesystem_type)
+MOUNTINFO = Path("/proc/self/mountinfo")
+
+# Módulo do checksum Adler-32 (usado pelo checksum fraco deslizante)
+ADLER_MOD = 65521
+
+# Limites do tamanho de bloco escolhido automaticamente (~raiz quadrada do arquivo)
+MIN_BLOCK_SIZE = 4 * 1024  # 4KB
+MAX_BLOCK_SIZE = 1024 * 1024  # 1MB
+
+# Quantidade de dados lidos da origem por vez
+READ_SIZE = 4 * 1024 * 1024  # 4MB
+
+
+def choose_block_size(file_size: int) -> int:
+    """
+    Escolhe o tamanho de bloco como potência de 2 próxima da raiz quadrada do tamanho.
+
+    Args:
+        file_size: Tamanho do arquivo base em bytes
+
+    Returns:
+        Tamanho de bloco em bytes
+    """
+    block_size = 1 << max(0, (file_size.bit_length() + 1) // 2)
+    return max(MIN_BLOCK_SIZE, min(MAX_BLOCK_SIZE, block_size))
+
+
+def _unescape_mount(field: str) -> str:
+    """Desfaz o escape octal (\\040 etc.) dos caminhos em mountinfo."""
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), field)
+
+
+def filesystem_type(path: Path) -> Optional[str]:
+    """
+    Tipo do sistema de arquivos que contém o caminho, lido de /proc/self/mountinfo.
+
+    Args:
+        path: Arquivo ou diretório
+
+    Returns:
+        Tipo (ex.: 'ext4', 'nfs4', 'fuse.sshfs') ou None fora do Linux ou em erro
+    """
+    try:
+        target = str(Path(path).resolve())
+        lines = MOUNTINFO.read_text().splitlines()
+    except (OSError, RuntimeError):
+        return None
+    best_point = ""
+    best_type = None
+    for line in lines:
+        fields, _, rest = line.partition(" - ")
+        fields = fields.split()
+        if len(fields) < 5 or not rest:
+            continue
+        point = _unescape_mount(fields[4])
+        inside = target == point or target.startswith(point.rstrip("/") + "/")
+        if inside and len(point) >= len(best_point):
+            best_point = point
+            best_type = rest.split()[0]
+    return best_type
+
+
+def is_slow_source(path: Path) -> bool:
+    """
+    Indica se a origem está em sistema de arquivos de rede ou em disco rotacional.
+
+    Args:
+        path: Arquivo ou diretório de origem
+
+    Returns:
+        True se a leitura da origem tende a ser o gargalo da cópia
+    """
+    fs_type = filesystem_type(path)
+    if fs_type is not None and fs_type.rpartition(".")[2] in REMOTE_FS_TYPES:
+        return True
+    return is_rotational(path) is True
+
+
+def resolve_delta(mode: Union[bool, str], source: Path) -> bool:
+    """
+    Decide se a transferência delta fica ativa para uma origem.
+
+    Args:
+        mode: Modo pedido (ver DELTA_MODES); True equivale a 'always' e False a 'off'
+        source: Origem da cópia (o disco dela decide o modo 'auto')
+
+    Returns:
+        True se destinos existentes devem ser atualizados por delta
+    """
+    if mode is True:
+        mode = "always"
+    elif mode is False or mode is None:
+        mode = "off"
+    if mode not in DELTA_MODES:
+        raise ValueError(f"Modo delta não suportado: {mode}")
+    if mode == "auto":
+        return is_slow_source(source)
+    return mode == "always"
+
+
+class DeltaTransfer:
+    """
+    Atualiza um destino existente reescrevendo apenas as regiões que diferem da origem.
+
+    O destino atual é dividido em blocos com checksum fraco (Adler-32, deslizante)
+    e hash forte (BLAKE2b). A origem é percorrida com uma janela deslizante: blocos
+    encontrados no destino são reaproveitados, o restante é escrito como literal.
+    O resultado é montado em um arquivo temporário e renomeado sobre o destino, de
+    modo que o arquivo inteiro é regravado (bytes_written = tamanho da origem);
+    bytes_reused só conta os dados copiados do próprio destino.
+
+    No modo in-place, cada bloco da origem é comparado ao bloco na mesma posição do
+    destino e só os diferentes são gravados, direto no destino (sem janela
+    deslizante: inserções deslocam o restante e viram literais). Não é atômico
+    (uma interrupção deixa o destino misturado) e altera todos os hard links do
+    arquivo; por isso só é usado quando a durabilidade não exige rename atômico.
+    """
+
+    def __init__(self, block_size: Optional[int] = None, in_place: bool = False):
+        """
+        Inicializa a transferência delta.
+
+        Args:
+            block_size: Tamanho de bloco fixo (None = escolhido pelo tamanho do destino)
+            in_place: Grava só os blocos alterados direto no destino
+        """
+        self.block_size = block_size
+        self.in_place = in_place
+        self.bytes_reused = 0
+        self.bytes_literal = 0
+        # Bytes efetivamente gravados no disco de destino
+        self.bytes_written = 0
+
+    @staticmethod
+    def _strong_hash(data) -> bytes:
+        """Calcula o hash forte de um bloco."""
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def build_signature(self, basis_file: Path, block_size: int) -> Dict[int, Dict[bytes, int]]:
+        """
+        Calcula a assinatura dos blocos completos do arquivo base (destino atual).
+
+        Args:
+            basis_file: Arquivo base
+            block_size: Tamanho dos blocos
+
+        Returns:
+            Dicionário checksum_fraco -> {hash_forte: índice_do_bloco}
+        """
+        signature: Dict[int, Dict[bytes, int]] = {}
+        with open(basis_file, 'rb') as f:
+            index = 0
+            while True:
+                block = f.read(block_size)
+                if len(block) < block_size:
+                    break
+                strong_map = signature.setdefault(zlib.adler32(block), {})
+                strong_map.setdefault(self._strong_hash(block), index)
+                index += 1
+        return signature
+
+    def transfer(self, source_file: Path, dest_file: Path,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 checkpoint: Optional[Callable[[], bool]] = None,
+                 durability=None, hasher=None, commit_item=None) -> bool:
+        """
+        Atualiza `dest_file` para ficar idêntico a `source_file`.
+
+        Args:
+            source_file: Arquivo de origem
+            dest_file: Arquivo de destino existente (base)
+            progress_callback: Chamado com (bytes_processados, tamanho_total)
+            checkpoint: Chamado a cada leitura; retorna False para cancelar
+            durability: DurabilityManager opcional usado para efetivar o rename
+            hasher: Objeto de hash opcional alimentado com todos os bytes da origem
+            commit_item: Identificação do arquivo nas falhas do DurabilityManager
+
+        Returns:
+            True se concluído, False se cancelado
+        """
+        self.bytes_reused = 0
+        self.bytes_literal = 0
+        self.bytes_written = 0
+
+        file_size = source_file.stat().st_size
+        block_size = self.block_size or choose_block_size(dest_file.stat().st_size)
+
+        if self.in_place and (durability is None or not durability.atomic):
+            if not self._update_in_place(source_file, dest_file, block_size, file_size,
+                                         progress_callback, checkpoint, hasher):
+                return False
+            shutil.copystat(source_file, dest_file)
+            if durability is not None:
+                durability.commit(dest_file, dest_file, file_size, commit_item)
+            return True
+
+        signature = self.build_signature(dest_file, block_size)
+        tmp_file = dest_file.with_name(f".{dest_file.name}.delta")
+
+        try:
+            completed = self._write_delta(source_file, dest_file, tmp_file, block_size, signature,
+                                          file_size, progress_callback, checkpoint, hasher)
+        except Exception:
+            self._remove(tmp_file)
+            raise
+
+        if not completed:
+            self._remove(tmp_file)
+            return False
+
+        self.bytes_written = file_size
+        shutil.copystat(source_file, tmp_file)
+        if durability is not None:
+            durability.commit(tmp_file, dest_file, file_size, commit_item)
+        else:
+            os.replace(tmp_file, dest_file)
+        return True
+
+    def _update_in_place(self, source_file: Path, dest_file: Path, block_size: int, file_size: int,
+                         progress_callback, checkpoint, hasher) -> bool:
+        """Grava no destino só os blocos que diferem da origem na mesma posição."""
+        with open(source_file, 'rb') as src, open(dest_file, 'r+b') as out:
+            offset = 0
+            while True:
+                if checkpoint and not checkpoint():
+                    return False
+                chunk = src.read(READ_SIZE)
+                if not chunk:
+                    break
+                if hasher is not None:
+                    hasher.update(chunk)
+                current = out.read(len(chunk))
+                if current == chunk:
+                    self.bytes_reused += len(chunk)
+                else:
+                    view = memoryview(chunk)
+                    for start in range(0, len(chunk), block_size):
+                        block = view[start:start + block_size]
+                        if current[start:start + block_size] == block:
+                            self.bytes_reused += len(block)
+                            continue
+                        out.seek(offset + start)
+                        out.write(block)
+                        self.bytes_literal += len(block)
+                        self.bytes_written += len(block)
+                    out.seek(offset + len(chunk))
+                offset += len(chunk)
+                if progress_callback:
+                    progress_callback(offset, file_size)
+            out.truncate(offset)
+        return True
+
+    def _write_delta(self, source_file: Path, basis_file: Path, tmp_file: Path, block_size: int,
+                     signature: Dict[int, Dict[bytes, int]], file_size: int,
+                     progress_callback, checkpoint, hasher) -> bool:
+        """Percorre a origem com janela deslizante e monta o novo arquivo."""
+        buf = bytearray()
+        pos = 0  # Início da janela atual em buf
+        literal_start = 0  # Início dos bytes ainda não emitidos
+        eof = False
+        weak = None
+        a = b = 0
+
+        with open(source_file, 'rb') as src, open(basis_file, 'rb') as basis, open(tmp_file, 'wb') as out:
+            while True:
+                # Garante pelo menos um byte além da janela (necessário para deslizar)
+                if len(buf) - pos <= block_size and not eof:
+                    if checkpoint and not checkpoint():
+                        return False
+                    if pos > literal_start:
+                        out.write(buf[literal_start:pos])
+                        self.bytes_literal += pos - literal_start
+                    del buf[:pos]
+                    pos = literal_start = 0
+                    chunk = src.read(READ_SIZE)
+                    if chunk:
+                        buf += chunk
+                        if hasher is not None:
+                            hasher.update(chunk)
+                        if progress_callback:
+                            progress_callback(src.tell(), file_size)
+                    else:
+                        eof = True
+                    continue
+
+                remaining = len(buf) - pos
+                if remaining < block_size:
+                    break
+
+                if weak is None:
+                    weak = zlib.adler32(bytes(buf[pos:pos + block_size]))
+                    a = weak & 0xFFFF
+                    b = weak >> 16
+
+                strong_map = signature.get(weak)
+                if strong_map:
+                    index = strong_map.get(self._strong_hash(bytes(buf[pos:pos + block_size])))
+                    if index is not None:
+                        if pos > literal_start:
+                            out.write(buf[literal_start:pos])
+                            self.bytes_literal += pos - literal_start
+                        basis.seek(index * block_size)
+                        out.write(basis.read(block_size))
+                        self.bytes_reused += block_size
+                        pos += block_size
+                        literal_start = pos
+                        weak = None
+                        continue
+
+                if remaining == block_size:
+                    # Fim da origem: nada mais para deslizar
+                    break
+
+                # Desliza a janela um byte (atualização incremental do Adler-32)
+                out_byte = buf[pos]
+                in_byte = buf[pos + block_size]
+                a = (a - out_byte + in_byte) % ADLER_MOD
+                b = (b - block_size * out_byte + a - 1) % ADLER_MOD
+                weak = (b << 16) | a
+                pos += 1
+
+            if len(buf) > literal_start:
+                out.write(buf[literal_start:])
+                self.bytes_literal += len(buf) - literal_start
+
+        return True
+
+    @staticmethod
+    def _remove(path: Path):
+        """Remove arquivo temporário ignorando erros."""
+        try:
+            path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,504 @@
+"""
+Módulo: digests.py
+Responsável pelo registro de algoritmos de hash (digests) selecionáveis:
+SHA/MD5 e BLAKE2 da biblioteca padrão, CRC32 e, quando instalados,
+BLAKE3, xxHash3 e CRC32C.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import errno
+import hashlib
+import mmap
+import os
+import queue
+import random
+import threading
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Dependências opcionais (aceleradas em C/Rust)
+try:
+    import blake3 as _blake3
+except ImportError:
+    _blake3 = None
+
+try:
+    import xxhash as _xxhash
+except ImportError:
+    _xxhash = None
+
+try:
+    import crc32c as _crc32c
+except ImportError:
+    _crc32c = None
+
+try:
+    import google_crc32c as _google_crc32c
+except ImportError:
+    _google_crc32c = None
+
+
+# Algoritmo padrão (usado quando a configuração não define outro)
+DEFAULT_ALGORITHM = "sha256"
+
+# Tamanho padrão do buffer de leitura ao calcular hashes de arquivos
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Faixa de tamanhos em que o mmap é usado (quando habilitado)
+MMAP_MIN_SIZE = 1024 * 1024
+MMAP_MAX_SIZE = 256 * 1024 * 1024
+
+# Buffers lidos à frente no hash em pipeline e tamanho mínimo para usá-lo
+DEFAULT_READ_AHEAD = 4
+PIPELINE_MIN_SIZE = 16 * 1024 * 1024
+
+# Amostragem: blocos aleatórios (além do início e do fim) e tamanho de cada bloco
+DEFAULT_SAMPLE_BLOCKS = 8
+DEFAULT_SAMPLE_BLOCK_SIZE = 64 * 1024  # 64KB
+
+# Uso do page cache na leitura:
+# - normal: leitura comum (o que estiver em cache é reaproveitado)
+# - drop:   fsync + posix_fadvise(DONTNEED) antes de ler (força a leitura do disco)
+#           e descarte das páginas já lidas (não ocupa o cache de outros processos)
+# - direct: O_DIRECT com buffer alinhado, sem passar pelo cache; onde o sistema de
+#           arquivos não suporta, cai para 'drop'
+CACHE_MODES = ("normal", "drop", "direct")
+
+# Alinhamento de buffer, offset e tamanho exigido pelo O_DIRECT
+DIRECT_ALIGNMENT = 4096
+
+# Bytes lidos entre descartes das páginas já usadas no modo 'drop'
+DROP_INTERVAL = 32 * 1024 * 1024
+
+# hashlib.file_digest (Python 3.11+)
+_file_digest = getattr(hashlib, "file_digest", None)
+
+# Pacote a instalar para cada algoritmo opcional
+OPTIONAL_PACKAGES = {
+    "blake3": "blake3",
+    "xxh3_64": "xxhash",
+    "xxh3_128": "xxhash",
+    "crc32c": "crc32c",
+}
+
+
+class _ChecksumHasher:
+    """Adapta uma função de checksum incremental (crc, valor) à interface do hashlib."""
+
+    digest_size = 4
+
+    def __init__(self, name: str, update_func: Callable[[bytes, int], int]):
+        self.name = name
+        self._update_func = update_func
+        self._value = 0
+
+    def update(self, data):
+        self._value = self._update_func(data, self._value)
+
+    def digest(self) -> bytes:
+        return self._value.to_bytes(4, "big")
+
+    def hexdigest(self) -> str:
+        return f"{self._value:08x}"
+
+    def copy(self):
+        clone = _ChecksumHasher(self.name, self._update_func)
+        clone._value = self._value
+        return clone
+
+
+def _crc32c_update(data, value: int) -> int:
+    """CRC32C incremental com o pacote disponível."""
+    if _crc32c is not None:
+        return _crc32c.crc32c(data, value)
+    return _google_crc32c.extend(value, bytes(data))
+
+
+# Registro: nome -> fábrica de objetos de hash (update/digest/hexdigest)
+_REGISTRY: Dict[str, Callable[[], object]] = {
+    "sha256": hashlib.sha256,
+    "sha512": hashlib.sha512,
+    "sha1": hashlib.sha1,
+    "md5": hashlib.md5,
+    "blake2b": hashlib.blake2b,
+    "blake2s": hashlib.blake2s,
+    "crc32": lambda: _ChecksumHasher("crc32", zlib.crc32),
+}
+
+if _blake3 is not None:
+    _REGISTRY["blake3"] = _blake3.blake3
+
+if _xxhash is not None:
+    _REGISTRY["xxh3_64"] = _xxhash.xxh3_64
+    _REGISTRY["xxh3_128"] = _xxhash.xxh3_128
+
+if _crc32c is not None or _google_crc32c is not None:
+    _REGISTRY["crc32c"] = lambda: _ChecksumHasher("crc32c", _crc32c_update)
+
+
+def register_digest(name: str, factory: Callable[[], object]):
+    """
+    Registra (ou substitui) um algoritmo de hash.
+
+    Args:
+        name: Nome do algoritmo (ex.: 'sha3_256')
+        factory: Função sem argumentos que retorna um objeto com update() e hexdigest()
+    """
+    _REGISTRY[name.lower()] = factory
+
+
+def available_algorithms() -> List[str]:
+    """
+    Lista os algoritmos disponíveis neste ambiente.
+
+    Returns:
+        Nomes dos algoritmos registrados
+    """
+    return sorted(_REGISTRY)
+
+
+def is_available(algorithm: str) -> bool:
+    """Indica se o algoritmo pode ser usado neste ambiente."""
+    return bool(algorithm) and algorithm.lower() in _REGISTRY
+
+
+def create_hasher(algorithm: str):
+    """
+    Cria um objeto de hash para o algoritmo informado.
+
+    Args:
+        algorithm: Nome do algoritmo (ver available_algorithms)
+
+    Returns:
+        Objeto compatível com hashlib (update/hexdigest)
+    """
+    factory = _REGISTRY.get((algorithm or "").lower())
+    if factory is None:
+        package = OPTIONAL_PACKAGES.get((algorithm or "").lower())
+        if package:
+            raise ValueError(f"Algoritmo {algorithm} requer o pacote opcional '{package}'")
+        raise ValueError(f"Algoritmo não suportado: {algorithm}")
+    return factory()
+
+
+def update_from_file(hasher, f, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Alimenta um objeto de hash com o conteúdo de um arquivo aberto.
+
+    Usa um único buffer reutilizado com readinto, sem alocar um bytes por chunk.
+
+    Args:
+        hasher: Objeto de hash (update)
+        f: Arquivo aberto em modo binário
+        chunk_size: Tamanho do buffer de leitura
+
+    Returns:
+        Bytes lidos
+    """
+    buffer = bytearray(max(1, chunk_size))
+    view = memoryview(buffer)
+    total = 0
+    while True:
+        read = f.readinto(buffer)
+        if not read:
+            break
+        hasher.update(view[:read])
+        total += read
+    return total
+
+
+def evict_cache(fd: int, offset: int = 0, length: int = 0) -> bool:
+    """
+    Descarta do page cache as páginas de um trecho do arquivo.
+
+    Páginas sujas não são descartadas pelo DONTNEED; chame os.fsync antes quando
+    o arquivo acabou de ser gravado.
+
+    Args:
+        fd: Descritor do arquivo
+        offset: Início do trecho
+        length: Tamanho do trecho (0 = até o fim)
+
+    Returns:
+        False se o sistema não tem posix_fadvise
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        return False
+    return True
+
+
+def update_uncached(hasher, f, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Alimenta um objeto de hash lendo o arquivo do disco, não do page cache.
+
+    O arquivo é sincronizado e suas páginas descartadas antes da leitura; durante
+    a leitura, as páginas já processadas são descartadas a cada DROP_INTERVAL.
+
+    Args:
+        hasher: Objeto de hash (update)
+        f: Arquivo aberto em modo binário
+        chunk_size: Tamanho do buffer de leitura
+
+    Returns:
+        Bytes lidos
+    """
+    fd = f.fileno()
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    if not evict_cache(fd):
+        return update_from_file(hasher, f, chunk_size)
+    if hasattr(os, "POSIX_FADV_SEQUENTIAL"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+    buffer = bytearray(max(1, chunk_size))
+    view = memoryview(buffer)
+    total = 0
+    dropped = 0
+    while True:
+        read = f.readinto(buffer)
+        if not read:
+            break
+        hasher.update(view[:read])
+        total += read
+        if total - dropped >= DROP_INTERVAL:
+            evict_cache(fd, dropped, total - dropped)
+            dropped = total
+    evict_cache(fd)
+    return total
+
+
+def _update_direct(hasher, file_path: Path, chunk_size: int) -> Optional[int]:
+    """
+    Alimenta um objeto de hash lendo com O_DIRECT.
+
+    O buffer é um mmap anônimo (alinhado à página) com tamanho múltiplo de
+    DIRECT_ALIGNMENT; os offsets ficam alinhados porque só a última leitura
+    volta incompleta.
+
+    Returns:
+        Bytes lidos ou None se O_DIRECT não é suportado (nada foi passado ao hasher)
+    """
+    if not hasattr(os, "O_DIRECT") or not hasattr(os, "preadv"):
+        return None
+    try:
+        fd = os.open(file_path, os.O_RDONLY | os.O_DIRECT)
+    except OSError as e:
+        if e.errno == errno.EINVAL:
+            return None
+        raise
+    size = max(DIRECT_ALIGNMENT, -(-chunk_size // DIRECT_ALIGNMENT) * DIRECT_ALIGNMENT)
+    buffer = mmap.mmap(-1, size)
+    view = memoryview(buffer)
+    total = 0
+    try:
+        while True:
+            try:
+                read = os.preadv(fd, [buffer], total)
+            except OSError as e:
+                if e.errno == errno.EINVAL and total == 0:
+                    return None
+                raise
+            if read:
+                hasher.update(view[:read])
+                total += read
+            if read < size:
+                return total
+    finally:
+        view.release()
+        buffer.close()
+        os.close(fd)
+
+
+def _read_ahead(f, buffers: List[bytearray], free: queue.Queue, filled: queue.Queue,
+                stop: threading.Event):
+    """Thread leitora do hash em pipeline: preenche os buffers livres em ordem."""
+    try:
+        while True:
+            index = free.get()
+            if index is None or stop.is_set():
+                return
+            read = f.readinto(buffers[index])
+            filled.put((index, read))
+            if not read:
+                return
+    except BaseException as e:
+        filled.put((None, e))
+
+
+def update_pipelined(hasher, f, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     depth: int = DEFAULT_READ_AHEAD) -> int:
+    """
+    Alimenta um objeto de hash lendo o arquivo em uma thread separada.
+
+    Uma thread leitora preenche um anel de `depth` buffers pré-alocados enquanto
+    a thread chamadora calcula o hash dos já lidos. Leitura e hash liberam o GIL,
+    então o disco e a CPU trabalham ao mesmo tempo e o throughput fica limitado
+    pelo mais lento dos dois.
+
+    Args:
+        hasher: Objeto de hash (update)
+        f: Arquivo aberto em modo binário
+        chunk_size: Tamanho de cada buffer
+        depth: Quantidade de buffers no anel (mínimo 2)
+
+    Returns:
+        Bytes lidos
+    """
+    depth = max(2, depth)
+    buffers = [bytearray(max(1, chunk_size)) for _ in range(depth)]
+    views = [memoryview(buffer) for buffer in buffers]
+    free: queue.Queue = queue.Queue()
+    filled: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    for index in range(depth):
+        free.put(index)
+
+    reader = threading.Thread(target=_read_ahead, args=(f, buffers, free, filled, stop),
+                              name="hash-read-ahead", daemon=True)
+    reader.start()
+    total = 0
+    try:
+        while True:
+            index, read = filled.get()
+            if index is None:
+                raise read
+            if not read:
+                break
+            hasher.update(views[index][:read])
+            total += read
+            free.put(index)
+    finally:
+        stop.set()
+        free.put(None)
+        reader.join()
+    return total
+
+
+def hash_file(file_path: Path, algorithm: str = DEFAULT_ALGORITHM,
+              chunk_size: Optional[int] = None, use_mmap: bool = False,
+              read_ahead: int = 0, cache_mode: str = "normal") -> str:
+    """
+    Calcula o hash de um arquivo.
+
+    Com chunk_size None usa hashlib.file_digest (quando disponível); caso
+    contrário lê com readinto em um buffer do tamanho informado. Com use_mmap,
+    arquivos entre MMAP_MIN_SIZE e MMAP_MAX_SIZE são mapeados e processados em
+    uma única chamada (o arquivo não deve ser truncado durante a leitura). Com
+    read_ahead, arquivos a partir de PIPELINE_MIN_SIZE são lidos em pipeline
+    (ver update_pipelined). Com cache_mode 'drop' ou 'direct', o arquivo é lido
+    do disco sem usar nem ocupar o page cache (ver CACHE_MODES); mmap e
+    pipeline são ignorados nesses modos.
+
+    Args:
+        file_path: Caminho do arquivo
+        algorithm: Algoritmo de hash (ver available_algorithms)
+        chunk_size: Tamanho do buffer de leitura (None = padrão do Python ou DEFAULT_CHUNK_SIZE)
+        use_mmap: Usa mmap para arquivos de tamanho médio
+        read_ahead: Buffers lidos à frente em arquivos grandes (0 = sem pipeline)
+        cache_mode: 'normal', 'drop' ou 'direct'
+
+    Returns:
+        Hash hexadecimal do arquivo
+    """
+    if cache_mode not in CACHE_MODES:
+        raise ValueError(f"Modo de cache não suportado: {cache_mode}")
+    hasher = create_hasher(algorithm)
+    if cache_mode == "direct":
+        if _update_direct(hasher, file_path, chunk_size or DEFAULT_CHUNK_SIZE) is not None:
+            return hasher.hexdigest()
+        cache_mode = "drop"
+    with open(file_path, 'rb', buffering=0) as f:
+        if cache_mode == "drop":
+            update_uncached(hasher, f, chunk_size or DEFAULT_CHUNK_SIZE)
+            return hasher.hexdigest()
+        if use_mmap or read_ahead:
+            size = os.fstat(f.fileno()).st_size
+            if use_mmap and MMAP_MIN_SIZE <= size <= MMAP_MAX_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hasher.update(mapped)
+                return hasher.hexdigest()
+            if read_ahead and size >= PIPELINE_MIN_SIZE:
+                update_pipelined(hasher, f, chunk_size or DEFAULT_CHUNK_SIZE, read_ahead)
+                return hasher.hexdigest()
+        if chunk_size is None and _file_digest is not None:
+            return _file_digest(f, lambda: hasher).hexdigest()
+        update_from_file(hasher, f, chunk_size or DEFAULT_CHUNK_SIZE)
+    return hasher.hexdigest()
+
+
+def sample_offsets(size: int, blocks: int = DEFAULT_SAMPLE_BLOCKS,
+                   block_size: int = DEFAULT_SAMPLE_BLOCK_SIZE, seed: int = 0,
+                   key: str = "") -> Optional[List[int]]:
+    """
+    Escolhe os blocos lidos no hash por amostragem.
+
+    A escolha depende do tamanho do arquivo, da semente e de `key` (o caminho
+    relativo, igual na origem e no destino), então origem e destino amostram os
+    mesmos blocos, enquanto arquivos diferentes de mesmo tamanho amostram regiões
+    diferentes. Trocar a semente (ex.: a data) faz verificações sucessivas cobrirem
+    outras regiões.
+
+    Args:
+        size: Tamanho do arquivo
+        blocks: Blocos aleatórios além do primeiro e do último
+        block_size: Tamanho de cada bloco
+        seed: Semente da escolha
+        key: Identificação do arquivo misturada à semente (ex.: caminho relativo)
+
+    Returns:
+        Deslocamentos ordenados, ou None se a amostra cobriria o arquivo inteiro
+    """
+    block_size = max(1, block_size)
+    total_blocks = -(-size // block_size)
+    if total_blocks <= blocks + 2:
+        return None
+    rng = random.Random(f"{seed}:{size}:{key}")
+    middle = rng.sample(range(1, total_blocks - 1), blocks)
+    return [0] + sorted(index * block_size for index in middle) + [size - block_size]
+
+
+def sample_hash(file_path: Path, algorithm: str = DEFAULT_ALGORITHM,
+                blocks: int = DEFAULT_SAMPLE_BLOCKS, block_size: int = DEFAULT_SAMPLE_BLOCK_SIZE,
+                seed: int = 0, key: str = "") -> Tuple[str, bool]:
+    """
+    Calcula o hash de uma amostra determinística do arquivo: início, fim e
+    `blocks` blocos escolhidos por sample_offsets.
+
+    O tamanho e os deslocamentos entram no hash. Arquivos pequenos demais para
+    amostrar são hasheados por completo.
+
+    Args:
+        file_path: Caminho do arquivo
+        algorithm: Algoritmo de hash (ver available_algorithms)
+        blocks: Blocos aleatórios além do primeiro e do último
+        block_size: Tamanho de cada bloco
+        seed: Semente da escolha dos blocos
+        key: Identificação do arquivo misturada à semente (a mesma na origem e no destino)
+
+    Returns:
+        Tupla (hash hexadecimal, completo) — completo=True se o arquivo foi lido inteiro
+    """
+    hasher = create_hasher(algorithm)
+    with open(file_path, 'rb', buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        offsets = sample_offsets(size, blocks, block_size, seed, key)
+        hasher.update(size.to_bytes(8, "big"))
+        if offsets is None:
+            update_from_file(hasher, f, DEFAULT_CHUNK_SIZE)
+            return hasher.hexdigest(), True
+        buffer = bytearray(block_size)
+        view = memoryview(buffer)
+        for offset in offsets:
+            f.seek(offset)
+            read = f.readinto(buffer)
+            hasher.update(offset.to_bytes(8, "big"))
+            hasher.update(view[:read])
+    return hasher.hexdigest(), False
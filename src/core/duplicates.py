@@ -0,0 +1,315 @@
+"""
+Módulo: duplicates.py
+Responsável pela busca de arquivos duplicados a partir da varredura de diretórios.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .scanner import DirectoryScanner
+from .verifier import create_hasher, hash_file
+
+
+# Bytes lidos do início e do fim de cada arquivo no hash parcial
+PARTIAL_SIZE = 4 * 1024  # 4KB
+
+# Quantidade de arquivos processados por lote (limita a memória usada)
+BATCH_FILES = 4096
+
+# Inserções no manifesto temporário agrupadas por transação
+INSERT_BATCH = 10000
+
+# Bloco de leitura do hash completo
+READ_SIZE = 1024 * 1024  # 1MB
+
+
+class DuplicateFinder:
+    """
+    Encontra arquivos com conteúdo idêntico estreitando os candidatos em etapas.
+
+    1. A varredura é gravada em um manifesto SQLite temporário e agrupada por tamanho;
+       tamanhos únicos são descartados sem ler o arquivo.
+    2. Arquivos com tamanho repetido recebem um hash parcial (início e fim).
+    3. Só as colisões do hash parcial são hasheadas por completo, em paralelo.
+
+    Os grupos são processados em lotes e entregues à medida que são confirmados,
+    então a memória usada não depende do número de arquivos varridos. Um tamanho
+    com mais de BATCH_FILES arquivos é hasheado em partes, com os hashes gravados
+    no manifesto e as colisões agrupadas pelo SQLite.
+    """
+
+    def __init__(self, path: Path, algorithm: str = "sha256", max_workers: int = 4,
+                 min_size: int = 1, partial_size: int = PARTIAL_SIZE,
+                 progress_callback: Optional[Callable] = None):
+        """
+        Inicializa o buscador de duplicados.
+
+        Args:
+            path: Diretório (ou arquivo) a analisar
+            algorithm: Algoritmo de hash ('sha256', 'md5', ...)
+            max_workers: Threads usadas nos hashes
+            min_size: Tamanho mínimo (bytes) dos arquivos considerados
+            partial_size: Bytes lidos do início e do fim no hash parcial
+            progress_callback: Chamado a cada etapa concluída de um lote
+                               Assinatura: callback(stage, files_done, bytes_hashed)
+        """
+        self.path = Path(path)
+        self.algorithm = algorithm
+        self.max_workers = max(1, max_workers)
+        self.min_size = max(1, min_size)
+        self.partial_size = max(1, partial_size)
+        self.progress_callback = progress_callback
+        self.files_scanned = 0
+        self.partial_hashed = 0
+        self.full_hashed = 0
+        self.bytes_hashed = 0
+        self.duplicate_groups = 0
+        self.wasted_bytes = 0
+        self.errors: List[Tuple[Path, str]] = []
+
+    def _report(self, stage: str, files_done: int):
+        """Emite progresso ignorando erros no callback."""
+        if self.progress_callback:
+            try:
+                self.progress_callback(stage, files_done, self.bytes_hashed)
+            except Exception:
+                pass
+
+    def _build_manifest(self, connection: sqlite3.Connection):
+        """Grava a varredura no manifesto temporário (um registro por arquivo)."""
+        connection.execute("CREATE TABLE files (path TEXT, size INTEGER, dev INTEGER, ino INTEGER)")
+        scanner = DirectoryScanner(self.path)
+        rows = []
+        for file_path, file_stat in scanner.iter_files():
+            self.files_scanned += 1
+            if file_stat.st_size < self.min_size:
+                continue
+            rows.append((str(file_path), file_stat.st_size, file_stat.st_dev, file_stat.st_ino))
+            if len(rows) >= INSERT_BATCH:
+                connection.executemany("INSERT INTO files VALUES (?, ?, ?, ?)", rows)
+                rows = []
+                self._report("scan", self.files_scanned)
+        if rows:
+            connection.executemany("INSERT INTO files VALUES (?, ?, ?, ?)", rows)
+        connection.execute("CREATE INDEX files_size ON files(size)")
+        for table in ("partial_hashes", "full_hashes"):
+            connection.execute(f"CREATE TABLE {table} (digest TEXT, path TEXT)")
+            connection.execute(f"CREATE INDEX {table}_digest ON {table}(digest)")
+        connection.commit()
+        self._report("scan", self.files_scanned)
+
+    @staticmethod
+    def _group_rows(connection: sqlite3.Connection, size: int) -> sqlite3.Cursor:
+        """Caminhos de um tamanho, um por inode (hardlinks contam uma única vez)."""
+        return connection.execute("SELECT MIN(path) FROM files WHERE size = ? GROUP BY dev, ino", (size,))
+
+    def _iter_size_batches(self, connection: sqlite3.Connection) -> Iterator[List[Tuple[int, Optional[List[Path]]]]]:
+        """
+        Agrupa o manifesto por tamanho e entrega lotes de grupos com tamanho repetido.
+
+        Hardlinks (mesmo dispositivo e inode) contam uma única vez. Um tamanho com
+        mais de BATCH_FILES arquivos não é carregado: vem sozinho no lote, como
+        (tamanho, None), para ser processado em partes por _process_large_size().
+        """
+        sizes = connection.execute(
+            "SELECT size FROM files GROUP BY size HAVING COUNT(*) > 1 ORDER BY size DESC")
+        batch: List[Tuple[int, Optional[List[Path]]]] = []
+        batch_files = 0
+        for (size,) in sizes:
+            (count,) = connection.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM files WHERE size = ? GROUP BY dev, ino)", (size,)).fetchone()
+            if count < 2:
+                continue
+            if count > BATCH_FILES:
+                if batch:
+                    yield batch
+                    batch = []
+                    batch_files = 0
+                yield [(size, None)]
+                continue
+            group = [Path(row[0]) for row in self._group_rows(connection, size)]
+            batch.append((size, group))
+            batch_files += len(group)
+            if batch_files >= BATCH_FILES:
+                yield batch
+                batch = []
+                batch_files = 0
+        if batch:
+            yield batch
+
+    def _partial_hash(self, file_path: Path, size: int) -> Optional[str]:
+        """Hash do início e do fim do arquivo (o arquivo inteiro se for pequeno)."""
+        hasher = create_hasher(self.algorithm)
+        try:
+            with open(file_path, 'rb') as f:
+                if size <= 2 * self.partial_size:
+                    hasher.update(f.read())
+                else:
+                    hasher.update(f.read(self.partial_size))
+                    f.seek(size - self.partial_size)
+                    hasher.update(f.read(self.partial_size))
+        except OSError as e:
+            self.errors.append((file_path, str(e)))
+            return None
+        return hasher.hexdigest()
+
+    def _full_hash(self, file_path: Path) -> Optional[str]:
+        """Hash completo do arquivo."""
+        try:
+            return hash_file(file_path, self.algorithm, chunk_size=READ_SIZE)
+        except OSError as e:
+            self.errors.append((file_path, str(e)))
+            return None
+
+    @staticmethod
+    def _collisions(items: List[Tuple[int, Path, Optional[str]]]) -> Dict[Tuple[int, str], List[Path]]:
+        """Agrupa (tamanho, hash) e mantém só os grupos com mais de um arquivo."""
+        groups: Dict[Tuple[int, str], List[Path]] = {}
+        for size, file_path, digest in items:
+            if digest is not None:
+                groups.setdefault((size, digest), []).append(file_path)
+        return {key: paths for key, paths in groups.items() if len(paths) > 1}
+
+    def _process_batch(self, executor: ThreadPoolExecutor,
+                       batch: List[Tuple[int, List[Path]]]) -> Iterator[Tuple[int, str, List[Path]]]:
+        """Aplica o hash parcial e o completo a um lote de grupos de mesmo tamanho."""
+        candidates = [(size, file_path) for size, group in batch for file_path in group]
+        partials = executor.map(lambda item: self._partial_hash(item[1], item[0]), candidates)
+        partial_groups = self._collisions(
+            [(size, file_path, digest) for (size, file_path), digest in zip(candidates, partials)])
+        self.partial_hashed += len(candidates)
+        self.bytes_hashed += sum(min(size, 2 * self.partial_size) for size, _ in candidates)
+        self._report("partial", self.partial_hashed)
+
+        # Arquivos pequenos já foram lidos por inteiro: o hash parcial é o definitivo
+        confirmed = {}
+        to_hash = []
+        for (size, digest), paths in partial_groups.items():
+            if size <= 2 * self.partial_size:
+                confirmed[(size, digest)] = paths
+            else:
+                to_hash.extend((size, file_path) for file_path in paths)
+
+        if to_hash:
+            fulls = executor.map(lambda item: self._full_hash(item[1]), to_hash)
+            confirmed.update(self._collisions(
+                [(size, file_path, digest) for (size, file_path), digest in zip(to_hash, fulls)]))
+            self.full_hashed += len(to_hash)
+            self.bytes_hashed += sum(size for size, _ in to_hash)
+            self._report("full", self.full_hashed)
+
+        for (size, digest), paths in confirmed.items():
+            self.duplicate_groups += 1
+            self.wasted_bytes += size * (len(paths) - 1)
+            yield size, digest, sorted(paths)
+
+    @staticmethod
+    def _iter_chunks(rows: sqlite3.Cursor) -> Iterator[List[Path]]:
+        """Lê os caminhos de um cursor em partes de até BATCH_FILES."""
+        while True:
+            chunk = [Path(row[0]) for row in rows.fetchmany(BATCH_FILES)]
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def _store_hashes(connection: sqlite3.Connection, table: str,
+                      chunk: List[Path], digests: Iterator[Optional[str]]):
+        """Grava no manifesto os hashes obtidos (arquivos com erro ficam de fora)."""
+        connection.executemany(f"INSERT INTO {table} VALUES (?, ?)",
+                               [(digest, str(file_path)) for file_path, digest in zip(chunk, digests)
+                                if digest is not None])
+
+    def _process_large_size(self, executor: ThreadPoolExecutor, connection: sqlite3.Connection,
+                            size: int) -> Iterator[Tuple[int, str, List[Path]]]:
+        """
+        Processa um tamanho com mais de BATCH_FILES arquivos, em partes de BATCH_FILES.
+
+        Os hashes de cada etapa vão para o manifesto, e as colisões são lidas de lá
+        agrupadas por hash: arquivos iguais em partes diferentes continuam se encontrando.
+        """
+        connection.execute("DELETE FROM partial_hashes")
+        connection.execute("DELETE FROM full_hashes")
+        for chunk in self._iter_chunks(self._group_rows(connection, size)):
+            self._store_hashes(connection, "partial_hashes", chunk,
+                               executor.map(lambda file_path: self._partial_hash(file_path, size), chunk))
+            self.partial_hashed += len(chunk)
+            self.bytes_hashed += min(size, 2 * self.partial_size) * len(chunk)
+            self._report("partial", self.partial_hashed)
+
+        # Arquivos pequenos já foram lidos por inteiro: o hash parcial é o definitivo
+        table = "partial_hashes"
+        if size > 2 * self.partial_size:
+            colliding = connection.execute(
+                "SELECT path FROM partial_hashes WHERE digest IN "
+                "(SELECT digest FROM partial_hashes GROUP BY digest HAVING COUNT(*) > 1)")
+            for chunk in self._iter_chunks(colliding):
+                self._store_hashes(connection, "full_hashes", chunk, executor.map(self._full_hash, chunk))
+                self.full_hashed += len(chunk)
+                self.bytes_hashed += size * len(chunk)
+                self._report("full", self.full_hashed)
+            table = "full_hashes"
+
+        rows = connection.execute(
+            f"SELECT digest, path FROM {table} WHERE digest IN "
+            f"(SELECT digest FROM {table} GROUP BY digest HAVING COUNT(*) > 1) ORDER BY digest")
+        for digest, group_rows in groupby(rows, key=lambda row: row[0]):
+            paths = sorted(Path(row[1]) for row in group_rows)
+            self.duplicate_groups += 1
+            self.wasted_bytes += size * (len(paths) - 1)
+            yield size, digest, paths
+
+    def find(self) -> Iterator[Tuple[int, str, List[Path]]]:
+        """
+        Busca os duplicados, entregando cada grupo assim que é confirmado.
+
+        Yields:
+            Tuplas (tamanho, hash, arquivos_idênticos)
+        """
+        self.files_scanned = 0
+        self.partial_hashed = 0
+        self.full_hashed = 0
+        self.bytes_hashed = 0
+        self.duplicate_groups = 0
+        self.wasted_bytes = 0
+        self.errors = []
+
+        fd, manifest_path = tempfile.mkstemp(prefix="duplicates_", suffix=".db")
+        os.close(fd)
+        connection = sqlite3.connect(manifest_path)
+        try:
+            self._build_manifest(connection)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for batch in self._iter_size_batches(connection):
+                    size, group = batch[0]
+                    if group is None:
+                        yield from self._process_large_size(executor, connection, size)
+                    else:
+                        yield from self._process_batch(executor, batch)
+        finally:
+            connection.close()
+            os.unlink(manifest_path)
+
+    def get_stats(self) -> dict:
+        """
+        Retorna estatísticas da última busca.
+
+        Returns:
+            Dicionário com contadores de cada etapa
+        """
+        return {
+            'files_scanned': self.files_scanned,
+            'partial_hashed': self.partial_hashed,
+            'full_hashed': self.full_hashed,
+            'bytes_hashed': self.bytes_hashed,
+            'duplicate_groups': self.duplicate_groups,
+            'wasted_bytes': self.wasted_bytes,
+            'errors': self.errors
+        }
@@ -0,0 +1,323 @@
+"""
+Módulo: durability.py
+Responsável pelos modos de durabilidade da cópia (fsync, group commit, syncfs)
+e pela gravação atômica via arquivo temporário + rename.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import ctypes
+import ctypes.util
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+
+# Modos de durabilidade suportados
+# - none:   sem fsync, escrita direta no destino (comportamento original)
+# - file:   fsync de cada arquivo antes do rename
+# - group:  fsync em lotes compartilhados entre workers (por tempo ou volume)
+# - syncfs: rename imediato e um único sync do sistema de arquivos no fim do job
+DURABILITY_MODES = ("none", "file", "group", "syncfs")
+
+# Sufixo dos arquivos temporários (o nome final só aparece após o rename)
+TEMP_SUFFIX = ".part"
+
+
+def _fsync_path(path: Path):
+    """Abre um arquivo e força seus dados para o disco."""
+    flags = os.O_RDWR if os.name == 'nt' else os.O_RDONLY
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_directory(directory: Path):
+    """Persiste a entrada de diretório (renames). Ignorado onde não é suportado."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _syncfs(path: Path):
+    """Sincroniza o sistema de arquivos que contém `path` (syncfs no Linux, sync nos demais)."""
+    libc_name = ctypes.util.find_library("c")
+    if libc_name:
+        try:
+            libc = ctypes.CDLL(libc_name, use_errno=True)
+            syncfs = libc.syncfs
+        except (OSError, AttributeError):
+            syncfs = None
+        if syncfs is not None:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                if syncfs(fd) == 0:
+                    return
+            finally:
+                os.close(fd)
+    if hasattr(os, "sync"):
+        os.sync()
+
+
+class DurabilityManager:
+    """
+    Aplica o modo de durabilidade às gravações de um job de cópia.
+
+    Uma mesma instância deve ser compartilhada entre todos os workers de um job,
+    para que o modo 'group' consiga agrupar fsyncs de arquivos de threads diferentes.
+
+    No modo 'group', commit() retorna antes do rename: o lote é efetivado quando
+    enche, quando um timer de `group_max_delay` expira ou em finish(). Uma falha
+    ao efetivar um lote não é levantada em quem disparou a descarga; ela é
+    registrada para todos os arquivos do lote e recolhida com take_failures().
+    """
+
+    def __init__(self, mode: str = "none", group_max_files: int = 256,
+                 group_max_bytes: int = 256 * 1024 * 1024, group_max_delay: float = 1.0):
+        """
+        Inicializa o gerenciador de durabilidade.
+
+        Args:
+            mode: Modo de durabilidade ('none', 'file', 'group' ou 'syncfs')
+            group_max_files: Arquivos pendentes que disparam um lote no modo 'group'
+            group_max_bytes: Bytes pendentes que disparam um lote no modo 'group'
+            group_max_delay: Segundos máximos de espera de um lote no modo 'group'
+        """
+        if mode not in DURABILITY_MODES:
+            raise ValueError(f"Modo de durabilidade não suportado: {mode}")
+        self.mode = mode
+        self.group_max_files = max(1, group_max_files)
+        self.group_max_bytes = max(1, group_max_bytes)
+        self.group_max_delay = group_max_delay
+        self.lock = threading.Lock()
+        self._pending: List[Tuple[Path, Path, Any]] = []
+        self._pending_bytes = 0
+        self._batch_started = 0.0
+        self._generation = 0
+        self._timer: Optional[threading.Timer] = None
+        # Lotes retirados e ainda em descarga (finish aguarda todos)
+        self._in_flight = 0
+        self._idle = threading.Condition(self.lock)
+        # Falhas de efetivação ainda não recolhidas: (destino, item, mensagem)
+        self.failures: List[Tuple[Path, Any, str]] = []
+        # Chamado com o caminho final de cada arquivo assim que ele fica visível
+        self.on_commit: Optional[Callable[[Path], None]] = None
+
+    @property
+    def atomic(self) -> bool:
+        """Indica se as gravações passam por arquivo temporário + rename."""
+        return self.mode != "none"
+
+    def write_path(self, dest_file: Path) -> Path:
+        """
+        Retorna o caminho onde os dados devem ser gravados.
+
+        Args:
+            dest_file: Caminho final do arquivo
+
+        Returns:
+            Arquivo temporário (nome determinístico, permite retomada) ou o próprio destino
+        """
+        if not self.atomic:
+            return dest_file
+        return dest_file.with_name(f".{dest_file.name}{TEMP_SUFFIX}")
+
+    def commit(self, written_file: Path, dest_file: Path, size: int = 0, item: Any = None):
+        """
+        Torna um arquivo gravado visível (e durável, conforme o modo).
+
+        Nos modos 'none', 'file' e 'syncfs', erros são levantados para o chamador.
+        No modo 'group', o arquivo entra no lote pendente e erros posteriores vão
+        para `failures` (ver take_failures).
+
+        Args:
+            written_file: Arquivo retornado por write_path()
+            dest_file: Caminho final do arquivo
+            size: Bytes gravados (usado pelo limite do modo 'group')
+            item: Identificação devolvida nas falhas do modo 'group' (ex.: arquivo
+                  de origem); None para gravações que não são arquivos do job
+        """
+        if self.mode == "none":
+            if written_file != dest_file:
+                os.replace(written_file, dest_file)
+            self._notify_commit(dest_file)
+            return
+
+        if self.mode == "file":
+            _fsync_path(written_file)
+            os.replace(written_file, dest_file)
+            _fsync_directory(dest_file.parent)
+            self._notify_commit(dest_file)
+            return
+
+        if self.mode == "syncfs":
+            os.replace(written_file, dest_file)
+            self._notify_commit(dest_file)
+            return
+
+        # Modo 'group': acumula e sincroniza em lote
+        batch = None
+        with self.lock:
+            if not self._pending:
+                self._batch_started = time.monotonic()
+                self._start_timer()
+            self._pending.append((written_file, dest_file, item))
+            self._pending_bytes += size
+            if (len(self._pending) >= self.group_max_files
+                    or self._pending_bytes >= self.group_max_bytes
+                    or time.monotonic() - self._batch_started >= self.group_max_delay):
+                batch = self._take_batch()
+        if batch:
+            self._flush_batch(batch)
+
+    def _start_timer(self):
+        """Agenda a descarga do lote recém-aberto após group_max_delay (chamar com o lock)."""
+        self._timer = threading.Timer(self.group_max_delay, self._flush_due, args=(self._generation,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_due(self, generation: int):
+        """Timer: descarrega o lote se ainda for o mesmo que abriu o timer."""
+        batch = None
+        with self.lock:
+            if generation == self._generation and self._pending:
+                batch = self._take_batch()
+        if batch:
+            self._flush_batch(batch)
+
+    def _notify_commit(self, dest_file: Path):
+        """Avisa o observador de que `dest_file` já está no caminho final."""
+        if self.on_commit:
+            self.on_commit(dest_file)
+
+    def _take_batch(self) -> List[Tuple[Path, Path, Any]]:
+        """Retira o lote pendente e desarma seu timer (chamar com o lock adquirido)."""
+        batch = self._pending
+        self._pending = []
+        self._pending_bytes = 0
+        self._generation += 1
+        if batch:
+            self._in_flight += 1
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush_batch(self, batch: List[Tuple[Path, Path, Any]]):
+        """
+        Sincroniza um lote: fsync dos dados, renames e fsync dos diretórios.
+
+        Um erro no fsync dos dados compromete o lote inteiro. Um erro em um rename
+        compromete só os arquivos a partir dele: os já renomeados estão no caminho
+        final (com os dados sincronizados) e são efetivados normalmente. A falha é
+        registrada para cada arquivo não efetivado.
+        """
+        renamed = 0
+        try:
+            try:
+                for written_file, _, _ in batch:
+                    _fsync_path(written_file)
+                for written_file, dest_file, _ in batch:
+                    os.replace(written_file, dest_file)
+                    renamed += 1
+            except OSError as e:
+                failed = batch[renamed:]
+                message = f"Falha ao efetivar o lote de gravação ({len(failed)} arquivo(s)): {e}"
+                with self.lock:
+                    self.failures.extend((dest_file, item, message) for _, dest_file, item in failed)
+            committed = batch[:renamed]
+            for directory in {dest_file.parent for _, dest_file, _ in committed}:
+                _fsync_directory(directory)
+            for _, dest_file, _ in committed:
+                self._notify_commit(dest_file)
+        finally:
+            with self.lock:
+                self._in_flight -= 1
+                self._idle.notify_all()
+
+    def sync_written(self, paths: Iterable[Path]):
+        """
+        Força para o disco arquivos gravados direto no caminho final, fora de commit()
+        (ex.: o pacote do modo arquivo).
+
+        Só age nos modos 'file' e 'group'; no 'syncfs' o sync de finish() já os cobre.
+        Não levanta exceções: falhas vão para `failures`, com item None.
+
+        Args:
+            paths: Arquivos a sincronizar (os inexistentes são ignorados)
+        """
+        if self.mode not in ("file", "group"):
+            return
+        directories = set()
+        for path in paths:
+            path = Path(path)
+            if not path.exists():
+                continue
+            try:
+                _fsync_path(path)
+            except OSError as e:
+                with self.lock:
+                    self.failures.append((path, None, f"Falha no fsync de {path}: {e}"))
+                continue
+            directories.add(path.parent)
+        for directory in directories:
+            _fsync_directory(directory)
+
+    def take_failures(self) -> List[Tuple[Path, Any, str]]:
+        """
+        Recolhe as falhas de efetivação registradas até aqui.
+
+        Returns:
+            Lista de (destino, item informado em commit, mensagem)
+        """
+        with self.lock:
+            failures = self.failures
+            self.failures = []
+        return failures
+
+    def finish(self, destinations: Iterable[Path] = ()):
+        """
+        Conclui o job: descarrega o lote pendente ou sincroniza os sistemas de arquivos.
+
+        Não levanta exceções: falhas vão para `failures` (no 'syncfs', com item None
+        e a raiz de destino cujo sync falhou).
+
+        Args:
+            destinations: Raízes de destino do job (usadas pelo modo 'syncfs')
+        """
+        if self.mode == "group":
+            with self.lock:
+                batch = self._take_batch()
+            if batch:
+                self._flush_batch(batch)
+            # Lotes descarregados pelo timer em outra thread
+            with self.lock:
+                while self._in_flight:
+                    self._idle.wait()
+        elif self.mode == "syncfs":
+            synced_devices = set()
+            for destination in destinations:
+                target = Path(destination)
+                try:
+                    while not target.exists() and target != target.parent:
+                        target = target.parent
+                    if not target.is_dir():
+                        target = target.parent
+                    device = target.stat().st_dev
+                    if device not in synced_devices:
+                        synced_devices.add(device)
+                        _syncfs(target)
+                except OSError as e:
+                    with self.lock:
+                        self.failures.append((Path(destination), None, f"Falha no sync do destino: {e}"))
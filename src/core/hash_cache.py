@@ -0,0 +1,189 @@
+"""
+Módulo: hash_cache.py
+Responsável pelo cache em memória de hashes de arquivos, limitado (LRU) e
+validado pelo stat do arquivo.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+# Limites padrão dos caches criados sem limites explícitos (ver set_default_limits)
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64MB
+
+# Custo aproximado de uma entrada além das strings (tupla, assinatura, nó do OrderedDict)
+ENTRY_OVERHEAD = 240
+
+# Assinatura: (st_dev, st_ino, tamanho, mtime_ns, ctime_ns)
+Signature = Tuple[int, int, int, int, int]
+
+_default_limits = {'max_entries': DEFAULT_MAX_ENTRIES, 'max_bytes': DEFAULT_MAX_BYTES}
+
+
+def set_default_limits(max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+                       max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+    """
+    Define os limites dos caches criados a partir de agora (ex.: a partir do Config).
+
+    Args:
+        max_entries: Entradas máximas (None = sem limite)
+        max_bytes: Memória aproximada máxima em bytes (None = sem limite)
+    """
+    _default_limits['max_entries'] = max_entries
+    _default_limits['max_bytes'] = max_bytes
+
+
+def stat_signature(stat: os.stat_result) -> Signature:
+    """Assinatura barata da versão de um arquivo."""
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns)
+
+
+class HashCache:
+    """
+    Cache LRU de hashes limitado por quantidade de entradas e memória aproximada.
+
+    Cada entrada guarda a assinatura do stat do arquivo no momento do hash; antes
+    de ser usada, a assinatura é comparada com um novo stat e, se o arquivo mudou,
+    a entrada é descartada. Os métodos são thread-safe.
+    """
+
+    _UNSET = object()
+
+    def __init__(self, max_entries=_UNSET, max_bytes=_UNSET):
+        """
+        Inicializa o cache.
+
+        Args:
+            max_entries: Entradas máximas (None = sem limite; padrão: set_default_limits)
+            max_bytes: Memória aproximada máxima em bytes (None = sem limite; padrão: set_default_limits)
+        """
+        self.max_entries = _default_limits['max_entries'] if max_entries is self._UNSET else max_entries
+        self.max_bytes = _default_limits['max_bytes'] if max_bytes is self._UNSET else max_bytes
+        self.lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Signature, str, int]]" = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(file_path: Path, algorithm: str) -> Tuple[str, str]:
+        return (os.fspath(file_path), algorithm.lower())
+
+    def _remove(self, key: Tuple[str, str]):
+        """Remove uma entrada (chamado com o lock adquirido)."""
+        _, _, size = self._entries.pop(key)
+        self.bytes_used -= size
+
+    def lookup(self, file_path: Path, algorithm: str) -> Tuple[os.stat_result, Optional[str]]:
+        """
+        Faz o stat do arquivo e busca seu hash, validando a assinatura.
+
+        Args:
+            file_path: Caminho do arquivo
+            algorithm: Algoritmo do hash
+
+        Returns:
+            Tupla (stat, hash_ou_None); o stat serve para um record posterior
+        """
+        stat = os.stat(file_path)
+        key = self._key(file_path, algorithm)
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return stat, None
+            if entry[0] != stat_signature(stat):
+                self._remove(key)
+                self.invalidations += 1
+                self.misses += 1
+                return stat, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return stat, entry[1]
+
+    def get(self, file_path: Path, algorithm: str) -> Optional[str]:
+        """
+        Busca o hash de um arquivo se ele não mudou desde o cálculo.
+
+        Returns:
+            Hash ou None (ausente, desatualizado ou arquivo inacessível)
+        """
+        try:
+            return self.lookup(file_path, algorithm)[1]
+        except OSError:
+            return None
+
+    def put(self, file_path: Path, stat: os.stat_result, algorithm: str, file_hash: str):
+        """
+        Guarda um hash, descartando as entradas menos usadas se exceder os limites.
+
+        Args:
+            file_path: Caminho do arquivo
+            stat: Stat obtido antes do hash
+            algorithm: Algoritmo do hash
+            file_hash: Hash hexadecimal
+        """
+        key = self._key(file_path, algorithm)
+        size = sys.getsizeof(key[0]) + sys.getsizeof(file_hash) + ENTRY_OVERHEAD
+        with self.lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (stat_signature(stat), file_hash, size)
+            self.bytes_used += size
+            while self._entries and (
+                    (self.max_entries is not None and len(self._entries) > self.max_entries)
+                    or (self.max_bytes is not None and self.bytes_used > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def record(self, file_path: Path, stat: os.stat_result, algorithm: str, file_hash: str):
+        """
+        Guarda um hash calculado se o arquivo não mudou durante o cálculo.
+
+        Args:
+            file_path: Caminho do arquivo
+            stat: Stat obtido antes do hash
+            algorithm: Algoritmo do hash
+            file_hash: Hash calculado
+        """
+        try:
+            current = os.stat(file_path)
+        except OSError:
+            return
+        if stat_signature(current) == stat_signature(stat):
+            self.put(file_path, stat, algorithm, file_hash)
+
+    def clear(self):
+        """Esvazia o cache (os contadores são mantidos)."""
+        with self.lock:
+            self._entries.clear()
+            self.bytes_used = 0
+
+    def stats(self) -> Dict:
+        """
+        Contadores para métricas.
+
+        Returns:
+            Dicionário com hits, misses, evictions, invalidations, entries e bytes
+        """
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'bytes': self.bytes_used,
+            }
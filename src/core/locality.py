@@ -0,0 +1,194 @@
+"""
+Módulo: locality.py
+Responsável pela ordenação dos arquivos pela posição física no disco (inode ou
+primeiro extent via FIEMAP), para reduzir seeks em discos rotacionais.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# fcntl só existe em sistemas POSIX (FIEMAP só no Linux)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Ordenações suportadas:
+# - off:    ordem da varredura
+# - auto:   'extent' se a origem estiver em disco rotacional, 'off' caso contrário (SSD)
+# - inode:  número do inode (próximo da ordem de alocação na maioria dos sistemas)
+# - extent: offset físico do primeiro extent (FIEMAP); inode onde não há FIEMAP
+LOCALITY_MODES = ("off", "auto", "inode", "extent")
+
+# Arquivos ordenados por vez quando a origem é percorrida em streaming
+LOCALITY_WINDOW = 10_000
+
+# Dispositivos de bloco por major:minor (ver is_rotational)
+SYS_DEV_BLOCK = Path("/sys/dev/block")
+
+# ioctl FS_IOC_FIEMAP: cabeçalho struct fiemap + um struct fiemap_extent
+_FS_IOC_FIEMAP = 0xC020660B
+_FIEMAP_HEADER = struct.Struct("=QQIIII")
+_FIEMAP_EXTENT = struct.Struct("=QQQQQIIII")
+_FIEMAP_MAX_OFFSET = 0xFFFFFFFFFFFFFFFF
+# Extent ainda sem posição no disco (ex.: alocação atrasada de dados não gravados)
+_FIEMAP_EXTENT_UNKNOWN = 0x2
+
+# Chave de ordenação: (dispositivo, sem extent conhecido, posição)
+LocalityKey = Tuple[int, int, int]
+
+
+def is_rotational(path: Path) -> Optional[bool]:
+    """
+    Indica se o caminho está em um disco rotacional (HDD).
+
+    Lê /sys/dev/block/<major>:<minor>/queue/rotational (ou o do disco pai, para
+    partições).
+
+    Args:
+        path: Arquivo ou diretório
+
+    Returns:
+        True (rotacional), False (SSD/NVMe/memória) ou None se não foi possível
+        identificar o dispositivo (ex.: sistemas de arquivos virtuais, fora do Linux)
+    """
+    try:
+        dev = os.stat(path).st_dev
+        device = (SYS_DEV_BLOCK / f"{os.major(dev)}:{os.minor(dev)}").resolve(strict=True)
+    except (OSError, AttributeError):
+        return None
+    for candidate in (device, device.parent):
+        try:
+            return (candidate / "queue" / "rotational").read_text().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def first_physical_offset(path: Path) -> Optional[int]:
+    """
+    Offset físico (em bytes) do primeiro extent do arquivo, via FIEMAP.
+
+    Args:
+        path: Arquivo
+
+    Returns:
+        Offset ou None (sem FIEMAP, arquivo vazio, dados inline ou ainda não
+        alocados, ou erro)
+    """
+    if fcntl is None:
+        return None
+    request = bytearray(_FIEMAP_HEADER.pack(0, _FIEMAP_MAX_OFFSET, 0, 0, 1, 0) + bytes(_FIEMAP_EXTENT.size))
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        fcntl.ioctl(fd, _FS_IOC_FIEMAP, request)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+    if not _FIEMAP_HEADER.unpack_from(request)[3]:
+        return None
+    extent = _FIEMAP_EXTENT.unpack_from(request, _FIEMAP_HEADER.size)
+    if extent[5] & _FIEMAP_EXTENT_UNKNOWN:
+        return None
+    return extent[1]
+
+
+def resolve_locality(mode: str, path: Path) -> str:
+    """
+    Resolve a ordenação efetiva para uma origem.
+
+    Args:
+        mode: Ordenação pedida (ver LOCALITY_MODES)
+        path: Origem (o disco dela decide o modo 'auto')
+
+    Returns:
+        'off', 'inode' ou 'extent'
+    """
+    if mode not in LOCALITY_MODES:
+        raise ValueError(f"Ordenação não suportada: {mode}")
+    if mode == "auto":
+        return "extent" if is_rotational(path) else "off"
+    return mode
+
+
+def locality_key(path: Path, mode: str, stat: Optional[os.stat_result] = None) -> LocalityKey:
+    """
+    Chave de ordenação física de um arquivo.
+
+    Args:
+        path: Arquivo
+        mode: 'inode' ou 'extent' (já resolvido)
+        stat: Stat do arquivo, se já conhecido
+
+    Returns:
+        Tupla (dispositivo, 0/1, posição); arquivos sem extent conhecido vêm depois
+        dos demais do mesmo dispositivo, em ordem de inode
+    """
+    if stat is None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return (0, 1, 0)
+    if mode == "extent":
+        offset = first_physical_offset(path)
+        if offset is not None:
+            return (stat.st_dev, 0, offset)
+        return (stat.st_dev, 1, stat.st_ino)
+    return (stat.st_dev, 0, stat.st_ino)
+
+
+def sort_by_locality(paths: List[Path], mode: str) -> List[Path]:
+    """
+    Ordena uma lista de arquivos pela posição física.
+
+    Args:
+        paths: Arquivos
+        mode: 'off', 'inode' ou 'extent' (já resolvido)
+
+    Returns:
+        Nova lista ordenada (a própria ordem se mode for 'off')
+    """
+    if mode == "off":
+        return list(paths)
+    return sorted(paths, key=lambda path: locality_key(path, mode))
+
+
+def iter_by_locality(items: Iterable[Tuple[Path, os.stat_result]], mode: str,
+                     window: int = LOCALITY_WINDOW) -> Iterator[Tuple[Path, os.stat_result]]:
+    """
+    Reordena um fluxo de (arquivo, stat) pela posição física, em janelas.
+
+    Só `window` arquivos ficam em memória: cada janela é ordenada e emitida antes
+    de ler a seguinte, mantendo a varredura em streaming.
+
+    Args:
+        items: Fluxo de (arquivo, stat) (ex.: DirectoryScanner.iter_files)
+        mode: 'off', 'inode' ou 'extent' (já resolvido)
+        window: Arquivos ordenados por vez
+
+    Yields:
+        Tuplas (arquivo, stat)
+    """
+    if mode == "off":
+        yield from items
+        return
+    batch = []
+    for item in items:
+        batch.append((locality_key(item[0], mode, item[1]), item))
+        if len(batch) >= window:
+            batch.sort(key=lambda keyed: keyed[0])
+            for _, sorted_item in batch:
+                yield sorted_item
+            batch = []
+    batch.sort(key=lambda keyed: keyed[0])
+    for _, sorted_item in batch:
+        yield sorted_item
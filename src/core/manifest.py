@@ -0,0 +1,674 @@
+"""
+Módulo: manifest.py
+Responsável pelos manifestos de checksums (formato sha256sum, hashdeep e
+binário compacto) e pela verificação de um destino contra um manifesto,
+sem precisar da origem.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import os
+import struct
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .chunk_tree import (ChunkTree, ChunkTreeReader, ChunkTreeWriter, chunks_path_for, find_bad_ranges,
+                         repair_and_recheck)
+from .digests import CACHE_MODES, create_hasher, hash_file
+from .result_sink import MAX_FAILURES_KEPT, ResultSink
+
+
+# Formatos suportados:
+# 'sum'      - uma linha "<hash>  <caminho>" (sha256sum, md5sum, b2sum...)
+# 'hashdeep' - CSV "tamanho,hash,caminho" com o cabeçalho do hashdeep
+# 'binary'   - registros binários (caminho, tamanho, digest em bytes)
+MANIFEST_FORMATS = ("sum", "hashdeep", "binary")
+
+# Extensão do manifesto por formato ('sum' usa o nome do algoritmo, ex.: .sha256)
+MANIFEST_EXTENSIONS = {"hashdeep": ".hashdeep", "binary": ".fcvm"}
+
+# Formato binário: cabeçalho = magia, versão, algoritmo, tamanho do digest e
+# quantidade de registros (gravada no fechamento); registro = caminho (u16 +
+# UTF-8), tamanho (u64) e digest
+BINARY_MAGIC = b"FCVM"
+BINARY_VERSION = 1
+_BINARY_COUNT = struct.Struct(">Q")
+_BINARY_RECORD = struct.Struct(">HQ")
+
+# Algoritmo presumido de um manifesto 'sum' pelo comprimento do hash
+SUM_ALGORITHMS_BY_LENGTH = {8: "crc32", 32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+
+# Leitura em blocos ao contar linhas de manifestos texto
+COUNT_READ_SIZE = 1024 * 1024
+
+# Arquivos em verificação simultânea por worker (limita futures pendentes)
+PENDING_PER_WORKER = 4
+
+
+def manifest_path_for(destination: Path, manifest_format: str, algorithm: str) -> Path:
+    """
+    Caminho padrão do manifesto de um destino: ao lado dele, fora da árvore copiada.
+
+    Args:
+        destination: Arquivo ou diretório de destino
+        manifest_format: Formato do manifesto
+        algorithm: Algoritmo dos hashes
+
+    Returns:
+        Ex.: /backup/fotos.sha256 para o destino /backup/fotos
+    """
+    destination = Path(destination)
+    extension = MANIFEST_EXTENSIONS.get(manifest_format, f".{algorithm.lower()}")
+    return destination.with_name(destination.name + extension)
+
+
+def find_manifest(destination: Path) -> Optional[Path]:
+    """Procura um manifesto ao lado do destino (qualquer formato)."""
+    destination = Path(destination)
+    candidates = [destination.with_name(destination.name + ext) for ext in MANIFEST_EXTENSIONS.values()]
+    candidates += [destination.with_name(destination.name + f".{name}")
+                   for name in sorted(set(SUM_ALGORITHMS_BY_LENGTH.values()) | {"blake2b", "blake3"})]
+    for candidate in candidates:
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _escape_sum_path(path: str) -> Tuple[str, bool]:
+    """Escapa um caminho como o sha256sum (barra invertida, quebras de linha)."""
+    if "\\" not in path and "\n" not in path and "\r" not in path:
+        return path, False
+    return path.replace("\\", "\\\\").replace("\n", "\\n").replace("\r", "\\r"), True
+
+
+def _unescape_sum_path(path: str) -> str:
+    """Desfaz o escape de caminho do sha256sum."""
+    result = []
+    chars = iter(path)
+    for char in chars:
+        if char == "\\":
+            escaped = next(chars, "")
+            result.append({"n": "\n", "r": "\r", "\\": "\\"}.get(escaped, escaped))
+        else:
+            result.append(char)
+    return "".join(result)
+
+
+class ManifestEntry:
+    """Uma linha do manifesto: caminho relativo (separador '/'), tamanho (se conhecido) e hash."""
+
+    __slots__ = ("path", "size", "hash")
+
+    def __init__(self, path: str, size: Optional[int], file_hash: str):
+        self.path = path
+        self.size = size
+        self.hash = file_hash
+
+    def __repr__(self):
+        return f"ManifestEntry({self.path!r}, {self.size!r}, {self.hash!r})"
+
+
+class ManifestWriter:
+    """Grava um manifesto em streaming (uma entrada por vez)."""
+
+    def __init__(self, manifest_path: Path, manifest_format: str = "sum", algorithm: str = "sha256",
+                 root: Optional[Path] = None, tree_chunk_size: Optional[int] = None):
+        """
+        Inicializa o gravador.
+
+        Args:
+            manifest_path: Arquivo do manifesto (sobrescrito)
+            manifest_format: 'sum', 'hashdeep' ou 'binary'
+            algorithm: Algoritmo dos hashes
+            root: Diretório a que os caminhos se referem (registrado no cabeçalho hashdeep)
+            tree_chunk_size: Se informado, grava também as árvores de blocos recebidas em
+                             add() no arquivo .chunks ao lado do manifesto
+        """
+        if manifest_format not in MANIFEST_FORMATS:
+            raise ValueError(f"Formato de manifesto não suportado: {manifest_format}")
+        self.manifest_path = Path(manifest_path)
+        self.manifest_format = manifest_format
+        self.algorithm = algorithm.lower()
+        self.digest_size = create_hasher(algorithm).digest_size
+        self.root = root
+        self.count = 0
+        self.skipped = 0
+        self._file = None
+        self.tree_chunk_size = tree_chunk_size
+        self.trees = (ChunkTreeWriter(chunks_path_for(self.manifest_path), self.algorithm, tree_chunk_size)
+                      if tree_chunk_size else None)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        """Cria o arquivo e grava o cabeçalho."""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.manifest_format == "binary":
+            self._file = open(self.manifest_path, 'wb')
+            name = self.algorithm.encode('ascii')
+            self._file.write(BINARY_MAGIC + bytes([BINARY_VERSION, len(name)]) + name
+                             + bytes([self.digest_size]) + _BINARY_COUNT.pack(0))
+            return
+        self._file = open(self.manifest_path, 'w', encoding='utf-8', errors='surrogateescape', newline='\n')
+        if self.manifest_format == "hashdeep":
+            self._file.write("%%%% HASHDEEP-1.0\n")
+            self._file.write(f"%%%% size,{self.algorithm},filename\n")
+            self._file.write(f"## Invoked from: {self.root or os.getcwd()}\n")
+            self._file.write("## $ filecopy-verifier\n##\n")
+
+    def add(self, relative_path: str, file_hash: str, size: Optional[int] = None,
+            tree: Optional[ChunkTree] = None) -> bool:
+        """
+        Acrescenta uma entrada.
+
+        O formato hashdeep não tem escape: caminhos com quebra de linha são
+        ignorados (contados em `skipped`).
+
+        Args:
+            relative_path: Caminho relativo à raiz (separador '/')
+            file_hash: Hash hexadecimal
+            size: Tamanho do arquivo (obrigatório nos formatos hashdeep e binário)
+            tree: Árvore de blocos do arquivo (ignorada sem tree_chunk_size)
+
+        Returns:
+            True se a entrada foi gravada
+        """
+        if self._file is None:
+            self.open()
+        if self.manifest_format == "sum":
+            path, escaped = _escape_sum_path(relative_path)
+            prefix = "\\" if escaped else ""
+            self._file.write(f"{prefix}{file_hash}  {path}\n")
+        elif self.manifest_format == "hashdeep":
+            if size is None:
+                raise ValueError("Manifesto hashdeep requer o tamanho do arquivo")
+            if "\n" in relative_path or "\r" in relative_path:
+                self.skipped += 1
+                return False
+            self._file.write(f"{size},{file_hash},{relative_path}\n")
+        else:
+            if size is None:
+                raise ValueError("Manifesto binário requer o tamanho do arquivo")
+            path = relative_path.encode('utf-8', 'surrogateescape')
+            self._file.write(_BINARY_RECORD.pack(len(path), size) + path + bytes.fromhex(file_hash))
+        self.count += 1
+        if tree is not None and self.trees is not None:
+            self.trees.add(relative_path, tree)
+        return True
+
+    def flush(self):
+        """Descarrega as entradas gravadas."""
+        if self._file is not None:
+            self._file.flush()
+        if self.trees is not None:
+            self.trees.flush()
+
+    def close(self):
+        """Finaliza o manifesto (no binário, grava a quantidade de registros)."""
+        if self.trees is not None:
+            self.trees.close()
+        if self._file is None:
+            return
+        if self.manifest_format == "binary":
+            self._file.seek(len(BINARY_MAGIC) + 2 + len(self.algorithm) + 1)
+            self._file.write(_BINARY_COUNT.pack(self.count))
+        self._file.close()
+        self._file = None
+
+
+class ManifestReader:
+    """
+    Lê um manifesto em streaming, detectando o formato pelo conteúdo.
+
+    Nenhuma lista de entradas é montada: manifestos com dezenas de milhões de
+    linhas são lidos com memória constante.
+    """
+
+    def __init__(self, manifest_path: Path, algorithm: Optional[str] = None):
+        """
+        Abre o manifesto e lê o cabeçalho.
+
+        Args:
+            manifest_path: Arquivo do manifesto
+            algorithm: Algoritmo dos hashes (necessário só em manifestos 'sum' ambíguos;
+                       por padrão é presumido pela extensão ou pelo comprimento do hash)
+        """
+        self.manifest_path = Path(manifest_path)
+        self.algorithm = algorithm.lower() if algorithm else None
+        self.count: Optional[int] = None
+        self._header_lines = 0
+        self._columns: List[str] = []
+
+        with open(self.manifest_path, 'rb') as f:
+            head = f.read(len(BINARY_MAGIC) + 2)
+            if head.startswith(BINARY_MAGIC):
+                self.manifest_format = "binary"
+                if head[len(BINARY_MAGIC)] != BINARY_VERSION:
+                    raise ValueError(f"Versão de manifesto binário não suportada: {head[len(BINARY_MAGIC)]}")
+                name = f.read(head[-1])
+                self.algorithm = name.decode('ascii')
+                self.digest_size = f.read(1)[0]
+                self.count = _BINARY_COUNT.unpack(f.read(_BINARY_COUNT.size))[0]
+                self._data_offset = f.tell()
+                return
+        self._data_offset = 0
+
+        with open(self.manifest_path, 'r', encoding='utf-8', errors='surrogateescape', newline='\n') as f:
+            first = f.readline()
+            if first.startswith("%%%% HASHDEEP"):
+                self.manifest_format = "hashdeep"
+                self._header_lines = 1
+                for line in f:
+                    if not line.startswith(("%%%%", "##")):
+                        break
+                    self._header_lines += 1
+                    if line.startswith("%%%% size"):
+                        self._columns = line[5:].strip().split(",")
+                if len(self._columns) < 3 or self._columns[0] != "size" or self._columns[-1] != "filename":
+                    raise ValueError(f"Cabeçalho hashdeep não suportado: {self.manifest_path}")
+                if self.algorithm is None:
+                    self.algorithm = self._columns[1]
+                if self.algorithm not in self._columns:
+                    raise ValueError(f"Manifesto hashdeep sem a coluna {self.algorithm}")
+            else:
+                self.manifest_format = "sum"
+                if self.algorithm is None:
+                    self.algorithm = self._guess_sum_algorithm(first)
+
+    def _guess_sum_algorithm(self, first_line: str) -> str:
+        """Presume o algoritmo de um manifesto 'sum' pela extensão ou pelo hash."""
+        extension = self.manifest_path.suffix.lstrip(".").lower()
+        try:
+            create_hasher(extension)
+            return extension
+        except ValueError:
+            pass
+        file_hash = first_line.lstrip("\\").split(" ", 1)[0]
+        algorithm = SUM_ALGORITHMS_BY_LENGTH.get(len(file_hash))
+        if algorithm is None:
+            raise ValueError(f"Não foi possível identificar o algoritmo do manifesto {self.manifest_path}")
+        return algorithm
+
+    def count_entries(self) -> int:
+        """
+        Conta as entradas sem carregá-las (leitura em blocos).
+
+        Returns:
+            Quantidade de entradas
+        """
+        if self.count is not None:
+            return self.count
+        lines = 0
+        last = b"\n"
+        with open(self.manifest_path, 'rb') as f:
+            while block := f.read(COUNT_READ_SIZE):
+                lines += block.count(b"\n")
+                last = block[-1:]
+        if last != b"\n":
+            lines += 1
+        self.count = max(0, lines - self._header_lines)
+        return self.count
+
+    def __iter__(self) -> Iterator[ManifestEntry]:
+        if self.manifest_format == "binary":
+            yield from self._iter_binary()
+        else:
+            yield from self._iter_text()
+
+    def _iter_binary(self) -> Iterator[ManifestEntry]:
+        with open(self.manifest_path, 'rb') as f:
+            f.seek(self._data_offset)
+            while header := f.read(_BINARY_RECORD.size):
+                if len(header) < _BINARY_RECORD.size:
+                    raise ValueError(f"Manifesto binário truncado: {self.manifest_path}")
+                path_length, size = _BINARY_RECORD.unpack(header)
+                path = f.read(path_length).decode('utf-8', 'surrogateescape')
+                digest = f.read(self.digest_size)
+                if len(digest) < self.digest_size:
+                    raise ValueError(f"Manifesto binário truncado: {self.manifest_path}")
+                yield ManifestEntry(path, size, digest.hex())
+
+    def _iter_text(self) -> Iterator[ManifestEntry]:
+        with open(self.manifest_path, 'r', encoding='utf-8', errors='surrogateescape', newline='\n') as f:
+            for number, line in enumerate(f):
+                if number < self._header_lines:
+                    continue
+                line = line.rstrip("\n").rstrip("\r")
+                if not line:
+                    continue
+                if self.manifest_format == "hashdeep":
+                    # O nome é a última coluna e pode conter vírgulas
+                    fields = line.split(",", len(self._columns) - 1)
+                    yield ManifestEntry(fields[-1], int(fields[0]),
+                                        fields[self._columns.index(self.algorithm)].lower())
+                    continue
+                escaped = line.startswith("\\")
+                if escaped:
+                    line = line[1:]
+                file_hash, _, rest = line.partition(" ")
+                # "<hash>  caminho" (modo texto) ou "<hash> *caminho" (modo binário)
+                path = rest[1:] if rest[:1] in (" ", "*") else rest
+                if escaped:
+                    path = _unescape_sum_path(path)
+                yield ManifestEntry(path, None, file_hash.lower())
+
+
+class ManifestSink(ResultSink):
+    """
+    Destino de resultados que grava o manifesto do job de cópia.
+
+    Cada arquivo copiado com hash vira uma entrada (caminho relativo ao destino,
+    tamanho e hash da origem calculado durante a cópia). Com `inner`, os
+    resultados também seguem para outro destino (ex.: ListSink, para o relatório).
+    """
+
+    def __init__(self, manifest_path: Path, destination: Path, manifest_format: str = "sum",
+                 algorithm: str = "sha256", inner: Optional[ResultSink] = None,
+                 max_failures_kept: Optional[int] = MAX_FAILURES_KEPT):
+        """
+        Inicializa o destino de manifesto.
+
+        Args:
+            manifest_path: Arquivo do manifesto (sobrescrito)
+            destination: Raiz do destino (os caminhos são relativos a ela)
+            manifest_format: 'sum', 'hashdeep' ou 'binary'
+            algorithm: Algoritmo dos hashes da cópia
+            inner: Destino que também recebe os resultados (listas e hashes vêm dele)
+            max_failures_kept: Falhas mantidas em memória para o relatório
+        """
+        super().__init__(max_failures_kept)
+        self.destination = Path(destination)
+        self.inner = inner
+        self.writer = ManifestWriter(manifest_path, manifest_format, algorithm, self.destination)
+        self.writer.open()
+        self.skipped = 0
+
+    def _write_failed(self, source_file, error):
+        if self.inner is not None:
+            self.inner.record_failed(source_file, error)
+
+    def copied_list(self) -> List[Path]:
+        return self.inner.copied_list() if self.inner is not None else []
+
+    def failed_list(self) -> List[Tuple[Path, str]]:
+        return self.inner.failed_list() if self.inner is not None else super().failed_list()
+
+    def hashes(self) -> Dict[Path, str]:
+        return self.inner.hashes() if self.inner is not None else {}
+
+    def _write_copied(self, source_file, dest_file, file_hash):
+        if self.inner is not None:
+            self.inner.record_copied(source_file, dest_file, file_hash)
+        if file_hash is None or dest_file is None:
+            self.skipped += 1
+            return
+        try:
+            size = os.stat(dest_file).st_size
+            relative = Path(dest_file).relative_to(self.destination).as_posix()
+        except (OSError, ValueError):
+            self.skipped += 1
+            return
+        if not self.writer.add(relative, file_hash, size):
+            self.skipped += 1
+
+    def flush(self):
+        with self.lock:
+            self.writer.flush()
+        if self.inner is not None:
+            self.inner.flush()
+
+    def close(self):
+        with self.lock:
+            self.writer.close()
+        if self.inner is not None:
+            self.inner.close()
+
+
+def write_manifest_from_hashes(manifest_path: Path, source: Path, destination: Path,
+                               hashes: Dict[Path, str], manifest_format: str = "sum",
+                               algorithm: str = "sha256") -> int:
+    """
+    Grava o manifesto de uma cópia a partir dos hashes da origem (ex.: FileCopier.file_hashes).
+
+    Args:
+        manifest_path: Arquivo do manifesto (sobrescrito)
+        source: Raiz da origem
+        destination: Raiz do destino (os caminhos do manifesto são relativos a ela)
+        hashes: Hash de cada arquivo de origem copiado
+        manifest_format: 'sum', 'hashdeep' ou 'binary'
+        algorithm: Algoritmo dos hashes
+
+    Returns:
+        Entradas gravadas (arquivos ausentes no destino são ignorados)
+    """
+    source = Path(source)
+    destination = Path(destination)
+    with ManifestWriter(manifest_path, manifest_format, algorithm, destination) as writer:
+        for source_file, file_hash in hashes.items():
+            relative = Path(source_file).relative_to(source)
+            try:
+                size = os.stat(destination / relative).st_size
+            except OSError:
+                continue
+            writer.add(relative.as_posix(), file_hash, size)
+        return writer.count
+
+
+class ManifestVerifier:
+    """
+    Verifica um destino contra um manifesto, sem a origem.
+
+    O manifesto é lido em streaming e só o destino é hasheado, por um pool de
+    workers com quantidade limitada de arquivos pendentes (memória constante).
+    Se houver árvores de blocos (.chunks) ao lado do manifesto, os arquivos com
+    hash diferente têm os trechos corrompidos localizados e, com `repair_source`,
+    só esses trechos são copiados de novo.
+    """
+
+    def __init__(self, manifest_path: Path, destination: Path, num_workers: int = 4,
+                 algorithm: Optional[str] = None, chunk_size: Optional[int] = None,
+                 use_mmap: bool = False, read_ahead: int = 0,
+                 progress_callback: Optional[Callable] = None,
+                 max_failures_kept: Optional[int] = MAX_FAILURES_KEPT,
+                 repair_source: Optional[Path] = None, cache_mode: str = "normal"):
+        """
+        Inicializa a verificação contra manifesto.
+
+        Args:
+            manifest_path: Arquivo do manifesto (formato detectado automaticamente)
+            destination: Raiz do destino (os caminhos do manifesto são relativos a ela)
+            num_workers: Arquivos verificados em paralelo
+            algorithm: Algoritmo (só para manifestos 'sum' ambíguos)
+            chunk_size: Tamanho do buffer de leitura (None = padrão)
+            use_mmap: Usa mmap para arquivos de tamanho médio
+            read_ahead: Buffers lidos à frente em arquivos grandes (0 = sem pipeline)
+            progress_callback: Chamado a cada arquivo concluído
+                               Assinatura: callback(files_done, total_files, bytes_done, total_bytes, file)
+                               (total_bytes é None: o manifesto não é lido antes)
+            max_failures_kept: Falhas mantidas em corrupted_list (None = todas)
+            repair_source: Raiz com o conteúdo correto (origem ou outra réplica); com ela,
+                           os trechos corrompidos localizados pelas árvores são reescritos
+            cache_mode: Uso do page cache nas leituras ('normal', 'drop' ou 'direct'; ver
+                        digests.CACHE_MODES)
+        """
+        self.reader = ManifestReader(manifest_path, algorithm)
+        chunks_path = chunks_path_for(self.reader.manifest_path)
+        self.trees = ChunkTreeReader(chunks_path) if chunks_path.exists() else None
+        self.repair_source = Path(repair_source) if repair_source is not None else None
+        create_hasher(self.reader.algorithm)
+        self.destination = Path(destination)
+        self.algorithm = self.reader.algorithm
+        self.num_workers = max(1, num_workers)
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+        self.read_ahead = read_ahead
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"Modo de cache não suportado: {cache_mode}")
+        self.cache_mode = cache_mode
+        self.progress_callback = progress_callback
+        self.max_failures_kept = max_failures_kept
+        self.cancel_event = threading.Event()
+        self.total_files = 0
+        self.files_done = 0
+        self.bytes_done = 0
+
+    def cancel(self):
+        """Interrompe o agendamento de novos arquivos (os em andamento terminam)."""
+        self.cancel_event.set()
+
+    @staticmethod
+    def _inside(root: Path, relative_path: str) -> Optional[Path]:
+        """
+        Caminho de uma entrada sob `root`, ou None se ele escapa da raiz.
+
+        Rejeita caminhos absolutos e com '..' e, após resolver links simbólicos,
+        qualquer caminho que não fique dentro de `root` (o reparo grava nele).
+        """
+        if not relative_path:
+            return root
+        parts = Path(relative_path).parts
+        if Path(relative_path).is_absolute() or ".." in parts:
+            return None
+        candidate = root / relative_path
+        try:
+            if not candidate.resolve().is_relative_to(root.resolve()):
+                return None
+        except (OSError, RuntimeError):
+            return None
+        return candidate
+
+    def _verify_entry(self, entry: ManifestEntry,
+                      tree: Optional[ChunkTree] = None) -> Tuple[Optional[str], int, Optional[List[Tuple[int, int]]]]:
+        """
+        Verifica uma entrada.
+
+        Args:
+            entry: Entrada do manifesto
+            tree: Árvore de blocos da entrada, se gravada
+
+        Returns:
+            Tupla (erro ou None, bytes lidos, trechos corrompidos ou None); erro None com
+            trechos indica um arquivo reparado
+        """
+        dest_file = self._inside(self.destination, entry.path)
+        if dest_file is None:
+            return "Caminho fora do destino no manifesto", 0, None
+        try:
+            size = os.stat(dest_file).st_size
+        except FileNotFoundError:
+            return "Arquivo não encontrado no destino", 0, None
+        if entry.size is not None and size != entry.size and tree is None:
+            return f"Tamanho diferente: manifesto={entry.size}, destino={size}", 0, None
+        if size == entry.size or entry.size is None:
+            dest_hash = hash_file(dest_file, self.algorithm, chunk_size=self.chunk_size,
+                                  use_mmap=self.use_mmap, read_ahead=self.read_ahead,
+                                  cache_mode=self.cache_mode)
+            if dest_hash == entry.hash:
+                return None, size, None
+            if tree is None:
+                return "Hash diferente", size, None
+
+        ranges = find_bad_ranges(dest_file, tree)
+        if self.repair_source is not None:
+            source_file = self._inside(self.repair_source, entry.path)
+            if source_file is None:
+                return "Caminho fora da origem do reparo no manifesto", size, ranges
+            remaining = repair_and_recheck(source_file, dest_file, tree, ranges, self.cache_mode)
+            if remaining:
+                return f"Reparo não conferiu: {len(remaining)} trecho(s) ainda diferente(s)", size, remaining
+            return None, size, ranges
+        if not ranges:
+            return f"Tamanho diferente: manifesto={tree.size}, destino={size}", size, ranges
+        return f"Hash diferente em {len(ranges)} trecho(s)", size, ranges
+
+    def _report(self, file_path: str):
+        """Emite o progresso agregado ignorando erros no callback."""
+        if self.progress_callback:
+            try:
+                self.progress_callback(self.files_done, self.total_files, self.bytes_done, None, file_path)
+            except Exception:
+                pass
+
+    def verify(self) -> Dict:
+        """
+        Executa a verificação.
+
+        Returns:
+            Dicionário com total, algorithm, verified, corrupted, corrupted_list
+            (caminhos no destino), missing, manifest, bad_ranges (trechos corrompidos
+            por arquivo ainda corrompido) e repaired (trechos reescritos por arquivo
+            reparado, que conta como verificado)
+        """
+        self.total_files = self.reader.count_entries()
+        self.files_done = 0
+        self.bytes_done = 0
+        verified = 0
+        corrupted_count = 0
+        missing = 0
+        corrupted: List[Tuple[Path, str]] = []
+        bad_ranges: Dict[Path, List[Tuple[int, int]]] = {}
+        repaired: Dict[Path, List[Tuple[int, int]]] = {}
+        max_pending = self.num_workers * PENDING_PER_WORKER
+        if self.trees is not None:
+            self.trees.close()
+
+        with ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="manifest") as workers:
+            pending = {}
+            entries = iter(self.reader)
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_pending and not self.cancel_event.is_set():
+                    entry = next(entries, None)
+                    if entry is None:
+                        exhausted = True
+                        break
+                    # Árvores lidas em sequência junto com o manifesto (mesma ordem de gravação)
+                    tree = self.trees.next_tree(entry.path) if self.trees is not None else None
+                    pending[workers.submit(self._verify_entry, entry, tree)] = entry
+                if self.cancel_event.is_set():
+                    exhausted = True
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entry = pending.pop(future)
+                    try:
+                        error, size, ranges = future.result()
+                    except Exception as e:
+                        error, size, ranges = str(e), 0, None
+                    dest_file = self.destination / entry.path
+                    if ranges is not None:
+                        (bad_ranges if error else repaired)[dest_file] = ranges
+                    if error is None:
+                        verified += 1
+                    else:
+                        corrupted_count += 1
+                        if error == "Arquivo não encontrado no destino":
+                            missing += 1
+                        if self.max_failures_kept is None or len(corrupted) < self.max_failures_kept:
+                            corrupted.append((dest_file, error))
+                    self.files_done += 1
+                    self.bytes_done += size
+                    self._report(entry.path)
+        if self.trees is not None:
+            self.trees.close()
+
+        return {
+            'total': self.files_done,
+            'algorithm': self.algorithm,
+            'verified': verified,
+            'corrupted': corrupted_count,
+            'corrupted_list': corrupted,
+            'missing': missing,
+            'manifest': str(self.reader.manifest_path),
+            'bad_ranges': bad_ranges,
+            'repaired': repaired
+        }
@@ -6,17 +6,52 @@ Data: 2024
 """
 
 from pathlib import Path
-from typing import List
-import time
-from .copier import FileCopier
+from typing import Dict, List, Optional, Tuple
+from .parallel_copier import ParallelFileCopier
+
+
+def plan_destinations(source_files: List[Path], destination: Path) -> Tuple[List[Tuple[Path, Path]], List[Tuple[Path, Path]]]:
+    """
+    Define o arquivo de destino de cada origem no diretório plano de destino.
+    
+    O primeiro arquivo com um nome fica com ele; os seguintes com o mesmo nome
+    (comparação sem diferenciar maiúsculas, como em NTFS/APFS) recebem um sufixo
+    "nome (2).ext", "nome (3).ext"...
+    
+    Args:
+        source_files: Arquivos de origem, na ordem da seleção
+        destination: Diretório de destino
+        
+    Returns:
+        Tupla (tarefas, renomeados), ambas listas de pares (origem, destino)
+    """
+    tasks = []
+    renamed = []
+    taken = set()
+    for source_file in source_files:
+        name = source_file.name
+        counter = 1
+        while name.casefold() in taken:
+            counter += 1
+            name = f"{source_file.stem} ({counter}){source_file.suffix}"
+        taken.add(name.casefold())
+        dest_file = destination / name
+        tasks.append((source_file, dest_file))
+        if counter > 1:
+            renamed.append((source_file, dest_file))
+    return tasks, renamed
 
 
 class MultiFileCopier:
     """
     Classe responsável por copiar múltiplos arquivos selecionados.
+    
+    A seleção é copiada pelo mesmo motor paralelo usado para diretórios
+    (ParallelFileCopier), com os destinos definidos antes do início da cópia.
     """
     
-    def __init__(self, source_files: List[Path], destination: Path, max_retries: int = 3):
+    def __init__(self, source_files: List[Path], destination: Path, max_retries: int = 3,
+                 hash_algorithm: Optional[str] = None, num_threads: int = 4):
         """
         Inicializa o copiador de múltiplos arquivos.
         
@@ -24,94 +59,97 @@ class MultiFileCopier:
             source_files: Lista de arquivos de origem
             destination: Diretório de destino
             max_retries: Número máximo de tentativas por arquivo
+            hash_algorithm: Calcula o hash da origem durante a cópia (ex.: 'sha256')
+            num_threads: Número de threads de cópia
         """
         self.source_files = [Path(f) for f in source_files]
         self.destination = Path(destination)
         self.progress_callback = None
+        self.file_started_callback = None
         self.max_retries = max_retries
+        self.hash_algorithm = hash_algorithm
+        self.num_threads = num_threads
         self.paused = False
         self.cancelled = False
+        self.engine: Optional[ParallelFileCopier] = None
     
     def set_progress_callback(self, callback):
         """Define callback de progresso."""
         self.progress_callback = callback
     
+    def set_file_started_callback(self, callback):
+        """
+        Define callback chamado uma vez por arquivo, no início da sua cópia.
+        
+        Args:
+            callback: Assinatura: callback(file_index, total_files, source_file, file_size)
+        """
+        self.file_started_callback = callback
+    
     def pause(self):
         """Pausa a cópia."""
         self.paused = True
+        if self.engine:
+            self.engine.pause()
     
     def resume(self):
         """Retoma a cópia."""
         self.paused = False
+        if self.engine:
+            self.engine.resume()
     
     def cancel(self):
         """Cancela a cópia."""
         self.cancelled = True
         self.paused = False
+        if self.engine:
+            self.engine.cancel()
     
     def copy_all(self) -> dict:
         """
         Copia todos os arquivos para o diretório de destino.
         
+        Arquivos com nomes repetidos na seleção são renomeados (ver plan_destinations);
+        os pares renomeados ficam em 'renamed_list'.
+        
         Returns:
             Dicionário com estatísticas da cópia
         """
-        copied_files = []
-        failed_files = []
         total_files = len(self.source_files)
+        failed_files: List[Tuple[Path, str]] = []
+        existing = []
+        for source_file in self.source_files:
+            if source_file.is_file():
+                existing.append(source_file)
+            else:
+                failed_files.append((source_file, "Arquivo não encontrado"))
         
-        for idx, source_file in enumerate(self.source_files, 1):
-            # Verifica cancelamento
-            if self.cancelled:
-                break
-            
-            # Aguarda se pausado
-            while self.paused and not self.cancelled:
-                time.sleep(0.1)
-            
-            if self.cancelled:
-                break
-            
-            try:
-                if not source_file.exists() or not source_file.is_file():
-                    failed_files.append((source_file, "Arquivo não encontrado"))
-                    continue
-                
-                # Destino é sempre um diretório para múltiplos arquivos
-                dest_file = self.destination / source_file.name
-                
-                # Usa FileCopier para copiar arquivo único
-                copier = FileCopier(source_file, dest_file, self.max_retries)
-                copier.paused = self.paused
-                copier.cancelled = self.cancelled
-                
-                # Cria callback específico para este arquivo (closure para capturar variáveis)
-                def make_callback(file_idx, total, source_f):
-                    def callback(curr, tot, fname, fsize, bcopy):
-                        if self.progress_callback:
-                            self.progress_callback(file_idx, total, source_f, fsize, bcopy)
-                    return callback
-                
-                copier.set_progress_callback(make_callback(idx, total_files, source_file))
-                
-                if copier.copy_file(source_file, dest_file, idx, total_files):
-                    copied_files.append(source_file)
-                    if self.progress_callback:
-                        # Notifica conclusão do arquivo
-                        file_size = source_file.stat().st_size
-                        self.progress_callback(idx, total_files, source_file, file_size, file_size)
-                else:
-                    failed_files.extend(copier.failed_files)
-                    
-            except Exception as e:
-                failed_files.append((source_file, str(e)))
+        tasks, renamed = plan_destinations(existing, self.destination)
+        
+        self.engine = ParallelFileCopier(None, self.destination, self.num_threads, self.max_retries,
+                                         hash_algorithm=self.hash_algorithm, tasks=tasks)
+        self.engine.set_progress_callback(self.progress_callback)
+        self.engine.set_file_started_callback(self.file_started_callback)
+        if self.paused:
+            self.engine.pause()
+        if self.cancelled:
+            self.engine.cancel()
+        
+        file_hashes: Dict[Path, str] = {}
+        copied_files: List[Path] = []
+        if tasks and not self.cancelled:
+            stats = self.engine.copy_all()
+            copied_files = stats['copied_list']
+            failed_files.extend(stats['failed_list'])
+            file_hashes = stats['hashes']
         
         return {
             'total_files': total_files,
             'copied_files': len(copied_files),
             'failed_files': len(failed_files),
+            'hash_algorithm': self.hash_algorithm,
+            'hashes': file_hashes,
+            'renamed_list': renamed,
             'copied_list': copied_files,
             'failed_list': failed_files
         }
-    
-
@@ -9,8 +9,44 @@ import threading
 import queue
 import time
 from pathlib import Path
-from typing import List, Tuple, Optional, Callable
-from .copier import FileCopier
+from typing import Dict, Iterable, Iterator, List, Sized, Tuple, Optional, Callable, Union
+from .copier import RESUME_VERIFY_MODES, FileCopier, dest_path_for
+from .dedup import ContentStore
+from .result_sink import ListSink, ResultSink
+from .scanner import DirectoryScanner
+from .sync import SyncChecker
+from .durability import DurabilityManager
+from .locality import LOCALITY_MODES, LOCALITY_WINDOW, iter_by_locality, resolve_locality
+from .verifier import IntegrityVerifier
+
+
+class CopyTask:
+    """
+    Registro de um arquivo a copiar, trafegado pela fila de trabalho.
+    
+    Usa __slots__ (sem __dict__ por instância): em jobs com milhões de arquivos
+    a fila e os workers lidam só com estes registros compactos.
+    """
+    
+    __slots__ = ('index', 'source', 'dest', 'extra_targets', 'size')
+    
+    def __init__(self, index: int, source: Path, dest: Optional[Path],
+                 extra_targets: Tuple = (), size: Optional[int] = None):
+        """
+        Inicializa o registro.
+        
+        Args:
+            index: Posição do arquivo no job (1-based)
+            source: Arquivo de origem
+            dest: Arquivo de destino principal (None se só vai para destinos adicionais)
+            extra_targets: Pares (raiz, arquivo) dos destinos adicionais (fan-out)
+            size: Tamanho da origem, se já conhecido pela varredura
+        """
+        self.index = index
+        self.source = source
+        self.dest = dest
+        self.extra_targets = extra_targets
+        self.size = size
 
 
 class ParallelFileCopier:
@@ -18,53 +54,313 @@ class ParallelFileCopier:
     Classe responsável por copiar arquivos em paralelo usando múltiplas threads.
     """
     
-    def __init__(self, source: Path, destination: Path, num_threads: int = 4, max_retries: int = 3):
+    def __init__(self, source: Optional[Path], destination: Path, num_threads: int = 4, max_retries: int = 3,
+                 resume_partial: bool = False, resume_verify: str = "tail", resume_samples: int = 4,
+                 sync_mode: Optional[str] = None,
+                 delta_mode: Union[bool, str] = False, delta_in_place: bool = False,
+                 durability: str = "none",
+                 hash_algorithm: Optional[str] = None, verify: bool = False,
+                 verify_threads: int = 2, verify_backlog: int = 64,
+                 extra_destinations: Optional[List[Path]] = None, verify_destinations: bool = False,
+                 archive_format: Optional[str] = None,
+                 dedup_store: Union[None, str, Path, ContentStore] = None, dedup_link: str = "auto",
+                 dedup_preserve_metadata: bool = False,
+                 tasks: Optional[Iterable[Tuple[Path, Path]]] = None,
+                 result_sink: Optional[ResultSink] = None, queue_size: int = 1024,
+                 verify_cache_mode: str = "normal", locality: str = "off",
+                 locality_window: int = LOCALITY_WINDOW):
         """
         Inicializa o copiador paralelo de arquivos.
         
         Args:
-            source: Caminho de origem (arquivo ou diretório)
+            source: Caminho de origem (arquivo ou diretório); ignorado quando `tasks` é informado
             destination: Caminho de destino (arquivo ou diretório)
             num_threads: Número de threads para cópia paralela
             max_retries: Número máximo de tentativas por arquivo
+            resume_partial: Retoma cópias parciais a partir do último offset válido
+            resume_verify: Validação do prefixo já escrito ('size', 'tail' ou 'sample')
+            resume_samples: Número de blocos amostrados no modo 'sample'
+            sync_mode: Cópia incremental ('quick' ou 'hash'); None copia tudo
+            delta_mode: Transferência delta para destinos existentes ('off', 'auto' ou
+                        'always'; True equivale a 'always'; 'auto' só a usa com origem lenta)
+            delta_in_place: Grava só os blocos alterados direto no destino
+            durability: Modo de durabilidade ('none', 'file', 'group' ou 'syncfs'),
+                        compartilhado por todos os workers
+            hash_algorithm: Calcula o hash da origem durante a cópia (ex.: 'sha256')
+            verify: Verifica cada arquivo assim que ele é copiado (em paralelo à cópia)
+            verify_threads: Threads dedicadas à verificação
+            verify_backlog: Máximo de arquivos aguardando verificação; acima da metade,
+                            os workers de cópia passam a verificar antes de copiar
+            extra_destinations: Destinos adicionais (fan-out): cada arquivo é lido uma vez
+                                e gravado em todos os destinos
+            verify_destinations: No fan-out, confere cada destino contra o hash da origem
+            archive_format: Grava a origem em um único pacote ('tar', 'tar.gz', 'tar.zst'
+                            ou 'zip'); o pacote é um stream único, gravado sequencialmente
+            dedup_store: Repositório de conteúdo (diretório ou ContentStore), compartilhado
+                         por todos os workers; os destinos viram links para os objetos
+            dedup_link: Tipo de link no modo deduplicado ('auto', 'reflink', 'hardlink' ou 'copy')
+            dedup_preserve_metadata: Copia timestamps e permissões da origem para os destinos
+                                     deduplicados ('hardlink' exige False)
+            tasks: Pares (arquivo_origem, arquivo_destino) a copiar, usados no lugar da
+                   varredura de `source` (ex.: seleção de arquivos); pode ser um gerador.
+                   Se for uma lista, o total dos callbacks é o tamanho dela desde o início
+            result_sink: Destino dos resultados por arquivo (padrão: ListSink, em memória);
+                         use CounterSink, JsonlSink ou SqliteSink em jobs muito grandes
+            queue_size: Máximo de arquivos enfileirados à frente dos workers
+            verify_cache_mode: Uso do page cache na verificação ('normal', 'drop' ou 'direct';
+                               ver digests.CACHE_MODES); fora do 'normal', o destino recém-
+                               copiado é relido do disco e não do cache
+            locality: Ordena os arquivos de um diretório pela posição física ('off', 'auto',
+                      'inode' ou 'extent'; ver locality.LOCALITY_MODES); 'auto' só ordena em
+                      discos rotacionais
+            locality_window: Arquivos ordenados por vez (a varredura continua em streaming)
         """
-        self.source = Path(source)
+        if locality not in LOCALITY_MODES:
+            raise ValueError(f"Ordenação não suportada: {locality}")
+        self.locality = locality
+        self.locality_window = max(1, locality_window)
+        self.locality_applied = "off"
+        self.source = Path(source) if source is not None else None
+        self.tasks = tasks
+        # Total já conhecido da lista de tarefas (a varredura só conhece o total no fim)
+        self.tasks_total = len(tasks) if isinstance(tasks, Sized) else None
+        if self.tasks is not None and archive_format:
+            raise ValueError("Modo arquivo requer uma origem, não uma lista de tarefas")
         self.destination = Path(destination)
         self.num_threads = max(1, num_threads)
         self.max_retries = max_retries
-        self.copied_files: List[Path] = []
-        self.failed_files: List[Tuple[Path, str]] = []
+        if resume_verify not in RESUME_VERIFY_MODES:
+            raise ValueError(f"Modo de validação de retomada não suportado: {resume_verify}")
+        self.resume_partial = resume_partial
+        self.resume_verify = resume_verify
+        self.resume_samples = resume_samples
+        self.sync_checker = SyncChecker(sync_mode) if sync_mode else None
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.delta_mode = delta_mode
+        self.delta_in_place = delta_in_place
+        self.delta_bytes_reused = 0
+        self.delta_bytes_written = 0
+        self.durability = DurabilityManager(durability)
+        self.hash_algorithm = hash_algorithm
+        self.extra_destinations = [Path(d) for d in (extra_destinations or [])]
+        self.verify_destinations = verify_destinations
+        self.destination_callback: Optional[Callable] = None
+        self.destination_stats: Dict[str, dict] = {}
+        self.archive_format = archive_format
+        self.archive_copier: Optional[FileCopier] = None
+        if isinstance(dedup_store, ContentStore) or dedup_store is None:
+            self.content_store = dedup_store
+        else:
+            self.content_store = ContentStore(dedup_store, hash_algorithm or "sha256", dedup_link,
+                                              fsync=self.durability.atomic,
+                                              preserve_metadata=dedup_preserve_metadata)
+        if self.content_store is not None and (self.extra_destinations or archive_format):
+            raise ValueError("Modo deduplicado não combina com fan-out nem com modo arquivo")
+        self.logical_bytes = 0
+        self.physical_bytes = 0
+        self.custom_sink = result_sink
+        self.sink: ResultSink = result_sink or ListSink()
         self.progress_callback: Optional[Callable] = None
-        self.is_file = self.source.is_file()
-        self.is_dir = self.source.is_dir()
+        self.is_file = self.source is not None and self.source.is_file()
+        self.is_dir = self.source is not None and self.source.is_dir()
         self.paused = False
         self.cancelled = False
         self.lock = threading.Lock()
-        self.file_queue = queue.Queue()
-        self.copied_count = 0
+        self.queue_size = max(1, queue_size)
+        self.file_queue = queue.Queue(maxsize=self.queue_size)
+        self.producer_done = threading.Event()
+        self._producer_error: Optional[BaseException] = None
         self.total_files = 0
+        
+        # Estágio de verificação em pipeline (verify-behind-copy)
+        self.verify = verify
+        self.verify_threads = max(1, verify_threads)
+        self.verify_backlog = max(2, verify_backlog)
+        self.verifier = IntegrityVerifier(hash_algorithm or "sha256", cache_mode=verify_cache_mode)
+        self.verify_queue = queue.Queue(maxsize=self.verify_backlog)
+        self.verify_callback: Optional[Callable] = None
+        self.copy_done = threading.Event()
+        self.verified_count = 0
+        self.corrupted_files: List[Tuple[Path, str]] = []
+        self._awaiting_commit: Dict[Path, Tuple] = {}
+        self._committed_early = set()
+        self._expecting_commit = set()
+        self._inline_hashes: Dict[Path, str] = {}
+        self._copiers: List[FileCopier] = []
+        # Fan-out com falha em algum destino: já registrado como falha no sink
+        self._fanout_failed = set()
+        self.durability_errors: List[Tuple[Path, str]] = []
+        self.file_started_callback: Optional[Callable] = None
     
     def set_progress_callback(self, callback: Callable):
         """Define callback de progresso."""
         self.progress_callback = callback
     
+    def set_file_started_callback(self, callback: Callable):
+        """
+        Define callback chamado uma vez por arquivo, quando um worker começa a copiá-lo.
+        
+        Args:
+            callback: Assinatura: callback(file_index, total_files, source_file, file_size)
+        """
+        self.file_started_callback = callback
+    
+    def set_destination_callback(self, callback: Callable):
+        """
+        Define callback de progresso por destino (fan-out).
+        
+        Args:
+            callback: Assinatura: callback(destination_root, file_index, total_files, filename, success)
+        """
+        self.destination_callback = callback
+    
+    def set_verify_callback(self, callback: Callable):
+        """
+        Define callback de progresso da verificação.
+        
+        Args:
+            callback: Assinatura: callback(files_checked, total_files, source_file, ok)
+        """
+        self.verify_callback = callback
+    
+    def _put_verify(self, item: Tuple):
+        """Enfileira para verificação; bloqueia enquanto o backlog estiver cheio."""
+        while not self.cancelled:
+            try:
+                self.verify_queue.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+    
+    def _on_commit(self, dest_file: Path):
+        """Libera para verificação um arquivo que acabou de chegar ao caminho final."""
+        with self.lock:
+            item = self._awaiting_commit.pop(dest_file, None)
+            if item is None and dest_file in self._expecting_commit:
+                # Commit síncrono (dentro de copy_file): o item é registrado logo depois
+                self._committed_early.add(dest_file)
+        if item is not None:
+            self._put_verify(item)
+    
+    def _submit_verify(self, file_index: int, source_file: Path, dest_file: Path):
+        """Enfileira um arquivo copiado para verificação assim que estiver visível no destino."""
+        with self.lock:
+            item = (file_index, source_file, dest_file, self._inline_hashes.pop(source_file, None))
+            self._expecting_commit.discard(dest_file)
+            if dest_file in self._committed_early:
+                self._committed_early.discard(dest_file)
+            else:
+                # Modo 'group': o rename só acontece no próximo lote
+                self._awaiting_commit[dest_file] = item
+                item = None
+        if item is not None:
+            self._put_verify(item)
+    
+    def _verify_item(self, item: Tuple):
+        """Verifica um arquivo do estágio de verificação."""
+        file_index, source_file, dest_file, source_hash = item
+        try:
+            ok, error = self.verifier.verify_file(source_file, dest_file, source_hash)
+        except Exception as e:
+            ok, error = False, str(e)
+        
+        with self.lock:
+            if ok:
+                self.verified_count += 1
+            else:
+                self.corrupted_files.append((source_file, error))
+            checked = self.verified_count + len(self.corrupted_files)
+        
+        if self.verify_callback:
+            try:
+                self.verify_callback(checked, self._callback_total(), source_file, ok)
+            except Exception:
+                pass
+        self.verify_queue.task_done()
+    
+    def _verify_thread(self):
+        """Thread do estágio de verificação: consome a fila até a cópia terminar."""
+        while not self.cancelled:
+            try:
+                item = self.verify_queue.get(timeout=0.2)
+            except queue.Empty:
+                if self.copy_done.is_set():
+                    break
+                continue
+            self._verify_item(item)
+    
     def pause(self):
         """Pausa a cópia."""
         self.paused = True
+        with self.lock:
+            copiers = list(self._copiers)
+        for copier in copiers:
+            copier.pause()
+        if self.archive_copier:
+            self.archive_copier.pause()
     
     def resume(self):
         """Retoma a cópia."""
         self.paused = False
+        with self.lock:
+            copiers = list(self._copiers)
+        for copier in copiers:
+            copier.resume()
+        if self.archive_copier:
+            self.archive_copier.resume()
     
     def cancel(self):
         """Cancela a cópia."""
         self.cancelled = True
         self.paused = False
+        with self.lock:
+            copiers = list(self._copiers)
+        for copier in copiers:
+            copier.cancel()
+        if self.archive_copier:
+            self.archive_copier.cancel()
+    
+    def _callback_total(self) -> int:
+        """Total informado aos callbacks: o da lista de tarefas ou o enfileirado até aqui."""
+        return self.tasks_total if self.tasks_total is not None else self.total_files
+    
+    def _forward_progress(self, file_index: int, total_files: int, source_file: Path,
+                          file_size: int, bytes_copied: int):
+        """Repassa o progresso dos copiadores dos workers (PyQt signals são thread-safe)."""
+        if self.progress_callback:
+            try:
+                self.progress_callback(file_index, total_files, source_file, file_size, bytes_copied)
+            except Exception:
+                pass
+    
+    def _new_copier(self) -> FileCopier:
+        """Cria o copiador reutilizado por um worker em todos os arquivos que ele processa."""
+        copier = FileCopier(self.source or self.destination, self.destination, self.max_retries,
+                            resume_partial=self.resume_partial,
+                            resume_verify=self.resume_verify,
+                            resume_samples=self.resume_samples,
+                            delta_mode=self.delta_mode,
+                            delta_in_place=self.delta_in_place,
+                            durability=self.durability,
+                            hash_algorithm=self.hash_algorithm,
+                            verify_destinations=self.verify_destinations,
+                            dedup_store=self.content_store)
+        copier.set_progress_callback(self._forward_progress)
+        with self.lock:
+            self._copiers.append(copier)
+            # Sincroniza estado de pausa/cancelamento (sob o lock, como pause/cancel)
+            if self.paused:
+                copier.pause()
+            if self.cancelled:
+                copier.cancel()
+        return copier
     
     def _worker_thread(self):
         """Thread worker que copia arquivos da fila."""
-        while not self.cancelled:
-            try:
+        copier = self._new_copier()
+        try:
+            while not self.cancelled:
                 # Aguarda se pausado
                 while self.paused and not self.cancelled:
                     time.sleep(0.1)
@@ -72,113 +368,317 @@ class ParallelFileCopier:
                 if self.cancelled:
                     break
                 
-                # Obtém arquivo da fila (timeout para verificar cancelamento)
+                # Backlog de verificação alto: verifica antes de copiar mais
+                if self.verify and self.verify_queue.qsize() >= self.verify_backlog // 2:
+                    try:
+                        self._verify_item(self.verify_queue.get_nowait())
+                        continue
+                    except queue.Empty:
+                        pass
+                
+                # Obtém arquivo da fila; termina quando o produtor acabou e a fila esvaziou
                 try:
-                    item = self.file_queue.get(timeout=0.5)
+                    task = self.file_queue.get(timeout=0.2)
                 except queue.Empty:
+                    if self.producer_done.is_set() and self.file_queue.empty():
+                        break
                     continue
                 
-                file_index, source_file, dest_file = item
-                
-                # Cria copiador para este arquivo
-                copier = FileCopier(source_file, dest_file, self.max_retries)
-                # Sincroniza estado de pausa/cancelamento
-                if self.paused:
-                    copier.pause()
-                if self.cancelled:
-                    copier.cancel()
-                
-                # Callback de progresso thread-safe
-                def make_callback(idx, total, sf):
-                    def callback(curr, tot, fname, fsize, bcopy):
-                        if self.progress_callback:
-                            # Chama callback sem lock para não bloquear (PyQt signals são thread-safe)
-                            try:
-                                self.progress_callback(idx, total, sf, fsize, bcopy)
-                            except Exception as e:
-                                # Log erro mas continua
-                                pass
-                    return callback
-                
-                copier.set_progress_callback(make_callback(file_index, self.total_files, source_file))
-                
-                # Atualiza estado antes de copiar
-                if self.paused:
-                    copier.pause()
+                self._run_task(copier, task)
+        finally:
+            with self.lock:
+                self.delta_bytes_reused += copier.delta_bytes_reused
+                self.delta_bytes_written += copier.delta_bytes_written
+                self.logical_bytes += copier.logical_bytes
+                self.physical_bytes += copier.physical_bytes
+    
+    def _run_task(self, copier: FileCopier, task: CopyTask):
+        """Copia um arquivo da fila com o copiador do worker e registra o resultado."""
+        source_file = task.source
+        dest_file = task.dest
+        try:
+            if self.file_started_callback:
+                file_size = task.size if task.size is not None else source_file.stat().st_size
+                try:
+                    self.file_started_callback(task.index, self._callback_total(), source_file, file_size)
+                except Exception:
+                    pass
+            
+            verify_file = self.verify and dest_file is not None
+            if verify_file:
+                with self.lock:
+                    self._expecting_commit.add(dest_file)
+            
+            failures_before = len(copier.failed_files)
+            if task.extra_targets:
+                success = self._copy_fanout(copier, task.index, source_file, dest_file, task.extra_targets)
+            else:
+                success = copier.copy_file(source_file, dest_file, task.index, self._callback_total())
+            
+            source_hash = copier.file_hashes.pop(source_file, None)
+            with self.lock:
+                if not success:
+                    self._committed_early.discard(dest_file)
+                    self._expecting_commit.discard(dest_file)
+                elif verify_file and source_hash is not None:
+                    # Hash da cópia para a verificação (retirado em _submit_verify)
+                    self._inline_hashes[source_file] = source_hash
+            
+            if success:
+                self.sink.record_copied(source_file, dest_file, source_hash)
+                if verify_file:
+                    self._submit_verify(task.index, source_file, dest_file)
+            else:
+                if task.extra_targets and self.durability.mode == "group":
+                    with self.lock:
+                        self._fanout_failed.add(source_file)
+                for failed_file, error in copier.failed_files[failures_before:]:
+                    self.sink.record_failed(failed_file, error)
+                del copier.failed_files[failures_before:]
+        
+        except Exception as e:
+            self.sink.record_failed(source_file, str(e))
+    
+    def _copy_fanout(self, copier: FileCopier, file_index: int, source_file: Path,
+                     dest_file: Optional[Path], extra_targets: Tuple) -> bool:
+        """
+        Copia um arquivo para o destino principal e os adicionais com uma única leitura.
+        
+        Returns:
+            True se o arquivo chegou a todos os destinos
+        """
+        targets = list(extra_targets)
+        if dest_file is not None:
+            targets.insert(0, (self.destination, dest_file))
+        results = copier.copy_file_fanout(source_file, [d for _, d in targets],
+                                          file_index, self._callback_total())
+        
+        errors = []
+        for root, target in targets:
+            error = results.get(target)
+            with self.lock:
+                entry = self.destination_stats.setdefault(
+                    str(root), {'copied_files': 0, 'failed_files': 0, 'failed_list': []})
+                if error is None:
+                    entry['copied_files'] += 1
+                else:
+                    entry['failed_files'] += 1
+                    entry['failed_list'].append((source_file, error))
+            if self.destination_callback:
+                self.destination_callback(root, file_index, self._callback_total(), source_file, error is None)
+            if error is not None:
+                errors.append(f"{root}: {error}")
+        
+        if errors:
+            copier.failed_files.append((source_file, "; ".join(errors)))
+            return False
+        return True
+    
+    def _apply_commit_failures(self):
+        """
+        Converte em falhas os arquivos cujo lote de gravação não foi efetivado.
+        
+        No modo 'group', os workers registram o arquivo como copiado antes do
+        rename; as falhas dos lotes são recolhidas do DurabilityManager no fim.
+        """
+        roots = [self.destination] + self.extra_destinations
+        errors_by_source: Dict[Path, List[str]] = {}
+        for dest_file, source_file, error in self.durability.take_failures():
+            if source_file is None:
+                self.durability_errors.append((dest_file, error))
+                continue
+            errors_by_source.setdefault(source_file, []).append(error)
+            self._awaiting_commit.pop(dest_file, None)
+            root = next((r for r in roots if dest_file.is_relative_to(r)), None)
+            entry = self.destination_stats.get(str(root)) if root is not None else None
+            if entry is not None:
+                entry['copied_files'] -= 1
+                entry['failed_files'] += 1
+                entry['failed_list'].append((source_file, error))
+        for source_file, errors in errors_by_source.items():
+            if source_file not in self._fanout_failed:
+                self.sink.record_commit_failed(source_file, "; ".join(dict.fromkeys(errors)))
+    
+    def _iter_planned(self) -> Iterator[Tuple[Path, Optional[Path], Optional[object]]]:
+        """
+        Enumera os arquivos a copiar sem montar a lista completa.
+        
+        Yields:
+            Tuplas (arquivo_origem, destino_explícito ou None, stat ou None)
+        """
+        if self.tasks is not None:
+            for source_file, dest_file in self.tasks:
+                yield Path(source_file), Path(dest_file), None
+        elif self.is_file:
+            yield self.source, None, None
+        else:
+            files = DirectoryScanner(self.source).iter_files()
+            for source_file, source_stat in iter_by_locality(files, self.locality_applied,
+                                                              self.locality_window):
+                yield source_file, None, source_stat
+    
+    def _producer_thread(self):
+        """Alimenta a fila limitada de trabalho; bloqueia enquanto os workers estão atrasados."""
+        destinations = [self.destination] + self.extra_destinations
+        try:
+            for source_file, planned_dest, source_stat in self._iter_planned():
                 if self.cancelled:
-                    copier.cancel()
-                
-                # Copia arquivo
-                success = copier.copy_file(source_file, dest_file, file_index, self.total_files)
+                    break
+                self.total_files += 1
+                idx = self.total_files
                 
-                with self.lock:
-                    if success:
-                        self.copied_files.append(source_file)
-                        self.copied_count += 1
-                    else:
-                        self.failed_files.extend(copier.failed_files)
+                if planned_dest is None:
+                    targets = [(root, dest_path_for(self.source, self.is_file, source_file, root))
+                               for root in destinations]
+                else:
+                    targets = [(self.destination, planned_dest)] + [
+                        (root, root / planned_dest.relative_to(self.destination))
+                        for root in self.extra_destinations]
                 
-                self.file_queue.task_done()
+                # Modo incremental: destinos inalterados não entram na fila
+                if self.sync_checker:
+                    source_stat = source_stat or source_file.stat()
+                    targets = [(root, dest_file) for root, dest_file in targets
+                               if not self.sync_checker.is_unchanged(source_file, source_stat, dest_file)]
+                    if not targets:
+                        self.skipped_files += 1
+                        self.skipped_bytes += source_stat.st_size
+                        if self.progress_callback:
+                            self.progress_callback(idx, self._callback_total(), source_file,
+                                                   source_stat.st_size, source_stat.st_size)
+                        continue
                 
-            except Exception as e:
-                with self.lock:
-                    self.failed_files.append((source_file, str(e)))
-                self.file_queue.task_done()
+                # Destino principal (se ainda precisar de cópia) + destinos adicionais do fan-out
+                dest_file = targets[0][1] if targets[0][0] == self.destination else None
+                extra_targets = tuple(t for t in targets if t[0] != self.destination)
+                task = CopyTask(idx, source_file, dest_file, extra_targets,
+                                source_stat.st_size if source_stat is not None else None)
+                while not self.cancelled:
+                    try:
+                        self.file_queue.put(task, timeout=0.2)
+                        break
+                    except queue.Full:
+                        continue
+        except Exception as e:
+            self._producer_error = e
+        finally:
+            self.producer_done.set()
     
     def copy_all(self) -> dict:
         """
         Copia todos os arquivos em paralelo.
         
+        Uma thread produtora percorre a origem e alimenta uma fila limitada
+        (`queue_size`) consumida pelos workers, e os resultados por arquivo vão
+        para o `result_sink`: a memória usada não cresce com o número de arquivos
+        (exceto com o ListSink padrão, que guarda as listas). 'total_files' conta
+        os arquivos enumerados até o momento de cada callback.
+        
         Returns:
             Dicionário com estatísticas da cópia
         """
-        self.copied_files = []
-        self.failed_files = []
-        self.copied_count = 0
+        # Modo arquivo: um único stream de saída, gravado pelo copiador sequencial
+        if self.archive_format:
+            self.archive_copier = FileCopier(self.source, self.destination, self.max_retries,
+                                             durability=self.durability,
+                                             hash_algorithm=self.hash_algorithm,
+                                             archive_format=self.archive_format)
+            self.archive_copier.set_progress_callback(self.progress_callback)
+            return self.archive_copier.copy_all()
         
-        # Determina lista de arquivos
-        source_files = []
-        if self.is_file:
-            source_files = [self.source]
-        elif self.is_dir:
-            source_files = [f for f in self.source.rglob('*') if f.is_file()]
-        else:
+        if self.tasks is None and not self.is_file and not self.is_dir:
             raise FileNotFoundError(f"Origem não encontrada: {self.source}")
         
-        self.total_files = len(source_files)
+        self.sink = self.custom_sink or ListSink()
+        self.locality_applied = (resolve_locality(self.locality, self.source)
+                                 if self.tasks is None and self.is_dir else "off")
+        self.total_files = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.delta_bytes_reused = 0
+        self.delta_bytes_written = 0
+        self.logical_bytes = 0
+        self.physical_bytes = 0
+        self.destination_stats = {}
+        self.verified_count = 0
+        self.corrupted_files = []
+        self._awaiting_commit = {}
+        self._committed_early = set()
+        self._expecting_commit = set()
+        self._inline_hashes = {}
+        self._copiers = []
+        self._fanout_failed = set()
+        self.durability_errors = []
+        self.copy_done.clear()
+        self.durability.on_commit = self._on_commit if self.verify else None
+        if self.sync_checker:
+            self.sync_checker.clear()
+        self.file_queue = queue.Queue(maxsize=self.queue_size)
+        self.producer_done.clear()
+        self._producer_error = None
         
-        # Adiciona arquivos à fila
-        for idx, source_file in enumerate(source_files, 1):
-            if self.is_file:
-                if self.destination.is_dir() or not self.destination.exists():
-                    dest_file = self.destination / source_file.name if self.destination.is_dir() else self.destination
-                else:
-                    dest_file = self.destination
-            else:
-                relative_path = source_file.relative_to(self.source)
-                dest_file = self.destination / relative_path
-            
-            self.file_queue.put((idx, source_file, dest_file))
+        # Inicia threads de verificação (antes da cópia, para acompanhá-la)
+        verify_threads = []
+        if self.verify:
+            for _ in range(self.verify_threads):
+                thread = threading.Thread(target=self._verify_thread, daemon=True)
+                thread.start()
+                verify_threads.append(thread)
         
-        # Inicia threads worker
+        # Inicia a thread produtora e as threads worker
+        producer = threading.Thread(target=self._producer_thread, daemon=True)
+        producer.start()
         threads = []
         for _ in range(self.num_threads):
             thread = threading.Thread(target=self._worker_thread, daemon=True)
             thread.start()
             threads.append(thread)
         
-        # Aguarda conclusão de todos os arquivos
-        self.file_queue.join()
-        
-        # Aguarda threads terminarem
+        # Aguarda o fim (ou o cancelamento): os workers saem sozinhos, sem join da fila
+        producer.join()
         for thread in threads:
-            thread.join(timeout=1.0)
+            thread.join()
+        
+        # Descarrega lotes pendentes / sincroniza o sistema de arquivos de destino
+        self.durability.finish([self.destination] + self.extra_destinations)
+        self._apply_commit_failures()
+        if self.content_store is not None:
+            self.content_store.flush()
+        
+        # Drena o estágio de verificação
+        self.copy_done.set()
+        for thread in verify_threads:
+            thread.join()
+        self.sink.flush()
+        
+        if self._producer_error is not None:
+            raise self._producer_error
         
-        return {
+        stats = {
             'total_files': self.total_files,
-            'copied_files': len(self.copied_files),
-            'failed_files': len(self.failed_files),
-            'copied_list': self.copied_files,
-            'failed_list': self.failed_files
+            'copied_files': self.sink.copied_count,
+            'failed_files': self.sink.failed_count,
+            'skipped_files': self.skipped_files,
+            'skipped_bytes': self.skipped_bytes,
+            'delta_bytes_reused': self.delta_bytes_reused,
+            'delta_bytes_written': self.delta_bytes_written,
+            'hash_algorithm': self.hash_algorithm,
+            'hashes': self.sink.hashes(),
+            'copied_list': self.sink.copied_list(),
+            'failed_list': self.sink.failed_list(),
+            'durability_errors': self.durability_errors,
+            'locality': self.locality_applied
         }
+        if self.extra_destinations:
+            stats['destinations'] = self.destination_stats
+        if self.content_store is not None:
+            stats['logical_bytes'] = self.logical_bytes
+            stats['physical_bytes'] = self.physical_bytes
+        if self.verify:
+            stats['verify_algorithm'] = self.verifier.algorithm
+            stats['verified'] = self.verified_count
+            stats['corrupted'] = len(self.corrupted_files)
+            stats['corrupted_list'] = self.corrupted_files
+            stats['hash_cache'] = self.verifier.hash_cache.stats()
+        return stats
 
@@ -0,0 +1,248 @@
+"""
+Módulo: result_sink.py
+Responsável pelo registro dos resultados por arquivo de um job de cópia
+(em memória, apenas contadores, JSONL ou SQLite).
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# Falhas mantidas em memória pelos destinos que não guardam listas completas
+MAX_FAILURES_KEPT = 1000
+
+
+class ResultSink:
+    """
+    Destino dos resultados de um job de cópia.
+
+    Mantém apenas contadores e uma amostra limitada das falhas; subclasses
+    gravam cada resultado em outro lugar. Os métodos são thread-safe: um mesmo
+    destino recebe resultados de todos os workers.
+    """
+
+    def __init__(self, max_failures_kept: Optional[int] = MAX_FAILURES_KEPT):
+        """
+        Inicializa o destino de resultados.
+
+        Args:
+            max_failures_kept: Falhas mantidas em memória para o relatório (None = todas)
+        """
+        self.lock = threading.Lock()
+        self.max_failures_kept = max_failures_kept
+        self.copied_count = 0
+        self.failed_count = 0
+        self.failures: List[Tuple[Path, str]] = []
+
+    def record_copied(self, source_file: Path, dest_file: Optional[Path], file_hash: Optional[str] = None):
+        """
+        Registra um arquivo copiado.
+
+        Args:
+            source_file: Arquivo de origem
+            dest_file: Arquivo de destino principal (None se só foi para destinos adicionais)
+            file_hash: Hash da origem calculado na cópia, se houver
+        """
+        with self.lock:
+            self.copied_count += 1
+            self._write_copied(source_file, dest_file, file_hash)
+
+    def record_failed(self, source_file: Path, error: str):
+        """
+        Registra uma falha.
+
+        Args:
+            source_file: Arquivo de origem
+            error: Mensagem de erro
+        """
+        with self.lock:
+            self.failed_count += 1
+            if self.max_failures_kept is None or len(self.failures) < self.max_failures_kept:
+                self.failures.append((source_file, error))
+            self._write_failed(source_file, error)
+
+    def record_commit_failed(self, source_file: Path, error: str):
+        """
+        Converte em falha um arquivo já registrado como copiado.
+
+        Usado quando a efetivação do arquivo (rename/fsync em lote, modo de
+        durabilidade 'group') falha depois do registro.
+
+        Args:
+            source_file: Arquivo de origem registrado como copiado
+            error: Mensagem de erro
+        """
+        with self.lock:
+            self.copied_count -= 1
+            self.failed_count += 1
+            if self.max_failures_kept is None or len(self.failures) < self.max_failures_kept:
+                self.failures.append((source_file, error))
+            self._write_commit_failed(source_file, error)
+
+    def _write_copied(self, source_file: Path, dest_file: Optional[Path], file_hash: Optional[str]):
+        """Grava um arquivo copiado (chamado com o lock adquirido)."""
+
+    def _write_commit_failed(self, source_file: Path, error: str):
+        """Grava a falha de um arquivo antes registrado como copiado (chamado com o lock adquirido)."""
+        self._write_failed(source_file, error)
+
+    def _write_failed(self, source_file: Path, error: str):
+        """Grava uma falha (chamado com o lock adquirido)."""
+
+    def copied_list(self) -> List[Path]:
+        """Arquivos copiados mantidos em memória (vazio se o destino não guarda a lista)."""
+        return []
+
+    def failed_list(self) -> List[Tuple[Path, str]]:
+        """Falhas mantidas em memória."""
+        return list(self.failures)
+
+    def hashes(self) -> Dict[Path, str]:
+        """Hashes mantidos em memória (vazio se o destino não guarda os hashes)."""
+        return {}
+
+    def flush(self):
+        """Descarrega resultados pendentes."""
+
+    def close(self):
+        """Descarrega e libera recursos."""
+        self.flush()
+
+
+class ListSink(ResultSink):
+    """Mantém todos os resultados em memória (comportamento padrão, para jobs pequenos)."""
+
+    def __init__(self):
+        super().__init__(max_failures_kept=None)
+        self.copied_files: List[Path] = []
+        self.file_hashes: Dict[Path, str] = {}
+
+    def _write_copied(self, source_file, dest_file, file_hash):
+        self.copied_files.append(source_file)
+        if file_hash is not None:
+            self.file_hashes[source_file] = file_hash
+
+    def _write_commit_failed(self, source_file, error):
+        try:
+            self.copied_files.remove(source_file)
+        except ValueError:
+            pass
+        self.file_hashes.pop(source_file, None)
+
+    def copied_list(self) -> List[Path]:
+        return self.copied_files
+
+    def failed_list(self) -> List[Tuple[Path, str]]:
+        return self.failures
+
+    def hashes(self) -> Dict[Path, str]:
+        return self.file_hashes
+
+
+class CounterSink(ResultSink):
+    """Apenas contadores (e uma amostra limitada de falhas): memória constante."""
+
+
+class JsonlSink(ResultSink):
+    """Grava um objeto JSON por linha para cada arquivo copiado ou com falha."""
+
+    def __init__(self, path: Path, max_failures_kept: Optional[int] = MAX_FAILURES_KEPT):
+        """
+        Inicializa o destino JSONL.
+
+        Args:
+            path: Arquivo de saída (sobrescrito)
+            max_failures_kept: Falhas mantidas em memória para o relatório
+        """
+        super().__init__(max_failures_kept)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'w', encoding='utf-8')
+
+    def _write_copied(self, source_file, dest_file, file_hash):
+        record = {'status': 'copied', 'source': str(source_file),
+                  'dest': str(dest_file) if dest_file is not None else None}
+        if file_hash is not None:
+            record['hash'] = file_hash
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _write_failed(self, source_file, error):
+        # Uma falha após um 'copied' do mesmo arquivo (efetivação em lote) prevalece sobre ele
+        record = {'status': 'failed', 'source': str(source_file), 'error': error}
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+class SqliteSink(ResultSink):
+    """Grava os resultados em uma tabela SQLite, com inserções em lote."""
+
+    def __init__(self, path: Path, batch_size: int = 1000,
+                 max_failures_kept: Optional[int] = MAX_FAILURES_KEPT):
+        """
+        Inicializa o destino SQLite.
+
+        Args:
+            path: Banco de dados (a tabela `results` é recriada)
+            batch_size: Resultados acumulados por transação
+            max_failures_kept: Falhas mantidas em memória para o relatório
+        """
+        super().__init__(max_failures_kept)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, batch_size)
+        self._pending: List[Tuple] = []
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("DROP TABLE IF EXISTS results")
+        self.connection.execute(
+            "CREATE TABLE results (status TEXT, source TEXT, dest TEXT, hash TEXT, error TEXT)")
+        self.connection.commit()
+
+    def _append(self, row: Tuple):
+        """Acumula uma linha e grava o lote quando cheio (chamado com o lock adquirido)."""
+        self._pending.append(row)
+        if len(self._pending) >= self.batch_size:
+            self._write_batch()
+
+    def _write_batch(self):
+        """Grava o lote pendente (chamado com o lock adquirido)."""
+        if self._pending:
+            self.connection.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?)", self._pending)
+            self.connection.commit()
+            self._pending = []
+
+    def _write_copied(self, source_file, dest_file, file_hash):
+        self._append(('copied', str(source_file), str(dest_file) if dest_file is not None else None,
+                      file_hash, None))
+
+    def _write_failed(self, source_file, error):
+        self._append(('failed', str(source_file), None, None, error))
+
+    def _write_commit_failed(self, source_file, error):
+        self._write_batch()
+        self.connection.execute("UPDATE results SET status = 'failed', hash = NULL, error = ? "
+                                "WHERE status = 'copied' AND source = ?", (error, str(source_file)))
+        self.connection.commit()
+
+    def flush(self):
+        with self.lock:
+            self._write_batch()
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.connection.close()
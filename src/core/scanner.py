@@ -5,11 +5,22 @@ Autor: FileCopy Verifier Team
 Data: 2024
 """
 
+import os
 from pathlib import Path
-from typing import Dict, List, Optional, Callable
+from typing import Dict, Iterator, List, Optional, Callable, Tuple
 from collections import defaultdict
 
 
+# Extensões de formatos já comprimidos (recomprimir não traz ganho)
+COMPRESSED_EXTENSIONS = frozenset({
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.7z', '.rar', '.lz4',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic',
+    '.mp3', '.aac', '.ogg', '.flac', '.m4a',
+    '.mp4', '.mkv', '.avi', '.mov', '.webm',
+    '.pdf', '.docx', '.xlsx', '.pptx', '.odt', '.jar', '.apk',
+})
+
+
 class DirectoryScanner:
     """
     Classe responsável por escanear diretórios e coletar estatísticas.
@@ -136,6 +147,52 @@ class DirectoryScanner:
         
         return self.stats
     
+    def iter_files(self) -> Iterator[Tuple[Path, os.stat_result]]:
+        """
+        Percorre o caminho sem acumular a lista de arquivos (memória constante).
+        
+        Diretórios e arquivos inacessíveis são ignorados. Como em `scan`, links simbólicos
+        para arquivos entram (com o stat do alvo) e links para diretórios não são percorridos.
+        
+        Yields:
+            Tuplas (arquivo, stat)
+        """
+        if self.is_file:
+            yield self.path, self.path.stat()
+            return
+        if not self.is_dir:
+            raise FileNotFoundError(f"Caminho não encontrado: {self.path}")
+        
+        pending = [self.path]
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.append(Path(entry.path))
+                            elif entry.is_file():
+                                yield Path(entry.path), entry.stat()
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+    
+    def compressed_fraction(self) -> float:
+        """
+        Calcula a fração dos bytes escaneados que já está em formatos comprimidos.
+        
+        Returns:
+            Valor entre 0.0 e 1.0 (0.0 se nada foi escaneado)
+        """
+        size_by_extension = self.stats.get('size_by_extension', {})
+        total = sum(size_by_extension.values())
+        if total <= 0:
+            return 0.0
+        compressed = sum(size for ext, size in size_by_extension.items() if ext in COMPRESSED_EXTENSIONS)
+        return compressed / total
+    
     def format_size(self, size_bytes: int) -> str:
         """
         Formata tamanho em bytes para formato legível.
@@ -0,0 +1,111 @@
+"""
+Módulo: sync.py
+Responsável pela comparação rápida (quick-check) entre origem e destino
+para cópias incrementais.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from .verifier import IntegrityVerifier
+
+
+# Modos de sincronização suportados
+SYNC_MODES = ("quick", "hash")
+
+
+class SyncChecker:
+    """
+    Decide se um arquivo de origem precisa ser copiado para o destino.
+
+    Cada diretório de destino é listado uma única vez (os.scandir) e as entradas
+    ficam em cache; o stat do destino só é feito para nomes que existem na
+    listagem, evitando um stat (com falha) por arquivo novo.
+    """
+
+    def __init__(self, mode: str = "quick", mtime_window_ns: int = 0, max_cached_dirs: int = 64):
+        """
+        Inicializa o verificador de sincronização.
+
+        Args:
+            mode: 'quick' (tamanho + mtime_ns) ou 'hash' (tamanho + hash do conteúdo)
+            mtime_window_ns: Tolerância na comparação de mtime (ex.: 2s para FAT)
+            max_cached_dirs: Número máximo de listagens de diretório mantidas em memória
+        """
+        if mode not in SYNC_MODES:
+            raise ValueError(f"Modo de sincronização não suportado: {mode}")
+        self.mode = mode
+        self.mtime_window_ns = max(0, mtime_window_ns)
+        self.max_cached_dirs = max(1, max_cached_dirs)
+        self.verifier = IntegrityVerifier() if mode == "hash" else None
+        self._listings: "OrderedDict[Path, Dict[str, os.DirEntry]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _list_directory(self, directory: Path) -> Dict[str, os.DirEntry]:
+        """Lista um diretório de destino uma única vez."""
+        entries = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    entries[entry.name] = entry
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        return entries
+
+    def _lookup(self, dest_file: Path) -> Optional[os.DirEntry]:
+        """Obtém a entrada do destino a partir da listagem em cache do diretório pai."""
+        parent = dest_file.parent
+        with self.lock:
+            listing = self._listings.get(parent)
+            if listing is None:
+                listing = self._list_directory(parent)
+                self._listings[parent] = listing
+                if len(self._listings) > self.max_cached_dirs:
+                    self._listings.popitem(last=False)
+            else:
+                self._listings.move_to_end(parent)
+            return listing.get(dest_file.name)
+
+    def is_unchanged(self, source_file: Path, source_stat: os.stat_result, dest_file: Path) -> bool:
+        """
+        Verifica se o destino já é idêntico à origem.
+
+        Args:
+            source_file: Arquivo de origem
+            source_stat: Resultado de stat() da origem
+            dest_file: Arquivo de destino correspondente
+
+        Returns:
+            True se o arquivo pode ser pulado
+        """
+        entry = self._lookup(dest_file)
+        if entry is None:
+            return False
+
+        try:
+            if not entry.is_file(follow_symlinks=False):
+                return False
+            dest_stat = entry.stat(follow_symlinks=False)
+        except OSError:
+            return False
+
+        if dest_stat.st_size != source_stat.st_size:
+            return False
+
+        if self.mode == "quick":
+            return abs(dest_stat.st_mtime_ns - source_stat.st_mtime_ns) <= self.mtime_window_ns
+
+        try:
+            return self.verifier.calculate_hash(source_file) == self.verifier.calculate_hash(dest_file)
+        except IOError:
+            return False
+
+    def clear(self):
+        """Descarta as listagens em cache."""
+        with self.lock:
+            self._listings.clear()
@@ -0,0 +1,372 @@
+"""
+Módulo: tree_diff.py
+Responsável pela comparação entre duas árvores de diretórios (arquivos novos,
+removidos, alterados e inalterados) e pelo espelhamento da origem no destino.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import os
+import shutil
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .digests import hash_file
+from .result_sink import MAX_FAILURES_KEPT
+from .sync import SYNC_MODES
+
+
+# Situações de um caminho na comparação ('unknown': arquivo do destino sob um caminho
+# da origem que não pôde ser lido, nunca tratado como removido)
+DIFF_STATUSES = ("added", "removed", "changed", "unchanged", "unknown")
+
+# Remoções simultâneas por worker no espelhamento (limita futures pendentes)
+PENDING_PER_WORKER = 4
+
+# Chave de ordenação: componentes do caminho relativo
+PathKey = Tuple[str, ...]
+
+
+def _sorted_listing(directory) -> Iterator[os.DirEntry]:
+    """Entradas de um diretório em ordem de nome (OSError se inacessível)."""
+    with os.scandir(directory) as it:
+        entries = list(it)
+    entries.sort(key=lambda entry: entry.name)
+    return iter(entries)
+
+
+def iter_sorted_files(root: Path, errors: Optional[List[Tuple[Path, str]]] = None
+                      ) -> Iterator[Tuple[PathKey, Optional[os.stat_result]]]:
+    """
+    Percorre uma árvore em ordem dos componentes do caminho (manifesto ordenado).
+
+    Só a listagem de cada diretório do caminho atual fica em memória. Como no
+    DirectoryScanner.iter_files, links para arquivos entram (com o stat do alvo)
+    e links para diretórios não são percorridos. Uma raiz inexistente é vazia.
+
+    Sem `errors`, caminhos ilegíveis são ignorados. Com `errors`, cada falha é
+    registrada como (caminho, mensagem) e o caminho é emitido com stat None: o
+    conteúdo dele (e de tudo abaixo dele) é desconhecido, não ausente.
+
+    Args:
+        root: Diretório raiz
+        errors: Lista que recebe as falhas de leitura
+
+    Yields:
+        Tuplas (componentes do caminho relativo, stat ou None)
+    """
+    try:
+        stack = [((), _sorted_listing(root))]
+    except FileNotFoundError:
+        return
+    except OSError as e:
+        if errors is not None:
+            errors.append((Path(root), str(e)))
+            yield (), None
+        return
+    while stack:
+        prefix, entries = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        key = prefix + (entry.name,)
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((key, _sorted_listing(entry.path)))
+            elif entry.is_file():
+                yield key, entry.stat()
+        except OSError as e:
+            if errors is not None:
+                errors.append((Path(entry.path), str(e)))
+                yield key, None
+
+
+class DiffEntry:
+    """Um caminho da comparação e sua situação."""
+
+    __slots__ = ("path", "status", "source_size", "dest_size", "conflict")
+
+    def __init__(self, path: str, status: str, source_size: Optional[int] = None,
+                 dest_size: Optional[int] = None, conflict: bool = False):
+        self.path = path
+        self.status = status
+        self.source_size = source_size
+        self.dest_size = dest_size
+        # Arquivo de um lado e diretório do outro com o mesmo nome
+        self.conflict = conflict
+
+    def __repr__(self):
+        return f"DiffEntry({self.path!r}, {self.status!r})"
+
+
+def _is_prefix(prefix: PathKey, key: Optional[PathKey]) -> bool:
+    return key is not None and len(key) > len(prefix) and key[:len(prefix)] == prefix
+
+
+class TreeDiff:
+    """
+    Compara origem e destino em uma única passada.
+
+    As duas árvores são percorridas em ordem (iter_sorted_files) e unidas como
+    em um merge-join de duas listas ordenadas: a memória não cresce com o
+    número de arquivos e cada lado é listado uma única vez.
+
+    Um caminho da origem que não pôde ser lido (permissão, erro de E/S, montagem
+    de rede caída) não é tratado como vazio: os arquivos do destino abaixo dele
+    saem como 'unknown' e a falha fica em `errors`.
+    """
+
+    def __init__(self, source: Path, destination: Path, mode: str = "quick",
+                 mtime_window_ns: int = 0, algorithm: str = "sha256"):
+        """
+        Inicializa a comparação.
+
+        Args:
+            source: Diretório de origem
+            destination: Diretório de destino (pode não existir)
+            mode: 'quick' (tamanho + mtime_ns) ou 'hash' (tamanho + hash do conteúdo)
+            mtime_window_ns: Tolerância na comparação de mtime (ex.: 2s para FAT)
+            algorithm: Algoritmo de hash do modo 'hash'
+        """
+        if mode not in SYNC_MODES:
+            raise ValueError(f"Modo de comparação não suportado: {mode}")
+        self.source = Path(source)
+        self.destination = Path(destination)
+        if not self.source.is_dir():
+            raise NotADirectoryError(f"Origem não é um diretório: {self.source}")
+        self.mode = mode
+        self.mtime_window_ns = max(0, mtime_window_ns)
+        self.algorithm = algorithm
+        # Falhas de leitura (caminho, mensagem) da última passada, dos dois lados
+        self.errors: List[Tuple[Path, str]] = []
+
+    def _same(self, key: PathKey, source_stat: os.stat_result, dest_stat: os.stat_result) -> bool:
+        """Decide se o destino é idêntico à origem."""
+        if source_stat.st_size != dest_stat.st_size:
+            return False
+        if self.mode == "quick":
+            return abs(source_stat.st_mtime_ns - dest_stat.st_mtime_ns) <= self.mtime_window_ns
+        try:
+            return (hash_file(self.source.joinpath(*key), self.algorithm)
+                    == hash_file(self.destination.joinpath(*key), self.algorithm))
+        except OSError:
+            return False
+
+    def __iter__(self) -> Iterator[DiffEntry]:
+        """
+        Percorre a comparação em streaming, em ordem de caminho.
+
+        Yields:
+            Um DiffEntry por arquivo presente em algum dos lados
+        """
+        self.errors = []
+        sources = iter_sorted_files(self.source, self.errors)
+        dests = iter_sorted_files(self.destination, self.errors)
+        source_item = next(sources, None)
+        dest_item = next(dests, None)
+        # Caminho da origem ilegível: o destino abaixo dele não pode ser comparado
+        unknown: Optional[PathKey] = None
+        while source_item is not None or dest_item is not None:
+            source_key = source_item[0] if source_item is not None else None
+            dest_key = dest_item[0] if dest_item is not None else None
+            if dest_item is not None and dest_item[1] is None:
+                # Caminho do destino ilegível: só fica registrado em errors
+                dest_item = next(dests, None)
+            elif source_item is not None and source_item[1] is None and \
+                    (dest_key is None or source_key <= dest_key):
+                unknown = source_key
+                source_item = next(sources, None)
+            elif dest_key is None or (source_key is not None and source_key < dest_key):
+                yield DiffEntry("/".join(source_key), "added", source_size=source_item[1].st_size,
+                                conflict=_is_prefix(source_key, dest_key))
+                source_item = next(sources, None)
+            elif source_key is None or dest_key < source_key:
+                if unknown is not None and (dest_key == unknown or _is_prefix(unknown, dest_key)):
+                    yield DiffEntry("/".join(dest_key), "unknown", dest_size=dest_item[1].st_size)
+                else:
+                    yield DiffEntry("/".join(dest_key), "removed", dest_size=dest_item[1].st_size,
+                                    conflict=_is_prefix(dest_key, source_key))
+                dest_item = next(dests, None)
+            else:
+                status = "unchanged" if self._same(source_key, source_item[1], dest_item[1]) else "changed"
+                yield DiffEntry("/".join(source_key), status, source_item[1].st_size, dest_item[1].st_size)
+                source_item = next(sources, None)
+                dest_item = next(dests, None)
+
+    def summarize(self, keep: Tuple[str, ...] = ("added", "removed", "changed"),
+                  max_listed: Optional[int] = MAX_FAILURES_KEPT) -> Dict:
+        """
+        Executa a comparação contando cada situação.
+
+        Args:
+            keep: Situações cujos caminhos são guardados em `paths`
+            max_listed: Caminhos guardados por situação (None = todos)
+
+        Returns:
+            Dicionário com a contagem de cada situação (added, removed, changed,
+            unchanged, unknown), bytes (tamanho da origem, ou do destino nos removidos
+            e desconhecidos, por situação), paths (caminhos relativos por situação em
+            `keep`) e errors (falhas de leitura: caminho, mensagem)
+        """
+        counts = {status: 0 for status in DIFF_STATUSES}
+        sizes = {status: 0 for status in DIFF_STATUSES}
+        paths: Dict[str, List[str]] = {status: [] for status in keep}
+        for entry in self:
+            counts[entry.status] += 1
+            sizes[entry.status] += entry.source_size if entry.source_size is not None else entry.dest_size
+            listed = paths.get(entry.status)
+            if listed is not None and (max_listed is None or len(listed) < max_listed):
+                listed.append(entry.path)
+        result = dict(counts)
+        result['bytes'] = sizes
+        result['paths'] = paths
+        result['errors'] = list(self.errors)
+        return result
+
+
+class TreeMirror:
+    """
+    Espelha a origem no destino: copia novos e alterados e remove os excedentes.
+
+    copy_tasks() percorre a comparação uma única vez: as remoções vão para um
+    pool de threads (em paralelo, com quantidade limitada de pendentes) e os
+    arquivos a copiar são devolvidos como tarefas para o ParallelFileCopier.
+    finish() aguarda as remoções e apaga os diretórios que ficaram vazios.
+    Nada é removido abaixo de um caminho da origem que não pôde ser lido.
+    """
+
+    def __init__(self, source: Path, destination: Path, mode: str = "quick",
+                 mtime_window_ns: int = 0, delete_workers: int = 4, dry_run: bool = False,
+                 max_failures_kept: Optional[int] = MAX_FAILURES_KEPT):
+        """
+        Inicializa o espelhamento.
+
+        Args:
+            source: Diretório de origem
+            destination: Diretório de destino
+            mode: Comparação dos arquivos presentes nos dois lados ('quick' ou 'hash')
+            mtime_window_ns: Tolerância na comparação de mtime
+            delete_workers: Threads de remoção
+            dry_run: Só conta o que seria feito (nada é copiado nem removido)
+            max_failures_kept: Falhas de remoção mantidas em memória (None = todas)
+        """
+        self.diff = TreeDiff(source, destination, mode, mtime_window_ns)
+        self.source = self.diff.source
+        self.destination = self.diff.destination
+        self.delete_workers = max(1, delete_workers)
+        self.dry_run = dry_run
+        self.max_failures_kept = max_failures_kept
+        self.lock = threading.Lock()
+        self.counts = {status: 0 for status in DIFF_STATUSES}
+        self.deleted = 0
+        self.deleted_dirs = 0
+        self.failed = 0
+        self.failures: List[Tuple[Path, str]] = []
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending: Set = set()
+        self._parents: Set[Path] = set()
+
+    def _delete(self, dest_file: Path):
+        """Remove um arquivo do destino (já removido não é erro)."""
+        try:
+            dest_file.unlink(missing_ok=True)
+        except OSError as e:
+            with self.lock:
+                self.failed += 1
+                if self.max_failures_kept is None or len(self.failures) < self.max_failures_kept:
+                    self.failures.append((dest_file, str(e)))
+            return
+        with self.lock:
+            self.deleted += 1
+
+    def _submit_delete(self, dest_file: Path):
+        """Agenda uma remoção, aguardando se houver remoções demais pendentes."""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.delete_workers, thread_name_prefix="mirror-delete")
+        if len(self._pending) >= self.delete_workers * PENDING_PER_WORKER:
+            _, self._pending = wait(self._pending, return_when=FIRST_COMPLETED)
+        self._pending.add(self._pool.submit(self._delete, dest_file))
+
+    def copy_tasks(self) -> Iterator[Tuple[Path, Path]]:
+        """
+        Percorre a comparação agendando as remoções.
+
+        Conflitos de tipo são resolvidos antes da cópia do caminho: um arquivo no
+        destino onde a origem tem um diretório é removido na hora, e um diretório
+        no destino onde a origem tem um arquivo é apagado inteiro (os arquivos dele,
+        que vêm logo em seguida na comparação, contam como removidos).
+
+        Yields:
+            Pares (arquivo_origem, arquivo_destino) a copiar (novos e alterados)
+        """
+        replaced = None
+        for entry in self.diff:
+            self.counts[entry.status] += 1
+            if entry.status in ("unchanged", "unknown"):
+                continue
+            dest_file = self.destination / entry.path
+            if entry.status == "removed":
+                if self.dry_run:
+                    continue
+                if replaced is not None and entry.path.startswith(replaced):
+                    with self.lock:
+                        self.deleted += 1
+                    continue
+                self._parents.add(dest_file.parent)
+                if entry.conflict:
+                    self._delete(dest_file)
+                else:
+                    self._submit_delete(dest_file)
+                continue
+            if self.dry_run:
+                continue
+            if entry.conflict:
+                shutil.rmtree(dest_file, ignore_errors=True)
+                replaced = entry.path + "/"
+            yield self.source / entry.path, dest_file
+
+    def _prune_directories(self):
+        """Apaga os diretórios do destino que ficaram vazios e não existem na origem."""
+        checked: Set[Path] = set()
+        for directory in sorted(self._parents, key=lambda p: len(p.parts), reverse=True):
+            while directory != self.destination and directory not in checked:
+                checked.add(directory)
+                if (self.source / directory.relative_to(self.destination)).is_dir():
+                    break
+                try:
+                    directory.rmdir()
+                except OSError:
+                    break
+                self.deleted_dirs += 1
+                directory = directory.parent
+
+    def finish(self) -> Dict:
+        """
+        Aguarda as remoções e limpa os diretórios vazios.
+
+        Returns:
+            Dicionário com a contagem de cada situação (added, removed, changed,
+            unchanged, unknown), deleted (arquivos removidos), deleted_dirs, failed e
+            failed_list (remoções que falharam), scan_errors e scan_error_list (falhas
+            de leitura das árvores: caminho, mensagem)
+        """
+        if self._pool is not None:
+            wait(self._pending)
+            self._pool.shutdown()
+            self._pool = None
+            self._pending = set()
+        self._prune_directories()
+        self._parents = set()
+        result = dict(self.counts)
+        result.update({
+            'deleted': self.deleted,
+            'deleted_dirs': self.deleted_dirs,
+            'failed': self.failed,
+            'failed_list': list(self.failures),
+            'scan_errors': len(self.diff.errors),
+            'scan_error_list': list(self.diff.errors),
+        })
+        return result
@@ -5,9 +5,17 @@ Autor: FileCopy Verifier Team
 Data: 2024
 """
 
-import hashlib
+import os
 from pathlib import Path
-from typing import Dict, Tuple, Optional
+from typing import Tuple, Optional
+from .digests import (CACHE_MODES, DEFAULT_SAMPLE_BLOCK_SIZE, DEFAULT_SAMPLE_BLOCKS, create_hasher, hash_file,
+                      sample_hash)
+from .hash_cache import HashCache
+
+
+# Níveis de verificação, do mais barato ao mais completo:
+# 'metadata' (tamanho + mtime), 'sample' (blocos amostrados) e 'full' (hash completo)
+VERIFY_LEVELS = ("metadata", "sample", "full")
 
 
 class IntegrityVerifier:
@@ -15,54 +23,119 @@ class IntegrityVerifier:
     Classe responsável por verificar a integridade de arquivos usando hash.
     """
     
-    def __init__(self, algorithm: str = "sha256"):
+    def __init__(self, algorithm: str = "sha256", chunk_size: Optional[int] = None,
+                 use_mmap: bool = False, read_ahead: int = 0, hash_store=None,
+                 hash_cache: Optional[HashCache] = None, level: str = "full",
+                 sample_blocks: int = DEFAULT_SAMPLE_BLOCKS,
+                 sample_block_size: int = DEFAULT_SAMPLE_BLOCK_SIZE, sample_seed: int = 0,
+                 mtime_window_ns: int = 0, cache_mode: str = "normal"):
         """
         Inicializa o verificador de integridade.
         
         Args:
-            algorithm: Algoritmo de hash a ser usado ('sha256', 'md5', etc.)
+            algorithm: Algoritmo de hash a ser usado ('sha256', 'blake2b', 'xxh3_64', etc.;
+                       ver digests.available_algorithms)
+            chunk_size: Tamanho do buffer de leitura (None = hashlib.file_digest / padrão)
+            use_mmap: Usa mmap para arquivos de tamanho médio
+            read_ahead: Buffers lidos à frente em arquivos grandes (0 = sem pipeline)
+            hash_store: Cache persistente de hashes (database.hash_store.HashStore); os
+                        hashes são validados por dispositivo, inode, tamanho e mtime
+            hash_cache: Cache em memória (padrão: um HashCache novo com os limites padrão)
+            level: Nível padrão de verify_file ('metadata', 'sample' ou 'full')
+            sample_blocks: Blocos aleatórios lidos no nível 'sample' (além do início e do fim)
+            sample_block_size: Tamanho de cada bloco amostrado
+            sample_seed: Semente da amostragem (trocá-la varia os blocos lidos)
+            mtime_window_ns: Tolerância na comparação de mtime do nível 'metadata'
+            cache_mode: Uso do page cache nas leituras completas ('normal', 'drop' ou
+                        'direct'; ver digests.CACHE_MODES)
         """
+        create_hasher(algorithm)  # Valida o algoritmo já na criação
+        if level not in VERIFY_LEVELS:
+            raise ValueError(f"Nível de verificação não suportado: {level}")
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"Modo de cache não suportado: {cache_mode}")
         self.algorithm = algorithm
-        self.hash_cache: Dict[Path, str] = {}
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+        self.read_ahead = read_ahead
+        self.hash_store = hash_store
+        self.hash_cache = hash_cache if hash_cache is not None else HashCache()
+        self.level = level
+        self.sample_blocks = max(0, sample_blocks)
+        self.sample_block_size = max(1, sample_block_size)
+        self.sample_seed = sample_seed
+        self.mtime_window_ns = max(0, mtime_window_ns)
+        self.cache_mode = cache_mode
     
-    def calculate_hash(self, file_path: Path, chunk_size: int = 8192) -> str:
+    def calculate_hash(self, file_path: Path, chunk_size: Optional[int] = None,
+                       use_cache: bool = True) -> str:
         """
         Calcula o hash de um arquivo.
         
+        Consulta primeiro o cache em memória e depois o hash_store; as entradas de
+        ambos só valem se o stat do arquivo não mudou.
+        
         Args:
             file_path: Caminho do arquivo
-            chunk_size: Tamanho do chunk para leitura (padrão: 8KB)
+            chunk_size: Tamanho do buffer de leitura (padrão: o do verificador)
+            use_cache: Consulta e alimenta os caches (desligar para reler de fato o arquivo)
             
         Returns:
             Hash hexadecimal do arquivo
         """
-        # Verifica cache
-        if file_path in self.hash_cache:
-            return self.hash_cache[file_path]
+        if not use_cache:
+            return self._read_hash(file_path, chunk_size)
+        
+        try:
+            stat, cached = self.hash_cache.lookup(file_path, self.algorithm)
+        except OSError as e:
+            raise IOError(f"Erro ao calcular hash de {file_path}: {str(e)}")
+        if cached is not None:
+            return cached
         
-        # Seleciona algoritmo
-        if self.algorithm == "sha256":
-            hasher = hashlib.sha256()
-        elif self.algorithm == "md5":
-            hasher = hashlib.md5()
-        else:
-            raise ValueError(f"Algoritmo não suportado: {self.algorithm}")
+        if self.hash_store is not None:
+            stored = self.hash_store.get(stat, self.algorithm)
+            if stored is not None:
+                self.hash_cache.put(file_path, stat, self.algorithm, stored)
+                return stored
         
-        # Calcula hash lendo em chunks
+        hash_value = self._read_hash(file_path, chunk_size)
+        self.hash_cache.record(file_path, stat, self.algorithm, hash_value)
+        if self.hash_store is not None:
+            self.hash_store.record(file_path, stat, self.algorithm, hash_value)
+        return hash_value
+    
+    def _read_hash(self, file_path: Path, chunk_size: Optional[int]) -> str:
+        """Lê o arquivo e calcula o hash."""
+        # Calcula hash lendo em um buffer reutilizado (ou via mmap)
         try:
-            with open(file_path, 'rb') as f:
-                while chunk := f.read(chunk_size):
-                    hasher.update(chunk)
+            return hash_file(file_path, self.algorithm,
+                             chunk_size=chunk_size or self.chunk_size,
+                             use_mmap=self.use_mmap, read_ahead=self.read_ahead,
+                             cache_mode=self.cache_mode)
+        except Exception as e:
+            raise IOError(f"Erro ao calcular hash de {file_path}: {str(e)}")
+    
+    def calculate_sample_hash(self, file_path: Path, key: str = "") -> Tuple[str, bool]:
+        """
+        Calcula o hash de uma amostra determinística do arquivo (nível 'sample').
+        
+        Args:
+            file_path: Caminho do arquivo
+            key: Identificação do arquivo na escolha dos blocos (a mesma na origem e no destino)
             
-            hash_value = hasher.hexdigest()
-            self.hash_cache[file_path] = hash_value
-            return hash_value
+        Returns:
+            Tupla (hash, completo) — completo=True se o arquivo era pequeno e foi lido inteiro
+        """
+        try:
+            return sample_hash(file_path, self.algorithm, self.sample_blocks,
+                               self.sample_block_size, self.sample_seed, key)
         except Exception as e:
             raise IOError(f"Erro ao calcular hash de {file_path}: {str(e)}")
     
-    def verify_file(self, source_file: Path, dest_file: Path) -> Tuple[bool, Optional[str]]:
+    def compare_metadata(self, source_file: Path, dest_file: Path) -> Tuple[bool, Optional[str]]:
         """
-        Verifica se dois arquivos são idênticos comparando seus hashes.
+        Compara tamanho e data de modificação (nível 'metadata').
         
         Args:
             source_file: Arquivo de origem
@@ -72,8 +145,90 @@ class IntegrityVerifier:
             Tupla (são_iguais, mensagem_erro)
         """
         try:
-            source_hash = self.calculate_hash(source_file)
-            dest_hash = self.calculate_hash(dest_file)
+            source_stat = os.stat(source_file)
+            dest_stat = os.stat(dest_file)
+        except OSError as e:
+            return False, str(e)
+        
+        if source_stat.st_size != dest_stat.st_size:
+            return False, f"Tamanho diferente: origem={source_stat.st_size}, destino={dest_stat.st_size}"
+        if abs(source_stat.st_mtime_ns - dest_stat.st_mtime_ns) > self.mtime_window_ns:
+            return False, "Data de modificação diferente"
+        return True, None
+    
+    def check_file(self, source_file: Path, dest_file: Path, source_hash: Optional[str] = None,
+                   level: Optional[str] = None,
+                   sample_key: Optional[str] = None) -> Tuple[bool, Optional[str], str]:
+        """
+        Verifica um arquivo no nível pedido e informa o nível efetivamente aplicado.
+        
+        No nível 'sample', arquivos pequenos demais para amostrar são lidos inteiros
+        e contam como 'full'.
+        
+        Args:
+            source_file: Arquivo de origem
+            dest_file: Arquivo de destino
+            source_hash: Hash completo da origem já conhecido (usado só no nível 'full')
+            level: Nível de verificação (padrão: o do verificador)
+            sample_key: Caminho relativo usado na escolha dos blocos do nível 'sample'
+                        (padrão: o nome da origem)
+            
+        Returns:
+            Tupla (são_iguais, mensagem_erro, nível_aplicado)
+        """
+        level = level or self.level
+        if level not in VERIFY_LEVELS:
+            raise ValueError(f"Nível de verificação não suportado: {level}")
+        
+        if level == "metadata":
+            ok, error = self.compare_metadata(source_file, dest_file)
+            return ok, error, level
+        
+        if level == "sample":
+            try:
+                source_size = os.path.getsize(source_file)
+                dest_size = os.path.getsize(dest_file)
+                if source_size != dest_size:
+                    return False, f"Tamanho diferente: origem={source_size}, destino={dest_size}", level
+                key = sample_key if sample_key is not None else Path(source_file).name
+                source_sample, complete = self.calculate_sample_hash(source_file, key)
+                dest_sample, _ = self.calculate_sample_hash(dest_file, key)
+            except Exception as e:
+                return False, str(e), level
+            applied = "full" if complete else "sample"
+            if source_sample != dest_sample:
+                return False, "Hash diferente nos blocos amostrados", applied
+            return True, None, applied
+        
+        ok, error = self._verify_full(source_file, dest_file, source_hash)
+        return ok, error, level
+    
+    def verify_file(self, source_file: Path, dest_file: Path,
+                    source_hash: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica se dois arquivos são idênticos no nível do verificador
+        (por padrão, comparando os hashes completos).
+        
+        Args:
+            source_file: Arquivo de origem
+            dest_file: Arquivo de destino
+            source_hash: Hash da origem já conhecido (ex.: calculado durante a cópia);
+                         quando informado, apenas o destino é lido
+            
+        Returns:
+            Tupla (são_iguais, mensagem_erro)
+        """
+        ok, error, _ = self.check_file(source_file, dest_file, source_hash)
+        return ok, error
+    
+    def _verify_full(self, source_file: Path, dest_file: Path,
+                     source_hash: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Compara os hashes completos (nível 'full')."""
+        try:
+            if source_hash is None:
+                source_hash = self.calculate_hash(source_file)
+            # O destino é sempre relido: é ele que está sendo verificado
+            dest_hash = self.calculate_hash(dest_file, use_cache=False)
             
             if source_hash == dest_hash:
                 return True, None
@@ -81,4 +236,3 @@ class IntegrityVerifier:
                 return False, f"Hash diferente: origem={source_hash[:16]}..., destino={dest_hash[:16]}..."
         except Exception as e:
             return False, str(e)
-
@@ -0,0 +1,354 @@
+"""
+Módulo: verify_engine.py
+Responsável pela verificação paralela de integridade entre origem e destino.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .chunk_tree import (DEFAULT_TREE_CHUNK_SIZE, ChunkTree, find_bad_ranges, hash_file_with_tree,
+                         repair_and_recheck)
+from .digests import DEFAULT_SAMPLE_BLOCK_SIZE, DEFAULT_SAMPLE_BLOCKS, hash_file
+from .locality import LOCALITY_MODES, locality_key, resolve_locality
+from .scanner import DirectoryScanner
+from .tree_diff import TreeDiff
+from .verifier import IntegrityVerifier, VERIFY_LEVELS
+
+
+# Arquivos em verificação simultânea por worker (limita futures pendentes)
+PENDING_PER_WORKER = 2
+
+# Intervalo (em arquivos) do callback de progresso da varredura
+SCAN_REPORT_INTERVAL = 1000
+
+
+class VerifyEngine:
+    """
+    Verifica uma árvore copiada comparando hashes de origem e destino em paralelo.
+
+    Os arquivos são agendados do maior para o menor (os grandes não ficam para o
+    fim, sozinhos em um worker). Em cada arquivo, a origem é hasheada em um pool
+    auxiliar enquanto o worker hasheia o destino; como o hashlib libera o GIL,
+    as leituras e hashes acontecem de fato ao mesmo tempo. O progresso é
+    agregado (arquivos e bytes) e emitido pela thread que chamou `verify`.
+
+    Com `tree_chunk_size`, a origem lida também produz sua árvore de blocos (na
+    mesma leitura) e um hash diferente é localizado em trechos; com `repair`, só
+    esses trechos são copiados de novo da origem.
+
+    Com `locality` (em disco rotacional, no modo 'auto'), os arquivos seguem a
+    posição física da origem em vez do tamanho, trocando o balanceamento entre
+    workers por leituras com menos seeks.
+    """
+
+    def __init__(self, source: Path, destination: Path, algorithm: str = "sha256",
+                 num_workers: int = 4, known_hashes: Optional[Dict[Path, str]] = None,
+                 chunk_size: Optional[int] = None, use_mmap: bool = False, read_ahead: int = 0,
+                 hash_store=None, progress_callback: Optional[Callable] = None,
+                 scan_callback: Optional[Callable[[int], None]] = None, level: str = "full",
+                 sample_blocks: int = DEFAULT_SAMPLE_BLOCKS,
+                 sample_block_size: int = DEFAULT_SAMPLE_BLOCK_SIZE, sample_seed: int = 0,
+                 mtime_window_ns: int = 0, manifest_writer=None,
+                 tree_chunk_size: Optional[int] = None, repair: bool = False, report_extra: bool = False,
+                 cache_mode: str = "normal", locality: str = "off"):
+        """
+        Inicializa o motor de verificação.
+
+        Args:
+            source: Arquivo ou diretório de origem
+            destination: Destino correspondente
+            algorithm: Algoritmo de hash (ver digests.available_algorithms)
+            num_workers: Arquivos verificados em paralelo
+            known_hashes: Hashes da origem já conhecidos (ex.: da cópia); evitam reler a origem
+            chunk_size: Tamanho do buffer de leitura (None = padrão)
+            use_mmap: Usa mmap para arquivos de tamanho médio
+            read_ahead: Buffers lidos à frente em arquivos grandes (0 = sem pipeline)
+            hash_store: Cache persistente de hashes (database.hash_store.HashStore), usado
+                        só para a origem: uma origem inalterada não é relida
+            progress_callback: Chamado a cada arquivo concluído
+                               Assinatura: callback(files_done, total_files, bytes_done, total_bytes, file)
+            scan_callback: Chamado durante a varredura da origem
+                           Assinatura: callback(files_count)
+            level: Nível de verificação ('metadata', 'sample' ou 'full'; ver verifier.VERIFY_LEVELS)
+            sample_blocks: Blocos aleatórios lidos no nível 'sample' (além do início e do fim)
+            sample_block_size: Tamanho de cada bloco amostrado
+            sample_seed: Semente da amostragem (trocá-la varia os blocos lidos)
+            mtime_window_ns: Tolerância na comparação de mtime do nível 'metadata'
+            manifest_writer: Gravador de manifesto (manifest.ManifestWriter) que recebe o hash
+                             da origem de cada arquivo verificado no nível 'full'
+            tree_chunk_size: Tamanho dos blocos das árvores de hash (None = sem árvores); as
+                             árvores da origem vão para o manifest_writer
+            repair: Reescreve no destino só os trechos corrompidos (nível 'full')
+            report_extra: Compara as duas árvores (tree_diff.TreeDiff) e relata os arquivos
+                          do destino que não existem na origem
+            cache_mode: Uso do page cache nas leituras ('normal', 'drop' ou 'direct'; ver
+                        digests.CACHE_MODES): fora do 'normal', o destino recém-copiado é
+                        lido do disco e a verificação não ocupa o cache
+            locality: Ordena os arquivos pela posição física da origem ('off', 'auto',
+                      'inode' ou 'extent'; ver locality.LOCALITY_MODES); 'auto' só ordena
+                      em discos rotacionais
+        """
+        if locality not in LOCALITY_MODES:
+            raise ValueError(f"Ordenação não suportada: {locality}")
+        # Valida algoritmo, nível e modo de cache já na criação; o verificador atende os
+        # níveis mais baratos
+        self.verifier = IntegrityVerifier(algorithm, level=level, sample_blocks=sample_blocks,
+                                          sample_block_size=sample_block_size, sample_seed=sample_seed,
+                                          mtime_window_ns=mtime_window_ns, cache_mode=cache_mode)
+        self.level = level
+        self.source = Path(source)
+        self.destination = Path(destination)
+        self.algorithm = algorithm
+        self.num_workers = max(1, num_workers)
+        self.known_hashes = known_hashes or {}
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+        self.read_ahead = read_ahead
+        self.hash_store = hash_store
+        self.manifest_writer = manifest_writer
+        self.tree_chunk_size = tree_chunk_size
+        self.repair = repair
+        self.report_extra = report_extra
+        self.cache_mode = cache_mode
+        self.locality = locality
+        self.locality_applied = "off"
+        self.progress_callback = progress_callback
+        self.scan_callback = scan_callback
+        self.cancel_event = threading.Event()
+        self.total_files = 0
+        self.total_bytes = 0
+        self.files_done = 0
+        self.bytes_done = 0
+
+    def cancel(self):
+        """Interrompe o agendamento de novos arquivos (os em andamento terminam)."""
+        self.cancel_event.set()
+
+    def collect(self) -> List[Tuple[Path, int]]:
+        """
+        Varre a origem e ordena os arquivos do maior para o menor (ou pela posição
+        física, com `locality`).
+
+        Returns:
+            Lista de (arquivo, tamanho)
+        """
+        self.locality_applied = resolve_locality(self.locality, self.source)
+        files = []
+        keys = {}
+        for file_path, stat in DirectoryScanner(self.source).iter_files():
+            files.append((file_path, stat.st_size))
+            if self.locality_applied != "off":
+                keys[file_path] = locality_key(file_path, self.locality_applied, stat)
+            if self.scan_callback and len(files) % SCAN_REPORT_INTERVAL == 0:
+                self.scan_callback(len(files))
+        if self.scan_callback:
+            self.scan_callback(len(files))
+        if keys:
+            files.sort(key=lambda item: keys[item[0]])
+        else:
+            files.sort(key=lambda item: item[1], reverse=True)
+        return files
+
+    def _dest_path(self, source_file: Path) -> Path:
+        """Caminho correspondente no destino."""
+        if source_file == self.source:
+            return self.destination
+        return self.destination / source_file.relative_to(self.source)
+
+    def _relative_name(self, source_file: Path) -> str:
+        """Caminho relativo à origem (separador '/'), como gravado no manifesto."""
+        if source_file == self.source:
+            return "."
+        return source_file.relative_to(self.source).as_posix()
+
+    def _hash(self, file_path: Path) -> str:
+        """Hash de um arquivo com as opções de leitura do motor."""
+        return hash_file(file_path, self.algorithm, chunk_size=self.chunk_size, use_mmap=self.use_mmap,
+                         read_ahead=self.read_ahead, cache_mode=self.cache_mode)
+
+    def _hash_source(self, source_file: Path, stat=None) -> Tuple[str, Optional[ChunkTree]]:
+        """Hash da origem (com a árvore de blocos, se pedida), registrado no hash_store."""
+        if self.tree_chunk_size:
+            file_hash, tree = hash_file_with_tree(source_file, self.algorithm, self.tree_chunk_size,
+                                                  self.cache_mode)
+        else:
+            file_hash, tree = self._hash(source_file), None
+        if stat is not None:
+            self.hash_store.record(source_file, stat, self.algorithm, file_hash)
+        return file_hash, tree
+
+    def _locate(self, source_file: Path, dest_file: Path,
+                source_tree: Optional[ChunkTree]) -> Tuple[Optional[str], List[Tuple[int, int]]]:
+        """
+        Localiza (e, com `repair`, reescreve) os trechos do destino que diferem da origem.
+
+        Returns:
+            Tupla (erro ou None se reparado e conferido, trechos corrompidos; após um
+            reparo que não conferiu, os trechos ainda diferentes)
+        """
+        if source_tree is None:
+            _, source_tree = hash_file_with_tree(source_file, self.algorithm,
+                                                 self.tree_chunk_size or DEFAULT_TREE_CHUNK_SIZE)
+        ranges = find_bad_ranges(dest_file, source_tree)
+        if self.repair:
+            remaining = repair_and_recheck(source_file, dest_file, source_tree, ranges, self.cache_mode)
+            if remaining:
+                return f"Reparo não conferiu: {len(remaining)} trecho(s) ainda diferente(s)", remaining
+            return None, ranges
+        if not ranges:
+            return f"Tamanho diferente: origem={source_tree.size}, destino={dest_file.stat().st_size}", ranges
+        return f"Hash diferente em {len(ranges)} trecho(s)", ranges
+
+    def _verify_one(self, helper: ThreadPoolExecutor, source_file: Path) -> Tuple:
+        """
+        Verifica um arquivo.
+
+        Returns:
+            Tupla (erro, nível_aplicado, hash_da_origem, árvore_da_origem, trechos); erro
+            None se origem e destino conferem (ou o destino foi reparado); o hash só é
+            conhecido no nível 'full' e a árvore só quando a origem foi lida com
+            tree_chunk_size; trechos são os corrompidos localizados (ou None)
+        """
+        dest_file = self._dest_path(source_file)
+        if not dest_file.exists():
+            return "Arquivo não encontrado no destino", self.level, None, None, None
+
+        if self.level != "full":
+            _, error, applied = self.verifier.check_file(source_file, dest_file, level=self.level,
+                                                         sample_key=self._relative_name(source_file))
+            return error, applied, None, None, None
+
+        source_hash = self.known_hashes.get(source_file)
+        source_tree = None
+        source_future = None
+        if source_hash is None and self.hash_store is not None:
+            stat, source_hash = self.hash_store.lookup(source_file, self.algorithm)
+            if source_hash is None:
+                source_future = helper.submit(self._hash_source, source_file, stat)
+        elif source_hash is None:
+            source_future = helper.submit(self._hash_source, source_file)
+        try:
+            dest_hash = self._hash(dest_file)
+        finally:
+            # Aguarda a origem mesmo se o destino falhar (não deixa trabalho órfão)
+            if source_future is not None:
+                wait([source_future])
+        if source_future is not None:
+            source_hash, source_tree = source_future.result()
+
+        if source_hash == dest_hash:
+            return None, "full", source_hash, source_tree, None
+        if not (self.tree_chunk_size or self.repair):
+            return "Hash diferente", "full", source_hash, source_tree, None
+        error, ranges = self._locate(source_file, dest_file, source_tree)
+        return error, "full", source_hash, source_tree, ranges
+
+    def _report(self, file_path: Path):
+        """Emite o progresso agregado ignorando erros no callback."""
+        if self.progress_callback:
+            try:
+                self.progress_callback(self.files_done, self.total_files,
+                                       self.bytes_done, self.total_bytes, str(file_path))
+            except Exception:
+                pass
+
+    def verify(self, files: Optional[List[Tuple[Path, int]]] = None) -> Dict:
+        """
+        Executa a verificação.
+
+        Args:
+            files: Lista de (arquivo_origem, tamanho); se None, a origem é varrida
+
+        Returns:
+            Dicionário com total, algorithm, verified, corrupted e corrupted_list, mais
+            level (nível pedido), levels (contagem por nível aplicado), file_levels
+            (nível aplicado a cada arquivo), bad_ranges (trechos corrompidos por arquivo
+            ainda corrompido) e repaired (trechos reescritos por arquivo reparado, que
+            conta como verificado), locality (ordenação efetiva); com report_extra,
+            também extra (arquivos só no destino) e extra_list (seus caminhos no destino)
+        """
+        if files is None:
+            files = self.collect()
+        else:
+            self.locality_applied = resolve_locality(self.locality, self.source)
+            if self.locality_applied != "off":
+                files = sorted(files, key=lambda item: locality_key(item[0], self.locality_applied))
+            else:
+                files = sorted(files, key=lambda item: item[1], reverse=True)
+
+        self.total_files = len(files)
+        self.total_bytes = sum(size for _, size in files)
+        self.files_done = 0
+        self.bytes_done = 0
+        verified = 0
+        corrupted: List[Tuple[Path, str]] = []
+        levels = {level: 0 for level in VERIFY_LEVELS}
+        file_levels: Dict[Path, str] = {}
+        bad_ranges: Dict[Path, List[Tuple[int, int]]] = {}
+        repaired: Dict[Path, List[Tuple[int, int]]] = {}
+        max_pending = self.num_workers * PENDING_PER_WORKER
+
+        with ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="verify") as workers, \
+                ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="verify-src") as helper:
+            pending = {}
+            queue = iter(files)
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_pending and not self.cancel_event.is_set():
+                    item = next(queue, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    pending[workers.submit(self._verify_one, helper, item[0])] = item
+                if self.cancel_event.is_set():
+                    exhausted = True
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source_file, size = pending.pop(future)
+                    try:
+                        error, applied, source_hash, tree, ranges = future.result()
+                    except Exception as e:
+                        error, applied, source_hash, tree, ranges = str(e), self.level, None, None, None
+                    if source_hash is not None and self.manifest_writer is not None:
+                        self.manifest_writer.add(self._relative_name(source_file), source_hash, size, tree)
+                    if ranges is not None:
+                        (bad_ranges if error else repaired)[source_file] = ranges
+                    levels[applied] += 1
+                    file_levels[source_file] = applied
+                    if error is None:
+                        verified += 1
+                    else:
+                        corrupted.append((source_file, error))
+                    self.files_done += 1
+                    self.bytes_done += size
+                    self._report(source_file)
+
+        if self.hash_store is not None:
+            self.hash_store.flush()
+        corrupted.sort(key=lambda item: str(item[0]))
+        extra = {}
+        if self.report_extra and self.source.is_dir() and not self.cancel_event.is_set():
+            summary = TreeDiff(self.source, self.destination).summarize(keep=("removed",))
+            extra = {'extra': summary['removed'],
+                     'extra_list': [self.destination / path for path in summary['paths']['removed']]}
+        return {
+            'total': self.total_files,
+            'algorithm': self.algorithm,
+            'verified': verified,
+            'corrupted': len(corrupted),
+            'corrupted_list': corrupted,
+            'level': self.level,
+            'levels': levels,
+            'file_levels': file_levels,
+            'bad_ranges': bad_ranges,
+            'repaired': repaired,
+            'locality': self.locality_applied,
+            **extra
+        }
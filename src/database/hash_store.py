@@ -0,0 +1,185 @@
+"""
+Módulo: hash_store.py
+Responsável pelo armazenamento persistente de hashes de arquivos (SQLite),
+indexados pela identidade e versão do arquivo no sistema de arquivos.
+Autor: FileCopy Verifier Team
+Data: 2024
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+# Hashes acumulados antes de gravar uma transação
+BATCH_SIZE = 500
+
+# Arquivos modificados há menos que isso não são gravados: uma escrita no mesmo
+# tique do relógio do sistema de arquivos não mudaria o mtime_ns
+RACY_WINDOW_NS = 2 * 1_000_000_000
+
+# Chave: (st_dev, st_ino, tamanho, mtime_ns, algoritmo)
+StoreKey = Tuple[int, int, int, int, str]
+
+
+def default_store_path() -> Path:
+    """Banco padrão, ao lado do arquivo de configuração."""
+    return Path.home() / ".filecopy_verifier" / "hashes.db"
+
+
+def store_key(stat: os.stat_result, algorithm: str) -> StoreKey:
+    """
+    Monta a chave de um arquivo a partir do seu stat.
+
+    Args:
+        stat: Resultado de os.stat do arquivo
+        algorithm: Algoritmo do hash
+
+    Returns:
+        Tupla (st_dev, st_ino, tamanho, mtime_ns, algoritmo)
+    """
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, algorithm.lower())
+
+
+class HashStore:
+    """
+    Cache persistente de hashes em SQLite.
+
+    Um hash só é devolvido se dispositivo, inode, tamanho e mtime_ns do arquivo
+    forem os mesmos de quando foi calculado; qualquer reescrita invalida a
+    entrada. O banco usa WAL e as inserções são gravadas em lotes. Os métodos
+    são thread-safe (uma conexão compartilhada protegida por lock).
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, batch_size: int = BATCH_SIZE):
+        """
+        Abre (ou cria) o banco de hashes.
+
+        Args:
+            db_path: Arquivo do banco (padrão: ~/.filecopy_verifier/hashes.db)
+            batch_size: Hashes acumulados por transação
+        """
+        self.db_path = Path(db_path) if db_path is not None else default_store_path()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, batch_size)
+        self.lock = threading.Lock()
+        self._pending: Dict[StoreKey, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        # Chave primária começa por (dev, ino, algoritmo): a troca da versão de um
+        # arquivo apaga a anterior por busca no índice
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            "dev INTEGER NOT NULL, ino INTEGER NOT NULL, algorithm TEXT NOT NULL, "
+            "size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, hash TEXT NOT NULL, "
+            "PRIMARY KEY (dev, ino, algorithm)) WITHOUT ROWID")
+        self.connection.commit()
+
+    def get(self, stat: os.stat_result, algorithm: str) -> Optional[str]:
+        """
+        Busca o hash de um arquivo pela sua versão atual.
+
+        Args:
+            stat: Resultado de os.stat do arquivo
+            algorithm: Algoritmo do hash
+
+        Returns:
+            Hash armazenado ou None se ausente ou desatualizado
+        """
+        key = store_key(stat, algorithm)
+        with self.lock:
+            value = self._pending.get(key)
+            if value is None:
+                row = self.connection.execute(
+                    "SELECT hash FROM hashes WHERE dev = ? AND ino = ? AND algorithm = ? "
+                    "AND size = ? AND mtime_ns = ?",
+                    (key[0], key[1], key[4], key[2], key[3])).fetchone()
+                value = row[0] if row else None
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, stat: os.stat_result, algorithm: str, file_hash: str):
+        """
+        Registra o hash de uma versão do arquivo (gravado no próximo lote).
+
+        Arquivos modificados há menos de RACY_WINDOW_NS são ignorados.
+
+        Args:
+            stat: Resultado de os.stat do arquivo (obtido antes do hash)
+            algorithm: Algoritmo do hash
+            file_hash: Hash hexadecimal
+        """
+        if time.time_ns() - stat.st_mtime_ns < RACY_WINDOW_NS:
+            return
+        with self.lock:
+            self._pending[store_key(stat, algorithm)] = file_hash
+            if len(self._pending) >= self.batch_size:
+                self._write_batch()
+
+    def _write_batch(self):
+        """Grava os hashes pendentes (chamado com o lock adquirido)."""
+        if self._pending:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+                [(dev, ino, algorithm, size, mtime_ns, file_hash)
+                 for (dev, ino, size, mtime_ns, algorithm), file_hash in self._pending.items()])
+            self.connection.commit()
+            self._pending = {}
+
+    def lookup(self, file_path: Path, algorithm: str) -> Tuple[os.stat_result, Optional[str]]:
+        """
+        Faz o stat do arquivo e busca seu hash.
+
+        Args:
+            file_path: Caminho do arquivo
+            algorithm: Algoritmo do hash
+
+        Returns:
+            Tupla (stat, hash_ou_None); o stat serve para um put posterior
+        """
+        stat = os.stat(file_path)
+        return stat, self.get(stat, algorithm)
+
+    def record(self, file_path: Path, stat: os.stat_result, algorithm: str, file_hash: str):
+        """
+        Registra um hash calculado se o arquivo não mudou durante o cálculo.
+
+        Args:
+            file_path: Caminho do arquivo
+            stat: Stat obtido antes do hash
+            algorithm: Algoritmo do hash
+            file_hash: Hash calculado
+        """
+        try:
+            current = os.stat(file_path)
+        except OSError:
+            return
+        if store_key(current, algorithm) == store_key(stat, algorithm):
+            self.put(stat, algorithm, file_hash)
+
+    def count(self) -> int:
+        """Quantidade de hashes gravados (inclui os pendentes)."""
+        self.flush()
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+    def flush(self):
+        """Grava os hashes pendentes."""
+        with self.lock:
+            self._write_batch()
+
+    def close(self):
+        """Grava os pendentes e fecha o banco."""
+        self.flush()
+        with self.lock:
+            self.connection.close()
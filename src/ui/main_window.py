@@ -7,6 +7,7 @@ Data: 2024
 
 import sys
 import os
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import List
@@ -23,9 +24,18 @@ from core.scanner import DirectoryScanner
 from core.copier import FileCopier
 from core.multi_file_copier import MultiFileCopier
 from core.parallel_copier import ParallelFileCopier
-from core.verifier import IntegrityVerifier
+from core.verify_engine import VerifyEngine
+from core.digests import DEFAULT_ALGORITHM, available_algorithms, is_available
+from core.hash_cache import set_default_limits
 from utils.logger import AppLogger
 from utils.cache import ScanCache
+from utils.config import Config
+from core.tree_diff import TreeMirror
+from core.locality import resolve_locality
+from core.manifest import (ManifestSink, ManifestVerifier, ManifestWriter, find_manifest, manifest_path_for,
+                           write_manifest_from_hashes)
+from core.result_sink import CounterSink
+from database.hash_store import HashStore
 
 
 class ScanWorker(QThread):
@@ -108,14 +118,13 @@ class MultiFileCopyWorker(QThread):
     error = pyqtSignal(str)  # error message
     log = pyqtSignal(str)  # log message
     
-    def __init__(self, source_files: List[Path], destination: Path):
+    def __init__(self, source_files: List[Path], destination: Path, hash_algorithm: str = None):
         super().__init__()
         self.source_files = source_files
         self.destination = destination
-        self.multi_copier = MultiFileCopier(source_files, destination)
+        self.multi_copier = MultiFileCopier(source_files, destination, hash_algorithm=hash_algorithm)
         self.multi_copier.set_progress_callback(self._on_progress)
-        self.current_file = None
-        self.current_file_size = 0
+        self.multi_copier.set_file_started_callback(self._on_file_started)
         self.total_size = 0
         self.start_time = None
     
@@ -135,14 +144,12 @@ class MultiFileCopyWorker(QThread):
             self.multi_copier.cancel()
         self.terminate()
     
+    def _on_file_started(self, current: int, total: int, filename: Path, file_size: int):
+        """Callback de início de arquivo (chamado uma vez por arquivo pelo motor paralelo)."""
+        self.file_started.emit(str(filename), file_size)
+    
     def _on_progress(self, current: int, total: int, filename: Path, file_size: int, bytes_copied: int):
         """Callback de progresso."""
-        if self.current_file != filename:
-            # Novo arquivo iniciado
-            self.current_file_size = file_size
-            self.file_started.emit(str(filename), file_size)
-            self.current_file = filename
-        
         # Emite progresso com informações reais
         self.progress.emit(current, total, str(filename), file_size, bytes_copied)
     
@@ -160,6 +167,8 @@ class MultiFileCopyWorker(QThread):
             self.total_size = total_size
             
             stats = self.multi_copier.copy_all()
+            for source_file, dest_file in stats.get('renamed_list', []):
+                self.log.emit(f"Nome repetido na seleção: {source_file} copiado como {dest_file.name}")
             
             # Adiciona informações de tamanho
             stats['total_size'] = self.total_size
@@ -175,26 +184,57 @@ class CopyWorker(QThread):
     """Worker thread para executar cópia sem travar a GUI."""
     
     progress = pyqtSignal(int, int, str, int, int)  # current, total, filename, file_size, bytes_copied
+    verify_progress = pyqtSignal(int, int, str, bool)  # checked, total, filename, ok (verificação em pipeline)
+    scanning = pyqtSignal(bool)  # True enquanto a origem ainda está sendo percorrida (total parcial)
     file_started = pyqtSignal(str, int)  # filename, file_size
     file_finished = pyqtSignal(str, bool)  # filename, success
     finished = pyqtSignal(dict)  # statistics
     error = pyqtSignal(str)  # error message
     log = pyqtSignal(str)  # log message
     
-    def __init__(self, source: Path, destination: Path, use_parallel: bool = False, num_threads: int = 4):
+    def __init__(self, source: Path, destination: Path, use_parallel: bool = False, num_threads: int = 4,
+                 resume_partial: bool = False, sync_mode: str = None, delta_mode: bool = False,
+                 durability: str = "none", hash_algorithm: str = None, verify_behind: bool = False,
+                 extra_destinations: List[Path] = None, archive_format: str = None,
+                 manifest_format: str = None, mirror: bool = False, locality: str = "off",
+                 resume_verify: str = "tail"):
         super().__init__()
         self.source = source
         self.destination = destination
         self.use_parallel = use_parallel
         self.num_threads = num_threads
+        self.resume_partial = resume_partial
+        self.resume_verify = resume_verify
+        self.sync_mode = sync_mode
+        self.delta_mode = delta_mode
+        self.durability = durability
+        self.hash_algorithm = hash_algorithm
+        self.verify_behind = verify_behind
+        self.extra_destinations = extra_destinations
+        self.archive_format = archive_format
+        # Grava um manifesto de checksums ao lado do destino (requer hash_algorithm)
+        self.manifest_format = manifest_format if hash_algorithm and not archive_format else None
+        # Espelhamento: copia só novos/alterados e remove do destino o que não existe na origem
+        self.mirror = mirror and not archive_format
+        # Ordem física dos arquivos da origem ('auto' só ordena em disco rotacional)
+        self.locality = locality
         self.copier = None
         self.parallel_copier = None
         self.current_file = None
         self.current_file_size = 0
         self.total_bytes_copied = 0
         self.total_size = 0
+        self.size_lock = threading.Lock()
+        self.scanning_source = False
         self.start_time = None
     
+    def _report_scan_state(self):
+        """Avisa a interface quando o total de arquivos deixa de ser parcial."""
+        scanning = not self.parallel_copier.producer_done.is_set()
+        if scanning != self.scanning_source:
+            self.scanning_source = scanning
+            self.scanning.emit(scanning)
+    
     def _on_progress(self, current: int, total: int, filename: Path, file_size: int, bytes_copied: int):
         """Callback de progresso."""
         if self.current_file != filename:
@@ -234,43 +274,107 @@ class CopyWorker(QThread):
             self.start_time = datetime.now()
             self.log.emit(f"Iniciando cópia de {self.source} para {self.destination}")
             
-            # Calcula tamanho total primeiro (com progresso)
-            def scan_progress_callback(files_count: int, current_file: str, total_size: int):
-                # Emite progresso de escaneamento
-                self.log.emit(f"Escaneando... {files_count} arquivo(s) encontrado(s)")
-                QCoreApplication.processEvents()
-            
-            scanner = DirectoryScanner(self.source, scan_progress_callback)
-            stats = scanner.scan()
-            self.total_size = stats['total_size']
+            manifest_path = None
+            if self.manifest_format:
+                manifest_path = manifest_path_for(self.destination, self.manifest_format, self.hash_algorithm)
             
             # Usa cópia paralela ou sequencial
             if self.use_parallel and not self.source.is_file():
+                # Memória constante: a origem é percorrida em streaming pelo copiador (sem
+                # varredura prévia) e os resultados por arquivo vão só para contadores ou
+                # para o manifesto, que também serve de hashes para a verificação
+                if manifest_path is not None:
+                    sink = ManifestSink(manifest_path, self.destination, self.manifest_format,
+                                        self.hash_algorithm)
+                else:
+                    sink = CounterSink()
+                mirror = None
+                if self.mirror:
+                    mirror = TreeMirror(self.source, self.destination, mode=self.sync_mode or "quick",
+                                        delete_workers=self.num_threads)
+                    self.log.emit("Modo espelho: comparando origem e destino em uma passada")
                 self.parallel_copier = ParallelFileCopier(
                     self.source, 
                     self.destination, 
-                    num_threads=self.num_threads
+                    num_threads=self.num_threads,
+                    resume_partial=self.resume_partial,
+                    resume_verify=self.resume_verify,
+                    sync_mode=None if mirror else self.sync_mode,
+                    delta_mode=self.delta_mode,
+                    durability=self.durability,
+                    hash_algorithm=self.hash_algorithm,
+                    verify=self.verify_behind,
+                    extra_destinations=self.extra_destinations,
+                    archive_format=self.archive_format,
+                    tasks=mirror.copy_tasks() if mirror else None,
+                    result_sink=sink,
+                    locality=self.locality
                 )
-                # Cria wrapper para converter callback em sinais PyQt
+                if self.verify_behind:
+                    self.parallel_copier.set_verify_callback(
+                        lambda checked, total, source_file, ok: self.verify_progress.emit(
+                            checked, total, str(source_file), ok))
+                # Cria wrappers para converter callbacks em sinais PyQt
                 def progress_wrapper(file_index, total, source_file, file_size, bytes_copied):
-                    # Emite sinal de progresso
+                    self._report_scan_state()
                     self.progress.emit(file_index, total, str(source_file), file_size, bytes_copied)
-                    # Emite file_started se for novo arquivo
-                    if str(source_file) not in getattr(self, '_seen_files', set()):
-                        if not hasattr(self, '_seen_files'):
-                            self._seen_files = set()
-                        self._seen_files.add(str(source_file))
-                        self.file_started.emit(str(source_file), file_size)
-                        # Log quando inicia novo arquivo
-                        self.log.emit(f"Copiando arquivo {file_index}/{total}: {Path(source_file).name}")
+                
+                def file_started_wrapper(file_index, total, source_file, file_size):
+                    # Chamado pelo motor uma vez por arquivo (sem conjunto de arquivos já vistos)
+                    with self.size_lock:
+                        self.total_size += file_size
+                    self._report_scan_state()
+                    self.file_started.emit(str(source_file), file_size)
+                    self.log.emit(f"Copiando arquivo {file_index}/{total}: {source_file.name}")
                 
                 self.parallel_copier.set_progress_callback(progress_wrapper)
-                self._seen_files = set()
-                stats = self.parallel_copier.copy_all()
+                self.parallel_copier.set_file_started_callback(file_started_wrapper)
+                try:
+                    stats = self.parallel_copier.copy_all()
+                finally:
+                    sink.close()
+                    if self.scanning_source:
+                        self.scanning_source = False
+                        self.scanning.emit(False)
+                    if mirror is not None:
+                        mirror_stats = mirror.finish()
+                if mirror is not None:
+                    stats['mirror'] = mirror_stats
+                    self.log.emit(f"Espelho: {mirror_stats['added']} novo(s), {mirror_stats['changed']} alterado(s), "
+                                  f"{mirror_stats['unchanged']} inalterado(s), {mirror_stats['deleted']} removido(s)")
+                    for path, error in mirror_stats['scan_error_list'][:10]:
+                        self.log.emit(f"Espelho: não foi possível ler {path} ({error}); "
+                                      f"nada foi removido abaixo dele")
+                if manifest_path is not None:
+                    stats['manifest'] = manifest_path
+                    self.log.emit(f"Manifesto gravado: {manifest_path} ({sink.writer.count} entrada(s))")
             else:
-                self.copier = FileCopier(self.source, self.destination)
+                # Calcula tamanho total primeiro (com progresso)
+                def scan_progress_callback(files_count: int, current_file: str, total_size: int):
+                    # Emite progresso de escaneamento
+                    self.log.emit(f"Escaneando... {files_count} arquivo(s) encontrado(s)")
+                    QCoreApplication.processEvents()
+                
+                scanner = DirectoryScanner(self.source, scan_progress_callback)
+                self.total_size = scanner.scan()['total_size']
+                
+                self.copier = FileCopier(self.source, self.destination, resume_partial=self.resume_partial,
+                                         resume_verify=self.resume_verify,
+                                         sync_mode=self.sync_mode, delta_mode=self.delta_mode,
+                                         durability=self.durability, hash_algorithm=self.hash_algorithm,
+                                         extra_destinations=self.extra_destinations,
+                                         archive_format=self.archive_format, locality=self.locality)
                 self.copier.set_progress_callback(self._on_progress)
                 stats = self.copier.copy_all()
+                if manifest_path is not None:
+                    count = write_manifest_from_hashes(manifest_path, self.source, self.destination,
+                                                       stats.get('hashes', {}), self.manifest_format,
+                                                       self.hash_algorithm)
+                    self.log.emit(f"Manifesto gravado: {manifest_path} ({count} entrada(s))")
+            for path, error in stats.get('durability_errors', []):
+                self.log.emit(f"Durabilidade: {path}: {error}")
+            if stats.get('locality', 'off') != 'off':
+                self.log.emit(f"Arquivos copiados em ordem física (disco rotacional, chave: {stats['locality']})")
             
             # Adiciona informações de tamanho
             stats['total_size'] = self.total_size
@@ -290,60 +394,87 @@ class VerifyWorker(QThread):
     error = pyqtSignal(str)  # error message
     log = pyqtSignal(str)  # log message
     
-    def __init__(self, source: Path, destination: Path):
+    def __init__(self, source: Path, destination: Path, known_hashes: dict = None,
+                 algorithm: str = DEFAULT_ALGORITHM, chunk_size: int = None, use_mmap: bool = False,
+                 num_workers: int = 4, read_ahead: int = 0, use_hash_store: bool = False,
+                 hash_store_path: str = None, level: str = "full", sample_blocks: int = 8,
+                 sample_seed: int = 0, manifest: Path = None, manifest_format: str = None,
+                 tree_chunk_size: int = None, repair: bool = False, report_extra: bool = False,
+                 cache_mode: str = "normal", locality: str = "off"):
         super().__init__()
         self.source = source
         self.destination = destination
-        self.verifier = IntegrityVerifier()
+        self.algorithm = algorithm
+        # Hashes da origem calculados durante a cópia: evitam reler a origem
+        self.known_hashes = known_hashes or {}
+        # Com `manifest`, verifica o destino contra o manifesto (a origem não é lida)
+        self.manifest = manifest
+        # Com `manifest_format`, grava o manifesto da origem ao lado do destino
+        self.manifest_format = manifest_format
+        # Com `tree_chunk_size`, grava as árvores de blocos junto do manifesto e localiza os
+        # trechos corrompidos; com `repair`, reescreve só esses trechos a partir da origem
+        self.tree_chunk_size = tree_chunk_size
+        if manifest is not None:
+            self.engine = ManifestVerifier(manifest, destination, num_workers=num_workers,
+                                           chunk_size=chunk_size, use_mmap=use_mmap, read_ahead=read_ahead,
+                                           progress_callback=self._on_progress, cache_mode=cache_mode)
+            self.algorithm = self.engine.algorithm
+            return
+        self.engine = VerifyEngine(source, destination, algorithm, num_workers=num_workers,
+                                   known_hashes=self.known_hashes, chunk_size=chunk_size,
+                                   use_mmap=use_mmap, read_ahead=read_ahead, progress_callback=self._on_progress,
+                                   scan_callback=self._on_scan, level=level, sample_blocks=sample_blocks,
+                                   sample_seed=sample_seed, tree_chunk_size=tree_chunk_size, repair=repair,
+                                   report_extra=report_extra, cache_mode=cache_mode, locality=locality)
+        # Cache persistente de hashes da origem (aberto na thread da verificação)
+        self.use_hash_store = use_hash_store
+        self.hash_store_path = hash_store_path
+    
+    def _on_scan(self, files_count: int):
+        """Progresso da varredura da origem."""
+        self.log.emit(f"Escaneando origem... {files_count} arquivo(s)")
+    
+    def _on_progress(self, files_done: int, total_files: int, bytes_done: int, total_bytes: int,
+                     current_file: str):
+        """Progresso agregado da verificação paralela."""
+        self.progress.emit(files_done, total_files, current_file)
+    
+    def cancel(self):
+        """Interrompe a verificação (arquivos em andamento terminam)."""
+        self.engine.cancel()
     
     def run(self):
         """Executa a verificação."""
         try:
             self.log.emit("Iniciando verificação de integridade...")
+            if self.manifest is not None:
+                self.log.emit(f"Verificando destino contra o manifesto {self.manifest} "
+                              f"({self.engine.num_workers} worker(s), origem não será lida)")
+                self.finished.emit(self.engine.verify())
+                return
             
-            # Callback de progresso durante escaneamento
-            def scan_progress_callback(files_count: int, current_file: str, total_size: int):
-                self.log.emit(f"Escaneando origem... {files_count} arquivo(s)")
-                QCoreApplication.processEvents()
-            
-            scanner = DirectoryScanner(self.source, scan_progress_callback)
-            source_stats = scanner.scan()
-            source_files = source_stats['files']
-            
-            verified = 0
-            corrupted = []
-            total = len(source_files)
-            
-            for idx, source_file in enumerate(source_files, 1):
-                try:
-                    relative_path = source_file.relative_to(self.source)
-                    dest_file = self.destination / relative_path
-                    
-                    if not dest_file.exists():
-                        corrupted.append((source_file, "Arquivo não encontrado no destino"))
-                        self.progress.emit(verified + len(corrupted), total, str(source_file))
-                        continue
-                    
-                    source_hash = self.verifier.calculate_hash(source_file)
-                    dest_hash = self.verifier.calculate_hash(dest_file)
-                    
-                    if source_hash == dest_hash:
-                        verified += 1
-                    else:
-                        corrupted.append((source_file, "Hash diferente"))
-                    
-                    self.progress.emit(verified + len(corrupted), total, str(source_file))
-                    
-                except Exception as e:
-                    corrupted.append((source_file, str(e)))
-                    self.progress.emit(verified + len(corrupted), total, str(source_file))
-            
-            result = {
-                'total': total,
-                'verified': verified,
-                'corrupted': len(corrupted),
-                'corrupted_list': corrupted
-            }
+            locality = resolve_locality(self.engine.locality, self.source)
+            order = "arquivos maiores primeiro" if locality == "off" else f"em ordem física (chave: {locality})"
+            self.log.emit(f"Verificando com {self.engine.num_workers} worker(s), {order} "
+                          f"(nível: {self.engine.level}, cache: {self.engine.cache_mode})")
+            hash_store = HashStore(self.hash_store_path) if self.use_hash_store else None
+            self.engine.hash_store = hash_store
+            writer = None
+            if self.manifest_format and self.engine.level == "full":
+                writer = ManifestWriter(manifest_path_for(self.destination, self.manifest_format, self.algorithm),
+                                        self.manifest_format, self.algorithm, self.destination,
+                                        tree_chunk_size=self.tree_chunk_size)
+                writer.open()
+                self.engine.manifest_writer = writer
+            try:
+                result = self.engine.verify()
+            finally:
+                if hash_store is not None:
+                    self.log.emit(f"Cache de hashes: {hash_store.hits} origem(ns) sem releitura")
+                    hash_store.close()
+                if writer is not None:
+                    writer.close()
+                    self.log.emit(f"Manifesto gravado: {writer.manifest_path} ({writer.count} entrada(s))")
             self.finished.emit(result)
             
         except Exception as e:
@@ -367,6 +498,15 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.logger = AppLogger().get_logger()
+        self.config = Config()
+        # Algoritmo da cópia (hash em linha) e da verificação, definido em Config
+        self.hash_algorithm = self.config.get('hash_algorithm', DEFAULT_ALGORITHM)
+        if not is_available(self.hash_algorithm):
+            self.logger.warning(f"Algoritmo '{self.hash_algorithm}' indisponível "
+                                f"(disponíveis: {', '.join(available_algorithms())}); usando {DEFAULT_ALGORITHM}")
+            self.hash_algorithm = DEFAULT_ALGORITHM
+        # Memória máxima dos caches de hash em memória (IntegrityVerifier)
+        set_default_limits(max_bytes=int(self.config.get('hash_cache_mb', 64) * 1024 * 1024))
         self.copy_worker = None
         self.verify_worker = None
         self.scan_worker = None
@@ -375,6 +515,10 @@ class MainWindow(QMainWindow):
         self.total_copied = 0
         self.scan_stats = None
         self.source_files_list = None  # Lista de arquivos selecionados (se múltiplos)
+        self.copy_hashes = {}  # Hashes da origem calculados na última cópia
+        self.copy_hashes_source = None  # Origem, destino e algoritmo da última cópia (valida copy_hashes)
+        self.copy_manifest = None  # Manifesto gravado na última cópia (hashes da origem, sem lista em memória)
+        self.copy_scanning = False  # Total de arquivos ainda parcial (origem sendo percorrida)
         self.is_paused = False
         # Detecta automaticamente número de threads (CPU count - 1, mínimo 2, máximo 8)
         cpu_count = os.cpu_count() or 4
@@ -450,6 +594,9 @@ class MainWindow(QMainWindow):
         self.time_label = QLabel("Tempo: --")
         stats_layout.addWidget(self.time_label, 1, 2)
         
+        self.verified_label = QLabel("Verificados: --")
+        stats_layout.addWidget(self.verified_label, 2, 0)
+        
         stats_group.setLayout(stats_layout)
         main_layout.addWidget(stats_group)
         
@@ -1017,6 +1164,7 @@ class MainWindow(QMainWindow):
             self.copied_label.setText("Copiado: 0 B")
             self.remaining_label.setText(f"Restante: {self.format_size(self.total_size)}")
             self.speed_label.setText("Velocidade: --")
+            self.verified_label.setText("Verificados: --")
             
             # Inicia timer de atualização (intervalo menor para atualização mais frequente)
             self.update_timer.start(100)  # Atualiza a cada 100ms para UI mais responsiva
@@ -1025,7 +1173,8 @@ class MainWindow(QMainWindow):
             if self.source_files_list:
                 self.copy_worker = MultiFileCopyWorker(
                     [Path(f) for f in self.source_files_list], 
-                    Path(dest_path)
+                    Path(dest_path),
+                    hash_algorithm=self.hash_algorithm
                 )
             else:
                 # Detecta automaticamente se deve usar cópia paralela
@@ -1035,12 +1184,22 @@ class MainWindow(QMainWindow):
                     self.log(f"Modo paralelo ativado automaticamente ({self.num_threads} threads)")
                 else:
                     self.log("Modo sequencial (arquivo único)")
+                    if self.config.get('verify_behind', False):
+                        self.log("Verificação em pipeline disponível apenas no modo paralelo")
                 
                 self.copy_worker = CopyWorker(
                     Path(source_path), 
                     Path(dest_path),
                     use_parallel=use_parallel,
-                    num_threads=self.num_threads
+                    num_threads=self.num_threads,
+                    resume_partial=self.config.get('resume_partial', False),
+                    resume_verify=self.config.get('resume_verify', 'tail'),
+                    durability=self.config.get('durability_mode', 'none'),
+                    hash_algorithm=self.hash_algorithm,
+                    verify_behind=self.config.get('verify_behind', False),
+                    manifest_format=self.config.get('manifest_format'),
+                    mirror=self.config.get('mirror_mode', False),
+                    locality=self.config.get('locality_order', 'auto')
                 )
             
             self.copy_worker.progress.connect(self.on_copy_progress)
@@ -1049,8 +1208,22 @@ class MainWindow(QMainWindow):
             self.copy_worker.finished.connect(self.on_copy_finished)
             self.copy_worker.error.connect(self.on_copy_error)
             self.copy_worker.log.connect(self.log)
+            self.copy_scanning = False
+            if isinstance(self.copy_worker, CopyWorker):
+                self.copy_worker.verify_progress.connect(self.on_copy_verify_progress)
+                self.copy_worker.scanning.connect(self.on_copy_scanning)
             self.copy_worker.start()
     
+    def on_copy_scanning(self, scanning: bool):
+        """Callback quando o total de arquivos da cópia passa a ser parcial ou definitivo."""
+        self.copy_scanning = scanning
+    
+    def on_copy_verify_progress(self, checked: int, total: int, filename: str, ok: bool):
+        """Callback da verificação em pipeline (arquivos relidos logo após a cópia)."""
+        self.verified_label.setText(f"Verificados: {checked} / {total}")
+        if not ok:
+            self.log(f"Verificação após cópia: {Path(filename).name} difere da origem")
+    
     def on_file_started(self, filename: str, file_size: int):
         """Callback quando um arquivo inicia cópia."""
         item = FileProgressItem(filename, file_size)
@@ -1328,7 +1501,10 @@ class MainWindow(QMainWindow):
                     self.progress_bar.setValue(progress)
                     self.progress_percent_label.setText(f"{progress}%")
             
-            self.files_label.setText(f"Arquivos: {current} / {total}")
+            if self.copy_scanning:
+                self.files_label.setText(f"Arquivos: {current} de ≥{total} (varrendo)")
+            else:
+                self.files_label.setText(f"Arquivos: {current} / {total}")
             self.status_label.setText(f"Copiando: {Path(filename).name}")
             
             # CORREÇÃO: Força atualização imediata da UI e processa eventos
@@ -1356,17 +1532,42 @@ class MainWindow(QMainWindow):
             self.time_label.setText(f"Tempo: {self.format_time(elapsed)}")
         
         self.status_label.setText("Cópia concluída")
+        
+        # Guarda hashes calculados durante a cópia para a verificação posterior
+        self.copy_hashes = stats.get('hashes') or {}
+        self.copy_hashes_source = (self.source_edit.text(), self.dest_edit.text(), stats.get('hash_algorithm'))
+        self.copy_manifest = stats.get('manifest')
+        
         self.log(f"Cópia concluída: {stats['copied_files']} arquivo(s) copiado(s)")
+        if stats.get('hash_algorithm'):
+            self.log(f"Algoritmo de hash: {stats['hash_algorithm']}")
         
         if stats['failed_files'] > 0:
             self.log(f"Atenção: {stats['failed_files']} arquivo(s) falharam")
+        if stats.get('skipped_files', 0) > 0:
+            self.log(f"Sincronização: {stats['skipped_files']} arquivo(s) inalterado(s) pulado(s) "
+                     f"({self.format_size(stats['skipped_bytes'])})")
+        if stats.get('delta_bytes_reused', 0) > 0:
+            self.log(f"Transferência delta: {self.format_size(stats['delta_bytes_reused'])} reaproveitado(s) do destino, "
+                     f"{self.format_size(stats['delta_bytes_written'])} gravado(s)")
         
         success_msg = f"Cópia concluída!\n\n"
         success_msg += f"Arquivos copiados: {stats['copied_files']} de {stats['total_files']}\n"
+        if stats.get('skipped_files', 0) > 0:
+            success_msg += f"Arquivos inalterados (pulados): {stats['skipped_files']}\n"
         if stats['failed_files'] > 0:
             success_msg += f"Arquivos com erro: {stats['failed_files']}\n"
-        
-        if stats['failed_files'] > 0:
+        for destination, dest_stats in stats.get('destinations', {}).items():
+            success_msg += (f"Destino {destination}: {dest_stats['copied_files']} copiado(s), "
+                            f"{dest_stats['failed_files']} com erro\n")
+        if 'verified' in stats:
+            # Verificação em pipeline: relatório único de cópia + verificação
+            success_msg += f"Arquivos verificados: {stats['verified']}\n"
+            success_msg += f"Arquivos corrompidos: {stats['corrupted']}\n"
+            for file_path, error in stats['corrupted_list'][:10]:
+                self.log(f"Corrompido: {Path(file_path).name}: {error}")
+        
+        if stats['failed_files'] > 0 or stats.get('corrupted', 0) > 0:
             QMessageBox.warning(self, "Cópia Concluída", success_msg)
         else:
             QMessageBox.information(self, "Sucesso", success_msg)
@@ -1389,20 +1590,59 @@ class MainWindow(QMainWindow):
         source_path = self.source_edit.text()
         dest_path = self.dest_edit.text()
         
-        if not source_path or not dest_path:
-            QMessageBox.warning(self, "Aviso", "Selecione a origem e destino.")
-            return
-        
         # Remove sufixo de múltiplos arquivos se existir
         if " (+ " in source_path:
             source_path = source_path.split(" (+ ")[0]
         
+        # Sem a origem (removida ou offline), verifica contra o manifesto gravado ao lado do destino
+        manifest = None
+        if dest_path and (not source_path or not Path(source_path).exists()):
+            manifest = find_manifest(Path(dest_path))
+            if manifest is not None:
+                self.log(f"Origem indisponível: usando o manifesto {manifest}")
+        
+        if not dest_path or (not source_path and manifest is None):
+            QMessageBox.warning(self, "Aviso", "Selecione a origem e destino.")
+            return
+        
         self.verify_btn.setEnabled(False)
         self.status_label.setText("Verificando...")
         self.progress_bar.setValue(0)
         self.log("Iniciando verificação de integridade...")
         
-        self.verify_worker = VerifyWorker(Path(source_path), Path(dest_path))
+        # Reaproveita hashes da cópia se origem/destino não mudaram
+        known_hashes = None
+        if self.copy_hashes and self.copy_hashes_source == (self.source_edit.text(), self.dest_edit.text(),
+                                                            self.hash_algorithm):
+            known_hashes = self.copy_hashes
+            self.log(f"Usando {len(known_hashes)} hash(es) calculado(s) durante a cópia (origem não será relida)")
+        elif (manifest is None and self.copy_manifest is not None and Path(self.copy_manifest).exists()
+              and self.copy_hashes_source == (self.source_edit.text(), self.dest_edit.text(), self.hash_algorithm)):
+            manifest = self.copy_manifest
+            self.log(f"Usando o manifesto gravado durante a cópia: {manifest} (origem não será relida)")
+        
+        try:
+            self.verify_worker = VerifyWorker(Path(source_path), Path(dest_path), known_hashes,
+                                              algorithm=self.hash_algorithm,
+                                              chunk_size=self.config.get('chunk_size'),
+                                              use_mmap=self.config.get('hash_use_mmap', False),
+                                              num_workers=self.config.get('verify_workers', 4),
+                                              read_ahead=self.config.get('hash_read_ahead', 0),
+                                              use_hash_store=self.config.get('hash_store', False),
+                                              hash_store_path=self.config.get('hash_store_path'),
+                                              level=self.config.get('verify_level', 'full'),
+                                              sample_blocks=self.config.get('verify_sample_blocks', 8),
+                                              sample_seed=self._sample_seed(),
+                                              manifest=manifest,
+                                              manifest_format=self.config.get('manifest_format'),
+                                              tree_chunk_size=self.config.get('chunk_tree_size'),
+                                              repair=self.config.get('verify_repair', False),
+                                              report_extra=self.config.get('verify_report_extra', True),
+                                              cache_mode=self.config.get('verify_cache_mode', 'normal'),
+                                              locality=self.config.get('locality_order', 'auto'))
+        except (OSError, ValueError) as e:
+            self.on_verify_error(str(e))
+            return
         self.verify_worker.progress.connect(self.on_verify_progress)
         self.verify_worker.finished.connect(self.on_verify_finished)
         self.verify_worker.error.connect(self.on_verify_error)
@@ -1417,6 +1657,11 @@ class MainWindow(QMainWindow):
             self.progress_percent_label.setText(f"{progress}%")
             self.status_label.setText(f"Verificando: {Path(filename).name}")
     
+    def _sample_seed(self) -> int:
+        """Semente da amostragem: a do Config ou, se não definida, o dia (cada noite lê outros blocos)."""
+        seed = self.config.get('verify_sample_seed')
+        return seed if seed is not None else datetime.now().date().toordinal()
+    
     def on_verify_finished(self, result: dict):
         """Callback quando verificação termina."""
         self.verify_btn.setEnabled(True)
@@ -1426,20 +1671,36 @@ class MainWindow(QMainWindow):
         
         msg = f"Verificação concluída!\n\n"
         msg += f"Total de arquivos: {result['total']}\n"
+        msg += f"Algoritmo: {result.get('algorithm', DEFAULT_ALGORITHM)}\n"
         msg += f"Arquivos verificados: {result['verified']}\n"
         msg += f"Arquivos corrompidos: {result['corrupted']}\n"
+        levels = result.get('levels', {})
+        if levels:
+            msg += f"Nível: {result.get('level', 'full')} ("
+            msg += ", ".join(f"{name}: {count}" for name, count in levels.items() if count) + ")\n"
+        if result.get('extra'):
+            msg += f"Arquivos só no destino: {result['extra']}\n"
+            for file_path in result.get('extra_list', [])[:10]:
+                self.log(f"Só no destino: {file_path}")
         
         if result['corrupted'] > 0:
             msg += f"\nArquivos com problemas:\n"
+            file_levels = result.get('file_levels', {})
             for file_path, error in result['corrupted_list'][:10]:  # Mostra até 10
-                msg += f"- {Path(file_path).name}: {error}\n"
+                level = f" [{file_levels[file_path]}]" if file_path in file_levels else ""
+                msg += f"- {Path(file_path).name}{level}: {error}\n"
             if len(result['corrupted_list']) > 10:
                 msg += f"... e mais {len(result['corrupted_list']) - 10} arquivo(s)\n"
+            for file_path, ranges in list(result.get('bad_ranges', {}).items())[:10]:
+                spans = ", ".join(f"{offset}-{offset + length - 1}" for offset, length in ranges[:5])
+                self.log(f"Trechos corrompidos em {file_path}: {spans}")
             
             QMessageBox.warning(self, "Verificação Concluída", msg)
         else:
             QMessageBox.information(self, "Sucesso", msg)
         
+        for file_path, ranges in result.get('repaired', {}).items():
+            self.log(f"Reparado: {file_path} ({sum(length for _, length in ranges)} byte(s) reescrito(s))")
         self.log(f"Verificação concluída: {result['verified']} de {result['total']} arquivos verificados")
     
     def on_verify_error(self, error_msg: str):
@@ -36,10 +36,30 @@ class Config:
         """
         default_config = {
             'hash_algorithm': 'sha256',
-            'chunk_size': 8192,
+            'chunk_size': 1024 * 1024,
+            'hash_use_mmap': False,
+            'hash_read_ahead': 4,
+            'verify_workers': 4,
+            'hash_store': True,
+            'hash_store_path': None,
+            'hash_cache_mb': 64,
+            'verify_level': 'full',
+            'verify_sample_blocks': 8,
+            'verify_sample_seed': None,
+            'manifest_format': None,
+            'chunk_tree_size': None,
+            'verify_repair': False,
+            'verify_report_extra': True,
+            'verify_cache_mode': 'normal',
+            'verify_behind': False,
+            'mirror_mode': False,
+            'resume_partial': False,
+            'resume_verify': 'tail',
+            'locality_order': 'auto',
             'log_level': 'INFO',
             'auto_verify': False,
-            'preserve_metadata': True
+            'preserve_metadata': True,
+            'durability_mode': 'none'
         }
         
         if self.config_file.exists():
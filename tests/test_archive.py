@@ -0,0 +1,133 @@
+"""
+Testes para o módulo archive.
+"""
+
+import json
+import pytest
+from pathlib import Path
+import tempfile
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core.archive import estimate_compressed_fraction, index_path_for, read_index, verify_archive, extract_member
+from core.copier import FileCopier
+
+
+def _create_tree(root: Path):
+    (root / "subdir").mkdir(parents=True)
+    (root / "file1.txt").write_text("content 1" * 100)
+    (root / "photo.jpg").write_bytes(bytes(range(256)) * 10)
+    (root / "subdir" / "file2.txt").write_text("content 2")
+
+
+@pytest.mark.parametrize("archive_format", ["tar", "tar.gz", "zip"])
+def test_archive_roundtrip(archive_format):
+    """Testa cópia para pacote, verificação pelo índice e extração de um membro."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        dest_dir = Path(tmpdir) / "dest"
+        _create_tree(source_dir)
+        dest_dir.mkdir()
+        
+        stats = FileCopier(source_dir, dest_dir, archive_format=archive_format).copy_all()
+        
+        assert stats['copied_files'] == 3
+        assert stats['archive_path'] == dest_dir / f"source.{archive_format}"
+        
+        header, entries = read_index(stats['archive_path'])
+        entries = {e['name']: e for e in entries}
+        assert header['format'] == archive_format
+        assert set(entries) == {"file1.txt", "photo.jpg", "subdir/file2.txt"}
+        if archive_format == "zip":
+            assert entries["photo.jpg"]['compressed'] is False
+            assert entries["file1.txt"]['compressed'] is True
+        
+        result = verify_archive(stats['archive_path'])
+        assert result['verified'] == 3
+        assert result['corrupted'] == 0
+        
+        extracted = Path(tmpdir) / "extracted.txt"
+        assert extract_member(stats['archive_path'], "subdir/file2.txt", extracted) is True
+        assert extracted.read_text() == "content 2"
+
+
+def test_archive_detects_corrupted_member():
+    """Testa que a verificação por offset aponta apenas o membro corrompido."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        archive_path = Path(tmpdir) / "backup.tar"
+        _create_tree(source_dir)
+        
+        FileCopier(source_dir, archive_path, archive_format="tar").copy_all()
+        
+        _, entries = read_index(archive_path)
+        target = next(e for e in entries if e['name'] == "photo.jpg")
+        with open(archive_path, 'r+b') as f:
+            f.seek(target['data_offset'] + 5)
+            f.write(b"\xff")
+        
+        result = verify_archive(archive_path)
+        assert result['verified'] == 2
+        assert [name for name, _ in result['corrupted_list']] == ["photo.jpg"]
+
+
+def test_compressed_tar_member_missing_from_archive():
+    """Tar comprimido: entrada do índice ausente do pacote vira falha, sem exceção."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        archive_path = Path(tmpdir) / "backup.tar.gz"
+        _create_tree(source_dir)
+        FileCopier(source_dir, archive_path, archive_format="tar.gz").copy_all()
+        
+        # Entrada fantasma no meio do índice (o índice segue a ordem do pacote)
+        index = index_path_for(archive_path)
+        lines = index.read_text().splitlines()
+        ghost = dict(json.loads(lines[1]), name="fantasma.bin")
+        lines.insert(2, json.dumps(ghost))
+        index.write_text("\n".join(lines) + "\n")
+        
+        result = verify_archive(archive_path)
+        assert result['verified'] == 3
+        assert result['corrupted_list'] == [("fantasma.bin", "Membro não encontrado no pacote")]
+        
+        extracted = Path(tmpdir) / "extraido.bin"
+        assert extract_member(archive_path, "fantasma.bin", extracted) is False
+        assert not extracted.exists()
+
+
+@pytest.mark.parametrize("archive_format", ["zip", "tar", "tar.gz"])
+def test_archive_cancel_discards_partial_archive(archive_format):
+    """Cancelar durante um membro descarta o pacote incompleto e preserva o anterior."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        archive_path = Path(tmpdir) / f"backup.{archive_format}"
+        _create_tree(source_dir)
+        
+        FileCopier(source_dir, archive_path, archive_format=archive_format).copy_all()
+        previous = archive_path.read_bytes()
+        
+        copier = FileCopier(source_dir, archive_path, archive_format=archive_format)
+        copier.set_progress_callback(lambda *args: copier.cancel())
+        stats = copier.copy_all()
+        
+        assert stats['copied_files'] == 0
+        assert stats['failed_files'] == 0
+        assert archive_path.read_bytes() == previous
+        assert sorted(p.name for p in Path(tmpdir).iterdir()) == sorted(
+            ["source", archive_path.name, index_path_for(archive_path).name])
+        assert verify_archive(archive_path)['corrupted'] == 0
+
+
+def test_estimate_compressed_fraction():
+    """A fração já comprimida é estimada pelos primeiros arquivos, sem varrer a origem."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.zip").write_bytes(b"z" * 300)
+        (root / "b.txt").write_bytes(b"t" * 100)
+        (root / "c.txt").write_bytes(b"t" * 600)
+        files = [root / "a.zip", root / "b.txt", root / "c.txt", root / "ausente.txt"]
+        
+        assert estimate_compressed_fraction(files) == 0.3
+        assert estimate_compressed_fraction(files, limit=2) == 0.75
+        assert estimate_compressed_fraction([]) == 0.0
@@ -0,0 +1,298 @@
+"""
+Testes para o módulo chunk_tree.
+"""
+
+import hashlib
+import os
+import tempfile
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import chunk_tree
+from core.chunk_tree import (ChunkTreeHasher, ChunkTreeReader, ChunkTreeWriter, chunks_path_for, find_bad_ranges,
+                             hash_file_with_tree, repair_ranges)
+from core.manifest import ManifestVerifier, ManifestWriter
+from core.verify_engine import VerifyEngine
+
+
+CHUNK = 4096
+DATA = bytes(range(256)) * 100  # 25600 bytes: 6 blocos cheios + 1 parcial
+
+
+def _spy_writes(monkeypatch):
+    """Registra (offset, tamanho) de cada escrita feita pelo reparo."""
+    writes = []
+    real_open = open
+
+    class SpyFile:
+        def __init__(self, f):
+            self._f = f
+
+        def write(self, data):
+            writes.append((self._f.tell(), len(data)))
+            return self._f.write(data)
+
+        def __getattr__(self, name):
+            return getattr(self._f, name)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self._f.close()
+
+    def spy_open(path, mode='r', *args, **kwargs):
+        f = real_open(path, mode, *args, **kwargs)
+        return SpyFile(f) if 'r+' in mode else f
+
+    monkeypatch.setattr(chunk_tree, "open", spy_open, raising=False)
+    return writes
+
+
+def _corrupt(path: Path, offset: int):
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        byte = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def test_hasher_matches_plain_hash():
+    """O hash completo do ChunkTreeHasher é o do algoritmo puro, mesmo em updates desalinhados."""
+    hasher = ChunkTreeHasher("sha256", CHUNK)
+    for i in range(0, len(DATA), 1000):
+        hasher.update(DATA[i:i + 1000])
+    tree = hasher.tree()
+
+    assert hasher.hexdigest() == hashlib.sha256(DATA).hexdigest()
+    assert len(tree.leaves) == 7
+    assert tree.size == len(DATA)
+
+    whole = ChunkTreeHasher("sha256", CHUNK)
+    whole.update(DATA)
+    assert whole.tree().leaves == tree.leaves
+    assert whole.tree().root() == tree.root()
+
+
+def test_diff_finds_single_block():
+    """Um byte alterado aponta exatamente o seu bloco."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "source.bin"
+        dest = Path(tmpdir) / "dest.bin"
+        source.write_bytes(DATA)
+        dest.write_bytes(DATA)
+        _corrupt(dest, 3 * CHUNK + 17)
+
+        _, tree = hash_file_with_tree(source, "sha256", CHUNK)
+        _, dest_tree = hash_file_with_tree(dest, "sha256", CHUNK)
+
+        assert tree.root() != dest_tree.root()
+        assert tree.diff(dest_tree) == [3]
+        assert find_bad_ranges(dest, tree) == [(3 * CHUNK, CHUNK)]
+
+
+def test_ranges_merge_neighbours_and_last_block():
+    """Blocos vizinhos viram um só trecho; o último bloco tem o tamanho restante."""
+    hasher = ChunkTreeHasher("sha256", CHUNK)
+    hasher.update(DATA)
+    tree = hasher.tree()
+
+    assert tree.ranges([1, 2, 4, 6]) == [(CHUNK, 2 * CHUNK), (4 * CHUNK, CHUNK), (6 * CHUNK, len(DATA) - 6 * CHUNK)]
+
+
+def test_repair_rewrites_only_corrupted_block(monkeypatch):
+    """O reparo grava só o bloco corrompido e o destino volta a conferir."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "source.bin"
+        dest = Path(tmpdir) / "dest.bin"
+        source.write_bytes(DATA)
+        dest.write_bytes(DATA)
+        _corrupt(dest, 5 * CHUNK)
+        _, tree = hash_file_with_tree(source, "sha256", CHUNK)
+        writes = _spy_writes(monkeypatch)
+
+        written = repair_ranges(source, dest, tree, find_bad_ranges(dest, tree))
+
+        assert writes == [(5 * CHUNK, CHUNK)]
+        assert written == CHUNK
+        assert dest.read_bytes() == DATA
+
+
+def test_repair_fixes_size(monkeypatch):
+    """Destino truncado recebe só o final; destino maior é truncado após o último bloco."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "source.bin"
+        dest = Path(tmpdir) / "dest.bin"
+        source.write_bytes(DATA)
+        _, tree = hash_file_with_tree(source, "sha256", CHUNK)
+        writes = _spy_writes(monkeypatch)
+
+        dest.write_bytes(DATA[:5 * CHUNK])
+        repair_ranges(source, dest, tree, find_bad_ranges(dest, tree))
+        # Um trecho de dois blocos é gravado bloco a bloco
+        assert writes == [(5 * CHUNK, CHUNK), (6 * CHUNK, len(DATA) - 6 * CHUNK)]
+        assert dest.read_bytes() == DATA
+
+        writes.clear()
+        dest.write_bytes(DATA + b"extra")
+        repair_ranges(source, dest, tree, find_bad_ranges(dest, tree))
+        assert writes == [(6 * CHUNK, len(DATA) - 6 * CHUNK)]
+        assert dest.read_bytes() == DATA
+
+
+def test_repair_refuses_changed_source():
+    """Uma origem que não confere com a árvore não é copiada para o destino."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "source.bin"
+        dest = Path(tmpdir) / "dest.bin"
+        source.write_bytes(DATA)
+        dest.write_bytes(DATA)
+        _, tree = hash_file_with_tree(source, "sha256", CHUNK)
+        _corrupt(dest, 0)
+        _corrupt(source, 1)
+
+        try:
+            repair_ranges(source, dest, tree, find_bad_ranges(dest, tree))
+            assert False, "origem alterada deveria falhar"
+        except IOError:
+            pass
+        assert dest.read_bytes() != DATA
+
+
+def test_tree_file_roundtrip():
+    """Árvores gravadas no .chunks são lidas de volta por caminho."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "m.sha256.chunks"
+        first = ChunkTreeHasher("sha256", CHUNK)
+        first.update(DATA)
+        empty = ChunkTreeHasher("sha256", CHUNK)
+        writer = ChunkTreeWriter(path, "sha256", CHUNK)
+        writer.add("dir/a.bin", first.tree())
+        writer.add("vazio", empty.tree())
+        writer.close()
+
+        reader = ChunkTreeReader(path)
+        assert reader.chunk_size == CHUNK
+        assert reader.get("dir/a.bin").leaves == first.tree().leaves
+        assert reader.get("vazio").leaves == []
+        assert reader.get("vazio").root() == ""
+        assert reader.get("outro") is None
+
+        # Em sequência, na ordem do manifesto (entradas sem árvore não consomem registros)
+        for _ in range(2):
+            assert reader.next_tree("dir/a.bin").leaves == first.tree().leaves
+            assert reader.next_tree("sem-arvore") is None
+            assert reader.next_tree("vazio").size == 0
+            assert reader.next_tree("depois") is None
+            reader.close()
+
+
+def _make_pair(root: Path):
+    source = root / "src"
+    dest = root / "dst"
+    for base in (source, dest):
+        (base / "sub").mkdir(parents=True)
+        (base / "sub" / "big.bin").write_bytes(DATA)
+        (base / "small.txt").write_bytes(b"small")
+    return source, dest
+
+
+def test_engine_locates_and_repairs(monkeypatch):
+    """O VerifyEngine localiza o bloco corrompido e, com repair, reescreve só ele."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_pair(Path(tmpdir))
+        _corrupt(dest / "sub" / "big.bin", 2 * CHUNK + 5)
+
+        result = VerifyEngine(source, dest, tree_chunk_size=CHUNK).verify()
+        assert result['corrupted'] == 1
+        assert result['corrupted_list'][0][1] == "Hash diferente em 1 trecho(s)"
+        assert result['bad_ranges'] == {source / "sub" / "big.bin": [(2 * CHUNK, CHUNK)]}
+
+        writes = _spy_writes(monkeypatch)
+        result = VerifyEngine(source, dest, tree_chunk_size=CHUNK, repair=True).verify()
+        assert result['corrupted'] == 0
+        assert result['verified'] == 2
+        assert result['repaired'] == {source / "sub" / "big.bin": [(2 * CHUNK, CHUNK)]}
+        assert writes == [(2 * CHUNK, CHUNK)]
+        assert (dest / "sub" / "big.bin").read_bytes() == DATA
+
+
+def test_manifest_trees_locate_and_repair(monkeypatch):
+    """Árvores gravadas com o manifesto localizam e reparam sem reler a origem inteira."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_pair(Path(tmpdir))
+        manifest = Path(tmpdir) / "dst.sha256"
+        writer = ManifestWriter(manifest, "sum", "sha256", dest, tree_chunk_size=CHUNK)
+        engine = VerifyEngine(source, dest, tree_chunk_size=CHUNK, manifest_writer=writer)
+        assert engine.verify()['verified'] == 2
+        writer.close()
+        assert chunks_path_for(manifest).exists()
+
+        _corrupt(dest / "sub" / "big.bin", 6 * CHUNK + 1)
+        result = ManifestVerifier(manifest, dest).verify()
+        assert result['corrupted'] == 1
+        assert result['bad_ranges'] == {dest / "sub" / "big.bin": [(6 * CHUNK, len(DATA) - 6 * CHUNK)]}
+
+        writes = _spy_writes(monkeypatch)
+        result = ManifestVerifier(manifest, dest, repair_source=source).verify()
+        assert result['corrupted'] == 0
+        assert result['repaired'] == {dest / "sub" / "big.bin": [(6 * CHUNK, len(DATA) - 6 * CHUNK)]}
+        assert writes == [(6 * CHUNK, len(DATA) - 6 * CHUNK)]
+        assert ManifestVerifier(manifest, dest).verify()['verified'] == 2
+        assert os.path.getsize(dest / "sub" / "big.bin") == len(DATA)
+
+
+def test_repair_reads_block_by_block(monkeypatch):
+    """Um arquivo todo corrompido é reparado sem ler da origem mais que um bloco por vez."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "source.bin"
+        dest = Path(tmpdir) / "dest.bin"
+        source.write_bytes(DATA)
+        dest.write_bytes(bytes(len(DATA)))
+        _, tree = hash_file_with_tree(source, "sha256", CHUNK)
+        ranges = find_bad_ranges(dest, tree)
+        assert ranges == [(0, len(DATA))]
+        reads = []
+        real_open = open
+
+        class SpySource:
+            def __init__(self, f):
+                self._f = f
+
+            def readinto(self, buffer):
+                reads.append(len(buffer))
+                return self._f.readinto(buffer)
+
+            def __getattr__(self, name):
+                return getattr(self._f, name)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self._f.close()
+
+        def spy_open(path, mode='r', *args, **kwargs):
+            f = real_open(path, mode, *args, **kwargs)
+            return SpySource(f) if mode == 'rb' else f
+
+        monkeypatch.setattr(chunk_tree, "open", spy_open, raising=False)
+        assert repair_ranges(source, dest, tree, ranges) == len(DATA)
+        assert max(reads) == CHUNK
+        assert dest.read_bytes() == DATA
+
+
+def test_engine_rechecks_after_repair(monkeypatch):
+    """Um reparo que não corrige o destino não conta como verificado."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_pair(Path(tmpdir))
+        _corrupt(dest / "sub" / "big.bin", 2 * CHUNK + 5)
+        monkeypatch.setattr(chunk_tree, "repair_ranges", lambda *args, **kwargs: 0)
+
+        result = VerifyEngine(source, dest, tree_chunk_size=CHUNK, repair=True).verify()
+        assert result['corrupted'] == 1
+        assert result['corrupted_list'][0][1] == "Reparo não conferiu: 1 trecho(s) ainda diferente(s)"
+        assert result['repaired'] == {}
+        assert result['bad_ranges'] == {source / "sub" / "big.bin": [(2 * CHUNK, CHUNK)]}
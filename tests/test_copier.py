@@ -56,3 +56,349 @@ def test_copy_all_files():
         assert (dest_dir / "file2.txt").exists()
         assert (dest_dir / "subdir" / "file3.txt").exists()
 
+
+
+def _interrupted_copy(copier, source_file, dest_file, offset):
+    """Simula uma cópia interrompida: marcador registrando `offset` bytes gravados."""
+    copier.resume_block_size = 16 * 1024
+    copier.resume_marker_interval = 16 * 1024
+    copier._write_resume_marker(dest_file, source_file.stat(), offset)
+
+
+def test_resume_partial_copy():
+    """Testa retomada de cópia parcial a partir do último bloco válido."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = Path(tmpdir) / "big.bin"
+        dest_file = Path(tmpdir) / "dest" / "big.bin"
+        dest_file.parent.mkdir()
+        
+        data = bytes(range(256)) * 400  # 100KB
+        source_file.write_bytes(data)
+        dest_file.write_bytes(data[:70000])  # cópia interrompida
+        
+        progress = []
+        copier = FileCopier(source_file, dest_file, resume_partial=True)
+        _interrupted_copy(copier, source_file, dest_file, 70000)
+        copier.set_progress_callback(lambda i, t, f, size, done: progress.append(done))
+        
+        assert copier.copy_file(source_file, dest_file) is True
+        assert dest_file.read_bytes() == data
+        # Retoma no último bloco completo (64KB), não do byte 0
+        assert progress[0] == 64 * 1024
+        assert progress[-1] == len(data)
+        # Cópia concluída: o marcador some
+        assert not copier._marker_path(dest_file).exists()
+
+
+def test_resume_partial_copy_detects_corrupted_block():
+    """Testa que um bloco amostrado divergente faz a cópia recomeçar do início."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = Path(tmpdir) / "big.bin"
+        dest_file = Path(tmpdir) / "partial.bin"
+        
+        data = bytes(range(256)) * 400
+        source_file.write_bytes(data)
+        partial = bytearray(data[:80000])
+        partial[20000] ^= 0xFF  # corrompe o segundo bloco
+        dest_file.write_bytes(bytes(partial))
+        
+        copier = FileCopier(source_file, dest_file, resume_partial=True, resume_verify="sample")
+        _interrupted_copy(copier, source_file, dest_file, 80000)
+        
+        assert copier._find_resume_offset(source_file, dest_file, len(data)) == 0
+        assert copier.copy_file(source_file, dest_file) is True
+        assert dest_file.read_bytes() == data
+
+
+def test_resume_ignores_destination_without_marker():
+    """Um destino existente sem marcador (mesmo do tamanho da origem) é recopiado."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = Path(tmpdir) / "big.bin"
+        dest_file = Path(tmpdir) / "dest.bin"
+        
+        data = bytes(range(256)) * 400
+        source_file.write_bytes(data)
+        stale = bytearray(data)
+        stale[100] ^= 0xFF
+        dest_file.write_bytes(bytes(stale))
+        
+        for mode in ("size", "tail", "sample"):
+            copier = FileCopier(source_file, dest_file, resume_partial=True, resume_verify=mode)
+            copier.resume_block_size = 16 * 1024
+            assert copier._find_resume_offset(source_file, dest_file, len(data)) == 0
+        
+        assert copier.copy_file(source_file, dest_file) is True
+        assert dest_file.read_bytes() == data
+
+
+def test_resume_rejects_stale_marker_and_checks_full_destination():
+    """Marcador de outra versão da origem é ignorado; destino completo é comparado inteiro."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = Path(tmpdir) / "big.bin"
+        dest_file = Path(tmpdir) / "dest.bin"
+        
+        data = bytes(range(256)) * 400
+        source_file.write_bytes(data)
+        stale = bytearray(data)
+        stale[100] ^= 0xFF
+        dest_file.write_bytes(bytes(stale))
+        
+        copier = FileCopier(source_file, dest_file, resume_partial=True, resume_verify="size")
+        _interrupted_copy(copier, source_file, dest_file, len(data))
+        # Destino completo: a divergência no primeiro bloco leva a retomada ao início
+        assert copier._find_resume_offset(source_file, dest_file, len(data)) == 0
+        
+        marker = copier._marker_path(dest_file)
+        size, mtime_ns, offset = marker.read_text().split()
+        marker.write_text(f"{size} {int(mtime_ns) + 1} {offset}\n")
+        dest_file.write_bytes(data)
+        assert copier._find_resume_offset(source_file, dest_file, len(data)) == 0
+        
+        _interrupted_copy(copier, source_file, dest_file, len(data))
+        assert copier._find_resume_offset(source_file, dest_file, len(data)) == len(data)
+
+
+def test_sync_mode_skips_unchanged_files():
+    """Testa que o modo incremental copia apenas arquivos novos ou alterados."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        dest_dir = Path(tmpdir) / "dest"
+        (source_dir / "subdir").mkdir(parents=True)
+        
+        (source_dir / "file1.txt").write_text("content 1")
+        (source_dir / "file2.txt").write_text("content 2")
+        (source_dir / "subdir" / "file3.txt").write_text("content 3")
+        
+        first = FileCopier(source_dir, dest_dir, sync_mode="quick").copy_all()
+        assert first['copied_files'] == 3
+        assert first['skipped_files'] == 0
+        
+        (source_dir / "file2.txt").write_text("content 2 alterado")
+        (source_dir / "subdir" / "file4.txt").write_text("novo")
+        
+        second = FileCopier(source_dir, dest_dir, sync_mode="quick").copy_all()
+        assert second['copied_files'] == 2
+        assert second['skipped_files'] == 2
+        assert second['skipped_bytes'] == len("content 1") + len("content 3")
+        assert (dest_dir / "file2.txt").read_text() == "content 2 alterado"
+        assert (dest_dir / "subdir" / "file4.txt").read_text() == "novo"
+
+
+@pytest.mark.parametrize("mode", ["none", "file", "group", "syncfs"])
+def test_durability_modes(mode):
+    """Testa que todos os modos de durabilidade entregam os arquivos sem temporários."""
+    from core.parallel_copier import ParallelFileCopier
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        dest_dir = Path(tmpdir) / "dest"
+        (source_dir / "subdir").mkdir(parents=True)
+        for i in range(10):
+            (source_dir / f"file{i}.txt").write_text(f"content {i}")
+        (source_dir / "subdir" / "nested.txt").write_text("nested")
+        
+        copier = ParallelFileCopier(source_dir, dest_dir, num_threads=3, durability=mode)
+        copier.durability.group_max_files = 4
+        stats = copier.copy_all()
+        
+        assert stats['copied_files'] == 11
+        assert (dest_dir / "file7.txt").read_text() == "content 7"
+        assert (dest_dir / "subdir" / "nested.txt").read_text() == "nested"
+        assert not [p for p in dest_dir.rglob('*') if p.name.endswith('.part')]
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_group_commit_failure_fails_whole_batch(monkeypatch, parallel):
+    """Uma falha ao efetivar um lote vira falha de todos os arquivos dele, sem exceção."""
+    from core import durability
+    from core.parallel_copier import ParallelFileCopier
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        dest_dir = Path(tmpdir) / "dest"
+        source_dir.mkdir()
+        for i in range(6):
+            (source_dir / f"file{i}.txt").write_text(f"content {i}")
+        real_fsync = durability._fsync_path
+        
+        def failing_fsync(path):
+            if path.name == ".file3.txt.part":
+                raise OSError(5, "Input/output error")
+            real_fsync(path)
+        
+        monkeypatch.setattr(durability, "_fsync_path", failing_fsync)
+        if parallel:
+            copier = ParallelFileCopier(source_dir, dest_dir, num_threads=1, durability="group")
+        else:
+            copier = FileCopier(source_dir, dest_dir, durability="group")
+        copier.durability.group_max_files = 100
+        stats = copier.copy_all()
+        
+        assert stats['copied_files'] == 0
+        assert stats['failed_files'] == 6
+        assert len(stats['failed_list']) == 6
+        assert stats['copied_list'] == []
+        assert all("lote" in error for _, error in stats['failed_list'])
+
+
+def test_group_commit_rename_failure_keeps_renamed_files():
+    """Falha em um rename do lote: os arquivos já renomeados continuam efetivados."""
+    import os
+    from core.durability import DurabilityManager
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = DurabilityManager("group", group_max_files=100)
+        committed = []
+        manager.on_commit = committed.append
+        dest_files = [Path(tmpdir) / "a.txt", Path(tmpdir) / "ausente" / "b.txt", Path(tmpdir) / "c.txt"]
+        for index, dest_file in enumerate(dest_files):
+            write_path = manager.write_path(dest_file)
+            if write_path.parent.exists():
+                write_path.write_text(dest_file.name)
+            else:
+                # Temporário fora do diretório final inexistente: o rename falha
+                write_path = Path(tmpdir) / f".b{index}.part"
+                write_path.write_text(dest_file.name)
+            manager.commit(write_path, dest_file, 1, item=dest_file.name)
+        manager.finish()
+        
+        assert committed == [dest_files[0]]
+        assert dest_files[0].read_text() == "a.txt"
+        assert [item for _, item, _ in manager.take_failures()] == ["b.txt", "c.txt"]
+        assert os.path.exists(Path(tmpdir) / ".c.txt.part")
+
+
+def test_archive_is_fsynced_in_file_mode(monkeypatch):
+    """No modo 'file', o pacote e o índice do modo arquivo vão para o disco ao fechar."""
+    from core import durability
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        source_dir.mkdir()
+        (source_dir / "file1.txt").write_text("content 1")
+        synced = []
+        real_fsync = durability._fsync_path
+        
+        def recording_fsync(path):
+            synced.append(Path(path))
+            real_fsync(path)
+        
+        monkeypatch.setattr(durability, "_fsync_path", recording_fsync)
+        copier = FileCopier(source_dir, Path(tmpdir) / "backup.tar", archive_format="tar", durability="file")
+        stats = copier.copy_all()
+        
+        assert stats['copied_files'] == 1
+        assert stats['archive_path'] in synced
+        assert stats['index_path'] in synced
+        assert stats['durability_errors'] == []
+
+
+def test_group_commit_flushes_on_timer():
+    """O último lote é efetivado após group_max_delay, sem esperar o fim do job."""
+    import time
+    from core.durability import DurabilityManager
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = DurabilityManager("group", group_max_delay=0.05)
+        dest_file = Path(tmpdir) / "a.txt"
+        write_path = manager.write_path(dest_file)
+        write_path.write_text("a")
+        manager.commit(write_path, dest_file, 1)
+        
+        deadline = time.monotonic() + 5
+        while not dest_file.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert dest_file.read_text() == "a"
+        manager.finish()
+        assert manager.take_failures() == []
+
+
+def test_inline_hash_matches_verifier():
+    """Testa que o hash calculado durante a cópia é o mesmo do verificador."""
+    from core.verifier import IntegrityVerifier
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        dest_dir = Path(tmpdir) / "dest"
+        source_dir.mkdir()
+        (source_dir / "file1.txt").write_text("content 1")
+        (source_dir / "empty.txt").write_text("")
+        
+        stats = FileCopier(source_dir, dest_dir, hash_algorithm="sha256").copy_all()
+        
+        verifier = IntegrityVerifier()
+        assert stats['hash_algorithm'] == "sha256"
+        assert len(stats['hashes']) == 2
+        for source_file, file_hash in stats['hashes'].items():
+            assert file_hash == verifier.calculate_hash(source_file)
+
+
+@pytest.mark.parametrize("durability", ["none", "file"])
+def test_cancel_removes_partial_files(durability):
+    """Cancelar no meio de um arquivo remove o parcial (temporário ou destino), inclusive no fan-out."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = Path(tmpdir) / "grande.bin"
+        source_file.write_bytes(b"x" * (2 * 1024 * 1024))
+        dest_a = Path(tmpdir) / "a"
+        dest_b = Path(tmpdir) / "b"
+        
+        copier = FileCopier(source_file, dest_a, durability=durability)
+        copier.set_progress_callback(lambda *args: copier.cancel())
+        assert copier.copy_file(source_file, dest_a / "grande.bin") is False
+        assert list(dest_a.iterdir()) == []
+        
+        copier = FileCopier(source_file, dest_a, durability=durability)
+        copier.set_progress_callback(lambda *args: copier.cancel())
+        results = copier.copy_file_fanout(source_file, [dest_a / "grande.bin", dest_b / "grande.bin"])
+        assert set(results.values()) == {"Cancelado"}
+        assert list(dest_a.iterdir()) == list(dest_b.iterdir()) == []
+
+
+@pytest.mark.parametrize("durability", ["none", "file"])
+def test_fanout_write_failure_removes_partial(monkeypatch, durability):
+    """Destino que falha no meio da passada do fan-out não deixa o parcial no disco."""
+    import builtins
+    from core import copier as copier_module
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = Path(tmpdir) / "grande.bin"
+        source_file.write_bytes(b"x" * (4 * 1024 * 1024))
+        dest_ok = Path(tmpdir) / "ok" / "grande.bin"
+        dest_bad = Path(tmpdir) / "ruim" / "grande.bin"
+        
+        class FailingWriter:
+            """Arquivo cuja segunda escrita falha (disco cheio)."""
+            def __init__(self, handle):
+                self.handle = handle
+                self.writes = 0
+            
+            def write(self, data):
+                self.writes += 1
+                if self.writes > 1:
+                    raise OSError(28, "No space left on device")
+                return self.handle.write(data)
+            
+            def __getattr__(self, name):
+                return getattr(self.handle, name)
+            
+            def __enter__(self):
+                return self
+            
+            def __exit__(self, *args):
+                self.handle.close()
+        
+        def fake_open(path, mode='r', *args, **kwargs):
+            handle = builtins.open(path, mode, *args, **kwargs)
+            if 'w' in mode and Path(path).parent == dest_bad.parent:
+                return FailingWriter(handle)
+            return handle
+        
+        monkeypatch.setattr(copier_module, "open", fake_open, raising=False)
+        copier = FileCopier(source_file, dest_ok.parent, durability=durability, max_retries=1)
+        copier.set_progress_callback(lambda *args: None)
+        results = copier.copy_file_fanout(source_file, [dest_ok, dest_bad])
+        
+        assert results[dest_ok] is None
+        assert results[dest_bad] is not None
+        assert dest_ok.read_bytes() == source_file.read_bytes()
+        assert list(dest_bad.parent.iterdir()) == []
@@ -0,0 +1,195 @@
+"""
+Testes para o módulo dedup.
+"""
+
+import os
+import pytest
+from pathlib import Path
+import tempfile
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import dedup
+from core.dedup import ContentStore
+from core.copier import FileCopier
+from core.parallel_copier import ParallelFileCopier
+
+
+def _make_source(root: Path) -> dict:
+    files = {
+        "a.txt": b"conteudo repetido" * 1000,
+        "sub/b.txt": b"conteudo repetido" * 1000,
+        "c.txt": b"conteudo unico" * 1000,
+        "d.txt": b"X" * (17 * 1000),  # Mesmo tamanho de a.txt, conteúdo diferente
+    }
+    for name, data in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return files
+
+
+@pytest.mark.parametrize("engine", ["sequential", "parallel"])
+def test_dedup_stores_content_once(engine):
+    """Testa que conteúdo repetido é gravado uma vez e reaproveitado por jobs seguintes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "source"
+        store_dir = Path(tmpdir) / "store"
+        files = _make_source(source)
+
+        def run(dest):
+            if engine == "parallel":
+                copier = ParallelFileCopier(source, dest, num_threads=1, dedup_store=store_dir,
+                                            dedup_link="hardlink", dedup_preserve_metadata=False,
+                                            hash_algorithm="sha256")
+            else:
+                copier = FileCopier(source, dest, dedup_store=store_dir, dedup_link="hardlink",
+                                    dedup_preserve_metadata=False, hash_algorithm="sha256")
+            stats = copier.copy_all()
+            copier.content_store.close()
+            return stats
+
+        stats = run(Path(tmpdir) / "dest1")
+        total = sum(len(data) for data in files.values())
+        assert stats['copied_files'] == 4
+        assert stats['logical_bytes'] == total
+        assert stats['physical_bytes'] == total - len(files["a.txt"])
+        assert len(stats['hashes']) == 4
+
+        for name, data in files.items():
+            dest_file = Path(tmpdir) / "dest1" / name
+            assert dest_file.read_bytes() == data
+        assert (Path(tmpdir) / "dest1" / "a.txt").stat().st_nlink == 3  # Objeto + 2 destinos
+
+        # Índice persistente: um novo job não grava nada
+        stats = run(Path(tmpdir) / "dest2")
+        assert stats['copied_files'] == 4
+        assert stats['physical_bytes'] == 0
+        assert (Path(tmpdir) / "dest2" / "c.txt").read_bytes() == files["c.txt"]
+
+
+def test_dedup_with_atomic_durability():
+    """Testa o modo deduplicado com gravação atômica em lotes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "source"
+        dest = Path(tmpdir) / "dest"
+        files = _make_source(source)
+
+        copier = FileCopier(source, dest, durability="group", dedup_store=Path(tmpdir) / "store",
+                            dedup_link="hardlink", dedup_preserve_metadata=False)
+        stats = copier.copy_all()
+        copier.content_store.close()
+
+        assert stats['failed_files'] == 0
+        for name, data in files.items():
+            assert (dest / name).read_bytes() == data
+        assert not list(dest.rglob("*.part"))
+
+
+def test_content_store_rejects_other_algorithm():
+    """Testa que o repositório mantém o algoritmo com que foi criado."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ContentStore(Path(tmpdir), "sha256").close()
+        with pytest.raises(ValueError):
+            ContentStore(Path(tmpdir), "md5")
+
+
+def test_dedup_preserves_metadata_without_touching_objects():
+    """Com metadados preservados não há hardlink: o destino recebe o mtime da origem, o objeto não."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "source"
+        dest = Path(tmpdir) / "dest"
+        files = _make_source(source)
+        for i, name in enumerate(files):
+            os.utime(source / name, ns=(1_000_000_000 * (i + 1), 1_000_000_000 * (i + 1)))
+        
+        with pytest.raises(ValueError):
+            FileCopier(source, dest, dedup_store=Path(tmpdir) / "store", dedup_link="hardlink",
+                       dedup_preserve_metadata=True)
+        
+        copier = FileCopier(source, dest, dedup_store=Path(tmpdir) / "store", dedup_preserve_metadata=True)
+        copier.copy_all()
+        store = copier.content_store
+        store.close()
+        
+        for name in files:
+            assert (dest / name).stat().st_mtime_ns == (source / name).stat().st_mtime_ns
+            assert (dest / name).stat().st_nlink == 1
+        # Os objetos mantêm os próprios timestamps (de quando foram gravados)
+        objects = [path for path in store.objects_dir.rglob("*") if path.is_file()]
+        assert len(objects) == 3
+        assert all(path.stat().st_mtime_ns > 10 ** 18 for path in objects)
+
+
+def test_dedup_reingests_missing_or_truncated_objects():
+    """Entrada do índice sem objeto íntegro é descartada e o conteúdo é gravado de novo."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "source"
+        store_dir = Path(tmpdir) / "store"
+        files = _make_source(source)
+        
+        copier = FileCopier(source, Path(tmpdir) / "dest1", dedup_store=store_dir, hash_algorithm="sha256")
+        stats = copier.copy_all()
+        copier.content_store.close()
+        hashes = stats['hashes']
+        
+        missing = copier.content_store.object_path(hashes[source / "a.txt"])
+        truncated = copier.content_store.object_path(hashes[source / "c.txt"])
+        missing.unlink()
+        truncated.chmod(0o644)
+        truncated.write_bytes(b"curto")
+        
+        copier = FileCopier(source, Path(tmpdir) / "dest2", dedup_store=store_dir, hash_algorithm="sha256")
+        stats = copier.copy_all()
+        copier.content_store.close()
+        
+        assert stats['failed_files'] == 0
+        assert stats['physical_bytes'] >= len(files["a.txt"]) + len(files["c.txt"])
+        for name, data in files.items():
+            assert (Path(tmpdir) / "dest2" / name).read_bytes() == data
+        assert missing.stat().st_size == len(files["a.txt"])
+        assert truncated.read_bytes() == files["c.txt"]
+
+
+def test_dedup_default_links_without_reflink(monkeypatch):
+    """Sem reflink, o modo padrão usa hardlinks: o destino ocupa menos que o volume lógico."""
+    monkeypatch.setattr(dedup, "_reflink", lambda source, dest: False)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "source"
+        dest = Path(tmpdir) / "dest"
+        data = os.urandom(1024 * 1024)
+        source.mkdir()
+        for name in ("a.bin", "b.bin", "c.bin"):
+            (source / name).write_bytes(data)
+
+        copier = FileCopier(source, dest, dedup_store=Path(tmpdir) / "store")
+        stats = copier.copy_all()
+        copier.content_store.close()
+
+        assert stats['logical_bytes'] == 3 * len(data)
+        assert stats['physical_bytes'] == len(data)
+        assert stats['physical_bytes'] < stats['logical_bytes']
+        assert all((dest / name).stat().st_nlink == 4 for name in ("a.bin", "b.bin", "c.bin"))
+
+
+def test_content_store_rejects_source_changed_between_reads(monkeypatch):
+    """Se a origem muda entre o hash e a cópia, o objeto não é publicado sob o hash antigo."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        store = ContentStore(root / "store")
+        (root / "primeiro.bin").write_bytes(b"A" * 100)
+        store.store_file(root / "primeiro.bin", root / "dest" / "primeiro.bin")
+
+        # Mesmo tamanho de um objeto existente: o hash é calculado antes da cópia
+        changed = root / "alterado.bin"
+        changed.write_bytes(b"B" * 100)
+        stale_hash = "0" * 64
+        monkeypatch.setattr(store, "_hash_file", lambda source_file, progress: stale_hash)
+
+        with pytest.raises(OSError):
+            store.store_file(changed, root / "dest" / "alterado.bin")
+        assert not store.has_object(stale_hash)
+        assert not store.object_path(stale_hash).exists()
+        assert not list(store.tmp_dir.iterdir())
+        store.close()
@@ -0,0 +1,141 @@
+"""
+Testes para o módulo delta.
+"""
+
+import pytest
+from pathlib import Path
+import random
+import tempfile
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import delta as delta_module
+from core.delta import DeltaTransfer, filesystem_type, resolve_delta
+from core.copier import FileCopier
+
+
+BLOCK_SIZE = 4096
+
+
+def _random_bytes(size: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    return bytes(rng.getrandbits(8) for _ in range(size))
+
+
+def _run_delta(tmpdir: str, old: bytes, new: bytes) -> DeltaTransfer:
+    source_file = Path(tmpdir) / "source.bin"
+    dest_file = Path(tmpdir) / "dest.bin"
+    source_file.write_bytes(new)
+    dest_file.write_bytes(old)
+    
+    delta = DeltaTransfer(block_size=BLOCK_SIZE)
+    assert delta.transfer(source_file, dest_file) is True
+    assert dest_file.read_bytes() == new
+    return delta
+
+
+def test_delta_insertion():
+    """Testa inserção no meio do arquivo (deslocamento dos blocos seguintes)."""
+    old = _random_bytes(64 * 1024, seed=1)
+    new = old[:10000] + b"inserido" * 100 + old[10000:]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        delta = _run_delta(tmpdir, old, new)
+        assert delta.bytes_literal < 3 * BLOCK_SIZE
+        assert delta.bytes_reused + delta.bytes_literal == len(new)
+
+
+def test_delta_deletion():
+    """Testa remoção de um trecho do arquivo."""
+    old = _random_bytes(64 * 1024, seed=2)
+    new = old[:20000] + old[30000:]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        delta = _run_delta(tmpdir, old, new)
+        assert delta.bytes_literal < 2 * BLOCK_SIZE
+
+
+def test_delta_append():
+    """Testa dados acrescentados ao final."""
+    old = _random_bytes(64 * 1024, seed=3)
+    new = old + _random_bytes(5000, seed=4)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        delta = _run_delta(tmpdir, old, new)
+        assert delta.bytes_reused == len(old)
+        assert delta.bytes_literal == 5000
+
+
+def test_copier_delta_mode_reports_reused_bytes():
+    """Testa o modo delta integrado ao FileCopier."""
+    old = _random_bytes(64 * 1024, seed=5)
+    new = bytearray(old)
+    new[30000:30010] = b"0123456789"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        dest_dir = Path(tmpdir) / "dest"
+        source_dir.mkdir()
+        dest_dir.mkdir()
+        (source_dir / "image.bin").write_bytes(bytes(new))
+        (dest_dir / "image.bin").write_bytes(old)
+        
+        copier = FileCopier(source_dir, dest_dir, delta_mode="always", delta_min_size=1)
+        stats = copier.copy_all()
+        
+        assert stats['copied_files'] == 1
+        assert stats['delta_bytes_reused'] >= len(old) - 2 * BLOCK_SIZE
+        # Sem in-place, o arquivo temporário recebe o arquivo inteiro
+        assert stats['delta_bytes_written'] == len(new)
+        assert (dest_dir / "image.bin").read_bytes() == bytes(new)
+
+
+def test_delta_in_place_writes_only_changed_blocks():
+    """No modo in-place só os blocos alterados são gravados, no próprio destino."""
+    old = _random_bytes(64 * 1024, seed=6)
+    new = bytearray(old)
+    new[20000:20004] = b"abcd"
+    new = bytes(new[:60000])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = Path(tmpdir) / "source.bin"
+        dest_file = Path(tmpdir) / "dest.bin"
+        source_file.write_bytes(new)
+        dest_file.write_bytes(old)
+        inode = dest_file.stat().st_ino
+        
+        delta = DeltaTransfer(block_size=BLOCK_SIZE, in_place=True)
+        assert delta.transfer(source_file, dest_file) is True
+        assert dest_file.read_bytes() == new
+        assert dest_file.stat().st_ino == inode
+        assert delta.bytes_written == BLOCK_SIZE
+        assert delta.bytes_reused == len(new) - BLOCK_SIZE
+        
+        # Durabilidade atômica exige rename: volta ao arquivo temporário
+        source_file.write_bytes(old)
+        copier = FileCopier(source_file, dest_file, delta_mode="always", delta_min_size=1,
+                            delta_in_place=True, durability="file")
+        assert copier.copy_all()['delta_bytes_written'] == len(old)
+        assert dest_file.read_bytes() == old
+
+
+def test_delta_auto_only_for_slow_sources(monkeypatch, tmp_path):
+    """O modo 'auto' só ativa o delta com origem em rede ou disco rotacional; True sempre ativa."""
+    mountinfo = tmp_path / "mountinfo"
+    mountinfo.write_text(
+        "22 1 8:1 / / rw - ext4 /dev/sda1 rw\n"
+        f"40 22 0:50 / {tmp_path}/rede\\040remota rw - nfs4 srv:/exp rw\n"
+        f"41 22 0:51 / {tmp_path}/fuse rw - fuse.sshfs host: rw\n")
+    monkeypatch.setattr(delta_module, "MOUNTINFO", mountinfo)
+    monkeypatch.setattr(delta_module, "is_rotational", lambda path: False)
+    
+    assert filesystem_type(tmp_path / "rede remota" / "a.bin") == "nfs4"
+    assert filesystem_type(tmp_path / "rede") == "ext4"
+    assert resolve_delta("auto", tmp_path / "rede remota") is True
+    assert resolve_delta(True, tmp_path / "local") is True
+    assert resolve_delta("auto", tmp_path / "fuse" / "x") is True
+    assert resolve_delta("auto", tmp_path / "local") is False
+    assert resolve_delta("always", tmp_path / "local") is True
+    assert resolve_delta(False, tmp_path / "rede remota") is False
+    
+    monkeypatch.setattr(delta_module, "is_rotational", lambda path: True)
+    assert resolve_delta("auto", tmp_path / "local") is True
+    
+    with pytest.raises(ValueError):
+        FileCopier(tmp_path, tmp_path / "dest", delta_mode="sempre")
@@ -0,0 +1,155 @@
+"""
+Testes para o módulo digests.
+"""
+
+import errno
+import hashlib
+import os
+import pytest
+from pathlib import Path
+import tempfile
+import zlib
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import digests
+from core.digests import OPTIONAL_PACKAGES, available_algorithms, create_hasher, hash_file, is_available
+from core.verify_engine import VerifyEngine
+from core.verifier import IntegrityVerifier
+
+
+DATA = b"FileCopy Verifier " * 5000
+
+
+@pytest.mark.parametrize("algorithm", available_algorithms())
+def test_incremental_matches_one_shot(algorithm):
+    """Testa que alimentar em partes produz o mesmo digest que de uma vez."""
+    whole = create_hasher(algorithm)
+    whole.update(DATA)
+    parts = create_hasher(algorithm)
+    for i in range(0, len(DATA), 777):
+        parts.update(DATA[i:i + 777])
+    assert parts.hexdigest() == whole.hexdigest()
+
+
+def test_stdlib_digests_match_hashlib():
+    """Testa BLAKE2 e CRC32 contra as implementações de referência."""
+    for algorithm in ("blake2b", "blake2s", "sha256", "md5"):
+        hasher = create_hasher(algorithm)
+        hasher.update(DATA)
+        assert hasher.hexdigest() == hashlib.new(algorithm, DATA).hexdigest()
+
+    crc = create_hasher("crc32")
+    crc.update(DATA[:100])
+    crc.update(DATA[100:])
+    assert crc.hexdigest() == f"{zlib.crc32(DATA):08x}"
+
+
+def test_unknown_and_missing_algorithms():
+    """Testa mensagens de erro para algoritmo inexistente ou pacote opcional ausente."""
+    with pytest.raises(ValueError):
+        create_hasher("nao_existe")
+    with pytest.raises(ValueError):
+        IntegrityVerifier("nao_existe")
+    for algorithm, package in OPTIONAL_PACKAGES.items():
+        if not is_available(algorithm):
+            with pytest.raises(ValueError, match=package):
+                create_hasher(algorithm)
+
+
+def test_verifier_with_selected_algorithm():
+    """Testa a verificação usando um algoritmo do registro."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = Path(tmpdir) / "a.bin"
+        dest_file = Path(tmpdir) / "b.bin"
+        source_file.write_bytes(DATA)
+        dest_file.write_bytes(DATA)
+
+        verifier = IntegrityVerifier("blake2b")
+        assert verifier.calculate_hash(source_file) == hashlib.blake2b(DATA).hexdigest()
+        assert verifier.verify_file(source_file, dest_file) == (True, None)
+
+
+@pytest.mark.parametrize("cache_mode", digests.CACHE_MODES)
+@pytest.mark.parametrize("chunk_size", [None, 5000, 65536])
+def test_cache_modes_same_hash(cache_mode, chunk_size):
+    """Todos os modos de cache produzem o mesmo hash, com buffers e tamanhos desalinhados."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in (0, 1, 4096, len(DATA)):
+            test_file = Path(tmpdir) / f"f{size}"
+            test_file.write_bytes(DATA[:size])
+            assert hash_file(test_file, "sha256", chunk_size=chunk_size, cache_mode=cache_mode) == \
+                hashlib.sha256(DATA[:size]).hexdigest()
+
+    with pytest.raises(ValueError):
+        hash_file(test_file, cache_mode="bypass")
+
+
+@pytest.mark.skipif(not hasattr(os, "posix_fadvise"), reason="posix_fadvise indisponível")
+def test_drop_mode_syncs_and_evicts(monkeypatch):
+    """No modo 'drop', o arquivo é sincronizado e as páginas descartadas antes e depois da leitura."""
+    calls = []
+    real_fadvise = os.posix_fadvise
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (calls.append("fsync"), real_fsync(fd)))
+    monkeypatch.setattr(os, "posix_fadvise",
+                        lambda fd, offset, length, advice: (calls.append((offset, length, advice)),
+                                                            real_fadvise(fd, offset, length, advice)))
+    monkeypatch.setattr(digests, "DROP_INTERVAL", 30000)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_file = Path(tmpdir) / "f"
+        test_file.write_bytes(DATA)
+
+        assert hash_file(test_file, chunk_size=10000, cache_mode="drop") == hashlib.sha256(DATA).hexdigest()
+
+    dontneed = [call for call in calls if call != "fsync" and call[2] == os.POSIX_FADV_DONTNEED]
+    assert calls[0] == "fsync"
+    assert dontneed[0] == (0, 0, os.POSIX_FADV_DONTNEED)
+    assert (0, 30000, os.POSIX_FADV_DONTNEED) in dontneed
+    assert dontneed[-1] == (0, 0, os.POSIX_FADV_DONTNEED)
+
+
+@pytest.mark.skipif(not hasattr(os, "O_DIRECT"), reason="O_DIRECT indisponível")
+def test_direct_mode_falls_back_to_drop(monkeypatch):
+    """Sem suporte a O_DIRECT no sistema de arquivos, o modo 'direct' lê como 'drop'."""
+    real_open = os.open
+    direct_opens = []
+
+    def fake_open(path, flags, *args, **kwargs):
+        if flags & os.O_DIRECT:
+            direct_opens.append(path)
+            raise OSError(errno.EINVAL, "Invalid argument")
+        return real_open(path, flags, *args, **kwargs)
+
+    monkeypatch.setattr(os, "open", fake_open)
+    dropped = []
+    real_uncached = digests.update_uncached
+    monkeypatch.setattr(digests, "update_uncached",
+                        lambda hasher, f, chunk_size: (dropped.append(chunk_size), real_uncached(hasher, f, chunk_size))[1])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_file = Path(tmpdir) / "f"
+        test_file.write_bytes(DATA)
+
+        assert hash_file(test_file, cache_mode="direct") == hashlib.sha256(DATA).hexdigest()
+
+    assert direct_opens and dropped
+
+
+def test_verify_engine_cache_mode():
+    """O motor de verificação aceita os modos de cache e rejeita os desconhecidos."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = Path(tmpdir) / "src", Path(tmpdir) / "dst"
+        for root in (source, dest):
+            root.mkdir()
+            (root / "a.bin").write_bytes(DATA)
+        (dest / "b.bin").write_bytes(b"x")
+        (source / "b.bin").write_bytes(b"y")
+
+        for cache_mode in ("drop", "direct"):
+            result = VerifyEngine(source, dest, cache_mode=cache_mode).verify()
+            assert result['verified'] == 1
+            assert result['corrupted'] == 1
+
+        with pytest.raises(ValueError):
+            VerifyEngine(source, dest, cache_mode="bypass")
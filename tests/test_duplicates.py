@@ -0,0 +1,92 @@
+"""
+Testes para o módulo duplicates.
+"""
+
+import os
+import pytest
+from pathlib import Path
+import tempfile
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import duplicates
+from core.duplicates import DuplicateFinder
+from core.scanner import DirectoryScanner
+
+
+def test_iter_files_streams_tree():
+    """Testa que iter_files encontra os mesmos arquivos que scan."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a" / "b").mkdir(parents=True)
+        (root / "x.txt").write_text("1")
+        (root / "a" / "y.txt").write_text("22")
+        (root / "a" / "b" / "z.txt").write_text("333")
+
+        scanner = DirectoryScanner(root)
+        streamed = {path: file_stat.st_size for path, file_stat in scanner.iter_files()}
+        assert set(streamed) == set(scanner.scan()['files'])
+        assert streamed[root / "a" / "b" / "z.txt"] == 3
+
+
+def test_find_duplicates_narrows_candidates():
+    """Testa os grupos encontrados e que só colisões do hash parcial são hasheadas por completo."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        big = os.urandom(64 * 1024)
+        (root / "dir1").mkdir()
+        (root / "dir2").mkdir()
+        (root / "dir1" / "big.bin").write_bytes(big)
+        (root / "dir2" / "big_copy.bin").write_bytes(big)
+        # Mesmo tamanho, início e fim iguais, meio diferente: só o hash completo distingue
+        (root / "big_middle.bin").write_bytes(big[:32 * 1024] + b"Z" + big[32 * 1024 + 1:])
+        # Mesmo tamanho e início diferente: descartado pelo hash parcial
+        (root / "big_head.bin").write_bytes(b"Z" + big[1:])
+        (root / "small1.txt").write_bytes(b"pequeno")
+        (root / "small2.txt").write_bytes(b"pequeno")
+        (root / "unique.txt").write_bytes(b"tamanho unico aqui")
+        (root / "empty1").write_bytes(b"")
+        (root / "empty2").write_bytes(b"")
+        os.link(root / "small1.txt", root / "small1_link.txt")
+
+        finder = DuplicateFinder(root, max_workers=2)
+        groups = {frozenset(paths): size for size, _, paths in finder.find()}
+
+        assert groups == {
+            frozenset({root / "dir1" / "big.bin", root / "dir2" / "big_copy.bin"}): len(big),
+            frozenset({root / "small1.txt", root / "small2.txt"}): 7,
+        }
+        stats = finder.get_stats()
+        assert stats['files_scanned'] == 10
+        assert stats['partial_hashed'] == 6
+        assert stats['full_hashed'] == 3
+        assert stats['wasted_bytes'] == len(big) + 7
+
+
+def test_large_size_group_is_split(monkeypatch):
+    """Tamanhos com mais de BATCH_FILES arquivos são hasheados em partes sem perder colisões."""
+    monkeypatch.setattr(duplicates, "BATCH_FILES", 2)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        big = os.urandom(64 * 1024)
+        # A primeira e a última cópia caem em partes diferentes
+        (root / "a_big.bin").write_bytes(big)
+        (root / "b_head.bin").write_bytes(b"Z" + big[1:])
+        (root / "c_middle.bin").write_bytes(big[:32 * 1024] + b"Z" + big[32 * 1024 + 1:])
+        (root / "d_big.bin").write_bytes(big)
+        for name in ("e1.txt", "e2.txt", "e3.txt", "e4.txt", "e5.txt"):
+            (root / name).write_bytes(b"igual" if name != "e3.txt" else b"outro")
+        os.link(root / "e1.txt", root / "e1_link.txt")
+
+        finder = DuplicateFinder(root, max_workers=2)
+        groups = {frozenset(paths): size for size, _, paths in finder.find()}
+
+        assert groups == {
+            frozenset({root / "a_big.bin", root / "d_big.bin"}): len(big),
+            frozenset({root / "e1.txt", root / "e2.txt", root / "e4.txt", root / "e5.txt"}): 5,
+        }
+        stats = finder.get_stats()
+        assert stats['partial_hashed'] == 9
+        assert stats['full_hashed'] == 3
+        assert stats['wasted_bytes'] == len(big) + 3 * 5
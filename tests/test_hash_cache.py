@@ -0,0 +1,127 @@
+"""
+Testes para o módulo hash_cache.
+"""
+
+import os
+import tempfile
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import core.hash_cache as hash_cache
+import core.verifier as verifier_module
+from core.hash_cache import HashCache
+from core.verifier import IntegrityVerifier
+
+
+def test_hit_and_stat_invalidation():
+    """Entrada vale enquanto o stat não muda; reescrita invalida."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir) / "a.txt"
+        file_path.write_text("one")
+        cache = HashCache()
+        
+        stat, value = cache.lookup(file_path, "sha256")
+        assert value is None
+        cache.put(file_path, stat, "sha256", "h1")
+        assert cache.get(file_path, "sha256") == "h1"
+        assert cache.get(file_path, "md5") is None
+        
+        file_path.write_text("two!")
+        later = time.time() + 5
+        os.utime(file_path, (later, later))
+        assert cache.get(file_path, "sha256") is None
+        
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 3
+        assert stats['invalidations'] == 1
+        assert stats['entries'] == 0
+
+
+def test_lru_eviction_by_entries():
+    """Excedido o limite de entradas, a menos usada sai."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        for name in "abc":
+            path = Path(tmpdir) / name
+            path.write_text(name)
+            paths.append(path)
+        cache = HashCache(max_entries=2, max_bytes=None)
+        
+        for path in paths[:2]:
+            cache.put(path, os.stat(path), "sha256", path.name)
+        cache.get(paths[0], "sha256")  # "a" passa a ser a mais recente
+        cache.put(paths[2], os.stat(paths[2]), "sha256", "c")
+        
+        assert cache.get(paths[1], "sha256") is None
+        assert cache.get(paths[0], "sha256") == "a"
+        assert cache.get(paths[2], "sha256") == "c"
+        assert cache.evictions == 1
+        assert len(cache) == 2
+
+
+def test_memory_cap():
+    """O total aproximado em bytes nunca passa do limite."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "f"
+        path.write_text("x")
+        stat = os.stat(path)
+        cache = HashCache(max_entries=None, max_bytes=4096)
+        
+        for i in range(200):
+            cache.put(Path(tmpdir) / f"file_{i}", stat, "sha256", "0" * 64)
+        
+        assert cache.bytes_used <= 4096
+        assert 0 < len(cache) < 200
+        assert cache.evictions == 200 - len(cache)
+
+
+def test_default_limits_configurable():
+    """set_default_limits vale para os caches criados depois."""
+    try:
+        hash_cache.set_default_limits(max_entries=10, max_bytes=1234)
+        cache = IntegrityVerifier().hash_cache
+        assert (cache.max_entries, cache.max_bytes) == (10, 1234)
+    finally:
+        hash_cache.set_default_limits()
+    assert HashCache().max_bytes == hash_cache.DEFAULT_MAX_BYTES
+
+
+def test_verifier_rehashes_changed_file():
+    """calculate_hash não devolve hash antigo depois que o arquivo muda."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir) / "a.txt"
+        file_path.write_text("first")
+        verifier = IntegrityVerifier()
+        
+        first = verifier.calculate_hash(file_path)
+        assert verifier.calculate_hash(file_path) == first
+        
+        file_path.write_text("second")
+        later = time.time() + 5
+        os.utime(file_path, (later, later))
+        
+        assert verifier.calculate_hash(file_path) != first
+        assert verifier.hash_cache.hits == 1
+
+
+def test_verify_file_always_reads_destination(monkeypatch):
+    """verify_file relê o destino mesmo com a origem em cache."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "src"
+        dest = Path(tmpdir) / "dst"
+        source.write_text("data")
+        dest.write_text("data")
+        read = []
+        real = verifier_module.hash_file
+        monkeypatch.setattr(verifier_module, "hash_file",
+                            lambda path, *args, **kwargs: read.append(path) or real(path, *args, **kwargs))
+        verifier = IntegrityVerifier()
+        
+        assert verifier.verify_file(source, dest) == (True, None)
+        assert verifier.verify_file(source, dest) == (True, None)
+        
+        assert read == [source, dest, dest]
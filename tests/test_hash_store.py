@@ -0,0 +1,147 @@
+"""
+Testes para o módulo hash_store.
+"""
+
+import os
+import tempfile
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import core.verify_engine as verify_engine
+from core.verifier import IntegrityVerifier
+from core.verify_engine import VerifyEngine
+from database.hash_store import HashStore
+
+
+def _write_old(path: Path, data: bytes):
+    """Grava o arquivo com mtime no passado (fora da janela de escrita recente)."""
+    path.write_bytes(data)
+    past = time.time() - 60
+    os.utime(path, (past, past))
+
+
+def test_put_get_persists():
+    """Hashes sobrevivem ao fechamento do banco."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir) / "a.bin"
+        _write_old(file_path, b"abc")
+        db = Path(tmpdir) / "hashes.db"
+        
+        store = HashStore(db)
+        stat = os.stat(file_path)
+        store.put(stat, "sha256", "h1")
+        assert store.get(stat, "sha256") == "h1"  # pendente, ainda não gravado
+        store.close()
+        
+        store = HashStore(db)
+        assert store.get(os.stat(file_path), "sha256") == "h1"
+        assert store.get(os.stat(file_path), "md5") is None
+        assert store.count() == 1
+        store.close()
+
+
+def test_rewrite_invalidates():
+    """Mudança de tamanho ou mtime torna a entrada inválida e a substitui."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir) / "a.bin"
+        _write_old(file_path, b"abc")
+        store = HashStore(Path(tmpdir) / "hashes.db", batch_size=1)
+        store.put(os.stat(file_path), "sha256", "old")
+        
+        with open(file_path, 'r+b') as f:
+            f.write(b"xyz")
+        past = time.time() - 30
+        os.utime(file_path, (past, past))
+        
+        assert store.get(os.stat(file_path), "sha256") is None
+        store.put(os.stat(file_path), "sha256", "new")
+        assert store.get(os.stat(file_path), "sha256") == "new"
+        assert store.count() == 1
+        store.close()
+
+
+def test_recent_files_not_stored():
+    """Arquivos modificados agora não são gravados (escrita no mesmo tique do mtime)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir) / "a.bin"
+        file_path.write_bytes(b"abc")
+        store = HashStore(Path(tmpdir) / "hashes.db")
+        
+        store.put(os.stat(file_path), "sha256", "h")
+        
+        assert store.get(os.stat(file_path), "sha256") is None
+        store.close()
+
+
+def test_verifier_skips_unchanged_source(monkeypatch):
+    """Uma segunda verificação não relê a origem inalterada, mas sempre relê o destino."""
+    import core.verifier as verifier_module
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "src.bin"
+        dest = Path(tmpdir) / "dst.bin"
+        _write_old(source, b"payload")
+        _write_old(dest, b"payload")
+        db = Path(tmpdir) / "hashes.db"
+        read = []
+        real = verifier_module.hash_file
+        monkeypatch.setattr(verifier_module, "hash_file",
+                            lambda path, *args, **kwargs: read.append(path) or real(path, *args, **kwargs))
+        
+        for _ in range(2):
+            store = HashStore(db)
+            assert IntegrityVerifier(hash_store=store).verify_file(source, dest) == (True, None)
+            store.close()
+        
+        assert read == [source, dest, dest]
+
+
+def test_engine_repeat_verify_reads_only_destination(monkeypatch):
+    """VerifyEngine com hash_store: na repetição só o destino é lido."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        for base in ("src", "dst"):
+            (root / base).mkdir()
+            for name in ("a.bin", "b.bin"):
+                _write_old(root / base / name, name.encode() * 100)
+        db = root / "hashes.db"
+        read = []
+        real = verify_engine.hash_file
+        monkeypatch.setattr(verify_engine, "hash_file",
+                            lambda path, *args, **kwargs: read.append(Path(path).parent.name) or real(path, *args, **kwargs))
+        
+        store = HashStore(db)
+        first = VerifyEngine(root / "src", root / "dst", hash_store=store).verify()
+        store.close()
+        assert sorted(read) == ["dst", "dst", "src", "src"]
+        
+        read.clear()
+        store = HashStore(db)
+        second = VerifyEngine(root / "src", root / "dst", hash_store=store).verify()
+        assert store.hits == 2
+        store.close()
+        
+        assert first['verified'] == second['verified'] == 2
+        assert read == ["dst", "dst"]
+
+
+def test_engine_detects_corruption_with_store():
+    """Corrupção no destino é detectada mesmo com a origem vinda do cache."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "src").mkdir()
+        (root / "dst").mkdir()
+        _write_old(root / "src" / "a.bin", b"good")
+        _write_old(root / "dst" / "a.bin", b"good")
+        store = HashStore(root / "hashes.db")
+        VerifyEngine(root / "src", root / "dst", hash_store=store).verify()
+        
+        (root / "dst" / "a.bin").write_bytes(b"evil")
+        result = VerifyEngine(root / "src", root / "dst", hash_store=store).verify()
+        store.close()
+        
+        assert result['corrupted'] == 1
+        assert store.hits == 1
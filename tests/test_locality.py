@@ -0,0 +1,141 @@
+"""
+Testes para o módulo locality.
+"""
+
+import os
+import tempfile
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import locality
+from core.copier import FileCopier
+from core.locality import (first_physical_offset, is_rotational, iter_by_locality, locality_key, resolve_locality,
+                           sort_by_locality)
+from core.parallel_copier import ParallelFileCopier
+from core.verify_engine import VerifyEngine
+
+
+def _fake_sysfs(root: Path, path: Path, rotational: str) -> Path:
+    """Monta um /sys/dev/block falso: a partição aponta para o disco, que tem queue/rotational."""
+    dev = os.stat(path).st_dev
+    disk = root / "devices" / "sda"
+    (disk / "queue").mkdir(parents=True)
+    (disk / "queue" / "rotational").write_text(rotational + "\n")
+    (disk / "sda1").mkdir()
+    block = root / "dev" / "block"
+    block.mkdir(parents=True)
+    (block / f"{os.major(dev)}:{os.minor(dev)}").symlink_to(disk / "sda1")
+    return block
+
+
+def _make_tree(root: Path, count: int = 12) -> Path:
+    source = root / "src"
+    for i in range(count):
+        path = source / f"d{i % 3}" / f"f{(i * 7) % count:02d}.bin"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(bytes([i]) * (100 + i))
+    return source
+
+
+def _inode_order(paths):
+    return sorted(paths, key=lambda p: os.stat(p).st_ino)
+
+
+def test_rotational_detection(monkeypatch):
+    """Partições herdam o queue/rotational do disco; 'auto' desliga em SSD."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        monkeypatch.setattr(locality, "SYS_DEV_BLOCK", _fake_sysfs(root / "hdd", root, "1"))
+        assert is_rotational(root) is True
+        assert resolve_locality("auto", root) == "extent"
+
+        monkeypatch.setattr(locality, "SYS_DEV_BLOCK", _fake_sysfs(root / "ssd", root, "0"))
+        assert is_rotational(root) is False
+        assert resolve_locality("auto", root) == "off"
+        assert resolve_locality("inode", root) == "inode"
+
+        monkeypatch.setattr(locality, "SYS_DEV_BLOCK", root / "ausente")
+        assert is_rotational(root) is None
+        assert resolve_locality("auto", root) == "off"
+
+        try:
+            resolve_locality("cilindro", root)
+            assert False, "modo inválido deveria falhar"
+        except ValueError:
+            pass
+
+
+def test_sort_by_inode_and_window():
+    """A ordenação segue o inode; em streaming, cada janela é ordenada por si."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = _make_tree(Path(tmpdir))
+        files = sorted(source.rglob("*.bin"), reverse=True)
+
+        assert sort_by_locality(files, "inode") == _inode_order(files)
+        assert sort_by_locality(files, "off") == files
+
+        items = [(path, os.stat(path)) for path in files]
+        streamed = [path for path, _ in iter_by_locality(iter(items), "inode", window=5)]
+        expected = []
+        for start in range(0, len(files), 5):
+            expected += _inode_order(files[start:start + 5])
+        assert streamed == expected
+
+
+def test_extent_key_falls_back_to_inode():
+    """Sem extent conhecido (arquivo vazio), o arquivo vai depois dos demais, por inode."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        empty = Path(tmpdir) / "vazio"
+        empty.write_bytes(b"")
+        stat = os.stat(empty)
+
+        assert first_physical_offset(empty) is None
+        assert locality_key(empty, "extent") == (stat.st_dev, 1, stat.st_ino)
+        assert locality_key(empty, "inode") == (stat.st_dev, 0, stat.st_ino)
+
+
+def test_extent_offset_after_sync():
+    """Depois de gravados no disco, os dados têm offset físico (onde há FIEMAP)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "dados.bin"
+        path.write_bytes(b"x" * 65536)
+        os.sync()
+
+        offset = first_physical_offset(path)
+        if offset is None:
+            return  # sem FIEMAP (tmpfs, outros sistemas)
+        assert locality_key(path, "extent")[1:] == (0, offset)
+
+
+def test_copiers_and_engine_follow_locality():
+    """Cópia sequencial, cópia paralela e verificação seguem a ordem física pedida."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = _make_tree(Path(tmpdir))
+        expected = _inode_order(list(source.rglob("*.bin")))
+
+        copier = FileCopier(source, Path(tmpdir) / "seq", locality="inode")
+        stats = copier.copy_all()
+        assert stats['locality'] == "inode"
+        assert stats['copied_list'] == expected
+
+        started = []
+        parallel = ParallelFileCopier(source, Path(tmpdir) / "par", num_threads=1, locality="inode")
+        parallel.set_file_started_callback(lambda idx, total, source_file, size: started.append(source_file))
+        stats = parallel.copy_all()
+        assert stats['locality'] == "inode"
+        assert started == expected
+
+        engine = VerifyEngine(source, Path(tmpdir) / "seq", locality="inode")
+        assert [path for path, _ in engine.collect()] == expected
+        result = engine.verify()
+        assert result['verified'] == len(expected)
+        assert result['locality'] == "inode"
+
+        assert VerifyEngine(source, Path(tmpdir) / "seq").verify()['locality'] == "off"
+        try:
+            FileCopier(source, Path(tmpdir) / "x", locality="cilindro")
+            assert False, "modo inválido deveria falhar"
+        except ValueError:
+            pass
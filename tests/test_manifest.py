@@ -0,0 +1,229 @@
+"""
+Testes para o módulo manifest.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core.manifest import (ManifestReader, ManifestSink, ManifestVerifier, ManifestWriter, find_manifest,
+                           manifest_path_for, write_manifest_from_hashes)
+from core.parallel_copier import ParallelFileCopier
+from core.result_sink import ListSink
+from core.verify_engine import VerifyEngine
+
+
+FILES = {
+    "a.txt": b"alpha",
+    "sub/b.bin": b"b" * 10000,
+    "sub/with, comma.txt": b"comma",
+    "sub/back\\slash.txt": b"slash",
+    "sub/new\nline.txt": b"newline",
+    "vazio.txt": b"",
+}
+
+
+def _make_tree(root: Path) -> Path:
+    for name, data in FILES.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return root
+
+
+def _expected(manifest_format: str):
+    """Entradas representáveis no formato (hashdeep não aceita quebra de linha no nome)."""
+    if manifest_format == "hashdeep":
+        return {name: data for name, data in FILES.items() if "\n" not in name}
+    return FILES
+
+
+def _write(manifest_path: Path, manifest_format: str, algorithm: str = "sha256"):
+    with ManifestWriter(manifest_path, manifest_format, algorithm) as writer:
+        for name, data in FILES.items():
+            digest = hashlib.new(algorithm, data).hexdigest()
+            writer.add(name, digest, len(data))
+    assert writer.count == len(_expected(manifest_format))
+
+
+@pytest.mark.parametrize("manifest_format", ["sum", "hashdeep", "binary"])
+def test_roundtrip(manifest_format):
+    """O que é gravado é lido de volta (caminhos com vírgula, barra invertida e quebra de linha)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manifest = Path(tmpdir) / f"m.{manifest_format}"
+        _write(manifest, manifest_format)
+        
+        reader = ManifestReader(manifest)
+        entries = {entry.path: entry for entry in reader}
+        expected = _expected(manifest_format)
+        
+        assert reader.manifest_format == manifest_format
+        assert reader.algorithm == "sha256"
+        assert reader.count_entries() == len(expected)
+        assert set(entries) == set(expected)
+        for name, data in expected.items():
+            assert entries[name].hash == hashlib.sha256(data).hexdigest()
+            assert entries[name].size == (None if manifest_format == "sum" else len(data))
+
+
+def test_binary_is_compact():
+    """O formato binário é menor que o texto."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write(Path(tmpdir) / "m.sum", "sum")
+        _write(Path(tmpdir) / "m.bin", "binary")
+        assert (Path(tmpdir) / "m.bin").stat().st_size < (Path(tmpdir) / "m.sum").stat().st_size
+
+
+@pytest.mark.skipif(shutil.which("sha256sum") is None, reason="sha256sum indisponível")
+def test_sum_format_accepted_by_sha256sum():
+    """O manifesto 'sum' é aceito por sha256sum -c."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = _make_tree(Path(tmpdir) / "tree")
+        manifest = Path(tmpdir) / "tree.sha256"
+        _write(manifest, "sum")
+        
+        result = subprocess.run(["sha256sum", "-c", str(manifest)], cwd=root, capture_output=True)
+        
+        assert result.returncode == 0, result.stdout + result.stderr
+
+
+def test_reads_foreign_sum_manifest():
+    """Lê manifestos gerados por outras ferramentas (modo binário '*', algoritmo pelo comprimento)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manifest = Path(tmpdir) / "CHECKSUMS"
+        manifest.write_text(f"{hashlib.md5(b'x').hexdigest()} *dir/x.txt\r\n")
+        
+        reader = ManifestReader(manifest)
+        entries = list(reader)
+        
+        assert reader.algorithm == "md5"
+        assert entries[0].path == "dir/x.txt"
+        assert entries[0].hash == hashlib.md5(b"x").hexdigest()
+
+
+def test_reads_multi_hash_hashdeep():
+    """Manifesto hashdeep com várias colunas de hash."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manifest = Path(tmpdir) / "m.hashdeep"
+        manifest.write_text("%%%% HASHDEEP-1.0\n%%%% size,md5,sha256,filename\n## Invoked from: /x\n##\n"
+                            f"1,{hashlib.md5(b'x').hexdigest()},{hashlib.sha256(b'x').hexdigest()},a,b.txt\n")
+        
+        entries = list(ManifestReader(manifest))
+        assert (entries[0].path, entries[0].size, entries[0].hash) == ("a,b.txt", 1, hashlib.md5(b"x").hexdigest())
+        
+        entries = list(ManifestReader(manifest, algorithm="sha256"))
+        assert entries[0].hash == hashlib.sha256(b"x").hexdigest()
+
+
+@pytest.mark.parametrize("manifest_format", ["sum", "hashdeep", "binary"])
+def test_verify_against_manifest(manifest_format):
+    """Verifica o destino sem a origem: acusa conteúdo alterado, tamanho diferente e ausência."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dest = _make_tree(Path(tmpdir) / "dest")
+        manifest = manifest_path_for(dest, manifest_format, "sha256")
+        _write(manifest, manifest_format)
+        
+        result = ManifestVerifier(manifest, dest, num_workers=3).verify()
+        count = len(_expected(manifest_format))
+        assert (result['total'], result['verified'], result['corrupted']) == (count, count, 0)
+        
+        (dest / "a.txt").write_bytes(b"alphx")
+        (dest / "sub" / "b.bin").write_bytes(b"b" * 9999)
+        (dest / "vazio.txt").unlink()
+        result = ManifestVerifier(manifest, dest).verify()
+        
+        errors = {path.name: error for path, error in result['corrupted_list']}
+        assert result['corrupted'] == 3
+        assert result['missing'] == 1
+        assert errors["a.txt"] == "Hash diferente"
+        assert errors["vazio.txt"] == "Arquivo não encontrado no destino"
+        assert errors["b.bin"] == ("Hash diferente" if manifest_format == "sum" else
+                                   "Tamanho diferente: manifesto=10000, destino=9999")
+
+
+def test_verify_streams_large_manifest():
+    """Manifesto com muitas linhas: corrupted_list limitado, contagens exatas."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dest = Path(tmpdir) / "dest"
+        dest.mkdir()
+        (dest / "f").write_bytes(b"data")
+        manifest = Path(tmpdir) / "big.sha256"
+        with ManifestWriter(manifest, "sum") as writer:
+            writer.add("f", hashlib.sha256(b"data").hexdigest())
+            for i in range(5000):
+                writer.add(f"missing/{i}", "0" * 64)
+        
+        result = ManifestVerifier(manifest, dest, num_workers=2, max_failures_kept=10).verify()
+        
+        assert result['total'] == 5001
+        assert result['verified'] == 1
+        assert result['corrupted'] == result['missing'] == 5000
+        assert len(result['corrupted_list']) == 10
+
+
+def test_copy_writes_manifest_via_sink():
+    """A cópia paralela grava o manifesto com os hashes calculados na cópia."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = _make_tree(Path(tmpdir) / "src")
+        dest = Path(tmpdir) / "dst"
+        manifest = manifest_path_for(dest, "binary", "sha256")
+        sink = ManifestSink(manifest, dest, "binary", "sha256", inner=ListSink())
+        
+        stats = ParallelFileCopier(source, dest, num_threads=2, hash_algorithm="sha256",
+                                   result_sink=sink).copy_all()
+        sink.close()
+        
+        assert stats['copied_files'] == len(FILES)
+        assert len(stats['hashes']) == len(FILES)
+        assert find_manifest(dest) == manifest
+        assert ManifestVerifier(manifest, dest).verify()['verified'] == len(FILES)
+
+
+def test_manifest_from_hashes_and_verify_engine():
+    """Manifesto gravado a partir de hashes ou pela verificação completa."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = _make_tree(Path(tmpdir) / "src")
+        dest = _make_tree(Path(tmpdir) / "dst")
+        hashes = {source / name: hashlib.sha256(data).hexdigest() for name, data in FILES.items()}
+        
+        manifest = Path(tmpdir) / "from_hashes.hashdeep"
+        assert write_manifest_from_hashes(manifest, source, dest, hashes, "hashdeep") == len(FILES) - 1
+        assert ManifestVerifier(manifest, dest).verify()['verified'] == len(FILES) - 1
+        
+        manifest = Path(tmpdir) / "from_verify.sha256"
+        with ManifestWriter(manifest, "sum") as writer:
+            VerifyEngine(source, dest, manifest_writer=writer).verify()
+        assert writer.count == len(FILES)
+        assert ManifestVerifier(manifest, dest).verify()['verified'] == len(FILES)
+
+
+def test_verify_rejects_paths_outside_destination():
+    """Entradas absolutas, com '..' ou que escapam por link simbólico não são lidas nem reparadas."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        dest = _make_tree(root / "dest")
+        outside = root / "fora.txt"
+        outside.write_bytes(b"original")
+        (dest / "link").symlink_to(root, target_is_directory=True)
+        manifest = root / "m.sha256"
+        digest = hashlib.sha256(b"alpha").hexdigest()
+        with ManifestWriter(manifest, "sum") as writer:
+            writer.add("a.txt", digest)
+            writer.add("../fora.txt", digest)
+            writer.add(str(outside), digest)
+            writer.add("link/fora.txt", digest)
+        
+        result = ManifestVerifier(manifest, dest, repair_source=dest).verify()
+        
+        assert result['verified'] == 1
+        assert result['corrupted'] == 3
+        assert {error for _, error in result['corrupted_list']} == {"Caminho fora do destino no manifesto"}
+        assert outside.read_bytes() == b"original"
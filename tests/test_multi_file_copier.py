@@ -0,0 +1,77 @@
+"""
+Testes para o módulo multi_file_copier.
+"""
+
+import pytest
+from pathlib import Path
+import tempfile
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core.multi_file_copier import MultiFileCopier, plan_destinations
+
+
+def test_plan_destinations_renames_collisions():
+    """Testa que nomes repetidos na seleção recebem sufixo numerado."""
+    dest = Path("/destino")
+    files = [Path("/a/foto.jpg"), Path("/b/foto.jpg"), Path("/c/FOTO.jpg"), Path("/d/outro.txt")]
+    tasks, renamed = plan_destinations(files, dest)
+
+    assert [d for _, d in tasks] == [dest / "foto.jpg", dest / "foto (2).jpg",
+                                     dest / "FOTO (3).jpg", dest / "outro.txt"]
+    assert renamed == [(files[1], dest / "foto (2).jpg"), (files[2], dest / "FOTO (3).jpg")]
+
+
+def test_recopy_overwrites_and_reports_full_total():
+    """Testa que recopiar a seleção sobrescreve o destino e que o total é o da seleção."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        selected = []
+        for i in range(30):
+            source_file = root / f"arquivo{i}.txt"
+            source_file.write_text(f"conteudo {i}")
+            selected.append(source_file)
+        dest = root / "dest"
+
+        MultiFileCopier(selected, dest, num_threads=2).copy_all()
+        selected[0].write_text("alterado")
+        totals = []
+        copier = MultiFileCopier(selected, dest, num_threads=2)
+        copier.set_file_started_callback(lambda idx, total, *args: totals.append(total))
+        stats = copier.copy_all()
+
+        assert stats['renamed_list'] == []
+        assert len(list(dest.iterdir())) == 30
+        assert (dest / "arquivo0.txt").read_text() == "alterado"
+        assert totals and set(totals) == {30}
+
+
+def test_multi_file_copy_parallel():
+    """Testa a cópia de uma seleção com nomes repetidos e arquivo inexistente."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        selected = []
+        for i in range(20):
+            folder = root / f"pasta{i % 2}"
+            folder.mkdir(exist_ok=True)
+            source_file = folder / f"arquivo{i // 2}.txt"
+            source_file.write_text(f"conteudo {i}")
+            selected.append(source_file)
+        selected.append(root / "nao_existe.txt")
+        dest = root / "dest"
+
+        progress = []
+        copier = MultiFileCopier(selected, dest, hash_algorithm="sha256", num_threads=4)
+        copier.set_progress_callback(lambda *args: progress.append(args))
+        stats = copier.copy_all()
+
+        assert stats['total_files'] == 21
+        assert stats['copied_files'] == 20
+        assert stats['failed_files'] == 1
+        assert len(stats['renamed_list']) == 10
+        assert len(stats['hashes']) == 20
+        assert len(list(dest.iterdir())) == 20
+        for source_file, dest_file in stats['renamed_list']:
+            assert dest_file.read_text() == source_file.read_text()
+        assert {args[2] for args in progress} == set(selected[:20])
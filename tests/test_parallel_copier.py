@@ -0,0 +1,179 @@
+"""
+Testes para o módulo parallel_copier.
+"""
+
+import json
+import pytest
+from pathlib import Path
+import sqlite3
+import tempfile
+import threading
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core.parallel_copier import ParallelFileCopier
+from core.result_sink import CounterSink, JsonlSink, SqliteSink
+
+
+def _create_tree(root: Path, count: int = 12):
+    (root / "subdir").mkdir(parents=True)
+    for i in range(count):
+        (root / f"file{i}.txt").write_text(f"content {i}" * 50)
+    (root / "subdir" / "nested.txt").write_text("nested")
+
+
+@pytest.mark.parametrize("durability", ["none", "group"])
+def test_verify_behind_copy(durability):
+    """Testa a verificação em pipeline durante a cópia paralela."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        dest_dir = Path(tmpdir) / "dest"
+        _create_tree(source_dir)
+        
+        checked = []
+        copier = ParallelFileCopier(source_dir, dest_dir, num_threads=3, durability=durability,
+                                    hash_algorithm="sha256", verify=True, verify_backlog=4)
+        copier.durability.group_max_files = 5
+        copier.set_verify_callback(lambda done, total, f, ok: checked.append(ok))
+        stats = copier.copy_all()
+        
+        assert stats['copied_files'] == 13
+        assert stats['verified'] == 13
+        assert stats['corrupted'] == 0
+        assert len(checked) == 13 and all(checked)
+
+
+def test_verify_behind_copy_detects_corruption():
+    """Testa que um arquivo alterado após a cópia aparece no relatório final."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        dest_dir = Path(tmpdir) / "dest"
+        _create_tree(source_dir)
+        
+        class CorruptingCopier(ParallelFileCopier):
+            def _submit_verify(self, file_index, source_file, dest_file):
+                # Simula corrupção no destino logo após a cópia
+                if source_file.name == "file3.txt":
+                    with open(dest_file, 'ab') as f:
+                        f.write(b"lixo")
+                super()._submit_verify(file_index, source_file, dest_file)
+        
+        copier = CorruptingCopier(source_dir, dest_dir, num_threads=2,
+                                  hash_algorithm="sha256", verify=True)
+        stats = copier.copy_all()
+        
+        assert stats['verified'] == 12
+        assert stats['corrupted'] == 1
+        assert stats['corrupted_list'][0][0].name == "file3.txt"
+
+
+def test_fanout_to_multiple_destinations():
+    """Testa fan-out: uma leitura, vários destinos, com verificação contra o hash da origem."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        dest_a = Path(tmpdir) / "dest_a"
+        dest_b = Path(tmpdir) / "dest_b"
+        _create_tree(source_dir)
+        
+        finished = []
+        copier = ParallelFileCopier(source_dir, dest_a, num_threads=3, hash_algorithm="sha256",
+                                    extra_destinations=[dest_b], verify_destinations=True)
+        copier.set_destination_callback(lambda root, idx, total, f, ok: finished.append((root, ok)))
+        stats = copier.copy_all()
+        
+        assert stats['copied_files'] == 13
+        assert len(stats['hashes']) == 13
+        for root in (dest_a, dest_b):
+            assert stats['destinations'][str(root)]['copied_files'] == 13
+            assert (root / "subdir" / "nested.txt").read_text() == "nested"
+        assert len(finished) == 26 and all(ok for _, ok in finished)
+
+
+def test_fanout_isolates_destination_failure():
+    """Testa que a falha em um destino não afeta os demais."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        dest_ok = Path(tmpdir) / "dest_ok"
+        dest_bad = Path(tmpdir) / "dest_bad"
+        _create_tree(source_dir, count=3)
+        dest_bad.write_text("não é um diretório")
+        
+        copier = ParallelFileCopier(source_dir, dest_ok, num_threads=2, max_retries=1,
+                                    extra_destinations=[dest_bad])
+        stats = copier.copy_all()
+        
+        assert stats['destinations'][str(dest_ok)]['copied_files'] == 4
+        assert stats['destinations'][str(dest_bad)]['failed_files'] == 4
+        assert stats['failed_files'] == 4
+        assert (dest_ok / "file1.txt").exists()
+
+
+@pytest.mark.parametrize("sink_type", ["counter", "jsonl", "sqlite"])
+def test_streaming_result_sinks(sink_type):
+    """Testa fila limitada com destinos de resultado que não guardam listas em memória."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        dest_dir = Path(tmpdir) / "dest"
+        _create_tree(source_dir, count=40)
+        
+        if sink_type == "counter":
+            sink = CounterSink()
+        elif sink_type == "jsonl":
+            sink = JsonlSink(Path(tmpdir) / "results.jsonl")
+        else:
+            sink = SqliteSink(Path(tmpdir) / "results.db", batch_size=7)
+        
+        copier = ParallelFileCopier(source_dir, dest_dir, num_threads=3, hash_algorithm="sha256",
+                                    result_sink=sink, queue_size=2)
+        stats = copier.copy_all()
+        sink.close()
+        
+        assert stats['total_files'] == 41
+        assert stats['copied_files'] == 41
+        assert stats['copied_list'] == []
+        assert (dest_dir / "file39.txt").exists()
+        
+        if sink_type == "jsonl":
+            records = [json.loads(line) for line in (Path(tmpdir) / "results.jsonl").read_text().splitlines()]
+            assert len(records) == 41
+            assert all(r['status'] == 'copied' and len(r['hash']) == 64 for r in records)
+        elif sink_type == "sqlite":
+            connection = sqlite3.connect(str(Path(tmpdir) / "results.db"))
+            assert connection.execute("SELECT COUNT(*) FROM results WHERE status = 'copied'").fetchone()[0] == 41
+            connection.close()
+
+
+def test_cancel_does_not_hang():
+    """Testa que cancelar com a fila cheia encerra produtor e workers."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        _create_tree(source_dir, count=50)
+        
+        copier = ParallelFileCopier(source_dir, Path(tmpdir) / "dest", num_threads=1, queue_size=1)
+        copier.set_progress_callback(lambda *args: copier.cancel())
+        
+        thread = threading.Thread(target=copier.copy_all)
+        thread.start()
+        thread.join(timeout=10)
+        
+        assert not thread.is_alive()
+        assert copier.sink.copied_count < 51
+
+
+def test_file_started_callback_once_per_file():
+    """Testa que o motor avisa o início de cada arquivo uma única vez."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_dir = Path(tmpdir) / "source"
+        _create_tree(source_dir)
+        
+        started = []
+        copier = ParallelFileCopier(source_dir, Path(tmpdir) / "dest", num_threads=3)
+        copier.set_file_started_callback(lambda idx, total, f, size: started.append((f, size)))
+        stats = copier.copy_all()
+        
+        assert stats['copied_files'] == 13
+        assert len(started) == 13
+        assert {f for f, _ in started} == {f for f in source_dir.rglob('*') if f.is_file()}
+        assert all(size == f.stat().st_size for f, size in started)
+        assert len(copier._copiers) == 3
@@ -0,0 +1,221 @@
+"""
+Testes para o módulo tree_diff.
+"""
+
+import os
+import tempfile
+import threading
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import tree_diff
+from core.parallel_copier import ParallelFileCopier
+from core.tree_diff import TreeDiff, TreeMirror, iter_sorted_files
+from core.verify_engine import VerifyEngine
+
+
+def _write(root: Path, files: dict):
+    for name, data in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+
+def _make_pair(root: Path):
+    source = root / "src"
+    dest = root / "dst"
+    _write(source, {"a.txt": b"a", "same.txt": b"same", "sub/changed.bin": b"new content",
+                    "sub/deep/new.txt": b"new", "conflict": b"file in source"})
+    _write(dest, {"a.txt": b"a", "same.txt": b"same", "sub/changed.bin": b"old",
+                  "sub/extra.txt": b"extra", "gone/x/y.txt": b"y", "conflict/inner.txt": b"dir in dest"})
+    # Mesmo mtime nos inalterados (modo quick)
+    for name in ("a.txt", "same.txt"):
+        stat = (source / name).stat()
+        os.utime(dest / name, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return source, dest
+
+
+def test_sorted_walk_order():
+    """A varredura segue a ordem dos componentes do caminho, não a do texto."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        _write(root, {"a/z.txt": b"", "a.b": b"", "a-c/x": b"", "b": b""})
+
+        keys = [key for key, _ in iter_sorted_files(root)]
+
+        assert keys == [("a", "z.txt"), ("a-c", "x"), ("a.b",), ("b",)]
+        assert keys == sorted(keys)
+        assert list(iter_sorted_files(root / "missing")) == []
+
+
+def test_diff_statuses():
+    """Cada arquivo cai em uma situação; os excedentes do destino são 'removed'."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_pair(Path(tmpdir))
+
+        entries = {entry.path: entry for entry in TreeDiff(source, dest)}
+        statuses = {path: entry.status for path, entry in entries.items()}
+
+        assert statuses == {
+            "a.txt": "unchanged", "same.txt": "unchanged", "sub/changed.bin": "changed",
+            "sub/deep/new.txt": "added", "sub/extra.txt": "removed", "gone/x/y.txt": "removed",
+            "conflict": "added", "conflict/inner.txt": "removed",
+        }
+        assert entries["conflict"].conflict
+        assert not entries["sub/deep/new.txt"].conflict
+
+        summary = TreeDiff(source, dest).summarize()
+        assert (summary['added'], summary['removed'], summary['changed'], summary['unchanged']) == (2, 3, 1, 2)
+        assert summary['paths']['removed'] == ["conflict/inner.txt", "gone/x/y.txt", "sub/extra.txt"]
+        assert summary['bytes']['removed'] == len(b"extra") + len(b"y") + len(b"dir in dest")
+        assert "unchanged" not in summary['paths']
+
+
+def test_diff_hash_mode_ignores_mtime():
+    """No modo 'hash', conteúdo igual com mtime diferente é inalterado."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = Path(tmpdir) / "src", Path(tmpdir) / "dst"
+        _write(source, {"f": b"same"})
+        _write(dest, {"f": b"same"})
+        os.utime(dest / "f", ns=(0, 0))
+
+        assert TreeDiff(source, dest).summarize()['changed'] == 1
+        assert TreeDiff(source, dest, mode="hash").summarize()['unchanged'] == 1
+
+
+def test_mirror_copies_and_deletes(monkeypatch):
+    """O espelhamento deixa o destino igual à origem, com remoções em threads."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_pair(Path(tmpdir))
+        delete_threads = set()
+        real_delete = TreeMirror._delete
+
+        def spy_delete(self, dest_file):
+            delete_threads.add(threading.current_thread().name)
+            real_delete(self, dest_file)
+
+        monkeypatch.setattr(TreeMirror, "_delete", spy_delete)
+        mirror = TreeMirror(source, dest)
+        copier = ParallelFileCopier(source, dest, num_threads=2, tasks=mirror.copy_tasks())
+        stats = copier.copy_all()
+        result = mirror.finish()
+
+        assert stats['copied_files'] == 3
+        assert result['deleted'] == 3
+        assert result['failed'] == 0
+        assert (result['added'], result['changed'], result['unchanged']) == (2, 1, 2)
+        assert any(name.startswith("mirror-delete") for name in delete_threads)
+        assert not (dest / "gone").exists()
+        assert (dest / "conflict").read_bytes() == b"file in source"
+        assert TreeDiff(source, dest, mode="hash").summarize()['unchanged'] == 5
+        assert sorted(p.relative_to(dest).as_posix() for p in dest.rglob("*")) == \
+            sorted(p.relative_to(source).as_posix() for p in source.rglob("*"))
+
+
+def test_mirror_dry_run_touches_nothing():
+    """Em dry_run, só as contagens são produzidas."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_pair(Path(tmpdir))
+        before = sorted(p.relative_to(dest) for p in dest.rglob("*"))
+
+        mirror = TreeMirror(source, dest, dry_run=True)
+        assert list(mirror.copy_tasks()) == []
+        result = mirror.finish()
+
+        assert (result['added'], result['removed'], result['deleted']) == (2, 3, 0)
+        assert sorted(p.relative_to(dest) for p in dest.rglob("*")) == before
+
+
+def test_mirror_delete_backlog_is_bounded(monkeypatch):
+    """As remoções pendentes não passam do limite por worker."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = Path(tmpdir) / "src", Path(tmpdir) / "dst"
+        source.mkdir()
+        _write(dest, {f"extra/{i:03d}": b"x" for i in range(100)})
+        monkeypatch.setattr(tree_diff, "PENDING_PER_WORKER", 2)
+        peak = 0
+        real_submit = TreeMirror._submit_delete
+
+        def spy_submit(self, dest_file):
+            nonlocal peak
+            real_submit(self, dest_file)
+            peak = max(peak, len(self._pending))
+
+        monkeypatch.setattr(TreeMirror, "_submit_delete", spy_submit)
+        mirror = TreeMirror(source, dest, delete_workers=2)
+        list(mirror.copy_tasks())
+        result = mirror.finish()
+
+        assert 0 < peak <= 5
+        assert result['deleted'] == 100
+        assert not (dest / "extra").exists()
+
+
+def test_verify_engine_reports_extra_files():
+    """Com report_extra, a verificação relata arquivos que só existem no destino."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = Path(tmpdir) / "src", Path(tmpdir) / "dst"
+        _write(source, {"a": b"a"})
+        _write(dest, {"a": b"a", "sobra/b": b"b"})
+
+        result = VerifyEngine(source, dest, report_extra=True).verify()
+
+        assert result['verified'] == 1
+        assert result['extra'] == 1
+        assert result['extra_list'] == [dest / "sobra" / "b"]
+        assert 'extra' not in VerifyEngine(source, dest).verify()
+
+
+def test_mirror_keeps_destination_under_unreadable_source(monkeypatch):
+    """Um diretório da origem ilegível não é tratado como vazio: nada é removido abaixo dele."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = Path(tmpdir) / "s", Path(tmpdir) / "d"
+        _write(source, {"sub/f.txt": b"f", "z.txt": b"z"})
+        _write(dest, {"sub/f.txt": b"f", "sub/deep/g.txt": b"g", "extra.txt": b"x"})
+        real_scandir = os.scandir
+
+        def failing_scandir(path="."):
+            if isinstance(path, (str, os.PathLike)) and Path(path) == source / "sub":
+                raise PermissionError(13, "Permission denied", str(path))
+            return real_scandir(path)
+
+        monkeypatch.setattr(tree_diff.os, "scandir", failing_scandir)
+        statuses = {entry.path: entry.status for entry in TreeDiff(source, dest)}
+        assert statuses == {"extra.txt": "removed", "sub/deep/g.txt": "unknown",
+                            "sub/f.txt": "unknown", "z.txt": "added"}
+
+        mirror = TreeMirror(source, dest)
+        ParallelFileCopier(source, dest, num_threads=1, tasks=mirror.copy_tasks()).copy_all()
+        result = mirror.finish()
+
+        assert (result['removed'], result['deleted'], result['unknown']) == (1, 1, 2)
+        assert result['scan_errors'] == 1
+        assert result['scan_error_list'][0][0] == source / "sub"
+        assert (dest / "sub" / "f.txt").exists()
+        assert (dest / "sub" / "deep" / "g.txt").exists()
+        assert not (dest / "extra.txt").exists()
+
+
+def test_mirror_unreadable_source_root_deletes_nothing(monkeypatch):
+    """Se nem a raiz da origem pode ser listada, todo o destino fica como desconhecido."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = Path(tmpdir) / "s", Path(tmpdir) / "d"
+        source.mkdir()
+        _write(dest, {"a.txt": b"a", "sub/b.txt": b"b"})
+        real_scandir = os.scandir
+
+        def failing_scandir(path="."):
+            if isinstance(path, (str, os.PathLike)) and Path(path) == source:
+                raise OSError(5, "Input/output error", str(path))
+            return real_scandir(path)
+
+        monkeypatch.setattr(tree_diff.os, "scandir", failing_scandir)
+        mirror = TreeMirror(source, dest)
+        assert list(mirror.copy_tasks()) == []
+        result = mirror.finish()
+
+        assert (result['removed'], result['deleted'], result['unknown']) == (0, 0, 2)
+        assert result['scan_errors'] == 1
+        assert (dest / "a.txt").exists() and (dest / "sub" / "b.txt").exists()
@@ -2,6 +2,11 @@
 Testes para o módulo verifier.
 """
 
+import hashlib
+import io
+import os
+import shutil
+import threading
 import pytest
 from pathlib import Path
 import tempfile
@@ -9,6 +14,9 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+import core.digests as digests
+import core.verifier as verifier_module
+from core.digests import create_hasher, hash_file, sample_offsets, update_pipelined
 from core.verifier import IntegrityVerifier
 
 
@@ -59,3 +67,206 @@ def test_verify_different_files():
         assert is_valid is False
         assert error is not None
 
+
+
+def test_verify_with_known_source_hash():
+    """Testa verificação usando hash da origem já conhecido (sem reler a origem)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = Path(tmpdir) / "source.txt"
+        dest_file = Path(tmpdir) / "dest.txt"
+        dest_file.write_text("test content")
+        
+        verifier = IntegrityVerifier()
+        known_hash = IntegrityVerifier().calculate_hash(dest_file)
+        
+        # A origem nem existe: só o destino é lido
+        is_valid, error = verifier.verify_file(source_file, dest_file, source_hash=known_hash)
+        assert is_valid is True
+        assert error is None
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"chunk_size": 1},
+    {"chunk_size": 4096},
+    {"chunk_size": 1024 * 1024},
+    {"use_mmap": True},
+])
+def test_hash_file_strategies_match(kwargs):
+    """Todas as estratégias de leitura produzem o mesmo hash."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        test_file = Path(tmpdir) / "data.bin"
+        test_file.write_bytes(data)
+        
+        assert hash_file(test_file, "sha256", **kwargs) == hashlib.sha256(data).hexdigest()
+        assert hash_file(test_file, "crc32", **kwargs) == IntegrityVerifier("crc32").calculate_hash(test_file)
+
+
+def test_hash_file_empty_with_mmap():
+    """Arquivos vazios (fora da faixa do mmap) usam a leitura normal."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_file = Path(tmpdir) / "empty.bin"
+        test_file.write_bytes(b"")
+        
+        assert hash_file(test_file, "sha256", use_mmap=True) == hashlib.sha256(b"").hexdigest()
+
+
+def test_verifier_honors_chunk_size(monkeypatch):
+    """O chunk_size do verificador (vindo de Config) é repassado à leitura."""
+    calls = []
+    real_hash_file = verifier_module.hash_file
+    
+    def spy(file_path, algorithm, chunk_size=None, **kwargs):
+        calls.append(chunk_size)
+        return real_hash_file(file_path, algorithm, chunk_size=chunk_size, **kwargs)
+    
+    monkeypatch.setattr(verifier_module, "hash_file", spy)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_file = Path(tmpdir) / "test.txt"
+        test_file.write_text("test content")
+        
+        IntegrityVerifier(chunk_size=65536).calculate_hash(test_file)
+        assert calls == [65536]
+
+
+@pytest.mark.parametrize("chunk_size,depth", [(1, 2), (4096, 2), (65536, 4), (1024 * 1024, 8)])
+def test_pipelined_hash_matches(chunk_size, depth):
+    """O hash em pipeline é idêntico ao sequencial."""
+    data = bytes(range(256)) * 1000 + b"tail"
+    hasher = create_hasher("sha256")
+    
+    assert update_pipelined(hasher, io.BytesIO(data), chunk_size, depth) == len(data)
+    assert hasher.hexdigest() == hashlib.sha256(data).hexdigest()
+
+
+def test_pipelined_hash_propagates_read_error():
+    """Erro de leitura na thread leitora chega à chamadora e a thread termina."""
+    class Failing:
+        def __init__(self):
+            self.calls = 0
+        
+        def readinto(self, buffer):
+            self.calls += 1
+            if self.calls > 3:
+                raise OSError("falha de leitura")
+            buffer[:4] = b"abcd"
+            return 4
+    
+    with pytest.raises(OSError, match="falha de leitura"):
+        update_pipelined(create_hasher("sha256"), Failing(), 4, 2)
+    assert not any(t.name == "hash-read-ahead" for t in threading.enumerate())
+
+
+def test_hash_file_uses_pipeline_for_large_files(monkeypatch):
+    """Com read_ahead, arquivos a partir de PIPELINE_MIN_SIZE passam pelo pipeline."""
+    calls = []
+    real = digests.update_pipelined
+    monkeypatch.setattr(digests, "PIPELINE_MIN_SIZE", 1024)
+    monkeypatch.setattr(digests, "update_pipelined",
+                        lambda *args: calls.append(args[3]) or real(*args))
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        small = Path(tmpdir) / "small.bin"
+        large = Path(tmpdir) / "large.bin"
+        small.write_bytes(b"x" * 100)
+        data = os.urandom(100000)
+        large.write_bytes(data)
+        
+        verifier = IntegrityVerifier(chunk_size=4096, read_ahead=3)
+        assert verifier.calculate_hash(large) == hashlib.sha256(data).hexdigest()
+        assert verifier.calculate_hash(small) == hashlib.sha256(b"x" * 100).hexdigest()
+        assert calls == [3]
+
+
+def test_sample_offsets_deterministic():
+    """Mesmo tamanho e semente escolhem os mesmos blocos; arquivo pequeno não é amostrado."""
+    size = 10 * 1024 * 1024 + 123
+    offsets = sample_offsets(size, blocks=8, block_size=65536, seed=7)
+    
+    assert offsets == sample_offsets(size, blocks=8, block_size=65536, seed=7)
+    assert offsets != sample_offsets(size, blocks=8, block_size=65536, seed=8)
+    assert len(offsets) == 10
+    assert offsets[0] == 0 and offsets[-1] == size - 65536
+    assert offsets == sorted(offsets)
+    assert sample_offsets(5 * 65536, blocks=8, block_size=65536) is None
+    
+    # Arquivos de mesmo tamanho com caminhos diferentes amostram regiões diferentes
+    first = sample_offsets(size, blocks=8, block_size=65536, seed=7, key="a/um.bin")
+    assert first == sample_offsets(size, blocks=8, block_size=65536, seed=7, key="a/um.bin")
+    assert first != sample_offsets(size, blocks=8, block_size=65536, seed=7, key="a/dois.bin")
+
+
+def _write_pair(tmpdir, data):
+    source = Path(tmpdir) / "src.bin"
+    dest = Path(tmpdir) / "dst.bin"
+    source.write_bytes(data)
+    dest.write_bytes(data)
+    shutil.copystat(source, dest)
+    return source, dest
+
+
+def test_levels_on_identical_files():
+    """Arquivos idênticos passam nos três níveis; nível 'sample' informa se leu tudo."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _write_pair(tmpdir, os.urandom(2 * 1024 * 1024))
+        verifier = IntegrityVerifier(sample_blocks=4, sample_block_size=4096)
+        
+        assert verifier.check_file(source, dest, level="metadata") == (True, None, "metadata")
+        assert verifier.check_file(source, dest, level="sample") == (True, None, "sample")
+        assert verifier.check_file(source, dest, level="full") == (True, None, "full")
+        
+        small_source, small_dest = Path(tmpdir) / "a", Path(tmpdir) / "b"
+        small_source.write_bytes(b"tiny")
+        small_dest.write_bytes(b"tiny")
+        assert verifier.check_file(small_source, small_dest, level="sample") == (True, None, "full")
+
+
+def test_levels_detection_power():
+    """Metadados não veem troca de conteúdo; amostra vê blocos amostrados; completo vê tudo."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        block = 4096
+        data = bytearray(os.urandom(64 * block))
+        source, dest = _write_pair(tmpdir, bytes(data))
+        verifier = IntegrityVerifier(sample_blocks=4, sample_block_size=block, sample_seed=1)
+        
+        offsets = sample_offsets(len(data), 4, block, 1, key=source.name)
+        sampled = offsets[2]
+        unsampled = next(i * block for i in range(64) if i * block not in offsets)
+        
+        def corrupt(offset):
+            changed = bytearray(data)
+            changed[offset] ^= 0xFF
+            stat = os.stat(dest)
+            dest.write_bytes(bytes(changed))
+            os.utime(dest, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        
+        corrupt(unsampled)
+        assert verifier.check_file(source, dest, level="metadata")[0] is True
+        assert verifier.check_file(source, dest, level="sample")[0] is True
+        assert verifier.check_file(source, dest, level="full")[0] is False
+        
+        corrupt(sampled)
+        ok, error, level = verifier.check_file(source, dest, level="sample")
+        assert (ok, level) == (False, "sample")
+        assert "amostrados" in error
+
+
+def test_metadata_level_detects_size_and_mtime():
+    """Nível 'metadata' compara tamanho e mtime."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _write_pair(tmpdir, b"12345")
+        verifier = IntegrityVerifier(level="metadata")
+        
+        os.utime(dest, ns=(0, os.stat(source).st_mtime_ns + 10**9))
+        assert verifier.verify_file(source, dest) == (False, "Data de modificação diferente")
+        assert IntegrityVerifier(level="metadata", mtime_window_ns=2 * 10**9).verify_file(source, dest)[0]
+        
+        dest.write_bytes(b"123")
+        assert not verifier.verify_file(source, dest)[0]
+
+
+def test_invalid_level():
+    """Nível desconhecido é rejeitado."""
+    with pytest.raises(ValueError):
+        IntegrityVerifier(level="quick")
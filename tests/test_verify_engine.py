@@ -0,0 +1,170 @@
+"""
+Testes para o módulo verify_engine.
+"""
+
+import hashlib
+import shutil
+import tempfile
+import threading
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import core.verify_engine as verify_engine
+from core.verify_engine import VerifyEngine
+
+
+def _make_tree(root: Path):
+    """Cria origem e destino idênticos com arquivos de tamanhos variados."""
+    source = root / "src"
+    dest = root / "dst"
+    for base in (source, dest):
+        (base / "sub").mkdir(parents=True)
+        (base / "small.txt").write_bytes(b"a" * 10)
+        (base / "sub" / "medium.bin").write_bytes(b"b" * 5000)
+        (base / "sub" / "large.bin").write_bytes(b"c" * 200000)
+    return source, dest
+
+
+def test_verify_tree_ok():
+    """Árvores idênticas: todos verificados, resultado no formato do VerifyWorker."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_tree(Path(tmpdir))
+        
+        result = VerifyEngine(source, dest, num_workers=3).verify()
+        
+        base = {key: result[key] for key in ('total', 'algorithm', 'verified', 'corrupted', 'corrupted_list')}
+        assert base == {'total': 3, 'algorithm': 'sha256', 'verified': 3,
+                        'corrupted': 0, 'corrupted_list': []}
+        assert result['level'] == 'full'
+        assert result['levels'] == {'metadata': 0, 'sample': 0, 'full': 3}
+
+
+def test_verify_detects_mismatch_and_missing():
+    """Conteúdo divergente e arquivo ausente aparecem em corrupted_list."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_tree(Path(tmpdir))
+        (dest / "sub" / "medium.bin").write_bytes(b"x" * 5000)
+        (dest / "small.txt").unlink()
+        
+        result = VerifyEngine(source, dest).verify()
+        
+        assert result['verified'] == 1
+        assert result['corrupted'] == 2
+        assert dict(result['corrupted_list']) == {
+            source / "sub" / "medium.bin": "Hash diferente",
+            source / "small.txt": "Arquivo não encontrado no destino",
+        }
+
+
+def test_largest_first_and_aggregated_progress():
+    """Arquivos agendados do maior para o menor; progresso agrega arquivos e bytes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_tree(Path(tmpdir))
+        events = []
+        
+        engine = VerifyEngine(source, dest, num_workers=1, progress_callback=lambda *args: events.append(args))
+        engine.verify()
+        
+        assert [Path(e[4]).name for e in events] == ["large.bin", "medium.bin", "small.txt"]
+        assert [e[0] for e in events] == [1, 2, 3]
+        assert all(e[1] == 3 and e[3] == 205010 for e in events)
+        assert events[-1][2] == 205010
+
+
+def test_known_hashes_skip_source():
+    """Com o hash da origem conhecido, apenas o destino é lido."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_tree(Path(tmpdir))
+        large = source / "sub" / "large.bin"
+        known = {large: hashlib.sha256(b"c" * 200000).hexdigest()}
+        read = []
+        real_hash = VerifyEngine._hash
+        
+        class Spy(VerifyEngine):
+            def _hash(self, file_path):
+                read.append(file_path)
+                return real_hash(self, file_path)
+        
+        result = Spy(source, dest, known_hashes=known).verify()
+        
+        assert result['verified'] == 3
+        assert large not in read
+        assert dest / "sub" / "large.bin" in read
+
+
+def test_source_and_dest_hashed_concurrently(monkeypatch):
+    """Origem e destino de um mesmo arquivo são hasheados ao mesmo tempo."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "src").mkdir()
+        (root / "dst").mkdir()
+        (root / "src" / "f.bin").write_bytes(b"data")
+        (root / "dst" / "f.bin").write_bytes(b"data")
+        
+        active = []
+        peak = [0]
+        lock = threading.Lock()
+        real_hash_file = verify_engine.hash_file
+        
+        def slow_hash_file(*args, **kwargs):
+            with lock:
+                active.append(1)
+                peak[0] = max(peak[0], len(active))
+            time.sleep(0.2)
+            with lock:
+                active.pop()
+            return real_hash_file(*args, **kwargs)
+        
+        monkeypatch.setattr(verify_engine, "hash_file", slow_hash_file)
+        result = VerifyEngine(root / "src", root / "dst", num_workers=1).verify()
+        
+        assert result['verified'] == 1
+        assert peak[0] == 2
+
+
+def test_single_file_source():
+    """Origem pode ser um único arquivo."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "a.txt"
+        dest = Path(tmpdir) / "b.txt"
+        source.write_text("same")
+        dest.write_text("same")
+        
+        result = VerifyEngine(source, dest).verify()
+        
+        assert result['total'] == 1
+        assert result['verified'] == 1
+
+
+def test_engine_reports_level_per_file():
+    """No nível 'sample', arquivos grandes são amostrados e pequenos lidos inteiros."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_tree(Path(tmpdir))
+        
+        result = VerifyEngine(source, dest, level="sample", sample_blocks=2, sample_block_size=4096).verify()
+        
+        assert result['verified'] == 3
+        assert result['level'] == 'sample'
+        assert result['levels'] == {'metadata': 0, 'sample': 1, 'full': 2}
+        assert result['file_levels'][source / "sub" / "large.bin"] == 'sample'
+        assert result['file_levels'][source / "small.txt"] == 'full'
+
+
+def test_engine_metadata_level():
+    """Nível 'metadata' não lê conteúdo e acusa tamanho diferente."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source, dest = _make_tree(Path(tmpdir))
+        (dest / "small.txt").write_bytes(b"a" * 11)
+        for path in source.rglob("*"):
+            if path.is_file() and path.name != "small.txt":
+                shutil.copystat(path, dest / path.relative_to(source))
+        
+        result = VerifyEngine(source, dest, level="metadata").verify()
+        
+        assert result['levels']['metadata'] == 3
+        assert result['verified'] == 2
+        assert result['corrupted_list'][0][0] == source / "small.txt"
+        assert result['corrupted_list'][0][1].startswith("Tamanho diferente")